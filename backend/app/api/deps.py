@@ -0,0 +1,70 @@
+import hmac
+from typing import Optional
+
+from fastapi import Depends, Header, HTTPException, status
+from fastapi.security import OAuth2PasswordBearer
+from jose import JWTError
+
+from ..core.config import settings
+from ..core.security import decode_access_token, forget_access_token, password_fingerprint
+from ..schemas.token import TokenPayload
+from ..schemas.user import UserInDB
+from ..services.usage.ledger import set_usage_user
+from ..services.user.user_service import UserService
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
+
+_credentials_exception = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> UserInDB:
+    """
+    Resolves the user for a bearer token.
+
+    Token verification and the user lookup are both served from in-process
+    caches on the hot path, so an authenticated request normally costs no
+    signature check and no database query. Tokens issued before a password
+    change no longer match the user's ``pwd`` fingerprint and are rejected,
+    and a rejected token's cached claims are dropped.
+    """
+    try:
+        payload = TokenPayload(**decode_access_token(token))
+    except (JWTError, ValueError):
+        raise _credentials_exception
+    if payload.sub is None:
+        raise _credentials_exception
+
+    user = await UserService().get_cached_by_email(payload.sub)
+    if user is None or not hmac.compare_digest(
+        payload.pwd or "", password_fingerprint(user.hashed_password)
+    ):
+        forget_access_token(token)
+        raise _credentials_exception
+    set_usage_user(str(user.id))
+    return user
+
+
+async def get_current_active_user(
+    current_user: UserInDB = Depends(get_current_user),
+) -> UserInDB:
+    """Rejects requests from deactivated accounts."""
+    if not current_user.is_active:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user")
+    return current_user
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """
+    Guards operator endpoints with the ADMIN_API_TOKEN shared secret.
+
+    The admin API answers 404 when no token is configured, so it is not
+    discoverable on deployments that do not use it.
+    """
+    if not settings.ADMIN_API_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, settings.ADMIN_API_TOKEN):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin token")
@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from typing import Any, List, Optional
+from uuid import UUID
+
+from ..deps import require_admin
+from ...db.session import get_db
+from ...core.profiling import (
+    clear_profiling_toggle,
+    create_profile_token,
+    get_profiling_toggle,
+    list_profiles,
+    profile_path,
+    set_profiling_toggle,
+)
+from ...schemas.profiling import (
+    ProfileInfo,
+    ProfileToken,
+    ProfileTokenRequest,
+    ProfilingToggle,
+    ProfilingToggleRequest,
+)
+from ...schemas.usage import FeatureUsage
+from ...services.usage.usage_service import UsageService
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+@router.get("/profiles", response_model=List[ProfileInfo])
+async def get_profiles() -> Any:
+    """
+    List stored request profiles on this host, newest first.
+    """
+    return await run_in_threadpool(list_profiles)
+
+
+@router.get("/profiles/{name}")
+async def download_profile(name: str) -> FileResponse:
+    """
+    Download a profile (speedscope JSON or collapsed stacks).
+    """
+    path = profile_path(name)
+    if path is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    media_type = "text/plain" if name.endswith(".collapsed") else "application/json"
+    return FileResponse(path, media_type=media_type, filename=name)
+
+
+@router.get("/profiling", response_model=Optional[ProfilingToggle])
+async def get_profiling() -> Any:
+    """
+    Show the active profiling toggle, if any.
+    """
+    return get_profiling_toggle()
+
+
+@router.put("/profiling", response_model=ProfilingToggle)
+async def enable_profiling(toggle_in: ProfilingToggleRequest) -> Any:
+    """
+    Profile the next requests under a path prefix on every worker of this host.
+    """
+    return set_profiling_toggle(toggle_in.path_prefix, toggle_in.minutes, toggle_in.max_profiles)
+
+
+@router.delete("/profiling", status_code=status.HTTP_204_NO_CONTENT)
+async def disable_profiling() -> None:
+    """
+    Turn the profiling toggle off.
+    """
+    clear_profiling_toggle()
+
+
+@router.post("/profiling/token", response_model=ProfileToken)
+async def create_profiling_token(token_in: ProfileTokenRequest) -> Any:
+    """
+    Mint a signed X-Profile-Request header value that profiles any request
+    carrying it, on any host sharing the signing key.
+    """
+    return ProfileToken(value=create_profile_token(token_in.minutes), expires_in_minutes=token_in.minutes)
+
+
+@router.get("/usage", response_model=List[FeatureUsage])
+def get_feature_usage(
+    hours: int = Query(24, ge=1, le=24 * 90),
+    user_id: Optional[UUID] = None,
+    db: Session = Depends(get_db),
+) -> Any:
+    """
+    Show AI provider usage per route or background feature and model, costliest first.
+    """
+    since = datetime.now(timezone.utc) - timedelta(hours=hours)
+    return UsageService(db).feature_usage(since, user_id=str(user_id) if user_id else None)
@@ -3,7 +3,7 @@ from fastapi.security import OAuth2PasswordRequestForm
 from datetime import timedelta
 from typing import Any
 
-from ...core.security import create_access_token
+from ...core.security import create_access_token, password_fingerprint
 from ...core.config import settings
 from ...schemas.token import Token
 from ...schemas.user import UserCreate, User
@@ -46,6 +46,7 @@ async def login_for_access_token(
     
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+        data={"sub": user.email, "pwd": password_fingerprint(user.hashed_password)},
+        expires_delta=access_token_expires,
     )
     return {"access_token": token, "token_type": "bearer"}
\ No newline at end of file
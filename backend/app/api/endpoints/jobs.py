@@ -0,0 +1,122 @@
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, UploadFile
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from typing import Dict, Any, Optional
+from pydantic import BaseModel, Field, model_validator
+import io
+
+from ...core.config import settings
+from ...core.rate_limit import limiter, user_or_remote_address
+from ...db.session import get_db
+from ..deps import get_current_active_user, require_admin
+from ...schemas.job import IngestionReport, JobPosting
+from ...schemas.user import UserInDB
+from ...schemas.pagination import Page
+from ...services.ai.ai_evaluator import JobEvaluator
+from ...services.jobs.ingestion import PostingIngestor, detect_format, read_records
+from ...services.jobs.job_service import JobService
+from ...services.usage.ledger import UsageLimitExceeded
+
+router = APIRouter()
+
+class JobMatchRequest(BaseModel):
+    your_background: str = Field(..., min_length=50, max_length=settings.MAX_RESUME_LENGTH)
+    top_k: int = Field(default=settings.VECTOR_TOP_K, ge=1, le=50)
+    ai_provider: str = Field(default="openai", pattern="^(openai|anthropic)$")
+    evaluate: bool = True
+
+    @model_validator(mode="after")
+    def cap_evaluations(self) -> "JobMatchRequest":
+        """Each evaluated posting is a paid provider call; keep the fan-out small."""
+        if self.evaluate and self.top_k > settings.MATCH_EVALUATE_MAX_TOP_K:
+            raise ValueError(
+                f"top_k may be at most {settings.MATCH_EVALUATE_MAX_TOP_K} when evaluate is true"
+            )
+        return self
+
+@router.get("", response_model=Page[JobPosting])
+def list_job_postings(
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    company: Optional[str] = None,
+    db: Session = Depends(get_db),
+) -> Any:
+    """
+    List active job postings, newest first, using cursor pagination.
+    """
+    try:
+        items, next_cursor = JobService(db).list_postings(cursor=cursor, limit=limit, company=company)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": items, "next_cursor": next_cursor}
+
+@router.post("/ingest", response_model=IngestionReport, dependencies=[Depends(require_admin)])
+async def ingest_job_postings(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, pattern="^(csv|jsonl)$"),
+) -> Any:
+    """
+    Bulk-ingest a CSV or JSONL feed of job postings. Operators only.
+
+    The upload is streamed through normalisation, COPY and a set-based upsert
+    in a worker thread. Postings are matched on their source id or URL;
+    changed ones are updated in place and unchanged ones are skipped.
+    """
+    fmt = format or detect_format(file.filename)
+    stream = io.TextIOWrapper(file.file, encoding="utf-8", newline="")
+    try:
+        return await run_in_threadpool(PostingIngestor().ingest, read_records(stream, fmt))
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Feed must be UTF-8 encoded")
+    finally:
+        stream.detach()
+
+@router.post("/match")
+@limiter.limit(settings.MATCH_RATE_LIMIT, key_func=user_or_remote_address)
+async def match_jobs(
+    request: Request,
+    match_request: JobMatchRequest,
+    db: Session = Depends(get_db),
+    current_user: UserInDB = Depends(get_current_active_user),
+) -> Dict[str, Any]:
+    """
+    Ranks job postings against a background and evaluates the best matches.
+
+    Only the top-K postings from the local vector index are sent to the AI
+    provider; set ``evaluate`` to false to get the similarity ranking alone.
+    Provider usage is billed to the caller and counts against their token
+    limits. Postings whose evaluation failed are left out of the result.
+    """
+    evaluator = JobEvaluator()
+
+    try:
+        if not match_request.evaluate:
+            ranked = await run_in_threadpool(
+                evaluator.rank_jobs, match_request.your_background, match_request.top_k
+            )
+            return {
+                "matches": [
+                    {"job_posting_id": job_id, "similarity": score}
+                    for job_id, score in ranked
+                ]
+            }
+
+        results = await evaluator.evaluate_top_jobs(
+            match_request.your_background,
+            JobService(db).get_descriptions,
+            top_k=match_request.top_k,
+            ai_provider=match_request.ai_provider,
+        )
+        return {
+            "matches": [
+                {"job_posting_id": job_id, "similarity": score, "evaluation": evaluation}
+                for job_id, score, evaluation in results
+            ]
+        }
+
+    except UsageLimitExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Job matching failed: {str(e)}")
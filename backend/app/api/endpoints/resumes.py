@@ -0,0 +1,110 @@
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Request, Response, UploadFile, status
+from fastapi.routing import APIRoute
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from typing import Any, Callable, Coroutine, Optional
+import os
+
+from ...core.config import settings
+from ...db.session import get_db
+from ..deps import get_current_active_user
+from ...schemas.resume import Resume
+from ...schemas.user import UserInDB
+from ...services.resume.extraction import (
+    ResumeExtractor,
+    UploadTooLargeError,
+    detect_kind,
+    save_stream,
+)
+from ...services.user.resume_service import ResumeService
+
+# Multipart boundaries, headers and form fields sent along with the file
+_MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadLimitRoute(APIRoute):
+    """
+    Rejects request bodies over RESUME_MAX_UPLOAD_BYTES before they are parsed.
+
+    FastAPI spools the whole multipart body before the endpoint runs, so the
+    cap in ``save_stream`` alone would only apply after an oversized upload
+    had been received. A declared Content-Length over the cap is refused
+    up front; chunked bodies are counted as they arrive.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+
+        async def limited_handler(request: Request) -> Response:
+            limit = settings.RESUME_MAX_UPLOAD_BYTES + _MULTIPART_OVERHEAD_BYTES
+            too_large = HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Resume exceeds the {settings.RESUME_MAX_UPLOAD_BYTES // (1024 * 1024)} MB upload limit",
+            )
+            length = request.headers.get("content-length", "")
+            if length.isdigit() and int(length) > limit:
+                raise too_large
+
+            receive = request.receive
+            received = 0
+
+            async def limited_receive():
+                nonlocal received
+                message = await receive()
+                if message["type"] == "http.request":
+                    received += len(message.get("body", b""))
+                    if received > limit:
+                        raise too_large
+                return message
+
+            return await handler(Request(request.scope, limited_receive))
+
+        return limited_handler
+
+
+router = APIRouter(route_class=UploadLimitRoute)
+
+@router.post("/upload", response_model=Resume, status_code=status.HTTP_201_CREATED)
+async def upload_resume(
+    file: UploadFile = File(...),
+    title: Optional[str] = Form(None),
+    is_default: bool = Form(False),
+    current_user: UserInDB = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+) -> Any:
+    """
+    Upload a PDF, DOCX or TXT resume and store its extracted text.
+
+    The body is streamed to disk with a size cap, and text extraction runs in
+    a separate process pool, cached by file hash. Skills found in the text
+    fill the user's profile.
+    """
+    try:
+        path, file_hash, _ = await run_in_threadpool(
+            save_stream, file.file, settings.RESUME_UPLOAD_DIR, settings.RESUME_MAX_UPLOAD_BYTES
+        )
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+
+    try:
+        with open(path, "rb") as f:
+            head = f.read(8)
+        kind = detect_kind(file.filename, head)
+        content = await ResumeExtractor().extract(path, kind, file_hash)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+
+    if not content:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="No text could be extracted from the uploaded resume",
+        )
+
+    return await run_in_threadpool(
+        ResumeService(db).create,
+        str(current_user.id),
+        title or os.path.splitext(file.filename or "Resume")[0][:255],
+        content,
+        file_url=file_hash,  # storage key under RESUME_UPLOAD_DIR
+        is_default=is_default,
+    )
@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import Any, List, Optional
+from uuid import UUID
+
+from ...db.session import get_db
+from ..deps import get_current_active_user
+from ...schemas.analysis import AnalysisRecord
+from ...schemas.application import UserApplication
+from ...schemas.pagination import Page
+from ...schemas.recommendation import Recommendation
+from ...schemas.stats import DashboardStats
+from ...schemas.usage import UsageBucket
+from ...schemas.user import User, UserInDB, UserUpdate
+from ...services.ai.analysis_history_service import AnalysisHistoryService
+from ...services.ai.precompute_service import recommendations_cache
+from ...services.stats.stats_service import StatsService
+from ...services.usage.usage_service import UsageService
+from ...services.user.application_service import ApplicationService
+from ...services.user.user_service import UserService
+
+router = APIRouter()
+
+@router.get("/me", response_model=User)
+async def read_current_user(
+    current_user: UserInDB = Depends(get_current_active_user),
+) -> Any:
+    """
+    Get the authenticated user.
+    """
+    return current_user
+
+@router.patch("/me", response_model=User)
+async def update_current_user(
+    user_in: UserUpdate,
+    current_user: UserInDB = Depends(get_current_active_user),
+) -> Any:
+    """
+    Update the authenticated user's name or password.
+    """
+    return await UserService().update(current_user, user_in)
+
+@router.get("/me/applications", response_model=Page[UserApplication])
+def list_applications(
+    status: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    current_user: UserInDB = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+) -> Any:
+    """
+    List the user's applications, newest first, optionally filtered by status.
+    """
+    try:
+        items, next_cursor = ApplicationService(db).list_applications(
+            str(current_user.id), status=status, cursor=cursor, limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": items, "next_cursor": next_cursor}
+
+@router.get("/me/analyses", response_model=Page[AnalysisRecord])
+def list_analyses(
+    job_posting_id: Optional[UUID] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    current_user: UserInDB = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+) -> Any:
+    """
+    List the user's past AI analyses, newest first, optionally for a single job.
+    """
+    try:
+        items, next_cursor = AnalysisHistoryService(db).list_analyses(
+            str(current_user.id),
+            job_posting_id=str(job_posting_id) if job_posting_id else None,
+            cursor=cursor,
+            limit=limit,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": items, "next_cursor": next_cursor}
+
+@router.get("/me/dashboard", response_model=DashboardStats)
+def get_dashboard_stats(
+    current_user: UserInDB = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+) -> Any:
+    """
+    Get the user's application and analysis statistics for the dashboard.
+    """
+    return StatsService(db).get_dashboard_stats(str(current_user.id))
+
+@router.get("/me/usage", response_model=List[UsageBucket])
+def get_usage(
+    days: int = Query(7, ge=1, le=90),
+    granularity: str = Query("day", pattern="^(minute|hour|day)$"),
+    current_user: UserInDB = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+) -> Any:
+    """
+    Get the user's AI provider usage (calls, tokens, cost) per model over time.
+    """
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    return UsageService(db).user_usage(str(current_user.id), since, granularity=granularity)
+
+@router.get("/me/recommendations", response_model=List[Recommendation])
+def get_recommendations(
+    current_user: UserInDB = Depends(get_current_active_user),
+) -> Any:
+    """
+    Get job matches precomputed for the user's default resume, best first.
+    """
+    return recommendations_cache().get(str(current_user.id)) or []
@@ -0,0 +1,188 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+import redis
+
+from .config import settings
+from .logger import get_logger
+from .shm_cache import get_shared_table, record_cache_lookup
+
+logger = get_logger(__name__)
+
+_redis_client: Optional[redis.Redis] = None
+_redis_checked = False
+_redis_lock = threading.Lock()
+
+
+def get_redis() -> Optional[redis.Redis]:
+    """
+    Returns the process-wide Redis client, or None when Redis is unreachable.
+
+    The connection is checked once per process so callers on the request
+    path never pay for a ping.
+    """
+    global _redis_client, _redis_checked
+    if _redis_checked:
+        return _redis_client
+    with _redis_lock:
+        if not _redis_checked:
+            try:
+                client = redis.Redis(
+                    host=settings.REDIS_HOST,
+                    port=settings.REDIS_PORT,
+                    password=settings.REDIS_PASSWORD,
+                    db=settings.REDIS_DB,
+                    decode_responses=True,
+                )
+                client.ping()
+                _redis_client = client
+            except redis.ConnectionError:
+                logger.warning("Redis connection failed, using shared memory cache fallback")
+            _redis_checked = True
+    return _redis_client
+
+
+class JSONCache:
+    """
+    Namespaced JSON cache backed by Redis.
+
+    Without Redis, values go to the host-wide shared memory table so every
+    worker sees them; values too large for a shared slot fall back to a
+    bounded per-process LRU (SHM_OVERSIZE_ENTRIES) shared by all namespaces.
+    """
+
+    def __init__(self, namespace: str, ttl: int = settings.CACHE_TTL):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.redis = get_redis()
+        self.shared = get_shared_table() if self.redis is None else None
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def get(self, key: str) -> Optional[Any]:
+        """Returns the cached value for ``key`` or None on a miss."""
+        data = None
+        try:
+            if self.redis is not None:
+                data = self.redis.get(self._key(key))
+            else:
+                raw = self.shared.get(self._key(key))
+                if raw is not None:
+                    data = raw.decode()
+                else:
+                    data = _oversize_values.get(self._key(key))
+            if data is not None:
+                return json.loads(data)
+        except Exception as e:
+            logger.error(f"Cache retrieval error: {e}")
+        finally:
+            record_cache_lookup(self.namespace, data is not None)
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        """Stores a JSON-serialisable value with the namespace TTL."""
+        try:
+            data = json.dumps(value, default=str)
+            if self.redis is not None:
+                self.redis.setex(self._key(key), self.ttl, data)
+            elif not self.shared.set(self._key(key), data.encode(), ttl=self.ttl):
+                # Drop any smaller shared value so it cannot shadow this one
+                self.shared.delete(self._key(key))
+                _oversize_values.set(self._key(key), data, ttl=self.ttl)
+        except Exception as e:
+            logger.error(f"Cache storage error: {e}")
+
+    def delete(self, key: str) -> None:
+        """Invalidates a single key."""
+        try:
+            if self.redis is not None:
+                self.redis.delete(self._key(key))
+            else:
+                self.shared.delete(self._key(key))
+                _oversize_values.delete(self._key(key))
+        except Exception as e:
+            logger.error(f"Cache invalidation error: {e}")
+
+    def clear(self) -> None:
+        """Invalidates every key in the namespace."""
+        prefix = f"{self.namespace}:"
+        try:
+            if self.redis is not None:
+                keys = list(self.redis.scan_iter(match=f"{prefix}*", count=1000))
+                for start in range(0, len(keys), 1000):
+                    self.redis.delete(*keys[start:start + 1000])
+            else:
+                self.shared.clear(prefix)
+                _oversize_values.delete_prefix(prefix)
+        except Exception as e:
+            logger.error(f"Cache invalidation error: {e}")
+
+
+class TTLCache:
+    """
+    Small thread-safe in-process LRU cache with per-entry expiry.
+
+    Used for hot, per-request lookups (verified token claims, current user)
+    where even a Redis round trip is too much. Entries are process-local, so
+    explicit invalidation only reaches the current worker; the TTL bounds
+    staleness everywhere else.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Returns the live value for ``key`` or None."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Stores ``value``, evicting the least recently used entry when full."""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._purge_expired()
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def _purge_expired(self) -> None:
+        """Drops expired entries; called with the lock held when full."""
+        now = time.monotonic()
+        for key in [key for key, (expires_at, _) in self._data.items() if expires_at <= now]:
+            del self._data[key]
+
+    def delete(self, key: Hashable) -> None:
+        """Invalidates a single key."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_prefix(self, prefix: str) -> None:
+        """Invalidates every string key starting with ``prefix``."""
+        with self._lock:
+            for key in [k for k in self._data if isinstance(k, str) and k.startswith(prefix)]:
+                del self._data[key]
+
+    def clear(self) -> None:
+        """Invalidates every entry."""
+        with self._lock:
+            self._data.clear()
+
+
+# JSONCache values too large for a shared memory slot
+_oversize_values = TTLCache(maxsize=settings.SHM_OVERSIZE_ENTRIES, ttl=settings.CACHE_TTL)
@@ -1,4 +1,4 @@
-from typing import Any, List, Optional, Union
+from typing import Any, Dict, List, Optional, Union
 from pydantic import AnyHttpUrl, PostgresDsn, field_validator
 from pydantic_settings import BaseSettings
 import secrets
@@ -30,6 +30,29 @@ class Settings(BaseSettings):
     SECRET_KEY: str = secrets.token_urlsafe(32)
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8  # 8 days
+    PASSWORD_HASH_WORKERS: int = 4  # dedicated bcrypt threads, off the event loop
+    PASSWORD_HASH_MAX_CONCURRENCY: int = 16  # hashes queued or running at once
+    TOKEN_CACHE_SIZE: int = 10000  # verified JWT claims kept in memory
+    TOKEN_CACHE_TTL: int = 300  # seconds
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_TTL: int = 60  # seconds; bounds staleness across workers
+    
+    # Logging Settings
+    LOG_QUEUE_SIZE: int = 10000  # records buffered before new ones are dropped
+    LOG_BATCH_SIZE: int = 256  # records per write
+    LOG_FLUSH_INTERVAL_MS: int = 50  # longest a record waits to be written
+    LOG_SUCCESS_SAMPLE_RATES: Dict[str, float] = {"/health": 0.01}  # path prefix -> share of 2xx/3xx request logs kept
+    LOG_SLOW_REQUEST_MS: int = 1000  # requests at least this slow are always logged
+    
+    # Profiling Settings
+    ADMIN_API_TOKEN: Optional[str] = None  # enables /api/v1/admin when set
+    PROFILE_SAMPLE_RATE: float = 0.0  # fraction of requests profiled automatically
+    PROFILE_INTERVAL_MS: float = 5.0  # sampling interval
+    PROFILE_FORMAT: str = "speedscope"  # speedscope or collapsed
+    PROFILE_DIR: str = "./data/profiles"
+    PROFILE_MAX_FILES: int = 200  # oldest profiles are deleted beyond this
+    PROFILE_SIGNING_KEY: Optional[str] = None  # signs X-Profile-Request; defaults to SECRET_KEY
+    LOOP_LAG_THRESHOLD_MS: int = 100  # log event loop stalls longer than this
     
     # CORS Settings
     CORS_ORIGINS: List[AnyHttpUrl] = [
@@ -57,6 +80,17 @@ class Settings(BaseSettings):
     REDIS_PASSWORD: Optional[str] = None
     REDIS_DB: int = 0
     CACHE_TTL: int = 3600  # 1 hour in seconds
+    DASHBOARD_STATS_TTL: int = 300  # safety net; writes invalidate explicitly
+    DASHBOARD_STATS_SOURCE: str = "counters"  # counters or materialized_view
+    DASHBOARD_ACTIVITY_DAYS: int = 90
+    
+    # Shared Memory Settings
+    SHM_CACHE_DIR: str = "/dev/shm"  # falls back to the temp dir when missing
+    SHM_CACHE_NAME: str = "careercompass-cache"
+    SHM_CACHE_SLOTS: int = 8192
+    SHM_CACHE_SLOT_BYTES: int = 8192  # larger values stay in per-worker memory
+    SHM_CACHE_STRIPES: int = 64  # lock stripes; must divide SHM_CACHE_SLOTS
+    SHM_OVERSIZE_ENTRIES: int = 1000  # values over a slot kept per worker, LRU
     
     # OpenAI Settings
     OPENAI_API_KEY: str
@@ -70,16 +104,87 @@ class Settings(BaseSettings):
     ANTHROPIC_TIMEOUT: int = 30
     ANTHROPIC_MAX_RETRIES: int = 3
     
+    # Provider Backend Settings
+    PROVIDER_MODE: str = "live"  # live, record (live + trace file) or replay (trace file only)
+    PROVIDER_TRACE_PATH: str = "./data/traces/providers.trace"
+    PROVIDER_REPLAY_SPEED: float = 1.0  # divides recorded latencies; 0 replays without delay
+    PROVIDER_REPLAY_ON_MISS: str = "error"  # error, or "model" to serve another response of the same model
+    
+    # Usage Accounting Settings
+    USAGE_FLUSH_INTERVAL: float = 10.0  # seconds between ledger writes per worker
+    USAGE_MAX_PENDING_BUCKETS: int = 10000  # unwritten ledger rows kept for retry per worker
+    USAGE_USER_MINUTE_TOKEN_LIMIT: int = 0  # provider tokens per user per minute; 0 disables
+    USAGE_USER_DAILY_TOKEN_LIMIT: int = 0  # provider tokens per user per day; 0 disables
+    USAGE_MODEL_PRICES: Dict[str, List[float]] = {  # USD per 1M input, output tokens
+        "gpt-4": [30.0, 60.0],
+        "gpt-4-1106-preview": [10.0, 30.0],
+        "gpt-3.5-turbo": [0.5, 1.5],
+        "claude-2.1": [8.0, 24.0],
+    }
+    
     # Rate Limiting Settings
     RATE_LIMIT_WINDOW: int = 3600  # 1 hour in seconds
     RATE_LIMIT_MAX_REQUESTS: int = 100
     RATE_LIMIT_STRATEGY: str = "fixed-window"
+    RATE_LIMIT_STORAGE_URI: str = "shm://"  # shm:// shares counters across workers on a host
     
     # AI Analysis Settings
     MAX_RESUME_LENGTH: int = 10000  # characters
     MAX_JOB_DESC_LENGTH: int = 5000  # characters
     ANALYSIS_TIMEOUT: int = 60  # seconds
     SIMILARITY_THRESHOLD: float = 0.75
+    INCREMENTAL_EVALUATION: bool = False  # re-evaluate only edited background sections
+    SECTION_MIN_CHARS: int = 200
+    SECTION_MAX_CHARS: int = 1500
+    SECTION_AVG_SENTENCES: int = 4  # expected sentences per content-defined chunk
+    SECTION_CACHE_TTL: int = 60 * 60 * 24 * 7  # 7 days
+    
+    # Analysis History Settings
+    ANALYSIS_PARTITION_MONTHS_AHEAD: int = 3  # monthly partitions created in advance
+    ANALYSIS_RETENTION_MONTHS: int = 0  # months of history kept; 0 keeps everything
+    
+    # Skills Extraction Settings
+    SKILLS_TAXONOMY_PATH: Optional[str] = None  # defaults to the bundled taxonomy
+    SKILLS_CACHE_DIR: str = "./data/skills"  # compiled automaton cache
+    
+    # Resume Upload Settings
+    RESUME_UPLOAD_DIR: str = "./data/resumes"
+    RESUME_MAX_UPLOAD_BYTES: int = 10 * 1024 * 1024  # 10 MB
+    RESUME_EXTRACT_WORKERS: int = 2  # text extraction processes per API worker
+    RESUME_EXTRACT_TASKS_PER_CHILD: int = 50  # recycle workers to cap memory growth
+    RESUME_EXTRACT_TIMEOUT: int = 30  # seconds
+    RESUME_TEXT_CACHE_TTL: int = 60 * 60 * 24 * 30  # 30 days
+    
+    # Vector Search Settings
+    VECTOR_INDEX_DIR: str = "./data/vector_index"
+    VECTOR_DIM: int = 1024  # must be a power of two
+    VECTOR_TOP_K: int = 10  # candidates sent to full LLM evaluation
+    MATCH_EVALUATE_MAX_TOP_K: int = 10  # cap on paid evaluations per /jobs/match request
+    MATCH_RATE_LIMIT: str = "20/hour"  # per user, for /jobs/match
+    VECTOR_IVF_LISTS: int = 0  # 0 disables IVF partitioning
+    VECTOR_IVF_NPROBE: int = 8
+    VECTOR_COMPACT_THRESHOLD: float = 0.2  # dead-row fraction that triggers compaction
+    
+    # Bulk Ingestion Settings
+    INGEST_BATCH_SIZE: int = 5000  # rows per COPY + upsert transaction
+    INGEST_UPDATE_VECTOR_INDEX: bool = True
+    
+    # Batch Pre-evaluation Settings
+    PRECOMPUTE_AI_PROVIDER: str = "openai"
+    PRECOMPUTE_POSTING_BATCH: int = 1000  # new postings shortlisted per round
+    PRECOMPUTE_RESUME_BATCH: int = 10000  # default resumes scored per matrix product
+    PRECOMPUTE_SHORTLIST_PER_USER: int = 5
+    PRECOMPUTE_MIN_SIMILARITY: float = 0.2
+    PRECOMPUTE_CONCURRENCY: int = 4  # provider worker pool size
+    PRECOMPUTE_REQUESTS_PER_MINUTE: int = 60
+    PRECOMPUTE_USER_TOKEN_BUDGET: int = 20000  # per run
+    PRECOMPUTE_GLOBAL_TOKEN_BUDGET: int = 2000000  # per run
+    PRECOMPUTE_COMPLETION_TOKENS: int = 800  # estimated output tokens per evaluation
+    PRECOMPUTE_MAX_ATTEMPTS: int = 3  # failed evaluations before a pair is given up
+    PRECOMPUTE_WINDOW_START_HOUR: int = 1  # UTC, inclusive
+    PRECOMPUTE_WINDOW_END_HOUR: int = 6  # UTC, exclusive
+    RECOMMENDATIONS_LIMIT: int = 20
+    RECOMMENDATIONS_TTL: int = 60 * 60 * 24 * 7  # 7 days
     
     @field_validator("DATABASE_URI", mode="before")
     @classmethod
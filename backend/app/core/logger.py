@@ -1,30 +1,239 @@
+import atexit
+import itertools
+import os
+import random
 import sys
+import threading
 import logging
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, BinaryIO, Dict, Optional, Union
+
+import orjson
 import structlog
-from typing import Any, Dict
 
 from .config import settings
 
+_ORJSON_OPTIONS = orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS
+
+LogRecord = Union[Dict[str, Any], str, bytes]
+
+
+class QueuedLogWriter:
+    """
+    Writes log records from a bounded in-memory queue on a background thread.
+
+    Callers only append to a deque, so logging from the event loop never
+    waits on stdout. The writer thread wakes every LOG_FLUSH_INTERVAL_MS, or
+    as soon as LOG_BATCH_SIZE records are pending, serialises pending event
+    dicts with orjson and writes them in one call. When the queue is full,
+    new records are dropped and counted rather than blocking the caller;
+    the writer logs the number dropped once it catches up.
+
+    Threads do not survive fork, so under gunicorn's preload the writer is
+    restarted in every worker with an empty queue.
+    """
+
+    def __init__(
+        self,
+        stream: BinaryIO,
+        max_size: int = settings.LOG_QUEUE_SIZE,
+        batch_size: int = settings.LOG_BATCH_SIZE,
+        flush_interval_ms: int = settings.LOG_FLUSH_INTERVAL_MS,
+    ):
+        self.stream = stream
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.dropped = 0
+        self.written = 0
+        self._reported_dropped = 0
+        self._records: deque = deque()
+        self._drop_counter = itertools.count(1)
+        self._closed = False
+        self._start()
+        os.register_at_fork(after_in_child=self._after_fork)
+        atexit.register(self.close)
+
+    def _start(self) -> None:
+        """Starts the writer thread with an empty queue."""
+        self._records.clear()
+        # A fresh lock: the parent's writer may have held it at fork time
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def _after_fork(self) -> None:
+        if not self._closed:
+            self._start()
+
+    def submit(self, record: LogRecord) -> None:
+        """Queues a record without blocking; drops it when the queue is full."""
+        records = self._records
+        if len(records) >= self.max_size:
+            # next() on a count is atomic, unlike += across threads
+            self.dropped = next(self._drop_counter)
+            return
+        records.append(record)
+        if len(records) >= self.batch_size:
+            self._wakeup.set()
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes every queued record."""
+        with self._write_lock:
+            records = self._records
+            while records:
+                batch = []
+                try:
+                    for _ in range(self.batch_size):
+                        batch.append(self._encode(records.popleft()))
+                except IndexError:
+                    pass
+                self._write(b"".join(batch))
+                self.written += len(batch)
+            self._report_dropped()
+
+    def _report_dropped(self) -> None:
+        """Logs how many records were dropped since the last report."""
+        dropped = self.dropped
+        if dropped > self._reported_dropped:
+            self._write(self._encode({
+                "event": "log_records_dropped",
+                "count": dropped - self._reported_dropped,
+                "total": dropped,
+                "level": "warning",
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+            }))
+            self._reported_dropped = dropped
+
+    @staticmethod
+    def _encode(record: LogRecord) -> bytes:
+        if isinstance(record, dict):
+            return orjson.dumps(record, default=str, option=_ORJSON_OPTIONS)
+        if isinstance(record, str):
+            record = record.encode("utf-8", "replace")
+        return record + b"\n"
+
+    def _write(self, data: bytes) -> None:
+        try:
+            self.stream.write(data)
+            self.stream.flush()
+        except (OSError, ValueError):
+            # stdout closed or broken; nothing better to report it to
+            pass
+
+    def close(self) -> None:
+        """Stops the writer thread after writing everything queued."""
+        self._closed = True
+        self._wakeup.set()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        self.flush()
+
+    def stats(self) -> Dict[str, int]:
+        """Returns queue depth and write/drop totals for this process."""
+        return {"queued": len(self._records), "written": self.written, "dropped": self.dropped}
+
+
+class QueuedLogger:
+    """structlog logger that hands rendered records to a QueuedLogWriter."""
+
+    def __init__(self, writer: QueuedLogWriter):
+        self._writer = writer
+
+    def msg(self, message: Optional[LogRecord] = None, **event_dict: Any) -> None:
+        # The JSON pipeline ends with the event dict itself, passed as
+        # keyword arguments, so serialisation happens on the writer thread
+        self._writer.submit(event_dict if message is None else message)
+
+    log = debug = info = warn = warning = msg
+    err = error = critical = exception = failure = fatal = msg
+
+
+class QueuedLoggerFactory:
+    """Returns loggers that share one QueuedLogWriter."""
+
+    def __init__(self, writer: QueuedLogWriter):
+        self.writer = writer
+        self._logger = QueuedLogger(writer)
 
-def configure_logging() -> None:
+    def __call__(self, *args: Any) -> QueuedLogger:
+        return self._logger
+
+
+class RouteSampler:
+    """
+    Keeps a fraction of successful request logs on configured routes.
+
+    Rates are keyed by path prefix and the longest matching prefix wins.
+    Only events carrying a ``path`` and a ``status_code`` below 400 are
+    sampled, so errors and application events are always kept, and so are
+    requests whose ``duration_ms`` reaches ``slow_ms``. Kept events record
+    their ``sample_rate`` so counts can be scaled back up.
+    """
+
+    def __init__(self, rates: Dict[str, float], slow_ms: int = settings.LOG_SLOW_REQUEST_MS):
+        self.rates = sorted(rates.items(), key=lambda item: len(item[0]), reverse=True)
+        self.slow_ms = slow_ms
+
+    def rate_for(self, path: str) -> float:
+        """Returns the fraction of successful requests to ``path`` to log."""
+        for prefix, rate in self.rates:
+            if path.startswith(prefix):
+                return rate
+        return 1.0
+
+    def __call__(self, logger: Any, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+        status_code = event_dict.get("status_code")
+        path = event_dict.get("path")
+        if status_code is None or path is None or status_code >= 400:
+            return event_dict
+        if event_dict.get("duration_ms", 0) >= self.slow_ms:
+            return event_dict
+        rate = self.rate_for(path)
+        if rate < 1.0:
+            if random.random() >= rate:
+                raise structlog.DropEvent
+            event_dict["sample_rate"] = rate
+        return event_dict
+
+
+_writer: Optional[QueuedLogWriter] = None
+
+
+def configure_logging(stream: Optional[BinaryIO] = None) -> None:
     """
     Configures structured logging for the application.
-    
+
     Sets up structlog with appropriate processors and formatting based on the
-    environment (development vs production).
+    environment (development vs production). Records are written by a
+    background thread, see QueuedLogWriter.
+
+    Args:
+        stream: Binary stream to write to, defaults to stdout
     """
+    global _writer
+
     logging.basicConfig(
         format="%(message)s",
         stream=sys.stdout,
         level=logging.DEBUG if settings.DEBUG else logging.INFO,
     )
 
+    # Sampling runs first so dropped events cost as little as possible
     shared_processors = [
+        RouteSampler(settings.LOG_SUCCESS_SAMPLE_RATES),
         structlog.contextvars.merge_contextvars,
         structlog.processors.add_log_level,
         structlog.processors.StackInfoRenderer(),
-        structlog.processors.TimeStamper(fmt="iso"),
-        structlog.processors.add_log_level,
+        structlog.processors.TimeStamper(fmt="iso", utc=True),
     ]
 
     if settings.ENVIRONMENT == "development":
@@ -33,15 +242,19 @@ def configure_logging() -> None:
             structlog.dev.ConsoleRenderer(colors=True),
         ]
     else:
+        # No renderer: the event dict goes to the writer thread as is
         processors = [
             *shared_processors,
             structlog.processors.format_exc_info,
-            structlog.processors.JSONRenderer(),
         ]
 
+    if _writer is not None:
+        _writer.close()
+    _writer = QueuedLogWriter(stream or sys.stdout.buffer)
+
     structlog.configure(
         processors=processors,
-        logger_factory=structlog.PrintLoggerFactory(),
+        logger_factory=QueuedLoggerFactory(_writer),
         wrapper_class=structlog.make_filtering_bound_logger(
             logging.DEBUG if settings.DEBUG else logging.INFO
         ),
@@ -49,13 +262,24 @@ def configure_logging() -> None:
     )
 
 
+def flush_logging() -> None:
+    """Writes all queued log records; call before the process exits."""
+    if _writer is not None:
+        _writer.flush()
+
+
+def logging_stats() -> Dict[str, int]:
+    """Returns the log queue's depth and write/drop totals for this process."""
+    return _writer.stats() if _writer is not None else {}
+
+
 def get_logger(name: str = None) -> structlog.BoundLogger:
     """
     Creates a structured logger instance with optional context.
-    
+
     Args:
         name: Optional name for the logger context
-        
+
     Returns:
         A configured structured logger instance
     """
@@ -66,7 +290,7 @@ def get_logger(name: str = None) -> structlog.BoundLogger:
 def get_request_id() -> str:
     """
     Retrieves the current request ID from context.
-    
+
     Returns:
         The current request ID or None if not set
     """
@@ -76,14 +300,14 @@ def get_request_id() -> str:
 def log_request_middleware(request_id: str) -> Dict[str, Any]:
     """
     Creates a middleware context dict for request logging.
-    
+
     Args:
         request_id: The unique identifier for the request
-        
+
     Returns:
         Dict with request context information
     """
     return {
         "request_id": request_id,
         "environment": settings.ENVIRONMENT,
-    }
\ No newline at end of file
+    }
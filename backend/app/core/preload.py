@@ -0,0 +1,41 @@
+"""
+Loading of read-mostly state before a preforking server forks its workers.
+
+Modules holding large read-mostly data (indexes, dictionaries) register a
+hook here. ``preload()`` runs the hooks once in the server's master process,
+so workers start with the data already in memory and share those pages
+copy-on-write instead of each loading a private copy.
+"""
+from typing import Callable, List
+
+from .config import settings
+from .logger import get_logger
+from .shm_cache import get_shared_table
+
+logger = get_logger(__name__)
+
+PreloadHook = Callable[[], None]
+
+_hooks: List[PreloadHook] = []
+
+
+def register_preload_hook(hook: PreloadHook) -> PreloadHook:
+    """Registers ``hook`` to run in ``preload()``; usable as a decorator."""
+    _hooks.append(hook)
+    return hook
+
+
+def preload() -> None:
+    """
+    Loads settings, the shared memory table and all registered data.
+
+    A failing hook is logged and skipped: the data is then loaded lazily by
+    each worker, which costs memory but not correctness.
+    """
+    logger.info(f"Preloading shared state for {settings.APP_NAME}")
+    get_shared_table()
+    for hook in _hooks:
+        try:
+            hook()
+        except Exception as e:
+            logger.error(f"Preload hook {hook.__qualname__} failed: {e}")
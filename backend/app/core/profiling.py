@@ -0,0 +1,497 @@
+"""
+Opt-in request profiling and event loop lag monitoring.
+
+A request is profiled when it is picked by PROFILE_SAMPLE_RATE, carries a
+valid signed ``X-Profile-Request`` header, or matches the admin toggle.
+Profiled requests are observed by one background sampler thread, so the
+request itself runs unmodified:
+
+* While one of the request's tasks is running, the event loop thread's
+  Python stack is sampled (on-CPU time).
+* While the request is suspended, the await chain of its most recently
+  created live task (normally the innermost work, e.g. the endpoint under
+  a middleware) is sampled under ``[await]``: time spent waiting on the
+  provider, the database or a thread pool.
+
+Samples are attributed through a task factory that tags every task created
+inside a profiled request. Profiles are written as speedscope JSON or
+collapsed stacks to PROFILE_DIR, which is kept to PROFILE_MAX_FILES files.
+
+``LoopLagMonitor`` independently watches the event loop and logs the stack
+of whatever blocks it for longer than LOOP_LAG_THRESHOLD_MS.
+"""
+import asyncio
+import contextvars
+import hashlib
+import hmac
+import itertools
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import weakref
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from .config import settings
+from .logger import get_logger
+from .shm_cache import get_shared_table
+
+logger = get_logger(__name__)
+
+PROFILE_HEADER = "x-profile-request"
+_TOGGLE_KEY = "profiling:toggle"
+_TOGGLE_COUNT_KEY = "profiling:toggle:count"
+_TOGGLE_REFRESH_S = 1.0
+_MAX_STACK_DEPTH = 128
+_NAME_RE = re.compile(r"^(\d+)_([\w-]+)_([A-Z]+)_([\w.-]*)_(\d+)ms\.(speedscope\.json|collapsed)$")
+
+_active_profile: contextvars.ContextVar[Optional["RequestProfile"]] = contextvars.ContextVar(
+    "active_profile", default=None
+)
+_labels: Dict[Any, str] = {}
+
+
+def _frame_label(code) -> str:
+    """Returns a stable 'qualname (dir/file.py:line)' label for a code object."""
+    label = _labels.get(code)
+    if label is None:
+        filename = os.sep.join(code.co_filename.rsplit(os.sep, 2)[-2:])
+        label = f"{getattr(code, 'co_qualname', code.co_name)} ({filename}:{code.co_firstlineno})"
+        _labels[code] = label
+    return label
+
+
+def _thread_stack(frame) -> Tuple[str, ...]:
+    """Returns the stack of a running thread, outermost frame first."""
+    labels = []
+    while frame is not None and len(labels) < _MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    return tuple(reversed(labels))
+
+
+def _await_chain(task: asyncio.Task) -> Tuple[str, ...]:
+    """Returns the chain of coroutines a suspended task is awaiting, outermost first."""
+    labels = []
+    coro = task.get_coro()
+    while coro is not None and len(labels) < _MAX_STACK_DEPTH:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None) \
+            or getattr(coro, "ag_frame", None)
+        if frame is None:
+            break
+        labels.append(_frame_label(frame.f_code))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None) \
+            or getattr(coro, "ag_await", None)
+    return tuple(labels)
+
+
+class RequestProfile:
+    """Samples collected for one request."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, loop_thread_id: int, reason: str):
+        self.loop = loop
+        self.loop_thread_id = loop_thread_id
+        self.reason = reason
+        # Task -> creation sequence number
+        self._sequence = itertools.count()
+        self.tasks: "weakref.WeakKeyDictionary[asyncio.Task, int]" = weakref.WeakKeyDictionary()
+        self.samples: Counter = Counter()
+        self.started = time.time()
+
+    def add_task(self, task: asyncio.Task) -> None:
+        """Attributes a task (and its samples) to this request."""
+        self.tasks[task] = next(self._sequence)
+
+    def sample(self, frames: Dict[int, Any]) -> None:
+        """Records one sample; called from the sampler thread."""
+        try:
+            tasks = list(self.tasks.items())
+            current = asyncio.current_task(self.loop)
+        except RuntimeError:
+            # The task map changed size while being copied; skip this tick
+            return
+        if current is not None and current in self.tasks:
+            stack = _thread_stack(frames.get(self.loop_thread_id))
+        else:
+            live = [(seq, task) for task, seq in tasks if not task.done()]
+            if not live:
+                return
+            stack = ("[await]",) + _await_chain(max(live, key=lambda item: item[0])[1])
+        self.samples[stack] += 1
+
+
+class SamplingProfiler:
+    """
+    Background thread sampling every active request profile.
+
+    The thread runs only while at least one profile is active. Each tick
+    costs one ``sys._current_frames()`` call plus a stack walk per profile.
+    """
+
+    def __init__(self, interval_ms: float = settings.PROFILE_INTERVAL_MS):
+        self.interval = interval_ms / 1000
+        self._profiles: "weakref.WeakSet[RequestProfile]" = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, profile: RequestProfile) -> None:
+        """Starts sampling a profile."""
+        with self._lock:
+            self._profiles.add(profile)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+
+    def remove(self, profile: RequestProfile) -> None:
+        """Stops sampling a profile."""
+        with self._lock:
+            self._profiles.discard(profile)
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                profiles = list(self._profiles)
+                if not profiles:
+                    self._wakeup.clear()
+            if not profiles:
+                self._wakeup.wait()
+                continue
+            frames = sys._current_frames()
+            for profile in profiles:
+                profile.sample(frames)
+            del frames
+            time.sleep(self.interval)
+
+
+_profiler = SamplingProfiler()
+
+
+def _task_factory(loop, coro, **kwargs):
+    """Creates tasks as usual, tagging those created inside a profiled request."""
+    task = asyncio.Task(coro, loop=loop, **kwargs)
+    profile = _active_profile.get()
+    if profile is not None:
+        profile.add_task(task)
+    return task
+
+
+def install_task_factory(loop: asyncio.AbstractEventLoop) -> None:
+    """Installs the profiling task factory unless another one is already set."""
+    if loop.get_task_factory() is None:
+        loop.set_task_factory(_task_factory)
+    elif loop.get_task_factory() is not _task_factory:
+        logger.warning("A custom task factory is installed; profiles only cover the request task")
+
+
+# ---------------------------------------------------------------------- #
+# Triggers
+# ---------------------------------------------------------------------- #
+
+def _signing_key() -> bytes:
+    return (settings.PROFILE_SIGNING_KEY or settings.SECRET_KEY).encode()
+
+
+def create_profile_token(minutes: int) -> str:
+    """
+    Returns a header value that flags requests for profiling.
+
+    The token is ``<expiry>.<hmac>`` and any request carrying it in
+    ``X-Profile-Request`` is profiled until the expiry.
+    """
+    expires = int(time.time()) + minutes * 60
+    signature = hmac.new(_signing_key(), str(expires).encode(), hashlib.sha256).hexdigest()
+    return f"{expires}.{signature}"
+
+
+def _valid_token(value: str) -> bool:
+    expires, _, signature = value.partition(".")
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    expected = hmac.new(_signing_key(), expires.encode(), hashlib.sha256).hexdigest()
+    return hmac.compare_digest(signature, expected)
+
+
+def set_profiling_toggle(path_prefix: str, minutes: int, max_profiles: int) -> Dict[str, Any]:
+    """
+    Profiles every request under ``path_prefix`` on every worker of this host.
+
+    Args:
+        path_prefix: Request path prefix, e.g. ``/api/v1/evaluate``
+        minutes: How long the toggle stays on
+        max_profiles: Stop after this many profiles across all workers
+
+    Returns:
+        The stored toggle
+    """
+    toggle = {
+        "path_prefix": path_prefix,
+        "expires_at": time.time() + minutes * 60,
+        "max_profiles": max_profiles,
+    }
+    table = get_shared_table()
+    table.delete(_TOGGLE_COUNT_KEY)
+    table.set(_TOGGLE_KEY, json.dumps(toggle).encode(), ttl=minutes * 60)
+    return toggle
+
+
+def clear_profiling_toggle() -> None:
+    """Turns the admin toggle off on every worker of this host."""
+    get_shared_table().delete(_TOGGLE_KEY)
+
+
+def get_profiling_toggle() -> Optional[Dict[str, Any]]:
+    """Returns the active admin toggle, if any."""
+    raw = get_shared_table().get(_TOGGLE_KEY)
+    return json.loads(raw) if raw else None
+
+
+_toggle_cache: Tuple[float, Optional[Dict[str, Any]]] = (0.0, None)
+
+
+def _toggle_matches(path: str) -> bool:
+    """Checks the admin toggle, re-reading shared memory at most once a second."""
+    global _toggle_cache
+    now = time.monotonic()
+    fetched_at, toggle = _toggle_cache
+    if now - fetched_at > _TOGGLE_REFRESH_S:
+        toggle = get_profiling_toggle()
+        _toggle_cache = (now, toggle)
+    if not toggle or toggle["expires_at"] < time.time() or not path.startswith(toggle["path_prefix"]):
+        return False
+    return get_shared_table().incr(_TOGGLE_COUNT_KEY) <= toggle["max_profiles"]
+
+
+def _profile_reason(scope: Dict[str, Any]) -> Optional[str]:
+    """Returns why a request should be profiled, or None."""
+    for name, value in scope.get("headers", ()):
+        if name == PROFILE_HEADER.encode():
+            if _valid_token(value.decode("latin-1")):
+                return "header"
+            break
+    if settings.PROFILE_SAMPLE_RATE and random.random() < settings.PROFILE_SAMPLE_RATE:
+        return "sampled"
+    if _toggle_matches(scope["path"]):
+        return "toggle"
+    return None
+
+
+# ---------------------------------------------------------------------- #
+# Storage
+# ---------------------------------------------------------------------- #
+
+def _render(profile: RequestProfile, name: str) -> str:
+    if settings.PROFILE_FORMAT == "collapsed":
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in profile.samples.items())
+
+    frame_index: Dict[str, int] = {}
+    samples: List[List[int]] = []
+    weights: List[float] = []
+    for stack, count in profile.samples.items():
+        samples.append([frame_index.setdefault(label, len(frame_index)) for label in stack])
+        weights.append(count * settings.PROFILE_INTERVAL_MS)
+    return json.dumps({
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "shared": {"frames": [{"name": label} for label in frame_index]},
+        "profiles": [{
+            "type": "sampled",
+            "name": name,
+            "unit": "milliseconds",
+            "startValue": 0,
+            "endValue": sum(weights),
+            "samples": samples,
+            "weights": weights,
+        }],
+        "name": name,
+        "exporter": settings.APP_NAME,
+    })
+
+
+def save_profile(profile: RequestProfile, request_id: str, method: str, route: str, duration_ms: int) -> str:
+    """
+    Writes a profile to PROFILE_DIR and trims the directory to PROFILE_MAX_FILES.
+
+    Returns:
+        The profile file name
+    """
+    extension = "collapsed" if settings.PROFILE_FORMAT == "collapsed" else "speedscope.json"
+    route_slug = re.sub(r"[^\w.-]+", "-", route).strip("-") or "root"
+    name = f"{int(profile.started * 1000)}_{request_id or 'none'}_{method}_{route_slug}_{duration_ms}ms.{extension}"
+
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    tmp_path = os.path.join(settings.PROFILE_DIR, f".{name}.tmp")
+    with open(tmp_path, "w") as f:
+        f.write(_render(profile, f"{method} {route} ({request_id}, {profile.reason})"))
+    os.replace(tmp_path, os.path.join(settings.PROFILE_DIR, name))
+
+    names = sorted(n for n in os.listdir(settings.PROFILE_DIR) if _NAME_RE.match(n))
+    for old in names[:max(0, len(names) - settings.PROFILE_MAX_FILES)]:
+        try:
+            os.unlink(os.path.join(settings.PROFILE_DIR, old))
+        except FileNotFoundError:
+            pass
+    return name
+
+
+def list_profiles() -> List[Dict[str, Any]]:
+    """Lists stored profiles, newest first."""
+    if not os.path.isdir(settings.PROFILE_DIR):
+        return []
+    profiles = []
+    for name in os.listdir(settings.PROFILE_DIR):
+        match = _NAME_RE.match(name)
+        if not match:
+            continue
+        started_ms, request_id, method, route, duration_ms, extension = match.groups()
+        profiles.append({
+            "name": name,
+            "request_id": request_id,
+            "method": method,
+            "route": route,
+            "duration_ms": int(duration_ms),
+            "format": "collapsed" if extension == "collapsed" else "speedscope",
+            "created_at": int(started_ms) / 1000,
+            "size": os.path.getsize(os.path.join(settings.PROFILE_DIR, name)),
+        })
+    profiles.sort(key=lambda p: p["created_at"], reverse=True)
+    return profiles
+
+
+def profile_path(name: str) -> Optional[str]:
+    """Returns the path of a stored profile, or None for unknown names."""
+    if not _NAME_RE.match(name):
+        return None
+    path = os.path.join(settings.PROFILE_DIR, name)
+    return path if os.path.isfile(path) else None
+
+
+# ---------------------------------------------------------------------- #
+# Middleware and loop monitoring
+# ---------------------------------------------------------------------- #
+
+def route_template(scope: Dict[str, Any]) -> str:
+    """Returns the matched route's path template, falling back to the raw path."""
+    endpoint = scope.get("endpoint")
+    app = scope.get("app")
+    if endpoint is not None and app is not None:
+        for route in app.routes:
+            if getattr(route, "endpoint", None) is endpoint:
+                return route.path
+    return scope["path"]
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that runs selected requests under the sampling profiler.
+
+    Added as the outermost middleware so the profile covers every other
+    middleware. The request ID is taken from the ``X-Request-ID`` response
+    header set by the logging middleware.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        reason = _profile_reason(scope)
+        if reason is None:
+            return await self.app(scope, receive, send)
+
+        profile = RequestProfile(asyncio.get_running_loop(), threading.get_ident(), reason)
+        profile.add_task(asyncio.current_task())
+        request_id = ""
+
+        async def send_wrapper(message):
+            nonlocal request_id
+            if message["type"] == "http.response.start":
+                for name, value in message.get("headers", ()):
+                    if name.lower() == b"x-request-id":
+                        request_id = value.decode("latin-1")
+            await send(message)
+
+        token = _active_profile.set(profile)
+        _profiler.add(profile)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _profiler.remove(profile)
+            _active_profile.reset(token)
+            duration_ms = int((time.perf_counter() - started) * 1000)
+            route = route_template(scope)
+            try:
+                name = await asyncio.to_thread(
+                    save_profile, profile, request_id, scope["method"], route, duration_ms
+                )
+                logger.info("request_profiled", profile=name, reason=reason, duration_ms=duration_ms)
+            except OSError as e:
+                logger.error(f"Could not save request profile: {e}")
+
+
+class LoopLagMonitor:
+    """
+    Detects and explains event loop stalls.
+
+    A heartbeat coroutine wakes up every half threshold. A watchdog thread
+    notices when the heartbeat is overdue and logs the loop thread's stack
+    and running task at that moment, which names the blocking call (for
+    example a synchronous Redis or database query). When the loop recovers,
+    the heartbeat logs the total stall.
+    """
+
+    def __init__(self, threshold_ms: int = settings.LOOP_LAG_THRESHOLD_MS):
+        self.threshold = threshold_ms / 1000
+        self.interval = self.threshold / 2
+        self._beat = time.monotonic()
+        self._reported_beat = 0.0
+        self._stop = threading.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+
+    async def start(self) -> None:
+        """Starts the heartbeat on the running loop and the watchdog thread."""
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="loop-lag-monitor", daemon=True)
+        self._thread.start()
+
+    async def stop(self) -> None:
+        """Stops monitoring."""
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _heartbeat(self) -> None:
+        while True:
+            before = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self._beat = time.monotonic()
+            lag = self._beat - before - self.interval
+            if lag > self.threshold:
+                logger.warning("event_loop_lag", lag_ms=round(lag * 1000))
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.interval / 2):
+            beat = self._beat
+            overdue = time.monotonic() - beat - self.interval
+            if overdue <= self.threshold or beat == self._reported_beat:
+                continue
+            self._reported_beat = beat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            task = asyncio.current_task(self._loop)
+            logger.warning(
+                "event_loop_blocked",
+                blocked_ms=round(overdue * 1000),
+                task=task.get_name() if task else None,
+                coroutine=getattr(task.get_coro(), "__qualname__", None) if task else None,
+                stack=";".join(_thread_stack(frame)[-20:]),
+            )
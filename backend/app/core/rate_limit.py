@@ -0,0 +1,60 @@
+from typing import Optional, Tuple, Type
+
+from limits.storage import Storage
+from slowapi import Limiter
+from slowapi.util import get_remote_address
+from starlette.requests import Request
+
+from .config import settings
+from .shm_cache import get_shared_table
+from ..services.usage.ledger import current_usage_labels
+
+
+class SharedMemoryStorage(Storage):
+    """
+    ``limits`` storage backend on the host-wide shared memory table.
+
+    Registered for ``shm://`` URIs so slowapi counters are shared by every
+    worker on the host instead of each worker enforcing its own limit.
+    Supports the fixed-window strategies.
+    """
+
+    STORAGE_SCHEME = ["shm"]
+
+    def __init__(self, uri: Optional[str] = None, wrap_exceptions: bool = False, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self.table = get_shared_table()
+
+    @property
+    def base_exceptions(self) -> Tuple[Type[Exception], ...]:
+        return (OSError, ValueError)
+
+    def _key(self, key: str) -> str:
+        return f"ratelimit:{key}"
+
+    def incr(self, key: str, expiry: int, elastic_expiry: bool = False, amount: int = 1) -> int:
+        return self.table.incr(self._key(key), amount, ttl=expiry)
+
+    def get(self, key: str) -> int:
+        return self.table.get_counter(self._key(key))
+
+    def get_expiry(self, key: str) -> float:
+        return self.table.get_expiry(self._key(key))
+
+    def check(self) -> bool:
+        return True
+
+    def reset(self) -> Optional[int]:
+        return self.table.clear(self._key(""))
+
+    def clear(self, key: str) -> None:
+        self.table.delete(self._key(key))
+
+
+def user_or_remote_address(request: Request) -> str:
+    """Keys limits by the authenticated user, or the client address without one."""
+    user_id = current_usage_labels()[0]
+    return f"user:{user_id}" if user_id else get_remote_address(request)
+
+
+limiter = Limiter(key_func=get_remote_address, storage_uri=settings.RATE_LIMIT_STORAGE_URI)
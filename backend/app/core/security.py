@@ -0,0 +1,138 @@
+import asyncio
+import hashlib
+import hmac
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from jose import JWTError, jwt
+from passlib.context import CryptContext
+
+from .cache import TTLCache
+from .config import settings
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# bcrypt releases the GIL, so a small dedicated pool keeps ~250 ms hashes off
+# the event loop without competing with the default threadpool used by
+# sync endpoints and database calls.
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash",
+)
+_hash_slots: Optional[asyncio.Semaphore] = None
+
+_claims_cache = TTLCache(maxsize=settings.TOKEN_CACHE_SIZE, ttl=settings.TOKEN_CACHE_TTL)
+
+
+async def _run_hash(fn, *args) -> Any:
+    """Runs a bcrypt operation in the hash pool with bounded concurrency."""
+    global _hash_slots
+    if _hash_slots is None:
+        _hash_slots = asyncio.Semaphore(settings.PASSWORD_HASH_MAX_CONCURRENCY)
+    async with _hash_slots:
+        return await asyncio.get_running_loop().run_in_executor(_hash_executor, fn, *args)
+
+
+async def hash_password(password: str) -> str:
+    """
+    Hashes a password with bcrypt without blocking the event loop.
+
+    Args:
+        password: Plain-text password
+
+    Returns:
+        The bcrypt hash
+    """
+    return await _run_hash(pwd_context.hash, password)
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verifies a password against its bcrypt hash without blocking the event loop.
+
+    Args:
+        plain_password: Password supplied by the user
+        hashed_password: Stored bcrypt hash
+
+    Returns:
+        True if the password matches
+    """
+    return await _run_hash(pwd_context.verify, plain_password, hashed_password)
+
+
+def password_fingerprint(hashed_password: str) -> str:
+    """
+    Returns a keyed digest of a password hash for the ``pwd`` token claim.
+
+    Tokens carry the fingerprint of the hash they were issued against, so
+    changing the password revokes every earlier token.
+
+    Args:
+        hashed_password: Stored bcrypt hash
+
+    Returns:
+        A short hex digest that reveals nothing about the hash
+    """
+    return hmac.new(settings.SECRET_KEY.encode(), hashed_password.encode(), hashlib.sha256).hexdigest()[:32]
+
+
+def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
+    """
+    Creates a signed JWT access token.
+
+    Args:
+        data: Claims to include, typically ``{"sub": email}``
+        expires_delta: Token lifetime; defaults to ACCESS_TOKEN_EXPIRE_MINUTES
+
+    Returns:
+        The encoded token
+    """
+    expire = datetime.utcnow() + (
+        expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+    return jwt.encode(
+        {**data, "exp": expire},
+        settings.SECRET_KEY,
+        algorithm=settings.JWT_ALGORITHM,
+    )
+
+
+def _token_key(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+
+def decode_access_token(token: str) -> Dict[str, Any]:
+    """
+    Verifies a JWT and returns its claims, caching successful verifications.
+
+    Only tokens whose signature has been verified are cached, keyed by a hash
+    of the full token, and a cached entry never outlives the token's ``exp``.
+
+    Args:
+        token: Encoded JWT from the Authorization header
+
+    Returns:
+        The verified claims
+
+    Raises:
+        JWTError: If the token is invalid or expired
+    """
+    key = _token_key(token)
+    claims = _claims_cache.get(key)
+    if claims is not None:
+        if claims.get("exp", 0) > datetime.utcnow().timestamp():
+            return claims
+        _claims_cache.delete(key)
+        raise JWTError("Token has expired")
+
+    claims = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+    remaining = claims.get("exp", 0) - datetime.utcnow().timestamp()
+    if remaining > 0:
+        _claims_cache.set(key, claims, ttl=min(remaining, settings.TOKEN_CACHE_TTL))
+    return claims
+
+
+def forget_access_token(token: str) -> None:
+    """Drops a token's cached claims so its next use is verified again."""
+    _claims_cache.delete(_token_key(token))
@@ -0,0 +1,320 @@
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .config import settings
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+_MAGIC = b"CCSHM001"
+_HEADER = struct.Struct("<8sIII")
+_HEADER_SIZE = 64
+# state, key length, value length, key hash, expiry (unix time, 0 = never)
+_SLOT = struct.Struct("<BxHIQd")
+_COUNTER = struct.Struct("<q")
+
+_EMPTY, _USED, _DELETED = 0, 1, 2
+_PROBE_LIMIT = 16
+_MAX_KEY_BYTES = 250
+
+
+class SharedMemoryTable:
+    """
+    Fixed-size hash table in a shared memory mapping, usable from every
+    worker process on a host.
+
+    The table is a file (normally under /dev/shm) divided into equal slots,
+    each holding one key and value. Slots are grouped into stripes with one
+    lock per stripe, so workers only contend when they touch keys in the
+    same stripe. Locks are an in-process mutex (for threads) plus an
+    ``fcntl`` byte-range lock on the stripe (for other processes).
+
+    Lookups probe a bounded run of slots inside the key's stripe. When the
+    run is full, the entry closest to expiry is evicted. Values too large
+    for a slot are rejected, so callers keep their own fallback for them.
+
+    Changing the slot layout settings replaces the file with a fresh one.
+    Processes that still map the old file keep using it, unshared, until
+    they restart, so restart all workers on a host together when doing so.
+    """
+
+    def __init__(self, path: str, slots: int, slot_bytes: int, stripes: int):
+        if slots % stripes:
+            raise ValueError("SHM_CACHE_SLOTS must be a multiple of SHM_CACHE_STRIPES")
+        self.path = path
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.stripes = stripes
+        self.per_stripe = slots // stripes
+        self.payload_bytes = slot_bytes - _SLOT.size
+        self._probe = min(_PROBE_LIMIT, self.per_stripe)
+        self._size = _HEADER_SIZE + slots * slot_bytes
+        self._thread_locks = [threading.Lock() for _ in range(stripes)]
+
+        self._fd = self._open(_HEADER.pack(_MAGIC, slots, slot_bytes, stripes))
+        self._mm = mmap.mmap(self._fd, self._size, mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE)
+
+    def _open(self, header: bytes) -> int:
+        """
+        Opens the table file, first replacing it if its layout does not match.
+
+        A mismatched file is never resized in place: shrinking a file that
+        another process has mapped makes that process fault (SIGBUS) on its
+        next access. The new file is prepared under a temporary name and
+        renamed over the old one.
+        """
+        while True:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            fcntl.lockf(fd, fcntl.LOCK_EX)
+            try:
+                # Another process may have replaced the file while we waited
+                try:
+                    current = os.fstat(fd).st_ino == os.stat(self.path).st_ino
+                except FileNotFoundError:
+                    current = False
+                if current and (
+                    os.pread(fd, _HEADER.size, 0) != header or os.fstat(fd).st_size != self._size
+                ):
+                    self._replace(header)
+                    current = False
+            finally:
+                fcntl.lockf(fd, fcntl.LOCK_UN)
+            if current:
+                return fd
+            os.close(fd)
+
+    def _replace(self, header: bytes) -> None:
+        """Atomically puts an empty table file with ``header`` at the table path."""
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(self.path), prefix=f"{os.path.basename(self.path)}."
+        )
+        try:
+            # A new file reads as zeroes, i.e. every slot empty
+            os.ftruncate(fd, self._size)
+            os.pwrite(fd, header, 0)
+            os.rename(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        finally:
+            os.close(fd)
+        logger.info(f"Initialised shared memory table at {self.path}")
+
+    @staticmethod
+    def _hash(key: bytes) -> int:
+        # Python's hash() is salted per process; this must agree across workers
+        return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+    @contextmanager
+    def _locked(self, stripe: int) -> Iterator[None]:
+        """Holds the thread and process locks for one stripe."""
+        with self._thread_locks[stripe]:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, _HEADER_SIZE + stripe)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, _HEADER_SIZE + stripe)
+
+    def _offset(self, index: int) -> int:
+        return _HEADER_SIZE + index * self.slot_bytes
+
+    def _find(self, key: bytes, key_hash: int, now: float) -> Tuple[Optional[int], int]:
+        """
+        Returns (slot of the live entry for ``key`` or None, slot to write
+        ``key`` into). Must be called with the stripe lock held.
+        """
+        stripe = key_hash % self.stripes
+        base = stripe * self.per_stripe
+        start = (key_hash // self.stripes) % self.per_stripe
+        free: Optional[int] = None
+        victim, victim_expiry = base + start, float("inf")
+        for i in range(self._probe):
+            index = base + (start + i) % self.per_stripe
+            offset = self._offset(index)
+            state, key_len, _, slot_hash, expires = _SLOT.unpack_from(self._mm, offset)
+            if state == _EMPTY:
+                return None, index if free is None else free
+            expired = 0 < expires <= now
+            if state == _USED and slot_hash == key_hash and \
+                    self._mm[offset + _SLOT.size:offset + _SLOT.size + key_len] == key:
+                return (None, index) if expired else (index, index)
+            if state == _DELETED or expired:
+                if free is None:
+                    free = index
+            elif (expires or float("inf")) < victim_expiry:
+                victim, victim_expiry = index, expires
+        return None, victim if free is None else free
+
+    def _write(self, index: int, key: bytes, key_hash: int, value: bytes, expires: float) -> None:
+        offset = self._offset(index) + _SLOT.size
+        self._mm[offset:offset + len(key)] = key
+        self._mm[offset + len(key):offset + len(key) + len(value)] = value
+        _SLOT.pack_into(self._mm, self._offset(index), _USED, len(key), len(value), key_hash, expires)
+
+    def _read(self, index: int) -> bytes:
+        offset = self._offset(index)
+        _, key_len, value_len, _, _ = _SLOT.unpack_from(self._mm, offset)
+        start = offset + _SLOT.size + key_len
+        return self._mm[start:start + value_len]
+
+    def _encode_key(self, key: str) -> Tuple[bytes, int]:
+        encoded = key.encode()
+        if len(encoded) > _MAX_KEY_BYTES:
+            encoded = hashlib.sha256(encoded).hexdigest().encode()
+        return encoded, self._hash(encoded)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Returns the live value for ``key`` or None."""
+        encoded, key_hash = self._encode_key(key)
+        with self._locked(key_hash % self.stripes):
+            index, _ = self._find(encoded, key_hash, time.time())
+            return None if index is None else self._read(index)
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        """
+        Stores ``value`` for ``key``.
+
+        Args:
+            key: Cache key
+            value: Encoded value
+            ttl: Seconds until expiry; None never expires
+
+        Returns:
+            False if the value does not fit in a slot and was not stored
+        """
+        encoded, key_hash = self._encode_key(key)
+        if len(encoded) + len(value) > self.payload_bytes:
+            return False
+        expires = time.time() + ttl if ttl else 0.0
+        with self._locked(key_hash % self.stripes):
+            _, index = self._find(encoded, key_hash, time.time())
+            self._write(index, encoded, key_hash, value, expires)
+        return True
+
+    def delete(self, key: str) -> None:
+        """Removes ``key`` if present."""
+        encoded, key_hash = self._encode_key(key)
+        with self._locked(key_hash % self.stripes):
+            index, _ = self._find(encoded, key_hash, time.time())
+            if index is not None:
+                self._mm[self._offset(index)] = _DELETED
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        """
+        Atomically adds ``amount`` to an integer counter.
+
+        A missing or expired counter starts from zero; ``ttl`` is applied
+        only when the counter is created, which gives fixed-window semantics.
+
+        Returns:
+            The new counter value
+        """
+        encoded, key_hash = self._encode_key(key)
+        now = time.time()
+        with self._locked(key_hash % self.stripes):
+            index, slot = self._find(encoded, key_hash, now)
+            if index is None:
+                value = amount
+                self._write(slot, encoded, key_hash, _COUNTER.pack(value), now + ttl if ttl else 0.0)
+            else:
+                value = _COUNTER.unpack(self._read(index))[0] + amount
+                offset = self._offset(index) + _SLOT.size + len(encoded)
+                _COUNTER.pack_into(self._mm, offset, value)
+        return value
+
+    def get_counter(self, key: str) -> int:
+        """Returns the value of an integer counter, 0 when missing."""
+        value = self.get(key)
+        return _COUNTER.unpack(value)[0] if value is not None else 0
+
+    def get_expiry(self, key: str) -> float:
+        """Returns the unix expiry time of ``key``, or now when missing."""
+        encoded, key_hash = self._encode_key(key)
+        now = time.time()
+        with self._locked(key_hash % self.stripes):
+            index, _ = self._find(encoded, key_hash, now)
+            if index is None:
+                return now
+            return _SLOT.unpack_from(self._mm, self._offset(index))[4] or float("inf")
+
+    def clear(self, prefix: str = "") -> int:
+        """
+        Removes every entry whose key starts with ``prefix``.
+
+        Keys longer than the key limit are stored hashed and never match a
+        non-empty prefix.
+
+        Returns:
+            The number of entries removed
+        """
+        encoded_prefix = prefix.encode()
+        removed = 0
+        for stripe in range(self.stripes):
+            with self._locked(stripe):
+                for index in range(stripe * self.per_stripe, (stripe + 1) * self.per_stripe):
+                    offset = self._offset(index)
+                    state, key_len, _, _, _ = _SLOT.unpack_from(self._mm, offset)
+                    key_start = offset + _SLOT.size
+                    if state == _USED and self._mm[key_start:key_start + key_len].startswith(encoded_prefix):
+                        self._mm[offset] = _DELETED
+                        removed += 1
+        return removed
+
+
+_table: Optional[SharedMemoryTable] = None
+_table_lock = threading.Lock()
+
+
+def get_shared_table() -> SharedMemoryTable:
+    """
+    Returns the host-wide shared table, creating it on first use.
+
+    Created before fork under the preforking server so every worker
+    inherits the same mapping.
+    """
+    global _table
+    if _table is None:
+        with _table_lock:
+            if _table is None:
+                directory = settings.SHM_CACHE_DIR
+                if not os.path.isdir(directory):
+                    directory = tempfile.gettempdir()
+                _table = SharedMemoryTable(
+                    os.path.join(directory, settings.SHM_CACHE_NAME),
+                    slots=settings.SHM_CACHE_SLOTS,
+                    slot_bytes=settings.SHM_CACHE_SLOT_BYTES,
+                    stripes=settings.SHM_CACHE_STRIPES,
+                )
+    return _table
+
+
+def record_cache_lookup(namespace: str, hit: bool) -> None:
+    """Counts a cache hit or miss for ``namespace`` across all workers."""
+    try:
+        get_shared_table().incr(f"stats:{namespace}:{'hits' if hit else 'misses'}")
+    except OSError as e:
+        logger.error(f"Cache statistics error: {e}")
+
+
+def cache_hit_stats(namespaces: List[str]) -> Dict[str, Dict[str, float]]:
+    """Returns host-wide hit/miss counts and hit rate per namespace."""
+    table = get_shared_table()
+    stats = {}
+    for namespace in namespaces:
+        hits = table.get_counter(f"stats:{namespace}:hits")
+        misses = table.get_counter(f"stats:{namespace}:misses")
+        total = hits + misses
+        stats[namespace] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+        }
+    return stats
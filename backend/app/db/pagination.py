@@ -0,0 +1,89 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+
+def encode_cursor(created_at: datetime, row_id: Any) -> str:
+    """
+    Encodes the sort key of the last row on a page as an opaque cursor.
+
+    Args:
+        created_at: Creation timestamp of the last row
+        row_id: Primary key of the last row (tie-breaker)
+
+    Returns:
+        URL-safe cursor string
+    """
+    if isinstance(created_at, datetime):
+        created_at = created_at.isoformat()
+    payload = json.dumps([str(created_at), str(row_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """
+    Decodes a cursor produced by ``encode_cursor``.
+
+    Args:
+        cursor: Opaque cursor string from a previous page
+
+    Returns:
+        The (created_at, id) sort key to continue after
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), row_id
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
+
+
+def fetch_keyset_page(
+    db: Session,
+    select_sql: str,
+    conditions: Sequence[str],
+    params: Dict[str, Any],
+    cursor: Optional[str],
+    limit: int,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Fetches one page ordered by (created_at DESC, id DESC) using a keyset cursor.
+
+    Unlike OFFSET, the cursor predicate seeks straight into the composite
+    index, so every page costs the same regardless of its depth.
+
+    Args:
+        db: Database session
+        select_sql: ``SELECT ... FROM table`` without WHERE/ORDER BY/LIMIT
+        conditions: SQL predicates ANDed into the WHERE clause
+        params: Bind parameters for ``conditions``
+        cursor: Cursor from the previous page, or None for the first page
+        limit: Maximum rows per page
+
+    Returns:
+        The page rows and the cursor for the next page (None on the last page)
+    """
+    conditions = list(conditions)
+    params = dict(params)
+    if cursor:
+        cursor_created_at, cursor_id = decode_cursor(cursor)
+        conditions.append("(created_at, id) < (:cursor_created_at, :cursor_id)")
+        params.update(cursor_created_at=cursor_created_at, cursor_id=cursor_id)
+
+    where = " AND ".join(conditions) if conditions else "TRUE"
+    sql = f"{select_sql} WHERE {where} ORDER BY created_at DESC, id DESC LIMIT :limit"
+    # One extra row tells us whether another page exists without a COUNT
+    rows = [dict(row) for row in db.execute(text(sql), {**params, "limit": limit + 1}).mappings()]
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+    return rows, next_cursor
@@ -2,27 +2,39 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
+from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from typing import Dict, Any
+import asyncio
+import os
 import time
 import uuid
 
+import structlog
+
 from .core.config import settings
-from .core.logger import configure_logging, get_logger, log_request_middleware
+from .core.logger import (
+    configure_logging,
+    flush_logging,
+    get_logger,
+    log_request_middleware,
+    logging_stats,
+)
+from .core.rate_limit import limiter  # also registers the shm:// rate limit storage
+from .core.profiling import LoopLagMonitor, ProfilingMiddleware, install_task_factory
+from .core.shm_cache import cache_hit_stats
 from .services.ai.ai_evaluator import JobEvaluator, JobEvaluationRequest, JobEvaluationResponse
 from .db.session import SessionLocal
-from .api.endpoints import analysis
+from .api.endpoints import admin, analysis, auth, jobs, resumes, users
+from .services.resume.extraction import ResumeExtractor
+from .services.stats.stats_listener import StatsInvalidationListener
+from .services.usage.ledger import UsageLimitExceeded, begin_request_usage, get_usage_ledger
 from fastapi import Form
 
 # Configure logging
 configure_logging()
 logger = get_logger(__name__)
 
-# Initialize rate limiter
-limiter = Limiter(key_func=get_remote_address)
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Handles application startup and shutdown events."""
@@ -37,10 +49,22 @@ async def lifespan(app: FastAPI):
         logger.error(f"Database connection failed: {e}")
         raise
 
+    stats_listener = StatsInvalidationListener()
+    stats_listener.start()
+
+    install_task_factory(asyncio.get_running_loop())
+    loop_monitor = LoopLagMonitor()
+    await loop_monitor.start()
+
     yield
 
     # Shutdown
     logger.info("Shutting down CareerCompassAI API")
+    await loop_monitor.stop()
+    stats_listener.stop()
+    ResumeExtractor.shutdown()
+    await asyncio.to_thread(get_usage_ledger().flush)
+    flush_logging()
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -69,8 +93,12 @@ async def request_middleware(request: Request, call_next):
     request_id = str(uuid.uuid4())
     start_time = time.time()
 
-    # Add request context to logger
-    logger.bind(**log_request_middleware(request_id))
+    # Add request context to every log line of this request
+    structlog.contextvars.clear_contextvars()
+    structlog.contextvars.bind_contextvars(**log_request_middleware(request_id))
+
+    # Attribute provider usage to this request's route and, once authenticated, user
+    begin_request_usage(request.scope)
 
     try:
         response = await call_next(request)
@@ -81,7 +109,8 @@ async def request_middleware(request: Request, call_next):
             path=request.url.path,
             method=request.method,
             status_code=response.status_code,
-            duration=f"{process_time:.3f}s"
+            duration=f"{process_time:.3f}s",
+            duration_ms=int(process_time * 1000),
         )
 
         response.headers["X-Request-ID"] = request_id
@@ -97,6 +126,9 @@ async def request_middleware(request: Request, call_next):
         )
         raise
 
+# Outermost, so selected requests are profiled through every other middleware
+app.add_middleware(ProfilingMiddleware)
+
 @app.exception_handler(ValueError)
 async def validation_exception_handler(request: Request, exc: ValueError):
     """Handles validation errors."""
@@ -108,6 +140,17 @@ async def validation_exception_handler(request: Request, exc: ValueError):
         }
     )
 
+@app.exception_handler(UsageLimitExceeded)
+async def usage_limit_exception_handler(request: Request, exc: UsageLimitExceeded):
+    """Handles exhausted provider token allowances."""
+    return JSONResponse(
+        status_code=429,
+        content={
+            "error": "Usage Limit Exceeded",
+            "detail": str(exc)
+        }
+    )
+
 @app.exception_handler(Exception)
 async def general_exception_handler(request: Request, exc: Exception):
     """Handles general exceptions."""
@@ -121,7 +164,12 @@ async def general_exception_handler(request: Request, exc: Exception):
     )
 
 # Include routers
+app.include_router(admin.router, prefix=f"{settings.API_V1_STR}/admin", tags=["admin"])
 app.include_router(analysis.router, prefix="/api", tags=["analysis"])
+app.include_router(auth.router, prefix=f"{settings.API_V1_STR}/auth", tags=["auth"])
+app.include_router(jobs.router, prefix=f"{settings.API_V1_STR}/jobs", tags=["jobs"])
+app.include_router(resumes.router, prefix=f"{settings.API_V1_STR}/resumes", tags=["resumes"])
+app.include_router(users.router, prefix=f"{settings.API_V1_STR}/users", tags=["users"])
 
 @app.get("/")
 async def root() -> Dict[str, Any]:
@@ -148,7 +196,10 @@ async def health_check() -> Dict[str, Any]:
             "services": {
                 "api": "up",
                 "database": "up"
-            }
+            },
+            "worker_pid": os.getpid(),
+            "cache": cache_hit_stats(["job_eval", "job_eval_section", "dashboard_stats"]),
+            "logging": logging_stats(),
         }
     except Exception as e:
         logger.error(f"Health check failed: {e}")
@@ -192,6 +243,8 @@ async def evaluate_job(
         # This would be implemented in a real application
 
         return result
+    except UsageLimitExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
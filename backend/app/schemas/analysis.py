@@ -0,0 +1,20 @@
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from pydantic import BaseModel
+
+
+class AnalysisRecord(BaseModel):
+    """A stored AI analysis as returned by listing endpoints."""
+    id: UUID
+    job_posting_id: Optional[UUID] = None
+    analysis_type: Optional[str] = None
+    analysis_data: Optional[Dict[str, Any]] = None
+    score: Optional[Decimal] = None
+    provider: Optional[str] = None
+    model: Optional[str] = None
+    prompt_version: Optional[str] = None
+    recommendations: Optional[str] = None
+    created_at: datetime
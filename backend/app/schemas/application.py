@@ -0,0 +1,17 @@
+from datetime import date, datetime
+from typing import Optional
+from uuid import UUID
+
+from pydantic import BaseModel
+
+
+class UserApplication(BaseModel):
+    """A user's job application as returned by listing endpoints."""
+    id: UUID
+    job_posting_id: Optional[UUID] = None
+    status: Optional[str] = None
+    application_date: Optional[date] = None
+    notes: Optional[str] = None
+    resume_version: Optional[str] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
@@ -0,0 +1,38 @@
+from datetime import date, datetime
+from typing import List, Optional
+from uuid import UUID
+
+from pydantic import BaseModel
+
+
+class JobPosting(BaseModel):
+    """Job posting as returned by listing endpoints."""
+    id: UUID
+    title: str
+    company: str
+    location: Optional[str] = None
+    job_type: Optional[str] = None
+    remote_option: Optional[str] = None
+    salary_range: Optional[str] = None
+    posted_date: Optional[date] = None
+    application_deadline: Optional[date] = None
+    job_url: Optional[str] = None
+    created_at: datetime
+
+
+class IngestionReject(BaseModel):
+    """A source record that failed normalisation."""
+    line: int
+    error: str
+
+
+class IngestionReport(BaseModel):
+    """Outcome of a bulk posting ingestion run."""
+    rows_read: int = 0
+    inserted: int = 0
+    updated: int = 0
+    duplicates: int = 0
+    rejected: int = 0
+    rejects: List[IngestionReject] = []
+    duration_seconds: float = 0.0
+    rows_per_second: float = 0.0
@@ -0,0 +1,39 @@
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class ProfileInfo(BaseModel):
+    """A stored request profile."""
+    name: str
+    request_id: str
+    method: str
+    route: str
+    duration_ms: int
+    format: str
+    created_at: float
+    size: int
+
+
+class ProfilingToggleRequest(BaseModel):
+    """Profiles requests under a path prefix on every worker of the host."""
+    path_prefix: str = Field("/", max_length=255)
+    minutes: int = Field(10, ge=1, le=24 * 60)
+    max_profiles: int = Field(20, ge=1, le=1000)
+
+
+class ProfilingToggle(ProfilingToggleRequest):
+    """The active profiling toggle."""
+    expires_at: float
+
+
+class ProfileTokenRequest(BaseModel):
+    """Validity of a signed profiling header."""
+    minutes: int = Field(10, ge=1, le=24 * 60)
+
+
+class ProfileToken(BaseModel):
+    """A value for the X-Profile-Request header."""
+    header: str = "X-Profile-Request"
+    value: str
+    expires_in_minutes: Optional[int] = None
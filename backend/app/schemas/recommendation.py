@@ -0,0 +1,15 @@
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from pydantic import BaseModel
+
+
+class Recommendation(BaseModel):
+    """A precomputed job match for the current user."""
+    analysis_id: Optional[UUID] = None
+    job_posting_id: UUID
+    similarity: float
+    score: float
+    summary: str
+    created_at: Optional[datetime] = None
@@ -0,0 +1,15 @@
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from pydantic import BaseModel
+
+
+class Resume(BaseModel):
+    """A stored resume."""
+    id: UUID
+    title: str
+    content: Optional[str] = None
+    file_url: Optional[str] = None
+    is_default: bool = False
+    created_at: Optional[datetime] = None
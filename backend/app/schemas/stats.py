@@ -0,0 +1,21 @@
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+
+
+class DailyActivity(BaseModel):
+    """Applications and analyses recorded on one day."""
+    day: date
+    applications: int
+    analyses: int
+
+
+class DashboardStats(BaseModel):
+    """Pre-aggregated per-user statistics for the dashboard."""
+    applications_total: int = 0
+    applications_by_status: Dict[str, int] = {}
+    analyses_total: int = 0
+    average_score: Optional[float] = None
+    last_activity_at: Optional[datetime] = None
+    activity: List[DailyActivity] = []
@@ -0,0 +1,16 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class Token(BaseModel):
+    """OAuth2 access token response."""
+    access_token: str
+    token_type: str
+
+
+class TokenPayload(BaseModel):
+    """Claims carried by an access token."""
+    sub: Optional[str] = None
+    exp: Optional[int] = None
+    pwd: Optional[str] = None
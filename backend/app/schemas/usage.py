@@ -0,0 +1,27 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class UsageTotals(BaseModel):
+    """Provider calls, tokens, cost and latency summed over a group."""
+    provider: str
+    model: str
+    requests: int
+    errors: int
+    input_tokens: int
+    output_tokens: int
+    cost_usd: float
+    avg_latency_ms: Optional[float] = None
+    max_latency_ms: Optional[int] = None
+
+
+class UsageBucket(UsageTotals):
+    """Usage of one provider model in one time bucket."""
+    bucket: datetime
+
+
+class FeatureUsage(UsageTotals):
+    """Usage of one provider model by one route or background feature."""
+    route: str
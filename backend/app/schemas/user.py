@@ -0,0 +1,35 @@
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+
+
+class UserBase(BaseModel):
+    """Fields shared by user schemas."""
+    email: str = Field(..., max_length=255, pattern=r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+    full_name: Optional[str] = Field(default=None, max_length=255)
+
+
+class UserCreate(UserBase):
+    """Payload for registering a user."""
+    password: str = Field(..., min_length=8, max_length=72)
+
+
+class UserUpdate(BaseModel):
+    """Payload for updating the current user."""
+    full_name: Optional[str] = Field(default=None, max_length=255)
+    password: Optional[str] = Field(default=None, min_length=8, max_length=72)
+
+
+class User(UserBase):
+    """User as returned by the API."""
+    id: UUID
+    is_active: bool = True
+    is_verified: bool = False
+    created_at: Optional[datetime] = None
+
+
+class UserInDB(User):
+    """User as stored, including the password hash."""
+    hashed_password: str
@@ -1,17 +1,30 @@
 from datetime import datetime
 import hashlib
 import json
-from typing import List, Optional, Dict, Any
-import redis
-from pydantic import BaseModel, Field, validator
-from tenacity import retry, stop_after_attempt, wait_exponential
-import openai
-import anthropic
+import uuid
+from typing import Callable, List, Optional, Dict, Any, Tuple
+import asyncio
+from pydantic import BaseModel, Field, ValidationError, validator
+from tenacity import retry, retry_if_not_exception_type, stop_after_attempt, wait_exponential
 from ...core.config import settings
+from ...core.cache import JSONCache, get_redis
 from ...core.logger import get_logger
+from ...core.shm_cache import get_shared_table, record_cache_lookup
+from ..search.embeddings import HashingEmbedder
+from ..search.vector_index import get_vector_index
+from ..skills.extractor import get_skill_extractor
+from ..usage.ledger import UsageLimitExceeded
+from .providers import ProviderRequest, TraceMissError, get_provider_backend, provider_trace_context
+from .sections import section_hash, split_sections
 
 logger = get_logger(__name__)
 
+# Characters of cached strengths/gaps quoted per reused section
+_FINDINGS_CHARS = 80
+
+# Stored with each analysis; bump when the evaluation prompts change
+PROMPT_VERSION = "2026.10"
+
 class JobEvaluationRequest(BaseModel):
     """Request model for job evaluation."""
     job_description: str = Field(..., min_length=50, max_length=settings.MAX_JOB_DESC_LENGTH)
@@ -31,45 +44,47 @@ class JobEvaluationResponse(BaseModel):
     gaps: List[str]
     suggested_questions: List[str]
     career_advice: str
+    skill_score: Optional[float] = None  # share of the job's skills found locally
+    matched_skills: List[str] = []
+    missing_skills: List[str] = []
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
 class CacheManager:
-    """Manages caching of job evaluations using Redis."""
-    
+    """
+    Manages caching of job evaluations.
+
+    Uses Redis when it is reachable and otherwise the host-wide shared
+    memory table, so all workers on a host share one evaluation cache.
+    """
+
+    namespace = "job_eval"
+
     def __init__(self):
-        """Initializes Redis connection with fallback to dummy cache."""
-        try:
-            self.redis = redis.Redis(
-                host=settings.REDIS_HOST,
-                port=settings.REDIS_PORT,
-                password=settings.REDIS_PASSWORD,
-                db=settings.REDIS_DB,
-                decode_responses=True
-            )
-            self.redis.ping()
-            self.cache_available = True
-        except redis.ConnectionError:
-            logger.warning("Redis connection failed, using in-memory cache fallback")
-            self.cache_available = False
-            self._memory_cache = {}
+        """Uses the process-wide Redis client, falling back to shared memory."""
+        self.redis = get_redis()
+        self.cache_available = self.redis is not None
+        self.shared = None if self.cache_available else get_shared_table()
 
     def generate_cache_key(self, request: JobEvaluationRequest) -> str:
         """Generates a unique cache key for the evaluation request."""
         content = f"{request.job_description}:{request.your_background}:{request.ai_provider}"
-        return f"job_eval:{hashlib.sha256(content.encode()).hexdigest()}"
+        return f"{self.namespace}:{hashlib.sha256(content.encode()).hexdigest()}"
 
     def get_cached_response(self, key: str) -> Optional[JobEvaluationResponse]:
         """Retrieves cached evaluation response."""
+        data = None
         try:
             if self.cache_available:
                 data = self.redis.get(key)
             else:
-                data = self._memory_cache.get(key)
-            
+                data = self.shared.get(key)
+
             if data:
                 return JobEvaluationResponse(**json.loads(data))
         except Exception as e:
             logger.error(f"Cache retrieval error: {e}")
+        finally:
+            record_cache_lookup(self.namespace, bool(data))
         return None
 
     def cache_response(self, key: str, response: JobEvaluationResponse) -> None:
@@ -78,8 +93,8 @@ class CacheManager:
             data = response.model_dump_json()
             if self.cache_available:
                 self.redis.setex(key, settings.CACHE_TTL, data)
-            else:
-                self._memory_cache[key] = data
+            elif not self.shared.set(key, data.encode(), ttl=settings.CACHE_TTL):
+                logger.warning(f"Evaluation of {len(data)} bytes exceeds the shared cache slot size")
         except Exception as e:
             logger.error(f"Cache storage error: {e}")
 
@@ -87,12 +102,26 @@ class JobEvaluator:
     """Handles job evaluation using AI providers."""
     
     def __init__(self):
-        """Initializes AI clients and cache manager."""
+        """Initializes the provider backend, cache manager and the job vector index."""
         self.cache = CacheManager()
-        self.openai_client = openai.Client(api_key=settings.OPENAI_API_KEY)
-        self.anthropic_client = anthropic.Anthropic(api_key=settings.ANTHROPIC_API_KEY)
+        self.backend = get_provider_backend()
+        self.embedder = HashingEmbedder()
+        self.job_index = get_vector_index("job_postings")
+        self.section_cache = JSONCache("job_eval_section", ttl=settings.SECTION_CACHE_TTL)
+        self.skill_extractor = get_skill_extractor()
+
+    def _create_skills_summary(self, skills: Dict[str, Any]) -> str:
+        """Condenses locally extracted skills into a few prompt lines."""
+        if not skills["job_skills"]:
+            return "No known skills were found in the job description."
+        return (
+            f"Job skills: {', '.join(skills['job_skills'])}\n"
+            f"        Matched in background: {', '.join(skills['matched']) or 'none'}\n"
+            f"        Not found in background: {', '.join(skills['missing']) or 'none'}\n"
+            f"        Local skills coverage: {skills['score']:.0f}/100"
+        )
 
-    def _create_evaluation_prompt(self, job_description: str, background: str) -> str:
+    def _create_evaluation_prompt(self, job_description: str, background: str, skills_summary: str = "") -> str:
         """Creates a comprehensive prompt for AI evaluation."""
         return f"""Analyze the job fit between the candidate's background and the job description. 
         Provide a detailed evaluation with the following components:
@@ -115,53 +144,177 @@ class JobEvaluator:
         Candidate Background:
         {background}
 
+        Skills extracted from both texts (use for the skills component; the
+        extractor may miss skills phrased unusually):
+        {skills_summary}
+
         Provide the analysis in JSON format with the following structure:
-        {
+        {{
             "score": float,
             "summary": string,
             "strengths": string[],
             "gaps": string[],
             "suggested_questions": string[],
             "career_advice": string
-        }"""
+        }}"""
 
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10)
-    )
-    async def _call_openai(self, prompt: str) -> Dict[str, Any]:
-        """Makes API call to OpenAI with retry logic."""
-        try:
-            response = await self.openai_client.chat.completions.create(
-                model=settings.OPENAI_MODEL,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.7,
-                response_format={"type": "json_object"}
-            )
-            return json.loads(response.choices[0].message.content)
-        except Exception as e:
-            logger.error(f"OpenAI API error: {e}")
-            raise
+    def _create_section_prompt(
+        self,
+        job_description: str,
+        changed: List[Tuple[str, str, str]],
+        reused: List[Tuple[str, Dict[str, Any]]],
+        skills_summary: str = "",
+    ) -> str:
+        """Creates a focused prompt that evaluates only changed background sections."""
+        sections_to_evaluate = "\n\n".join(
+            f"[{section_id}] {label}:\n{text}" for section_id, label, text in changed
+        ) or "(none - all sections were evaluated previously)"
+        # Findings are truncated: they only give context for the overall score
+        previous_findings = "\n".join(
+            f"- {label} (score {result['score']}): "
+            f"+ {'; '.join(result['strengths'])[:_FINDINGS_CHARS] or 'none'} "
+            f"- {'; '.join(result['gaps'])[:_FINDINGS_CHARS] or 'none'}"
+            for label, result in reused
+        ) or "(none)"
+
+        return f"""Analyze the job fit between the candidate's background and the job description.
+        The background is split into sections. Evaluate ONLY the sections listed under
+        "Sections to evaluate"; the other sections were already evaluated and their
+        findings are listed for context.
+
+        For each section to evaluate, give:
+           - A score (0-100) for how well the section supports the job, using the
+             weights skills 40%, experience 30%, education 20%, cultural fit 10%
+           - Strengths and gaps attributable to that section only
+
+        Then, considering ALL sections, give the overall match score (0-100), a
+        summary, relevant behavioral interview questions and career development advice.
+
+        Job Description:
+        {job_description}
+
+        Sections to evaluate:
+        {sections_to_evaluate}
+
+        Previously evaluated sections:
+        {previous_findings}
+
+        Skills extracted from the job and the whole background:
+        {skills_summary}
+
+        Provide the analysis in JSON format with the following structure:
+        {{
+            "sections": {{
+                "<section id>": {{"score": float, "strengths": string[], "gaps": string[]}}
+            }},
+            "score": float,
+            "summary": string,
+            "suggested_questions": string[],
+            "career_advice": string
+        }}"""
+
+    @staticmethod
+    def model_name(ai_provider: str) -> str:
+        """Returns the model used for the given provider."""
+        return settings.ANTHROPIC_MODEL if ai_provider == "anthropic" else settings.OPENAI_MODEL
 
     @retry(
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10)
+        wait=wait_exponential(multiplier=1, min=4, max=10),
+        retry=retry_if_not_exception_type((UsageLimitExceeded, TraceMissError)),
     )
-    async def _call_anthropic(self, prompt: str) -> Dict[str, Any]:
-        """Makes API call to Anthropic with retry logic."""
-        try:
-            response = await self.anthropic_client.messages.create(
-                model=settings.ANTHROPIC_MODEL,
-                max_tokens=1000,
-                messages=[{
-                    "role": "user",
-                    "content": prompt
-                }]
-            )
-            return json.loads(response.content[0].text)
-        except Exception as e:
-            logger.error(f"Anthropic API error: {e}")
-            raise
+    async def _complete(self, request: ProviderRequest) -> Dict[str, Any]:
+        """Runs a completion with retry logic and parses its JSON answer."""
+        completion = await self.backend.complete(request)
+        return json.loads(completion.text)
+
+    async def _call_provider(self, ai_provider: str, prompt: str) -> Dict[str, Any]:
+        """Dispatches a prompt to the requested AI provider."""
+        messages = [{"role": "user", "content": prompt}]
+        if ai_provider == "openai":
+            return await self._complete(ProviderRequest(
+                "openai", settings.OPENAI_MODEL, messages, temperature=0.7, json_response=True
+            ))
+        elif ai_provider == "anthropic":
+            return await self._complete(ProviderRequest(
+                "anthropic", settings.ANTHROPIC_MODEL, messages, max_tokens=1000
+            ))
+        raise ValueError(f"Invalid AI provider: {ai_provider}")
+
+    async def _evaluate_incremental(self, request: JobEvaluationRequest, skills_summary: str = "") -> JobEvaluationResponse:
+        """
+        Evaluates only the background sections not seen before for this job.
+
+        Each section's score, strengths and gaps are cached under a hash of the
+        prompt version, job description, provider and section text. On a re-run after an edit,
+        unchanged sections are served from that cache and only the edited ones
+        are sent to the provider; their cached findings go along in compact
+        form so the overall score and narrative still reflect the whole
+        background.
+        """
+        sections = split_sections(request.your_background)
+        keys = [
+            section_hash(request.job_description, request.ai_provider, text, PROMPT_VERSION)
+            for _, text in sections
+        ]
+        cached = [self.section_cache.get(key) for key in keys]
+
+        changed = [
+            (f"S{i}", label, text)
+            for i, ((label, text), result) in enumerate(zip(sections, cached), start=1)
+            if result is None
+        ]
+        reused = [
+            (label, result)
+            for (label, _), result in zip(sections, cached)
+            if result is not None
+        ]
+
+        prompt = self._create_section_prompt(request.job_description, changed, reused, skills_summary)
+        result = await self._call_provider(request.ai_provider, prompt)
+
+        fresh = result.get("sections") or {}
+        section_results: List[Dict[str, Any]] = []
+        for i, (key, previous) in enumerate(zip(keys, cached), start=1):
+            if previous is None:
+                section_result = fresh.get(f"S{i}")
+                if not isinstance(section_result, dict):
+                    section_result = {"score": None, "strengths": [], "gaps": []}
+                else:
+                    section_result = {
+                        "score": section_result.get("score"),
+                        "strengths": list(section_result.get("strengths") or []),
+                        "gaps": list(section_result.get("gaps") or []),
+                    }
+                    self.section_cache.set(key, section_result)
+                previous = section_result
+            section_results.append(previous)
+
+        score = result.get("score")
+        if score is None:
+            # Fall back to a length-weighted average of the section scores
+            weighted = [
+                (r["score"], len(text))
+                for r, (_, text) in zip(section_results, sections)
+                if r["score"] is not None
+            ]
+            total = sum(length for _, length in weighted)
+            score = sum(s * length for s, length in weighted) / total if total else 0
+
+        logger.info(
+            "incremental_evaluation",
+            sections_total=len(sections),
+            sections_reused=len(reused),
+            prompt_chars=len(prompt),
+        )
+        return JobEvaluationResponse(
+            score=max(0.0, min(100.0, float(score))),
+            summary=result.get("summary", ""),
+            strengths=list(dict.fromkeys(s for r in section_results for s in r["strengths"])),
+            gaps=list(dict.fromkeys(g for r in section_results for g in r["gaps"])),
+            suggested_questions=result.get("suggested_questions", []),
+            career_advice=result.get("career_advice", ""),
+        )
 
     async def evaluate_job(self, request: JobEvaluationRequest) -> JobEvaluationResponse:
         """
@@ -185,25 +338,114 @@ class JobEvaluator:
                 logger.info("Returning cached evaluation")
                 return cached_response
 
-            # Create evaluation prompt
-            prompt = self._create_evaluation_prompt(
-                request.job_description,
-                request.your_background
-            )
-
-            # Call appropriate AI provider
-            if request.ai_provider == "openai":
-                result = await self._call_openai(prompt)
-            elif request.ai_provider == "anthropic":
-                result = await self._call_anthropic(prompt)
-            else:
-                raise ValueError(f"Invalid AI provider: {request.ai_provider}")
+            # Extract skills locally; the provider only has to weigh them
+            skills = self.skill_extractor.match(request.job_description, request.your_background)
+            skills_summary = self._create_skills_summary(skills)
+
+            # Groups the calls in provider traces by evaluation; the request
+            # itself is already in the recorded prompts
+            with provider_trace_context(evaluation=uuid.uuid4().hex):
+                if settings.INCREMENTAL_EVALUATION:
+                    # Reuse per-section results from earlier versions of the background
+                    response = await self._evaluate_incremental(request, skills_summary)
+                else:
+                    # Create evaluation prompt
+                    prompt = self._create_evaluation_prompt(
+                        request.job_description,
+                        request.your_background,
+                        skills_summary,
+                    )
+
+                    # Call appropriate AI provider
+                    result = await self._call_provider(request.ai_provider, prompt)
+                    response = JobEvaluationResponse(**result)
 
-            # Create and cache response
-            response = JobEvaluationResponse(**result)
+            response = response.model_copy(update={
+                "skill_score": skills["score"],
+                "matched_skills": skills["matched"],
+                "missing_skills": skills["missing"],
+            })
+
+            # Cache the complete response
             self.cache.cache_response(cache_key, response)
             return response
 
         except Exception as e:
             logger.error(f"Job evaluation error: {e}")
-            raise
\ No newline at end of file
+            raise
+
+    def rank_jobs(self, your_background: str, top_k: int = settings.VECTOR_TOP_K) -> List[Tuple[str, float]]:
+        """
+        Ranks indexed job postings by semantic similarity to a background.
+
+        Args:
+            your_background: Candidate resume or background text
+            top_k: Number of postings to return
+
+        Returns:
+            List of (job_posting_id, similarity) pairs, best match first
+        """
+        return self.job_index.search(self.embedder.embed(your_background), top_k=top_k)
+
+    async def evaluate_top_jobs(
+        self,
+        your_background: str,
+        fetch_descriptions: Callable[[List[str]], Dict[str, str]],
+        top_k: int = settings.VECTOR_TOP_K,
+        ai_provider: str = "openai",
+    ) -> List[Tuple[str, float, JobEvaluationResponse]]:
+        """
+        Runs full AI evaluation only for the postings closest to a background.
+
+        The vector index shortlists candidates locally, so the provider is
+        called at most ``top_k`` times regardless of the corpus size.
+        Postings too short to evaluate are skipped, and a failed evaluation
+        drops only its own posting from the result.
+
+        Args:
+            your_background: Candidate resume or background text
+            fetch_descriptions: Loads job descriptions for a list of posting ids
+            top_k: Number of shortlisted postings to evaluate
+            ai_provider: Provider used for the full evaluations
+
+        Returns:
+            List of (job_posting_id, similarity, evaluation), best match first
+
+        Raises:
+            Exception: The first evaluation error, if no evaluation succeeded
+        """
+        ranked = await asyncio.to_thread(self.rank_jobs, your_background, top_k)
+        descriptions = await asyncio.to_thread(fetch_descriptions, [job_id for job_id, _ in ranked])
+
+        shortlisted = []
+        for job_id, score in ranked:
+            if not descriptions.get(job_id):
+                continue
+            try:
+                request = JobEvaluationRequest(
+                    job_description=descriptions[job_id][:settings.MAX_JOB_DESC_LENGTH],
+                    your_background=your_background,
+                    ai_provider=ai_provider,
+                )
+            except ValidationError as e:
+                logger.warning("match_posting_skipped", job_posting_id=job_id, error=str(e))
+                continue
+            shortlisted.append((job_id, score, request))
+
+        outcomes = await asyncio.gather(
+            *[self.evaluate_job(request) for _, _, request in shortlisted],
+            return_exceptions=True,
+        )
+        results = []
+        errors = []
+        for (job_id, score, _), outcome in zip(shortlisted, outcomes):
+            if isinstance(outcome, Exception):
+                logger.error("match_evaluation_failed", job_posting_id=job_id, error=str(outcome))
+                errors.append(outcome)
+            elif isinstance(outcome, BaseException):
+                raise outcome
+            else:
+                results.append((job_id, score, outcome))
+        if errors and not results:
+            raise errors[0]
+        return results
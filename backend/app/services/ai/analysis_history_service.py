@@ -0,0 +1,140 @@
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+
+from ...db.pagination import fetch_keyset_page
+
+
+def hash_cache_key(cache_key: str) -> bytes:
+    """Returns the digest stored in ai_analysis.cache_key_hash for a cache key."""
+    return hashlib.sha256(cache_key.encode()).digest()
+
+
+class AnalysisHistoryService:
+    """Service for reading stored AI analyses."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def list_analyses(
+        self,
+        user_id: str,
+        job_posting_id: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = 20,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Lists a user's past analyses, newest first.
+
+        Args:
+            user_id: Owner of the analyses
+            job_posting_id: Optional filter to analyses of a single job
+            cursor: Cursor returned with the previous page
+            limit: Maximum analyses per page
+
+        Returns:
+            The page of analyses and the cursor for the next page
+        """
+        conditions = ["user_id = :user_id"]
+        params: Dict[str, Any] = {"user_id": user_id}
+        if job_posting_id:
+            conditions.append("job_posting_id = :job_posting_id")
+            params["job_posting_id"] = job_posting_id
+        return fetch_keyset_page(
+            self.db,
+            "SELECT id, job_posting_id, analysis_type, analysis_data, score, provider, model, "
+            "prompt_version, analysis_data ->> 'career_advice' AS recommendations, created_at "
+            "FROM ai_analysis",
+            conditions,
+            params,
+            cursor,
+            limit,
+        )
+
+    def save_evaluation(
+        self,
+        user_id: str,
+        job_posting_id: str,
+        evaluation: Dict[str, Any],
+        analysis_type: str = "resume_match",
+        provider: Optional[str] = None,
+        model: Optional[str] = None,
+        prompt_version: Optional[str] = None,
+        cache_key: Optional[str] = None,
+    ) -> str:
+        """
+        Stores a job evaluation in the analysis history.
+
+        Args:
+            user_id: User the evaluation belongs to
+            job_posting_id: Evaluated job posting
+            evaluation: JobEvaluationResponse as a JSON-compatible dict
+            analysis_type: Kind of analysis
+            provider: AI provider that produced the evaluation
+            model: Provider model name
+            prompt_version: Version of the evaluation prompts used
+            cache_key: Evaluation cache key, stored as its SHA-256
+
+        Returns:
+            Id of the stored analysis
+        """
+        analysis_id = self.db.execute(text(
+            "INSERT INTO ai_analysis "
+            "(user_id, job_posting_id, analysis_type, analysis_data, score, "
+            "provider, model, prompt_version, cache_key_hash) "
+            "VALUES (:user_id, :job_posting_id, :analysis_type, CAST(:analysis_data AS JSONB), "
+            ":score, :provider, :model, :prompt_version, :cache_key_hash) RETURNING id"
+        ), {
+            "user_id": user_id,
+            "job_posting_id": job_posting_id,
+            "analysis_type": analysis_type,
+            "analysis_data": json.dumps(evaluation, default=str),
+            "score": round(evaluation["score"] / 100, 2),
+            "provider": provider,
+            "model": model,
+            "prompt_version": prompt_version,
+            "cache_key_hash": hash_cache_key(cache_key) if cache_key else None,
+        }).scalar_one()
+        self.db.commit()
+        return str(analysis_id)
+
+    def evaluated_job_ids(self, user_id: str, job_posting_ids: List[str]) -> Set[str]:
+        """
+        Returns which of the given postings already have an analysis for a user.
+
+        Args:
+            user_id: User to check
+            job_posting_ids: Candidate job postings
+
+        Returns:
+            Subset of ``job_posting_ids`` with a stored analysis
+        """
+        if not job_posting_ids:
+            return set()
+        stmt = text(
+            "SELECT DISTINCT job_posting_id FROM ai_analysis "
+            "WHERE user_id = :user_id AND job_posting_id IN :job_posting_ids"
+        ).bindparams(bindparam("job_posting_ids", expanding=True))
+        rows = self.db.execute(stmt, {"user_id": user_id, "job_posting_ids": job_posting_ids})
+        return {str(row.job_posting_id) for row in rows}
+
+    def find_by_cache_key(self, cache_key: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Lists stored analyses produced from one evaluation cache entry, newest first.
+
+        Args:
+            cache_key: Evaluation cache key (see CacheManager.generate_cache_key)
+            limit: Maximum analyses to return
+
+        Returns:
+            Matching analyses with their owner, job and provenance columns
+        """
+        rows = self.db.execute(text(
+            "SELECT id, user_id, job_posting_id, score, provider, model, prompt_version, created_at "
+            "FROM ai_analysis WHERE cache_key_hash = :cache_key_hash "
+            "ORDER BY created_at DESC LIMIT :limit"
+        ), {"cache_key_hash": hash_cache_key(cache_key), "limit": limit})
+        return [dict(row._mapping) for row in rows]
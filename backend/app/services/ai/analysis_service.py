@@ -1,12 +1,27 @@
 from typing import Dict, List, Any, Optional
-import openai
-from ...core.config import settings
+from .providers import ProviderRequest, get_provider_backend
 
 class AnalysisService:
     """Service for AI-powered analysis of resumes and job descriptions."""
+
+    model = "gpt-4"
     
     def __init__(self):
-        openai.api_key = settings.OPENAI_API_KEY
+        self.backend = get_provider_backend()
+
+    async def _complete(self, system: str, user: str, temperature: float) -> str:
+        """Runs one chat completion through the provider backend."""
+        completion = await self.backend.complete(ProviderRequest(
+            "openai",
+            self.model,
+            [
+                {"role": "system", "content": system},
+                {"role": "user", "content": user}
+            ],
+            temperature=temperature,
+            max_tokens=1000,
+        ))
+        return completion.text
     
     async def analyze_resume(self, resume_text: str) -> Dict[str, Any]:
         """
@@ -19,18 +34,14 @@ class AnalysisService:
             Dict containing analysis results
         """
         try:
-            response = await openai.ChatCompletion.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "You are an expert career advisor. Analyze this resume and provide detailed feedback."},
-                    {"role": "user", "content": f"Please analyze this resume and provide feedback:\n\n{resume_text}"}
-                ],
+            content = await self._complete(
+                "You are an expert career advisor. Analyze this resume and provide detailed feedback.",
+                f"Please analyze this resume and provide feedback:\n\n{resume_text}",
                 temperature=0.5,
-                max_tokens=1000
             )
             
             # Process the response to extract structured feedback
-            analysis = self._process_resume_analysis(response.choices[0].message.content)
+            analysis = self._process_resume_analysis(content)
             return analysis
             
         except Exception as e:
@@ -52,18 +63,14 @@ class AnalysisService:
             Dict containing match analysis and score
         """
         try:
-            response = await openai.ChatCompletion.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "You are an expert ATS system that evaluates resumes against job descriptions."},
-                    {"role": "user", "content": f"Evaluate how well this resume matches the job description. Provide a match percentage and detailed feedback.\n\nRESUME:\n{resume_text}\n\nJOB DESCRIPTION:\n{job_description}"}
-                ],
+            content = await self._complete(
+                "You are an expert ATS system that evaluates resumes against job descriptions.",
+                f"Evaluate how well this resume matches the job description. Provide a match percentage and detailed feedback.\n\nRESUME:\n{resume_text}\n\nJOB DESCRIPTION:\n{job_description}",
                 temperature=0.5,
-                max_tokens=1000
             )
             
             # Process the response to extract structured feedback
-            analysis = self._process_job_match_analysis(response.choices[0].message.content)
+            analysis = self._process_job_match_analysis(content)
             return analysis
             
         except Exception as e:
@@ -85,18 +92,14 @@ class AnalysisService:
             Dict containing generated interview questions
         """
         try:
-            response = await openai.ChatCompletion.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "You are an expert interviewer who creates tailored interview questions."},
-                    {"role": "user", "content": f"Generate 10 interview questions based on this resume and job description. Include both technical questions and behavioral questions.\n\nRESUME:\n{resume_text}\n\nJOB DESCRIPTION:\n{job_description}"}
-                ],
+            content = await self._complete(
+                "You are an expert interviewer who creates tailored interview questions.",
+                f"Generate 10 interview questions based on this resume and job description. Include both technical questions and behavioral questions.\n\nRESUME:\n{resume_text}\n\nJOB DESCRIPTION:\n{job_description}",
                 temperature=0.7,
-                max_tokens=1000
             )
             
             # Extract questions from response
-            questions = self._extract_interview_questions(response.choices[0].message.content)
+            questions = self._extract_interview_questions(content)
             return {
                 "success": True,
                 "questions": questions
@@ -0,0 +1,517 @@
+import asyncio
+import heapq
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import bindparam, text
+
+from ...core.cache import JSONCache
+from ...core.config import settings
+from ...core.logger import get_logger
+from ...db.session import SessionLocal
+from ..jobs.job_service import JobService
+from ..search.embeddings import HashingEmbedder, build_posting_text
+from ..search.vector_index import get_vector_index
+from ..usage.ledger import UsageLimitExceeded, check_usage_limit, usage_scope
+from .ai_evaluator import PROMPT_VERSION, JobEvaluationRequest, JobEvaluator
+from .analysis_history_service import AnalysisHistoryService
+
+logger = get_logger(__name__)
+
+CHECKPOINT_NAME = "default_resume_matches"
+
+# (user_id, resume_id, job_posting_id, similarity)
+Candidate = Tuple[str, str, str, float]
+
+
+def recommendations_cache() -> JSONCache:
+    """Cache holding each user's precomputed recommendations."""
+    return JSONCache("recommendations", ttl=settings.RECOMMENDATIONS_TTL)
+
+
+def in_offpeak_window(now: Optional[datetime] = None) -> bool:
+    """Returns whether ``now`` (UTC) falls inside the configured off-peak hours."""
+    hour = (now or datetime.now(timezone.utc)).hour
+    start, end = settings.PRECOMPUTE_WINDOW_START_HOUR, settings.PRECOMPUTE_WINDOW_END_HOUR
+    if start <= end:
+        return start <= hour < end
+    return hour >= start or hour < end
+
+
+class TokenBudget:
+    """Per-user and global token allowances for one pipeline run."""
+
+    def __init__(
+        self,
+        per_user: int = settings.PRECOMPUTE_USER_TOKEN_BUDGET,
+        global_limit: int = settings.PRECOMPUTE_GLOBAL_TOKEN_BUDGET,
+    ):
+        self.per_user = per_user
+        self.global_limit = global_limit
+        self.used = 0
+        self._used_by_user: Dict[str, int] = {}
+
+    @property
+    def exhausted(self) -> bool:
+        return self.used >= self.global_limit
+
+    def try_reserve(self, user_id: str, tokens: int) -> bool:
+        """Reserves ``tokens`` for a user if both budgets and the user's usage limits allow it."""
+        user_used = self._used_by_user.get(user_id, 0)
+        if self.used + tokens > self.global_limit or user_used + tokens > self.per_user:
+            return False
+        try:
+            check_usage_limit(user_id, tokens)
+        except UsageLimitExceeded:
+            return False
+        self.used += tokens
+        self._used_by_user[user_id] = user_used + tokens
+        return True
+
+
+class RequestRateLimiter:
+    """Spaces provider requests evenly to stay under a requests-per-minute cap."""
+
+    def __init__(self, requests_per_minute: int = settings.PRECOMPUTE_REQUESTS_PER_MINUTE):
+        self.interval = 60.0 / max(requests_per_minute, 1)
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class PrecomputePipeline:
+    """
+    Pre-evaluates new job postings against users' default resumes.
+
+    Each run scans postings created after the stored checkpoint in keyset
+    order. Every batch is shortlisted locally: hashing embeddings of the
+    postings are scored against the default resumes' vectors from the
+    ``user_resumes`` index with one matrix product per resume chunk, keeping
+    each user's top matches above a similarity floor. Only the shortlisted
+    pairs that have not been evaluated before are sent to the provider,
+    through a rate-limited worker pool with per-user and global token
+    budgets.
+
+    Results land in ``ai_analysis``, in the evaluation cache (via
+    ``JobEvaluator``) and in each user's recommendations list, so the
+    recommendations page is a pure cache read. The checkpoint only advances
+    past a batch once all of its pairs are evaluated or deliberately
+    skipped. Pairs deferred by a token budget, a usage limit or a provider
+    error hold it at the last complete batch, so the next run picks them up
+    again; later batches are still processed, and pairs already evaluated
+    are skipped cheaply when they are rescanned. Failures are counted per
+    pair in ``precompute_failures``; a pair that fails
+    PRECOMPUTE_MAX_ATTEMPTS times is given up, so it cannot hold the
+    checkpoint forever.
+    """
+
+    def __init__(self, respect_window: bool = True):
+        self.respect_window = respect_window
+        self.embedder = HashingEmbedder()
+        self.evaluator = JobEvaluator()
+        self.budget = TokenBudget()
+        self.rate_limiter = RequestRateLimiter()
+        self.recommendations = recommendations_cache()
+        self._resumes: Optional[List[Tuple[List[str], List[str]]]] = None
+        self.stats = {
+            "postings_scanned": 0,
+            "pairs_shortlisted": 0,
+            "evaluations": 0,
+            "skipped_existing": 0,
+            "skipped_budget": 0,
+            "failures": 0,
+            "skipped_failed": 0,
+            "resumes_embedded": 0,
+        }
+
+    async def run(self) -> Dict[str, Any]:
+        """
+        Processes new postings until caught up, out of budget or out of window.
+
+        Returns:
+            Counters and throughput for the run
+        """
+        started = time.perf_counter()
+        checkpoint = await asyncio.to_thread(self._load_checkpoint)
+        held = False
+
+        while self._may_continue():
+            postings = await asyncio.to_thread(self._fetch_postings, checkpoint)
+            if not postings:
+                break
+
+            if self._resumes is None:
+                self._resumes = await asyncio.to_thread(self._load_resumes)
+            candidates = await asyncio.to_thread(self._shortlist, postings)
+            candidates = await asyncio.to_thread(self._drop_evaluated, candidates)
+            completed = await self._evaluate(candidates)
+            self.stats["postings_scanned"] += len(postings)
+
+            checkpoint = (postings[-1]["created_at"], str(postings[-1]["id"]))
+            if completed and not held:
+                await asyncio.to_thread(self._save_checkpoint, checkpoint)
+            elif not held:
+                held = True
+                logger.info("precompute_checkpoint_held", after_posting_id=str(postings[0]["id"]))
+
+        elapsed = time.perf_counter() - started
+        report = {
+            **self.stats,
+            "checkpoint_held": held,
+            "tokens_reserved": self.budget.used,
+            "duration_seconds": round(elapsed, 1),
+            "evaluations_per_minute": round(self.stats["evaluations"] * 60 / max(elapsed, 1e-9), 1),
+        }
+        logger.info("precompute_run_finished", **report)
+        return report
+
+    def _may_continue(self) -> bool:
+        if self.budget.exhausted:
+            return False
+        return not self.respect_window or in_offpeak_window()
+
+    # ------------------------------------------------------------------ #
+    # Checkpoint and inputs
+    # ------------------------------------------------------------------ #
+
+    def _load_checkpoint(self) -> Optional[Tuple[datetime, str]]:
+        db = SessionLocal()
+        try:
+            row = db.execute(text(
+                "SELECT last_created_at, last_id FROM precompute_checkpoints WHERE name = :name"
+            ), {"name": CHECKPOINT_NAME}).first()
+            if row is None or row.last_created_at is None:
+                return None
+            return row.last_created_at, str(row.last_id)
+        finally:
+            db.close()
+
+    def _save_checkpoint(self, checkpoint: Tuple[datetime, str]) -> None:
+        db = SessionLocal()
+        try:
+            db.execute(text(
+                "INSERT INTO precompute_checkpoints (name, last_created_at, last_id, updated_at) "
+                "VALUES (:name, :created_at, :id, NOW()) "
+                "ON CONFLICT (name) DO UPDATE SET last_created_at = EXCLUDED.last_created_at, "
+                "last_id = EXCLUDED.last_id, updated_at = NOW()"
+            ), {"name": CHECKPOINT_NAME, "created_at": checkpoint[0], "id": checkpoint[1]})
+            db.commit()
+        finally:
+            db.close()
+
+    def _fetch_postings(self, checkpoint: Optional[Tuple[datetime, str]]) -> List[Dict[str, Any]]:
+        """Loads the next batch of active postings after the checkpoint, oldest first."""
+        conditions = ["is_active"]
+        params: Dict[str, Any] = {"limit": settings.PRECOMPUTE_POSTING_BATCH}
+        if checkpoint:
+            conditions.append("(created_at, id) > (:created_at, :id)")
+            params.update(created_at=checkpoint[0], id=checkpoint[1])
+
+        db = SessionLocal()
+        try:
+            rows = db.execute(text(
+                "SELECT id, title, company, description, requirements, created_at "
+                f"FROM job_postings WHERE {' AND '.join(conditions)} "
+                "ORDER BY created_at, id LIMIT :limit"
+            ), params).mappings().all()
+            return [dict(row) for row in rows]
+        finally:
+            db.close()
+
+    def _load_resumes(self) -> List[Tuple[List[str], List[str]]]:
+        """
+        Lists users' default resumes and makes sure each has an index vector.
+
+        Resumes missing from the ``user_resumes`` index (e.g. stored before
+        it was built) are embedded once here and added to it, so no resume
+        is embedded again for later batches or runs.
+
+        Returns:
+            (user ids, resume ids) chunks of at most PRECOMPUTE_RESUME_BATCH
+        """
+        db = SessionLocal()
+        try:
+            stmt = text(
+                "SELECT DISTINCT ON (user_id) user_id, id FROM user_resumes "
+                "WHERE is_default AND content IS NOT NULL "
+                "ORDER BY user_id, updated_at DESC"
+            ).execution_options(yield_per=settings.PRECOMPUTE_RESUME_BATCH)
+            chunks = [
+                ([str(row.user_id) for row in rows], [str(row.id) for row in rows])
+                for rows in db.execute(stmt).partitions()
+            ]
+
+            index = get_vector_index("user_resumes")
+            for _, resume_ids in chunks:
+                indexed = set(index.present(resume_ids))
+                missing = [resume_id for resume_id in resume_ids if resume_id not in indexed]
+                if missing:
+                    texts = self._load_resume_texts(db, missing)
+                    index.upsert(list(texts), self.embedder.embed_many(texts.values()))
+                    self.stats["resumes_embedded"] += len(texts)
+            return chunks
+        finally:
+            db.close()
+
+    @staticmethod
+    def _load_resume_texts(db, resume_ids: List[str]) -> Dict[str, str]:
+        stmt = text(
+            "SELECT id, content FROM user_resumes WHERE id IN :ids AND content IS NOT NULL"
+        ).bindparams(bindparam("ids", expanding=True))
+        return {str(row.id): row.content for row in db.execute(stmt, {"ids": resume_ids})}
+
+    # ------------------------------------------------------------------ #
+    # Shortlisting
+    # ------------------------------------------------------------------ #
+
+    def _shortlist(self, postings: List[Dict[str, Any]]) -> List[Candidate]:
+        """
+        Picks each user's best new postings with local similarity scoring.
+
+        Returns:
+            (user_id, resume_id, job_posting_id, similarity) tuples, best
+            matches first
+        """
+        posting_ids = [str(posting["id"]) for posting in postings]
+        posting_vectors = self.embedder.embed_many(
+            build_posting_text(
+                p["title"], p["company"], p["description"] or "", p["requirements"] or ""
+            )
+            for p in postings
+        )
+        top_n = min(settings.PRECOMPUTE_SHORTLIST_PER_USER, len(postings))
+        index = get_vector_index("user_resumes")
+
+        candidates: List[Candidate] = []
+        for user_ids, resume_ids in self._resumes or []:
+            owners = dict(zip(resume_ids, user_ids))
+            found, resume_vectors = index.vectors(resume_ids)
+            if not found:
+                continue
+            scores = resume_vectors @ posting_vectors.T
+            best = np.argpartition(-scores, top_n - 1, axis=1)[:, :top_n]
+
+            for row, resume_id in enumerate(found):
+                for col in best[row]:
+                    similarity = float(scores[row, col])
+                    if similarity >= settings.PRECOMPUTE_MIN_SIMILARITY:
+                        candidates.append((owners[resume_id], resume_id, posting_ids[col], similarity))
+
+        candidates.sort(key=lambda candidate: -candidate[3])
+        self.stats["pairs_shortlisted"] += len(candidates)
+        return candidates
+
+    def _drop_evaluated(self, candidates: List[Candidate]) -> List[Candidate]:
+        """Removes pairs that already have a stored analysis or were given up."""
+        by_user: Dict[str, List[str]] = {}
+        for user_id, _, job_posting_id, _ in candidates:
+            by_user.setdefault(user_id, []).append(job_posting_id)
+
+        db = SessionLocal()
+        try:
+            history = AnalysisHistoryService(db)
+            evaluated = {
+                (user_id, job_posting_id)
+                for user_id, job_posting_ids in by_user.items()
+                for job_posting_id in history.evaluated_job_ids(user_id, job_posting_ids)
+            }
+            given_up = self._given_up(db, sorted({c[2] for c in candidates})) - evaluated
+        finally:
+            db.close()
+
+        self.stats["skipped_existing"] += len(evaluated)
+        self.stats["skipped_failed"] += len(given_up)
+        return [c for c in candidates if (c[0], c[2]) not in evaluated and (c[0], c[2]) not in given_up]
+
+    @staticmethod
+    def _given_up(db, job_posting_ids: List[str]) -> Set[Tuple[str, str]]:
+        """Returns the (user, posting) pairs among these postings that failed too often."""
+        if not job_posting_ids:
+            return set()
+        stmt = text(
+            "SELECT user_id, job_posting_id FROM precompute_failures "
+            "WHERE job_posting_id IN :ids AND attempts >= :max_attempts"
+        ).bindparams(bindparam("ids", expanding=True))
+        rows = db.execute(stmt, {"ids": job_posting_ids, "max_attempts": settings.PRECOMPUTE_MAX_ATTEMPTS})
+        return {(str(row.user_id), str(row.job_posting_id)) for row in rows}
+
+    # ------------------------------------------------------------------ #
+    # Evaluation
+    # ------------------------------------------------------------------ #
+
+    async def _evaluate(self, candidates: List[Candidate]) -> bool:
+        """
+        Evaluates shortlisted pairs through the rate-limited worker pool.
+
+        Returns:
+            True if every pair was evaluated or deliberately skipped, False if
+            any was deferred (token budget, usage limit or provider error) or
+            the run stopped early (window closed or global budget spent)
+        """
+        if not candidates:
+            return True
+
+        descriptions, resumes = await asyncio.to_thread(self._load_inputs, candidates)
+        queue: "asyncio.Queue[Candidate]" = asyncio.Queue()
+        for candidate in candidates:
+            queue.put_nowait(candidate)
+
+        completed = True
+
+        async def worker() -> None:
+            nonlocal completed
+            while not queue.empty():
+                if not self._may_continue():
+                    completed = False
+                    return
+                candidate = queue.get_nowait()
+                if not await self._evaluate_one(candidate, descriptions, resumes):
+                    completed = False
+
+        await asyncio.gather(*[worker() for _ in range(settings.PRECOMPUTE_CONCURRENCY)])
+        return completed
+
+    def _load_inputs(self, candidates: List[Candidate]) -> Tuple[Dict[str, str], Dict[str, str]]:
+        """Loads the posting descriptions and resume texts of the shortlisted pairs."""
+        db = SessionLocal()
+        try:
+            descriptions = JobService(db).get_descriptions(sorted({c[2] for c in candidates}))
+            resumes = self._load_resume_texts(db, sorted({c[1] for c in candidates}))
+            return descriptions, resumes
+        finally:
+            db.close()
+
+    async def _evaluate_one(
+        self,
+        candidate: Candidate,
+        descriptions: Dict[str, str],
+        resumes: Dict[str, str],
+    ) -> bool:
+        """
+        Evaluates one pair and stores the result.
+
+        Returns:
+            False if the pair was deferred and must be retried by a later run;
+            True once it failed PRECOMPUTE_MAX_ATTEMPTS times
+        """
+        user_id, resume_id, job_posting_id, similarity = candidate
+        description = descriptions.get(job_posting_id)
+        resume = resumes.get(resume_id)
+        if not description or not resume:
+            return True  # deleted since shortlisting
+
+        try:
+            request = JobEvaluationRequest(
+                job_description=description[:settings.MAX_JOB_DESC_LENGTH],
+                your_background=resume[:settings.MAX_RESUME_LENGTH],
+                ai_provider=settings.PRECOMPUTE_AI_PROVIDER,
+            )
+        except ValueError:
+            return True  # too short to evaluate meaningfully
+
+        prompt = self.evaluator._create_evaluation_prompt(
+            request.job_description, request.your_background
+        )
+        estimated_tokens = len(prompt) // 4 + settings.PRECOMPUTE_COMPLETION_TOKENS
+        if not self.budget.try_reserve(user_id, estimated_tokens):
+            self.stats["skipped_budget"] += 1
+            return False
+
+        await self.rate_limiter.acquire()
+        try:
+            with usage_scope(user_id=user_id, feature="precompute"):
+                evaluation = await self.evaluator.evaluate_job(request)
+        except Exception as e:
+            self.stats["failures"] += 1
+            logger.error(f"Precompute evaluation failed for user {user_id}: {e}")
+            try:
+                attempts = await asyncio.to_thread(self._record_failure, user_id, job_posting_id, str(e))
+            except Exception as record_error:
+                logger.error(f"Precompute failure count not stored: {record_error}")
+                return False
+            if attempts < settings.PRECOMPUTE_MAX_ATTEMPTS:
+                return False
+            self.stats["skipped_failed"] += 1
+            logger.warning(
+                "precompute_pair_given_up",
+                user_id=user_id,
+                job_posting_id=job_posting_id,
+                attempts=attempts,
+            )
+            return True
+
+        data = evaluation.model_dump(mode="json")
+        analysis_id = await asyncio.to_thread(self._store, user_id, job_posting_id, data, request)
+        self._add_recommendation(user_id, {
+            "analysis_id": analysis_id,
+            "job_posting_id": job_posting_id,
+            "similarity": round(similarity, 4),
+            "score": data["score"],
+            "summary": data["summary"],
+            "created_at": data["timestamp"],
+        })
+        self.stats["evaluations"] += 1
+        return True
+
+    def _record_failure(self, user_id: str, job_posting_id: str, error: str) -> int:
+        """Counts a failed evaluation of a pair and returns its attempts so far."""
+        db = SessionLocal()
+        try:
+            attempts = db.execute(text(
+                "INSERT INTO precompute_failures (user_id, job_posting_id, attempts, last_error, updated_at) "
+                "VALUES (:user_id, :job_posting_id, 1, :error, NOW()) "
+                "ON CONFLICT (user_id, job_posting_id) DO UPDATE SET "
+                "attempts = precompute_failures.attempts + 1, last_error = EXCLUDED.last_error, "
+                "updated_at = NOW() "
+                "RETURNING attempts"
+            ), {"user_id": user_id, "job_posting_id": job_posting_id, "error": error[:1000]}).scalar_one()
+            db.commit()
+            return attempts
+        finally:
+            db.close()
+
+    def _store(
+        self,
+        user_id: str,
+        job_posting_id: str,
+        data: Dict[str, Any],
+        request: JobEvaluationRequest,
+    ) -> str:
+        db = SessionLocal()
+        try:
+            analysis_id = AnalysisHistoryService(db).save_evaluation(
+                user_id,
+                job_posting_id,
+                data,
+                provider=request.ai_provider,
+                model=self.evaluator.model_name(request.ai_provider),
+                prompt_version=PROMPT_VERSION,
+                cache_key=self.evaluator.cache.generate_cache_key(request),
+            )
+            # Earlier failed attempts no longer count
+            db.execute(text(
+                "DELETE FROM precompute_failures WHERE user_id = :user_id AND job_posting_id = :job_posting_id"
+            ), {"user_id": user_id, "job_posting_id": job_posting_id})
+            db.commit()
+            return analysis_id
+        finally:
+            db.close()
+
+    def _add_recommendation(self, user_id: str, recommendation: Dict[str, Any]) -> None:
+        """Merges a new result into the user's cached recommendations list."""
+        current = self.recommendations.get(user_id) or []
+        merged = [r for r in current if r["job_posting_id"] != recommendation["job_posting_id"]]
+        merged.append(recommendation)
+        self.recommendations.set(
+            user_id,
+            heapq.nlargest(settings.RECOMMENDATIONS_LIMIT, merged, key=lambda r: r["score"]),
+        )
@@ -0,0 +1,498 @@
+import asyncio
+import hashlib
+import itertools
+import os
+import random
+import struct
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+import anthropic
+import openai
+import orjson
+
+from ...core.config import settings
+from ...core.logger import get_logger
+from ..usage.ledger import check_usage_limit, record_usage
+
+logger = get_logger(__name__)
+
+PROVIDERS = ("openai", "anthropic")
+
+# kind, writer id, payload length
+_FRAME = struct.Struct("<BII")
+_SEGMENT = 0
+_RECORD = 1
+
+# Labels attached to recorded calls, e.g. the evaluation they belong to
+_trace_context: ContextVar[Optional[Dict[str, Any]]] = ContextVar("provider_trace_context", default=None)
+
+
+class ProviderRequest:
+    """One chat completion request, independent of the provider SDK."""
+
+    __slots__ = ("provider", "model", "messages", "temperature", "max_tokens", "json_response")
+
+    def __init__(
+        self,
+        provider: str,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        json_response: bool = False,
+    ):
+        self.provider = provider
+        self.model = model
+        self.messages = messages
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.json_response = json_response
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @property
+    def key(self) -> str:
+        """SHA-256 of the request's canonical JSON; the replay lookup key."""
+        return hashlib.sha256(orjson.dumps(self.to_dict(), option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+    @property
+    def estimated_input_tokens(self) -> int:
+        """Rough token count of the prompt, about four characters per token."""
+        return sum(len(message["content"]) for message in self.messages) // 4
+
+
+class Completion:
+    """A provider's answer to a ProviderRequest."""
+
+    __slots__ = ("text", "input_tokens", "output_tokens", "latency_ms")
+
+    def __init__(self, text: str, input_tokens: int, output_tokens: int, latency_ms: float):
+        self.text = text
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+        self.latency_ms = latency_ms
+
+
+class StreamUsage:
+    """Token usage of a streamed call, filled in by the backend when the stream ends."""
+
+    __slots__ = ("input_tokens", "output_tokens")
+
+    def __init__(self):
+        self.input_tokens: Optional[int] = None
+        self.output_tokens: Optional[int] = None
+
+
+class TraceMissError(LookupError):
+    """Raised in replay mode for a request the trace has no response for."""
+
+
+class ReplayedProviderError(Exception):
+    """A provider error, raised again in replay mode where it was recorded."""
+
+
+class ProviderBackend(ABC):
+    """
+    Serves chat completions for ProviderRequests.
+
+    Code that calls an AI provider builds a ProviderRequest and hands it to
+    the backend from get_provider_backend(), so the same pipeline runs
+    against the live APIs (LiveBackend), while capturing a trace of them
+    (RecordingBackend), or offline from such a trace (ReplayBackend).
+    """
+
+    @abstractmethod
+    async def complete(self, request: ProviderRequest) -> Completion:
+        """
+        Runs one completion.
+
+        Args:
+            request: The request to complete
+
+        Returns:
+            The completion with its token usage and latency
+        """
+
+    @abstractmethod
+    def stream(self, request: ProviderRequest, usage: Optional[StreamUsage] = None) -> AsyncIterator[str]:
+        """
+        Runs one completion, yielding text chunks as they arrive.
+
+        Args:
+            request: The request to complete
+            usage: Filled in with the call's token usage once the stream
+                has been consumed to the end
+
+        Returns:
+            Async iterator over the response text chunks
+        """
+
+
+class LiveBackend(ProviderBackend):
+    """Calls the OpenAI and Anthropic APIs and records their usage."""
+
+    def __init__(self):
+        self.openai_client = openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        self.anthropic_client = anthropic.AsyncAnthropic(api_key=settings.ANTHROPIC_API_KEY)
+
+    @staticmethod
+    def _check(request: ProviderRequest) -> None:
+        """Rejects unknown providers and users out of token allowance."""
+        if request.provider not in PROVIDERS:
+            raise ValueError(f"Invalid AI provider: {request.provider}")
+        check_usage_limit(tokens=request.estimated_input_tokens)
+
+    @staticmethod
+    def _openai_kwargs(request: ProviderRequest) -> Dict[str, Any]:
+        kwargs: Dict[str, Any] = {"model": request.model, "messages": request.messages}
+        if request.temperature is not None:
+            kwargs["temperature"] = request.temperature
+        if request.max_tokens is not None:
+            kwargs["max_tokens"] = request.max_tokens
+        if request.json_response:
+            kwargs["response_format"] = {"type": "json_object"}
+        return kwargs
+
+    @staticmethod
+    def _anthropic_kwargs(request: ProviderRequest) -> Dict[str, Any]:
+        # System prompts are a parameter of their own in the messages API
+        system = "\n\n".join(m["content"] for m in request.messages if m["role"] == "system")
+        kwargs: Dict[str, Any] = {
+            "model": request.model,
+            "messages": [m for m in request.messages if m["role"] != "system"],
+            "max_tokens": request.max_tokens or 1000,
+        }
+        if system:
+            kwargs["system"] = system
+        if request.temperature is not None:
+            kwargs["temperature"] = request.temperature
+        return kwargs
+
+    async def complete(self, request: ProviderRequest) -> Completion:
+        self._check(request)
+        started = time.perf_counter()
+        try:
+            if request.provider == "openai":
+                response = await self.openai_client.chat.completions.create(**self._openai_kwargs(request))
+                usage = response.usage
+                text = response.choices[0].message.content
+                input_tokens = usage.prompt_tokens if usage else 0
+                output_tokens = usage.completion_tokens if usage else 0
+            else:
+                response = await self.anthropic_client.messages.create(**self._anthropic_kwargs(request))
+                text = response.content[0].text
+                input_tokens = response.usage.input_tokens
+                output_tokens = response.usage.output_tokens
+        except Exception as e:
+            record_usage(request.provider, request.model, 0, 0, (time.perf_counter() - started) * 1000, error=True)
+            logger.error(f"{request.provider} API error: {e}")
+            raise
+        latency_ms = (time.perf_counter() - started) * 1000
+        record_usage(request.provider, request.model, input_tokens, output_tokens, latency_ms)
+        return Completion(text, input_tokens, output_tokens, latency_ms)
+
+    async def stream(self, request: ProviderRequest, usage: Optional[StreamUsage] = None) -> AsyncIterator[str]:
+        self._check(request)
+        started = time.perf_counter()
+        try:
+            if request.provider == "openai":
+                output_chars = 0
+                response = await self.openai_client.chat.completions.create(
+                    **self._openai_kwargs(request), stream=True
+                )
+                async for chunk in response:
+                    text = chunk.choices[0].delta.content if chunk.choices else None
+                    if text:
+                        output_chars += len(text)
+                        yield text
+                # Streamed chat completions carry no usage; estimate it
+                input_tokens = request.estimated_input_tokens
+                output_tokens = output_chars // 4
+            else:
+                async with self.anthropic_client.messages.stream(**self._anthropic_kwargs(request)) as response:
+                    async for text in response.text_stream:
+                        yield text
+                    message = await response.get_final_message()
+                input_tokens = message.usage.input_tokens
+                output_tokens = message.usage.output_tokens
+        except Exception as e:
+            record_usage(request.provider, request.model, 0, 0, (time.perf_counter() - started) * 1000, error=True)
+            logger.error(f"{request.provider} API error: {e}")
+            raise
+        if usage is not None:
+            usage.input_tokens, usage.output_tokens = input_tokens, output_tokens
+        record_usage(request.provider, request.model, input_tokens, output_tokens, (time.perf_counter() - started) * 1000)
+
+
+class TraceWriter:
+    """
+    Appends records to a compact, append-only trace file.
+
+    The file is a sequence of frames: a 9-byte header (kind, writer id,
+    payload length) and a payload. Each writer starts with a segment frame
+    and then writes one record frame per call. Records share the segment's
+    zlib stream and are sync-flushed one by one, so each compresses against
+    the prompts before it yet is on disk as soon as it is written. Writer
+    ids keep apart the segments of several workers appending to one file.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Unbuffered: every frame goes out in a single O_APPEND write, so
+        # frames from several workers never interleave mid-frame
+        self._file = open(path, "ab", buffering=0)
+        self._writer_id = random.getrandbits(32)
+        self._compressor = zlib.compressobj(6)
+        self._lock = threading.Lock()
+        self._file.write(_FRAME.pack(_SEGMENT, self._writer_id, 0))
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """Compresses and writes one record."""
+        data = orjson.dumps(record, default=str)
+        with self._lock:
+            payload = self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+            self._file.write(_FRAME.pack(_RECORD, self._writer_id, len(payload)) + payload)
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+def iter_trace(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Reads the records of a trace file in the order they were written.
+
+    Args:
+        path: Trace file written by RecordingBackend
+
+    Returns:
+        Iterator over record dicts
+    """
+    decompressors: Dict[int, Any] = {}
+    with open(path, "rb") as f:
+        while True:
+            header = f.read(_FRAME.size)
+            if len(header) < _FRAME.size:
+                return
+            kind, writer_id, length = _FRAME.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length:
+                # Cut short by a crash mid-write
+                return
+            if kind == _SEGMENT:
+                decompressors[writer_id] = zlib.decompressobj()
+            elif writer_id in decompressors:
+                yield orjson.loads(decompressors[writer_id].decompress(payload))
+
+
+@contextmanager
+def provider_trace_context(**labels: Any) -> Iterator[None]:
+    """Attaches ``labels`` to every call recorded inside the block."""
+    token = _trace_context.set(labels)
+    try:
+        yield
+    finally:
+        _trace_context.reset(token)
+
+
+class RecordingBackend(ProviderBackend):
+    """
+    Passes calls to another backend and appends each one to a trace file.
+
+    A record holds the request and its key, the response text, token usage,
+    latency, the wall-clock start time, the error if the call failed, the
+    offsets of streamed chunks, and labels from provider_trace_context().
+    A stream the consumer stopped early is recorded with the chunks it got
+    and marked as cancelled.
+    """
+
+    def __init__(self, inner: ProviderBackend, path: str):
+        self.inner = inner
+        self.path = path
+        self.clock = time.time
+        self._writer: Optional[TraceWriter] = None
+        self._writer_pid = 0
+        self._lock = threading.Lock()
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        # Opened lazily, and again in every worker: a forked copy of the
+        # parent's writer would share its segment and compressor state
+        if self._writer is None or self._writer_pid != os.getpid():
+            with self._lock:
+                if self._writer is None or self._writer_pid != os.getpid():
+                    self._writer = TraceWriter(self.path)
+                    self._writer_pid = os.getpid()
+        try:
+            self._writer.append(record)
+        except OSError as e:
+            logger.error(f"Trace write error: {e}")
+
+    def _record(self, request: ProviderRequest, started_at: float, **fields: Any) -> None:
+        record = {"k": request.key, "t": started_at, "r": request.to_dict(), **fields}
+        labels = _trace_context.get()
+        if labels:
+            record["g"] = labels
+        self._append(record)
+
+    async def complete(self, request: ProviderRequest) -> Completion:
+        started_at = self.clock()
+        started = time.perf_counter()
+        try:
+            completion = await self.inner.complete(request)
+        except Exception as e:
+            self._record(request, started_at, l=(time.perf_counter() - started) * 1000, e=f"{type(e).__name__}: {e}")
+            raise
+        self._record(
+            request,
+            started_at,
+            x=completion.text,
+            u=[completion.input_tokens, completion.output_tokens],
+            l=completion.latency_ms,
+        )
+        return completion
+
+    async def stream(self, request: ProviderRequest, usage: Optional[StreamUsage] = None) -> AsyncIterator[str]:
+        started_at = self.clock()
+        started = time.perf_counter()
+        inner_usage = StreamUsage()
+        chunks: List[Tuple[float, str]] = []
+        error: Optional[str] = None
+        finished = False
+        try:
+            async for text in self.inner.stream(request, inner_usage):
+                chunks.append((round((time.perf_counter() - started) * 1000, 2), text))
+                yield text
+            finished = True
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            # Also reached when the consumer stops early (GeneratorExit, cancellation)
+            latency_ms = (time.perf_counter() - started) * 1000
+            if error is not None:
+                self._record(request, started_at, c=chunks, l=latency_ms, e=error)
+            else:
+                text = "".join(text for _, text in chunks)
+                if inner_usage.input_tokens is None:
+                    inner_usage.input_tokens, inner_usage.output_tokens = request.estimated_input_tokens, len(text) // 4
+                fields: Dict[str, Any] = {"x": text, "u": [inner_usage.input_tokens, inner_usage.output_tokens]}
+                if not finished:
+                    fields["a"] = 1
+                self._record(request, started_at, l=latency_ms, c=chunks, **fields)
+        if usage is not None:
+            usage.input_tokens, usage.output_tokens = inner_usage.input_tokens, inner_usage.output_tokens
+
+
+class ReplayBackend(ProviderBackend):
+    """
+    Serves recorded responses from a trace file, without network access.
+
+    Requests are matched by key; a request recorded several times gets its
+    responses in turn. Latencies, and the offsets of streamed chunks, are
+    divided by ``speed``; 0 replays without delay. A request missing from
+    the trace raises TraceMissError, or with on_miss="model" is answered
+    with a recorded response of the same provider and model, so pipelines
+    whose prompts changed can still be driven at the recorded pace. Usage
+    is not recorded.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        speed: float = settings.PROVIDER_REPLAY_SPEED,
+        on_miss: str = settings.PROVIDER_REPLAY_ON_MISS,
+    ):
+        if on_miss not in ("error", "model"):
+            raise ValueError(f"Invalid PROVIDER_REPLAY_ON_MISS: {on_miss}")
+        self.speed = speed
+        self.on_miss = on_miss
+        self.records: List[Dict[str, Any]] = list(iter_trace(path))
+        self._by_key: Dict[str, List[Dict[str, Any]]] = {}
+        self._by_model: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        for record in self.records:
+            self._by_key.setdefault(record["k"], []).append(record)
+            request = record["r"]
+            self._by_model.setdefault((request["provider"], request["model"]), []).append(record)
+        self._turns: Dict[Any, Iterator[int]] = {}
+        self.hits = 0
+        self.misses = 0
+        logger.info("provider_trace_loaded", path=path, records=len(self.records), keys=len(self._by_key))
+
+    def _next(self, key: Any, records: List[Dict[str, Any]]) -> Dict[str, Any]:
+        turns = self._turns.get(key)
+        if turns is None:
+            turns = self._turns[key] = itertools.count()
+        return records[next(turns) % len(records)]
+
+    def _lookup(self, request: ProviderRequest) -> Dict[str, Any]:
+        key = request.key
+        records = self._by_key.get(key)
+        if records:
+            self.hits += 1
+            return self._next(key, records)
+        self.misses += 1
+        model = (request.provider, request.model)
+        if self.on_miss == "model" and model in self._by_model:
+            return self._next(model, self._by_model[model])
+        raise TraceMissError(f"No recorded response for request {key[:16]} ({request.provider}/{request.model})")
+
+    async def _delay(self, ms: float) -> None:
+        if self.speed > 0 and ms > 0:
+            await asyncio.sleep(ms / 1000 / self.speed)
+
+    async def complete(self, request: ProviderRequest) -> Completion:
+        record = self._lookup(request)
+        await self._delay(record["l"])
+        if "e" in record:
+            raise ReplayedProviderError(record["e"])
+        input_tokens, output_tokens = record["u"]
+        return Completion(record["x"], input_tokens, output_tokens, record["l"])
+
+    async def stream(self, request: ProviderRequest, usage: Optional[StreamUsage] = None) -> AsyncIterator[str]:
+        record = self._lookup(request)
+        chunks = record.get("c")
+        if chunks is None:
+            # Recorded by complete(): the whole text arrives at the end
+            chunks = [] if "e" in record else [(record["l"], record["x"])]
+        elapsed = 0.0
+        for offset, text in chunks:
+            await self._delay(offset - elapsed)
+            elapsed = offset
+            yield text
+        await self._delay(record["l"] - elapsed)
+        if "e" in record:
+            raise ReplayedProviderError(record["e"])
+        if usage is not None:
+            usage.input_tokens, usage.output_tokens = record["u"]
+
+    def stats(self) -> Dict[str, int]:
+        """Returns how many requests were found in the trace and how many missed."""
+        return {"records": len(self.records), "hits": self.hits, "misses": self.misses}
+
+
+@lru_cache(maxsize=1)
+def get_provider_backend() -> ProviderBackend:
+    """
+    Returns the process-wide provider backend selected by PROVIDER_MODE.
+
+    "live" calls the providers, "record" also appends every call to
+    PROVIDER_TRACE_PATH, and "replay" answers from that file instead.
+    """
+    mode = settings.PROVIDER_MODE
+    if mode == "live":
+        return LiveBackend()
+    if mode == "record":
+        return RecordingBackend(LiveBackend(), settings.PROVIDER_TRACE_PATH)
+    if mode == "replay":
+        return ReplayBackend(settings.PROVIDER_TRACE_PATH)
+    raise ValueError(f"Invalid PROVIDER_MODE: {mode}")
@@ -0,0 +1,97 @@
+import hashlib
+import re
+import zlib
+from typing import List, Tuple
+
+from ...core.config import settings
+
+# Headings recognised once whitespace has been collapsed: either ALL CAPS or
+# followed by a colon, so ordinary prose ("experience with ...") never splits.
+_HEADINGS = (
+    "summary", "professional summary", "profile", "objective", "about me",
+    "experience", "work experience", "professional experience", "employment history",
+    "education", "skills", "technical skills", "core competencies",
+    "projects", "certifications", "awards", "publications",
+    "volunteering", "volunteer experience", "languages", "interests",
+)
+_HEADING_RE = re.compile(
+    r"(?:(?<=^)|(?<=[\s.;|]))"
+    r"(?:(?P<caps>" + "|".join(h.upper() for h in sorted(_HEADINGS, key=len, reverse=True)) + r")\b:?"
+    r"|(?P<colon>(?i:" + "|".join(sorted(_HEADINGS, key=len, reverse=True)) + r"))\s*:)"
+)
+_SENTENCE_RE = re.compile(r"[^.!?;•]+(?:[.!?;•]+|$)")
+
+
+def _content_defined_chunks(text: str) -> List[str]:
+    """
+    Splits unstructured text into chunks at content-defined sentence boundaries.
+
+    A chunk ends after a sentence whose checksum hits a fixed residue, so
+    editing one sentence only changes the chunk containing it; boundaries
+    elsewhere do not shift the way fixed-size chunking would.
+    """
+    sentences = [s.strip() for s in _SENTENCE_RE.findall(text) if s.strip()]
+    chunks: List[str] = []
+    current: List[str] = []
+    length = 0
+    for sentence in sentences:
+        current.append(sentence)
+        length += len(sentence)
+        boundary = zlib.crc32(sentence.encode()) % settings.SECTION_AVG_SENTENCES == 0
+        if (boundary and length >= settings.SECTION_MIN_CHARS) or length >= settings.SECTION_MAX_CHARS:
+            chunks.append(" ".join(current))
+            current, length = [], 0
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def split_sections(background: str) -> List[Tuple[str, str]]:
+    """
+    Splits a candidate background into independently evaluable sections.
+
+    Resume headings are used when present; otherwise, and within overlong
+    headed sections, content-defined sentence chunking keeps sections small
+    and stable across edits.
+
+    Args:
+        background: Whitespace-normalised background text
+
+    Returns:
+        (label, text) pairs in document order
+    """
+    matches = list(_HEADING_RE.finditer(background))
+    raw: List[Tuple[str, str]] = []
+    if len(matches) >= 2:
+        if matches[0].start() > 0:
+            raw.append(("Introduction", background[:matches[0].start()]))
+        for match, following in zip(matches, matches[1:] + [None]):
+            end = following.start() if following else len(background)
+            label = (match.group("caps") or match.group("colon")).title()
+            raw.append((label, background[match.end():end]))
+    else:
+        raw.append(("Background", background))
+
+    sections: List[Tuple[str, str]] = []
+    for label, body in raw:
+        body = body.strip()
+        if not body:
+            continue
+        if len(body) <= settings.SECTION_MAX_CHARS:
+            sections.append((label, body))
+            continue
+        chunks = _content_defined_chunks(body)
+        for i, chunk in enumerate(chunks, start=1):
+            sections.append((f"{label} ({i}/{len(chunks)})", chunk))
+    return sections
+
+
+def section_hash(job_description: str, ai_provider: str, section_text: str, prompt_version: str) -> str:
+    """
+    Returns the cache key component for one section of one evaluation.
+
+    The prompt version is part of the key, so findings produced by an older
+    prompt are never quoted back into a newer one.
+    """
+    content = f"{prompt_version}:{job_description}:{ai_provider}:{section_text}"
+    return hashlib.sha256(content.encode()).hexdigest()
@@ -0,0 +1,318 @@
+import csv
+import hashlib
+import io
+import json
+import time
+from datetime import date
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from ...core.config import settings
+from ...core.logger import get_logger
+from ...db.session import engine
+from ...schemas.job import IngestionReject, IngestionReport
+from ..search.embeddings import HashingEmbedder, build_posting_text
+from ..search.vector_index import get_vector_index
+
+logger = get_logger(__name__)
+
+# Column name -> maximum length (None for unbounded TEXT)
+_TEXT_COLUMNS = {
+    "title": 255,
+    "company": 255,
+    "location": 255,
+    "job_type": 50,
+    "remote_option": 50,
+    "salary_range": 100,
+    "description": None,
+    "requirements": None,
+    "job_url": 500,
+}
+_DATE_COLUMNS = ("posted_date", "application_deadline")
+_REQUIRED_COLUMNS = ("title", "company")
+_COLUMNS = (*_TEXT_COLUMNS, *_DATE_COLUMNS, "content_hash", "identity_hash")
+# Columns a re-ingested posting may change; identity_hash is the conflict key
+_UPDATE_COLUMNS = (*_TEXT_COLUMNS, *_DATE_COLUMNS, "content_hash")
+
+# Rejects kept verbatim in the report; the rest are only counted
+_MAX_REPORTED_REJECTS = 100
+
+
+def read_records(stream: TextIO, fmt: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Streams raw records from a CSV or JSONL source one at a time.
+
+    Args:
+        stream: Text stream positioned at the start of the data
+        fmt: Either ``"csv"`` (with a header row) or ``"jsonl"``
+
+    Yields:
+        (line number, record) pairs; unparseable CSV rows (oversized fields,
+        malformed quoting) and undecodable JSON lines yield the error
+        message as a string in place of the record
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(stream, strict=True)
+        while True:
+            line_num = reader.reader.line_num
+            try:
+                record = next(reader)
+            except StopIteration:
+                return
+            except csv.Error as e:
+                if reader.reader.line_num == line_num:
+                    raise  # nothing consumed; retrying would loop forever
+                yield reader.reader.line_num, f"Invalid CSV: {e}"
+                continue
+            yield reader.line_num, record
+    elif fmt == "jsonl":
+        for line_num, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_num, json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_num, f"Invalid JSON: {e.msg}"
+    else:
+        raise ValueError(f"Unsupported ingestion format: {fmt}")
+
+
+def normalize_posting(record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Normalises a raw feed record into job_postings columns.
+
+    NUL characters, which PostgreSQL text cannot store, are removed.
+    Whitespace is collapsed, text is truncated to the column limits, enum-like
+    fields are lowercased and dates are parsed from ISO format. The content
+    hash is computed over the normalised values, so cosmetic differences in
+    the feed do not defeat deduplication.
+
+    The identity hash names the posting itself: the feed's ``source_id`` if
+    given, else ``job_url``, else company, title and location. A posting
+    whose content changes keeps its identity and is updated in place.
+
+    Args:
+        record: Raw record from the feed
+
+    Returns:
+        Dict of column values including ``content_hash`` and ``identity_hash``
+
+    Raises:
+        ValueError: If the record is not an object or lacks a required field
+    """
+    if not isinstance(record, dict):
+        raise ValueError("Record is not an object")
+
+    posting: Dict[str, Any] = {}
+    for column, max_length in _TEXT_COLUMNS.items():
+        value = record.get(column)
+        value = " ".join(str(value).replace("\x00", "").split()) if value is not None else ""
+        if max_length:
+            value = value[:max_length]
+        posting[column] = value or None
+
+    for column in ("job_type", "remote_option"):
+        if posting[column]:
+            posting[column] = posting[column].lower()
+
+    for column in _REQUIRED_COLUMNS:
+        if not posting[column]:
+            raise ValueError(f"Missing required field: {column}")
+
+    for column in _DATE_COLUMNS:
+        value = record.get(column)
+        if value in (None, ""):
+            posting[column] = None
+            continue
+        try:
+            posting[column] = date.fromisoformat(str(value).strip()[:10])
+        except ValueError:
+            raise ValueError(f"Invalid date for {column}: {value!r}")
+
+    fingerprint = "\x1f".join(
+        "" if posting[column] is None else str(posting[column])
+        for column in (*_TEXT_COLUMNS, *_DATE_COLUMNS)
+    )
+    posting["content_hash"] = hashlib.sha256(fingerprint.encode()).hexdigest()
+    posting["identity_hash"] = posting_identity(record.get("source_id"), posting)
+    return posting
+
+
+def posting_identity(source_id: Any, posting: Dict[str, Any]) -> str:
+    """
+    Hashes the natural identity of a normalised posting.
+
+    Must stay in step with the backfill in migrations/008_job_postings_identity.sql.
+    """
+    source_id = " ".join(str(source_id).replace("\x00", "").split()) if source_id is not None else ""
+    if source_id:
+        key = ("source", source_id)
+    elif posting["job_url"]:
+        key = ("url", posting["job_url"])
+    else:
+        key = (
+            "posting",
+            posting["company"].lower(),
+            posting["title"].lower(),
+            (posting["location"] or "").lower(),
+        )
+    return hashlib.sha256("\x1f".join(key).encode()).hexdigest()
+
+
+def _copy_value(value: Any) -> str:
+    """Encodes a value for PostgreSQL COPY text format."""
+    if value is None:
+        return "\\N"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+class PostingIngestor:
+    """
+    Bulk-loads job postings through COPY and a set-based upsert.
+
+    Records are streamed, normalised and buffered one batch at a time, so
+    memory use is bounded by the batch size whatever the feed length. Each
+    batch is copied into a session-local staging table and merged into
+    job_postings with ``INSERT ... ON CONFLICT (identity_hash) DO UPDATE``,
+    then committed on its own. The update only fires when the content hash
+    changed, so re-ingesting an unchanged feed writes nothing.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = settings.INGEST_BATCH_SIZE,
+        update_vector_index: bool = settings.INGEST_UPDATE_VECTOR_INDEX,
+    ):
+        self.batch_size = batch_size
+        self.update_vector_index = update_vector_index
+        self.embedder = HashingEmbedder()
+
+    def ingest(self, records: Iterable[Tuple[int, Any]]) -> IngestionReport:
+        """
+        Ingests a stream of raw records.
+
+        Args:
+            records: (line number, record) pairs, e.g. from ``read_records``
+
+        Returns:
+            Counts of inserted, updated, duplicate and rejected rows with
+            throughput
+        """
+        report = IngestionReport()
+        started = time.perf_counter()
+        connection = engine.raw_connection()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "CREATE TEMP TABLE IF NOT EXISTS job_postings_staging "
+                    "(LIKE job_postings INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+                )
+            connection.commit()
+
+            batch: List[Dict[str, Any]] = []
+            for line_num, record in records:
+                report.rows_read += 1
+                try:
+                    if isinstance(record, str):
+                        raise ValueError(record)
+                    batch.append(normalize_posting(record))
+                except ValueError as e:
+                    report.rejected += 1
+                    if len(report.rejects) < _MAX_REPORTED_REJECTS:
+                        report.rejects.append(IngestionReject(line=line_num, error=str(e)))
+
+                if len(batch) >= self.batch_size:
+                    self._load_batch(connection, batch, report)
+                    batch = []
+                    self._log_progress(report, started)
+
+            if batch:
+                self._load_batch(connection, batch, report)
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+
+        if self.update_vector_index and (report.inserted or report.updated):
+            get_vector_index("job_postings").maybe_compact()
+
+        report.duration_seconds = round(time.perf_counter() - started, 3)
+        report.rows_per_second = round(report.rows_read / max(report.duration_seconds, 1e-9), 1)
+        logger.info(
+            "postings_ingested",
+            rows_read=report.rows_read,
+            inserted=report.inserted,
+            updated=report.updated,
+            duplicates=report.duplicates,
+            rejected=report.rejected,
+            rows_per_second=report.rows_per_second,
+        )
+        return report
+
+    def _load_batch(self, connection, batch: List[Dict[str, Any]], report: IngestionReport) -> None:
+        """Copies one batch into staging and merges it into job_postings."""
+        # A row may only be upserted once per statement; the feed's last
+        # version of a repeated posting wins
+        postings = {posting["identity_hash"]: posting for posting in batch}
+        buffer = io.StringIO()
+        for posting in postings.values():
+            buffer.write("\t".join(_copy_value(posting[column]) for column in _COLUMNS))
+            buffer.write("\n")
+        buffer.seek(0)
+
+        columns = ", ".join(_COLUMNS)
+        updates = ", ".join(f"{column} = EXCLUDED.{column}" for column in _UPDATE_COLUMNS)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(f"COPY job_postings_staging ({columns}) FROM STDIN", buffer)
+            cursor.execute(
+                f"INSERT INTO job_postings ({columns}) "
+                f"SELECT {columns} FROM job_postings_staging "
+                "ON CONFLICT (identity_hash) DO UPDATE "
+                f"SET {updates}, updated_at = NOW() "
+                "WHERE job_postings.content_hash IS DISTINCT FROM EXCLUDED.content_hash "
+                "RETURNING id, xmax = 0, is_active, title, company, description, requirements"
+            )
+            changed = cursor.fetchall()
+        connection.commit()
+
+        inserted = sum(1 for row in changed if row[1])
+        report.inserted += inserted
+        report.updated += len(changed) - inserted
+        report.duplicates += len(batch) - len(changed)
+
+        # Deactivated postings stay out of the index even when their content changes
+        active = [row for row in changed if row[2]]
+        if self.update_vector_index and active:
+            get_vector_index("job_postings").upsert(
+                [str(row[0]) for row in active],
+                self.embedder.embed_many(
+                    build_posting_text(row[3], row[4], row[5] or "", row[6] or "")
+                    for row in active
+                ),
+            )
+
+    @staticmethod
+    def _log_progress(report: IngestionReport, started: float) -> None:
+        elapsed = time.perf_counter() - started
+        logger.info(
+            "postings_ingest_progress",
+            rows_read=report.rows_read,
+            inserted=report.inserted,
+            updated=report.updated,
+            rows_per_second=round(report.rows_read / max(elapsed, 1e-9), 1),
+        )
+
+
+def detect_format(filename: Optional[str], default: str = "csv") -> str:
+    """Infers the feed format from a file name."""
+    if filename and filename.lower().endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    if filename and filename.lower().endswith(".csv"):
+        return "csv"
+    return default
@@ -0,0 +1,138 @@
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+
+from ...db.pagination import fetch_keyset_page
+from ..search.embeddings import build_posting_text
+from ..search.vector_index import get_vector_index
+
+_LISTING_COLUMNS = (
+    "id, title, company, location, job_type, remote_option, salary_range, "
+    "posted_date, application_deadline, job_url, created_at"
+)
+
+
+class JobService:
+    """Service for reading job postings from the database."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def list_postings(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 20,
+        company: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Lists active job postings, newest first.
+
+        Args:
+            cursor: Cursor returned with the previous page
+            limit: Maximum postings per page
+            company: Optional exact company filter
+
+        Returns:
+            The page of postings and the cursor for the next page
+        """
+        conditions = ["is_active"]
+        params: Dict[str, Any] = {}
+        if company:
+            conditions.append("company = :company")
+            params["company"] = company
+        return fetch_keyset_page(
+            self.db,
+            f"SELECT {_LISTING_COLUMNS} FROM job_postings",
+            conditions,
+            params,
+            cursor,
+            limit,
+        )
+
+    def get_descriptions(self, job_ids: List[str]) -> Dict[str, str]:
+        """
+        Loads the evaluation text for a set of job postings.
+
+        Args:
+            job_ids: Job posting ids to load
+
+        Returns:
+            Mapping of job posting id to its combined description text
+        """
+        if not job_ids:
+            return {}
+        stmt = text(
+            "SELECT id, title, company, description, requirements "
+            "FROM job_postings WHERE id IN :ids AND is_active"
+        ).bindparams(bindparam("ids", expanding=True))
+        rows = self.db.execute(stmt, {"ids": job_ids})
+        return {
+            str(row.id): build_posting_text(
+                row.title, row.company, row.description or "", row.requirements or ""
+            )
+            for row in rows
+        }
+
+    def iter_index_documents(self, batch_size: int = 1000) -> Iterator[List[Tuple[str, str]]]:
+        """
+        Streams active postings as (id, text) batches for vector indexing.
+
+        Args:
+            batch_size: Number of rows fetched per round trip
+
+        Yields:
+            Lists of (job_posting_id, text) pairs
+        """
+        stmt = text(
+            "SELECT id, title, company, description, requirements "
+            "FROM job_postings WHERE is_active"
+        ).execution_options(yield_per=batch_size)
+        for rows in self.db.execute(stmt).partitions():
+            yield [
+                (
+                    str(row.id),
+                    build_posting_text(
+                        row.title, row.company, row.description or "", row.requirements or ""
+                    ),
+                )
+                for row in rows
+            ]
+
+    def iter_inactive_ids(self, batch_size: int = 1000) -> Iterator[List[str]]:
+        """
+        Streams the ids of deactivated postings in batches.
+
+        Args:
+            batch_size: Number of rows fetched per round trip
+
+        Yields:
+            Lists of job posting ids
+        """
+        stmt = text(
+            "SELECT id FROM job_postings WHERE NOT is_active"
+        ).execution_options(yield_per=batch_size)
+        for rows in self.db.execute(stmt).partitions():
+            yield [str(row.id) for row in rows]
+
+    def deactivate_postings(self, job_ids: List[str]) -> List[str]:
+        """
+        Deactivates postings and removes them from the vector index.
+
+        Args:
+            job_ids: Job posting ids to deactivate
+
+        Returns:
+            Ids of the postings that were active until now
+        """
+        if not job_ids:
+            return []
+        stmt = text(
+            "UPDATE job_postings SET is_active = false, updated_at = NOW() "
+            "WHERE id IN :ids AND is_active RETURNING id"
+        ).bindparams(bindparam("ids", expanding=True))
+        deactivated = [str(row.id) for row in self.db.execute(stmt, {"ids": job_ids})]
+        self.db.commit()
+        # Tombstoned so matching stops shortlisting them
+        get_vector_index("job_postings").delete(deactivated)
+        return deactivated
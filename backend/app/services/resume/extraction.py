@@ -0,0 +1,251 @@
+import asyncio
+import hashlib
+import os
+import re
+import tempfile
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import BinaryIO, Optional, Tuple
+
+from ...core.cache import JSONCache
+from ...core.config import settings
+from ...core.logger import get_logger
+
+logger = get_logger(__name__)
+
+_CHUNK_SIZE = 1024 * 1024
+_CONTROL_CHARS_RE = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]")
+
+SUPPORTED_KINDS = ("pdf", "docx", "txt")
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds RESUME_MAX_UPLOAD_BYTES."""
+
+
+def detect_kind(filename: Optional[str], head: bytes) -> str:
+    """
+    Determines the document type from its leading bytes and file name.
+
+    Args:
+        filename: Client-supplied file name
+        head: First bytes of the file
+
+    Returns:
+        One of ``SUPPORTED_KINDS``
+
+    Raises:
+        ValueError: If the document type is not supported
+    """
+    if head.startswith(b"%PDF"):
+        return "pdf"
+    if head.startswith(b"PK\x03\x04") and (filename or "").lower().endswith(".docx"):
+        return "docx"
+    if (filename or "").lower().endswith((".txt", ".md")) or not filename:
+        return "txt"
+    raise ValueError("Unsupported resume format; upload a PDF, DOCX or TXT file")
+
+
+def save_stream(source: BinaryIO, directory: str, max_bytes: int) -> Tuple[str, str, int]:
+    """
+    Copies an upload to disk in fixed-size chunks, hashing it on the way.
+
+    The file is written under a temporary name and renamed to its SHA-256,
+    so identical uploads share one file on disk.
+
+    Args:
+        source: Readable binary stream (e.g. ``UploadFile.file``)
+        directory: Destination directory
+        max_bytes: Size cap; exceeding it aborts the copy
+
+    Returns:
+        (path, sha256 hex digest, size in bytes)
+
+    Raises:
+        UploadTooLargeError: If the stream is larger than ``max_bytes``
+    """
+    os.makedirs(directory, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            while True:
+                chunk = source.read(_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLargeError(
+                        f"Resume exceeds the {max_bytes // (1024 * 1024)} MB upload limit"
+                    )
+                digest.update(chunk)
+                f.write(chunk)
+
+        file_hash = digest.hexdigest()
+        path = os.path.join(directory, file_hash)
+        os.replace(tmp_path, path)
+        return path, file_hash, size
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def extract_text(path: str, kind: str) -> str:
+    """
+    Extracts raw text from a resume document.
+
+    Runs inside an extraction worker process; parser imports are local so
+    API workers never load them.
+
+    Args:
+        path: Path to the document on disk
+        kind: One of ``SUPPORTED_KINDS``
+
+    Returns:
+        The document text
+    """
+    if kind == "pdf":
+        from pypdf import PdfReader
+
+        reader = PdfReader(path)
+        return "\n".join(page.extract_text() or "" for page in reader.pages)
+    if kind == "docx":
+        import docx
+
+        document = docx.Document(path)
+        parts = [paragraph.text for paragraph in document.paragraphs]
+        for table in document.tables:
+            for row in table.rows:
+                parts.append(" ".join(cell.text for cell in row.cells))
+        return "\n".join(parts)
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return f.read(settings.MAX_RESUME_LENGTH * 4)
+
+
+def normalize_resume_text(text: str, max_length: int = settings.MAX_RESUME_LENGTH) -> str:
+    """
+    Cleans extracted text so it fits the evaluation pipeline.
+
+    Applies NFKC normalisation (ligatures, full-width characters), strips
+    control characters, collapses whitespace and truncates at a word boundary.
+
+    Args:
+        text: Raw extracted text
+        max_length: Maximum length in characters
+
+    Returns:
+        The normalised text
+    """
+    text = unicodedata.normalize("NFKC", text)
+    text = _CONTROL_CHARS_RE.sub(" ", text)
+    text = " ".join(text.split())
+    if len(text) > max_length:
+        cut = text.rfind(" ", 0, max_length + 1)
+        text = text[:cut if cut > 0 else max_length]
+    return text
+
+
+def _extract_and_normalize(path: str, kind: str) -> str:
+    return normalize_resume_text(extract_text(path, kind))
+
+
+class ResumeExtractor:
+    """
+    Extracts resume text in a bounded process pool with a by-hash cache.
+
+    Parsing PDFs and DOCX files is CPU-bound pure Python, so it runs in
+    separate processes: it never blocks the event loop or competes for this
+    worker's GIL. Workers are recycled after RESUME_EXTRACT_TASKS_PER_CHILD
+    files to cap memory growth from large documents. A file that runs past
+    RESUME_EXTRACT_TIMEOUT has its pool killed and replaced, since a worker
+    stuck parsing it would otherwise hold its slot forever; a pool broken by
+    a worker that died is replaced the same way.
+    """
+
+    _executor: Optional[ProcessPoolExecutor] = None
+    _slots: Optional[asyncio.Semaphore] = None
+
+    def __init__(self):
+        self.cache = JSONCache("resume_text", ttl=settings.RESUME_TEXT_CACHE_TTL)
+
+    @classmethod
+    def _get_executor(cls) -> ProcessPoolExecutor:
+        # Created lazily so a pre-forking server never forks an existing pool
+        if cls._executor is None:
+            cls._executor = ProcessPoolExecutor(
+                max_workers=settings.RESUME_EXTRACT_WORKERS,
+                max_tasks_per_child=settings.RESUME_EXTRACT_TASKS_PER_CHILD,
+            )
+        if cls._slots is None:
+            cls._slots = asyncio.Semaphore(settings.RESUME_EXTRACT_WORKERS * 2)
+        return cls._executor
+
+    @classmethod
+    def _kill_executor(cls, executor: ProcessPoolExecutor) -> None:
+        """
+        Terminates a pool whose worker is stuck; the next extraction starts a new one.
+
+        Other files in flight on the same pool fail and may be uploaded again.
+        """
+        if cls._executor is executor:
+            cls._executor = None
+        # The executor has no public way to stop a running task
+        processes = list((executor._processes or {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+        logger.warning("resume_extraction_pool_killed", processes=len(processes))
+
+    @classmethod
+    def shutdown(cls) -> None:
+        """Stops the extraction processes."""
+        if cls._executor is not None:
+            cls._executor.shutdown(cancel_futures=True)
+            cls._executor = None
+            cls._slots = None
+
+    async def extract(self, path: str, kind: str, file_hash: str) -> str:
+        """
+        Returns the normalised text of a stored upload.
+
+        Args:
+            path: Path returned by ``save_stream``
+            kind: One of ``SUPPORTED_KINDS``
+            file_hash: SHA-256 of the file, used as the cache key
+
+        Returns:
+            Normalised resume text
+
+        Raises:
+            ValueError: If the document cannot be parsed in time
+        """
+        cached = self.cache.get(file_hash)
+        if cached is not None:
+            return cached
+
+        executor = self._get_executor()
+        async with self._slots:
+            try:
+                text = await asyncio.wait_for(
+                    asyncio.get_running_loop().run_in_executor(
+                        executor, _extract_and_normalize, path, kind
+                    ),
+                    timeout=settings.RESUME_EXTRACT_TIMEOUT,
+                )
+            except asyncio.TimeoutError:
+                self._kill_executor(executor)
+                raise ValueError("Resume text extraction timed out")
+            except BrokenProcessPool as e:
+                # A worker died (e.g. killed for memory); the pool refuses all later work
+                logger.error(f"Resume extraction failed: {e}")
+                self._kill_executor(executor)
+                raise ValueError("Could not read text from the uploaded resume")
+            except Exception as e:
+                logger.error(f"Resume extraction failed: {e}")
+                raise ValueError("Could not read text from the uploaded resume")
+
+        self.cache.set(file_hash, text)
+        return text
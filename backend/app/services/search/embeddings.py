@@ -0,0 +1,79 @@
+import math
+import re
+import zlib
+from collections import Counter
+from typing import Iterable, List
+
+import numpy as np
+
+from ...core.config import settings
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]")
+
+
+class HashingEmbedder:
+    """
+    Stateless text embedder based on the hashing trick.
+
+    Produces L2-normalised float32 vectors from unigrams and bigrams without a
+    fitted vocabulary, so every process (API workers, ingestion, batch jobs)
+    maps the same text to the same vector with no shared state and no network.
+    """
+
+    def __init__(self, dim: int = settings.VECTOR_DIM):
+        if dim <= 0 or dim & (dim - 1):
+            raise ValueError("Embedding dimension must be a power of two")
+        self.dim = dim
+        self._mask = dim - 1
+
+    def tokenize(self, text: str) -> List[str]:
+        """Lowercases text and splits it into unigram and bigram features."""
+        words = _TOKEN_RE.findall(text.lower())
+        bigrams = [f"{a} {b}" for a, b in zip(words, words[1:])]
+        return words + bigrams
+
+    def embed(self, text: str) -> np.ndarray:
+        """
+        Embeds a single document.
+
+        Args:
+            text: Raw document text
+
+        Returns:
+            A normalised float32 vector of length ``dim``
+        """
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature, count in Counter(self.tokenize(text)).items():
+            h = zlib.crc32(feature.encode())
+            sign = -1.0 if h & 0x80000000 else 1.0
+            vector[h & self._mask] += sign * (1.0 + math.log(count))
+
+        norm = float(np.linalg.norm(vector))
+        if norm > 0:
+            vector /= norm
+        return vector
+
+    def embed_many(self, texts: Iterable[str]) -> np.ndarray:
+        """
+        Embeds a batch of documents.
+
+        Args:
+            texts: Iterable of raw document texts
+
+        Returns:
+            A float32 matrix with one normalised row per document
+        """
+        rows = [self.embed(text) for text in texts]
+        if not rows:
+            return np.empty((0, self.dim), dtype=np.float32)
+        return np.vstack(rows)
+
+
+def build_posting_text(
+    title: str = "",
+    company: str = "",
+    description: str = "",
+    requirements: str = "",
+) -> str:
+    """Concatenates the searchable fields of a job posting."""
+    return " ".join(part for part in (title, company, description, requirements) if part)
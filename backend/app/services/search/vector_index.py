@@ -0,0 +1,444 @@
+import fcntl
+import json
+import os
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ...core.config import settings
+from ...core.logger import get_logger
+from ...core.preload import register_preload_hook
+
+logger = get_logger(__name__)
+
+# Rows scored per matrix product; bounds the temporary score buffer
+_SEARCH_CHUNK_ROWS = 65536
+_KMEANS_ITERATIONS = 10
+_KMEANS_SAMPLE_PER_LIST = 256
+
+
+class VectorIndex:
+    """
+    Append-only, memory-mapped float32 vector index.
+
+    On-disk layout (one directory per index):
+        vectors.f32      raw row-major float32 matrix, one row per appended vector
+        ids.txt          one id per line, line ``i`` belongs to row ``i``
+        tombstones.txt   "id<TAB>rows" per deletion since the last compaction
+        meta.json        dimension, compaction generation and IVF coverage
+        ivf_*.npy        optional IVF centroids and inverted lists
+
+    Readers map ``vectors.f32`` read-only, so every worker process on a host
+    shares the same page-cache pages with zero copies. Updates append a new row
+    for the id (the latest row wins) and deletions append a tombstone; dead rows
+    are reclaimed by ``compact``, which rewrites the files and bumps the
+    generation so readers remap on their next search. A tombstone records how
+    many rows existed when it was written and only kills a row below that, so
+    an id upserted again after its deletion stays live.
+    """
+
+    def __init__(self, path: str, dim: int = settings.VECTOR_DIM):
+        self.path = path
+        self.dim = dim
+        os.makedirs(path, exist_ok=True)
+
+        self._vectors_path = os.path.join(path, "vectors.f32")
+        self._ids_path = os.path.join(path, "ids.txt")
+        self._tombstones_path = os.path.join(path, "tombstones.txt")
+        self._meta_path = os.path.join(path, "meta.json")
+        self._lock_path = os.path.join(path, ".lock")
+
+        self._reload_lock = threading.Lock()
+        self._generation = -1
+        self._matrix: Optional[np.ndarray] = None
+        self._ids: List[str] = []
+        self._ids_offset = 0
+        self._tombstones_offset = 0
+        self._id_to_row: Dict[str, int] = {}
+        self._live = np.zeros(0, dtype=bool)
+        self._ivf: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+        self._ivf_covered_rows = 0
+
+        if not os.path.exists(self._meta_path):
+            self._write_meta({"dim": dim, "generation": 0, "ivf_covered_rows": 0})
+        self.refresh()
+
+    # ------------------------------------------------------------------ #
+    # Reading
+    # ------------------------------------------------------------------ #
+
+    def __len__(self) -> int:
+        self.refresh()
+        return int(self._live.sum())
+
+    def refresh(self) -> None:
+        """Picks up rows appended or compactions done by other processes."""
+        with self._reload_lock:
+            meta = self._read_meta()
+            if meta["dim"] != self.dim:
+                raise ValueError(
+                    f"Index at {self.path} has dimension {meta['dim']}, expected {self.dim}"
+                )
+            if meta["generation"] != self._generation:
+                self._load_all(meta)
+                return
+            self._load_tail()
+
+    def _load_all(self, meta: Dict) -> None:
+        """Maps the index from scratch after open or compaction."""
+        self._generation = meta["generation"]
+        self._matrix = None
+        self._ids = []
+        self._ids_offset = 0
+        self._tombstones_offset = 0
+        self._id_to_row = {}
+        self._live = np.zeros(0, dtype=bool)
+        self._ivf = None
+        self._ivf_covered_rows = meta.get("ivf_covered_rows", 0)
+
+        if self._ivf_covered_rows:
+            self._ivf = (
+                np.load(os.path.join(self.path, "ivf_centroids.npy"), mmap_mode="r"),
+                np.load(os.path.join(self.path, "ivf_rows.npy"), mmap_mode="r"),
+                np.load(os.path.join(self.path, "ivf_offsets.npy"), mmap_mode="r"),
+            )
+        self._load_tail()
+
+    def _load_tail(self) -> None:
+        """Reads ids and tombstones appended since the last refresh and remaps."""
+        vector_rows = 0
+        if os.path.exists(self._vectors_path):
+            vector_rows = os.path.getsize(self._vectors_path) // (4 * self.dim)
+
+        # Writers append vectors before ids, so an id always has its row on disk
+        start = len(self._ids)
+        new_ids = []
+        if os.path.exists(self._ids_path) and vector_rows > start:
+            with open(self._ids_path, "r", encoding="utf-8") as f:
+                f.seek(self._ids_offset)
+                while start + len(new_ids) < vector_rows:
+                    line = f.readline()
+                    if not line.endswith("\n"):
+                        break  # partially written by a concurrent writer
+                    new_ids.append(line[:-1])
+                    self._ids_offset = f.tell()
+
+        if new_ids:
+            self._ids.extend(new_ids)
+            live = np.ones(len(self._ids), dtype=bool)
+            live[:start] = self._live
+            for offset, item_id in enumerate(new_ids):
+                previous = self._id_to_row.get(item_id)
+                if previous is not None:
+                    live[previous] = False
+                self._id_to_row[item_id] = start + offset
+            self._live = live
+            self._matrix = np.memmap(
+                self._vectors_path,
+                dtype=np.float32,
+                mode="r",
+                shape=(len(self._ids), self.dim),
+            )
+
+        if os.path.exists(self._tombstones_path):
+            with open(self._tombstones_path, "r", encoding="utf-8") as f:
+                f.seek(self._tombstones_offset)
+                for line in iter(f.readline, ""):
+                    if not line.endswith("\n"):
+                        break
+                    item_id, _, rows = line[:-1].partition("\t")
+                    rows = int(rows) if rows else len(self._ids)
+                    if rows > len(self._ids):
+                        break  # deletes rows not loaded yet; replayed on the next refresh
+                    row = self._id_to_row.get(item_id)
+                    if row is not None and row < rows:
+                        del self._id_to_row[item_id]
+                        self._live[row] = False
+                    self._tombstones_offset = f.tell()
+
+    def _candidate_rows(self, queries: np.ndarray, nprobe: int) -> Optional[np.ndarray]:
+        """Returns the rows to score when IVF partitioning is available."""
+        if self._ivf is None:
+            return None
+        centroids, ivf_rows, ivf_offsets = self._ivf
+        nprobe = max(1, min(nprobe, len(centroids)))
+        probes = np.argpartition(-(queries @ centroids.T), nprobe - 1, axis=1)[:, :nprobe]
+        lists = np.unique(probes)
+        parts = [ivf_rows[ivf_offsets[i]:ivf_offsets[i + 1]] for i in lists]
+        # Rows appended after the IVF build are always scanned exhaustively
+        parts.append(np.arange(self._ivf_covered_rows, len(self._ids), dtype=np.int64))
+        return np.concatenate(parts)
+
+    def search_many(
+        self,
+        queries: np.ndarray,
+        top_k: int = settings.VECTOR_TOP_K,
+        nprobe: int = settings.VECTOR_IVF_NPROBE,
+    ) -> List[List[Tuple[str, float]]]:
+        """
+        Finds the nearest rows for a batch of queries by inner product.
+
+        Args:
+            queries: Float32 matrix of normalised query vectors, one per row
+            top_k: Number of results per query
+            nprobe: Number of IVF lists probed per batch when partitioned
+
+        Returns:
+            For each query, a list of (id, score) pairs sorted by descending score
+        """
+        self.refresh()
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        if self._matrix is None or not self._live.any():
+            return [[] for _ in range(len(queries))]
+
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_rows = np.empty((len(queries), 0), dtype=np.int64)
+        for scores, rows in self._score_chunks(queries, nprobe):
+            best_scores = np.concatenate([best_scores, scores], axis=1)
+            best_rows = np.concatenate([best_rows, np.broadcast_to(rows, scores.shape)], axis=1)
+            if best_scores.shape[1] > top_k:
+                keep = np.argpartition(-best_scores, top_k - 1, axis=1)[:, :top_k]
+                best_scores = np.take_along_axis(best_scores, keep, axis=1)
+                best_rows = np.take_along_axis(best_rows, keep, axis=1)
+
+        results = []
+        for scores, rows in zip(best_scores, best_rows):
+            order = np.argsort(-scores)
+            results.append([
+                (self._ids[rows[i]], float(scores[i])) for i in order if scores[i] > -np.inf
+            ])
+        return results
+
+    def _score_chunks(self, queries: np.ndarray, nprobe: int) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Yields (scores, rows) for the rows to search, one chunk at a time.
+
+        An exhaustive scan multiplies contiguous slices of the mapping, which
+        are views rather than copies, and gives dead rows a score of -inf.
+        Only the IVF candidate lists, a small fraction of the index, are
+        gathered into a temporary matrix.
+        """
+        candidates = self._candidate_rows(queries, nprobe)
+        if candidates is None:
+            for start in range(0, len(self._ids), _SEARCH_CHUNK_ROWS):
+                block = self._matrix[start:start + _SEARCH_CHUNK_ROWS]
+                scores = queries @ block.T
+                dead = ~self._live[start:start + len(block)]
+                if dead.any():
+                    scores[:, dead] = -np.inf
+                yield scores, np.arange(start, start + len(block), dtype=np.int64)
+            return
+
+        candidates = candidates[self._live[candidates]]
+        for start in range(0, len(candidates), _SEARCH_CHUNK_ROWS):
+            rows = candidates[start:start + _SEARCH_CHUNK_ROWS]
+            yield queries @ self._matrix[rows].T, rows
+
+    def search(
+        self,
+        query: np.ndarray,
+        top_k: int = settings.VECTOR_TOP_K,
+        nprobe: int = settings.VECTOR_IVF_NPROBE,
+    ) -> List[Tuple[str, float]]:
+        """Finds the nearest rows for a single query vector."""
+        return self.search_many(query[np.newaxis, :], top_k=top_k, nprobe=nprobe)[0]
+
+    # ------------------------------------------------------------------ #
+    # Writing
+    # ------------------------------------------------------------------ #
+
+    @contextmanager
+    def _writer_lock(self) -> Iterator[None]:
+        """Serialises writers across processes."""
+        with open(self._lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def upsert(self, ids: Sequence[str], vectors: np.ndarray) -> None:
+        """
+        Appends vectors for the given ids, superseding any earlier rows.
+
+        Args:
+            ids: Item identifiers, one per row of ``vectors``
+            vectors: Float32 matrix of normalised vectors
+        """
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if vectors.shape != (len(ids), self.dim):
+            raise ValueError(f"Expected vectors of shape ({len(ids)}, {self.dim})")
+        if not len(ids):
+            return
+
+        with self._writer_lock():
+            with open(self._vectors_path, "ab") as f:
+                f.write(vectors.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            with open(self._ids_path, "a", encoding="utf-8") as f:
+                f.write("".join(f"{item_id}\n" for item_id in ids))
+
+    def delete(self, ids: Sequence[str]) -> None:
+        """Marks ids as deleted until the next compaction; later upserts revive them."""
+        if not ids:
+            return
+        with self._writer_lock():
+            # No writer can append meanwhile, so this is every row on disk
+            self.refresh()
+            rows = len(self._ids)
+            with open(self._tombstones_path, "a", encoding="utf-8") as f:
+                f.write("".join(f"{item_id}\t{rows}\n" for item_id in ids))
+
+    def present(self, ids: Sequence[str]) -> List[str]:
+        """Returns those of ``ids`` that currently have a live row."""
+        self.refresh()
+        return [item_id for item_id in ids if item_id in self._id_to_row]
+
+    def vectors(self, ids: Sequence[str]) -> Tuple[List[str], np.ndarray]:
+        """
+        Looks up the stored vectors of the given ids.
+
+        Returns:
+            The ids that have a live row, in the given order, and a copy of
+            their vectors, one row each
+        """
+        self.refresh()
+        found = [item_id for item_id in ids if item_id in self._id_to_row]
+        if not found:
+            return found, np.empty((0, self.dim), dtype=np.float32)
+        return found, np.asarray(self._matrix[[self._id_to_row[item_id] for item_id in found]])
+
+    def dead_fraction(self) -> float:
+        """Returns the share of rows superseded or deleted since compaction."""
+        self.refresh()
+        if not len(self._ids):
+            return 0.0
+        return 1.0 - float(self._live.sum()) / len(self._ids)
+
+    def maybe_compact(self) -> bool:
+        """Compacts when dead rows exceed the configured threshold."""
+        if self.dead_fraction() < settings.VECTOR_COMPACT_THRESHOLD:
+            return False
+        self.compact()
+        return True
+
+    def compact(self, ivf_lists: int = settings.VECTOR_IVF_LISTS) -> None:
+        """
+        Rewrites the index with live rows only and rebuilds IVF lists.
+
+        Args:
+            ivf_lists: Number of IVF partitions to build, 0 to disable
+        """
+        with self._writer_lock():
+            self.refresh()
+            live_rows = np.flatnonzero(self._live)
+            tmp_vectors = self._vectors_path + ".tmp"
+            tmp_ids = self._ids_path + ".tmp"
+
+            with open(tmp_vectors, "wb") as f:
+                for start in range(0, len(live_rows), _SEARCH_CHUNK_ROWS):
+                    rows = live_rows[start:start + _SEARCH_CHUNK_ROWS]
+                    f.write(np.ascontiguousarray(self._matrix[rows]).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            with open(tmp_ids, "w", encoding="utf-8") as f:
+                f.write("".join(f"{self._ids[row]}\n" for row in live_rows))
+
+            ivf_covered_rows = 0
+            if ivf_lists and len(live_rows) >= ivf_lists * 4:
+                matrix = np.memmap(
+                    tmp_vectors, dtype=np.float32, mode="r", shape=(len(live_rows), self.dim)
+                )
+                self._build_ivf(matrix, ivf_lists)
+                ivf_covered_rows = len(live_rows)
+
+            os.replace(tmp_vectors, self._vectors_path)
+            os.replace(tmp_ids, self._ids_path)
+            open(self._tombstones_path, "w").close()
+            self._write_meta({
+                "dim": self.dim,
+                "generation": self._generation + 1,
+                "ivf_covered_rows": ivf_covered_rows,
+            })
+
+        logger.info(
+            "vector_index_compacted",
+            path=self.path,
+            live_rows=len(live_rows),
+            ivf_lists=ivf_lists if ivf_covered_rows else 0,
+        )
+        self.refresh()
+
+    def _build_ivf(self, matrix: np.ndarray, n_lists: int) -> None:
+        """Clusters rows with spherical k-means and writes CSR inverted lists."""
+        rng = np.random.default_rng(0)
+        sample_size = min(len(matrix), n_lists * _KMEANS_SAMPLE_PER_LIST)
+        sample = np.asarray(matrix[np.sort(rng.choice(len(matrix), sample_size, replace=False))])
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+
+        for _ in range(_KMEANS_ITERATIONS):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            for i in range(n_lists):
+                members = sample[assignment == i]
+                if len(members):
+                    centroid = members.sum(axis=0)
+                    centroids[i] = centroid / max(float(np.linalg.norm(centroid)), 1e-12)
+
+        assignment = np.empty(len(matrix), dtype=np.int64)
+        for start in range(0, len(matrix), _SEARCH_CHUNK_ROWS):
+            chunk = np.asarray(matrix[start:start + _SEARCH_CHUNK_ROWS])
+            assignment[start:start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+
+        rows = np.argsort(assignment, kind="stable").astype(np.int64)
+        offsets = np.zeros(n_lists + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.bincount(assignment, minlength=n_lists))
+
+        # Replace rather than overwrite: readers may still map the previous files
+        for name, array in (
+            ("ivf_centroids.npy", centroids.astype(np.float32)),
+            ("ivf_rows.npy", rows),
+            ("ivf_offsets.npy", offsets),
+        ):
+            target = os.path.join(self.path, name)
+            with open(target + ".tmp", "wb") as f:
+                np.save(f, array)
+            os.replace(target + ".tmp", target)
+
+    # ------------------------------------------------------------------ #
+    # Metadata
+    # ------------------------------------------------------------------ #
+
+    def _read_meta(self) -> Dict:
+        with open(self._meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_meta(self, meta: Dict) -> None:
+        tmp_path = self._meta_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self._meta_path)
+
+
+@lru_cache(maxsize=None)
+def get_vector_index(name: str) -> VectorIndex:
+    """
+    Returns the process-wide index instance for a named corpus.
+
+    Args:
+        name: Corpus name, e.g. ``"job_postings"`` or ``"user_resumes"``
+
+    Returns:
+        The shared VectorIndex for that corpus
+    """
+    return VectorIndex(os.path.join(settings.VECTOR_INDEX_DIR, name))
+
+
+@register_preload_hook
+def _preload_indexes() -> None:
+    """Maps both corpora and builds their id tables before workers fork."""
+    for name in ("job_postings", "user_resumes"):
+        get_vector_index(name).refresh()
@@ -0,0 +1,77 @@
+from collections import deque
+from typing import Dict, Hashable, Iterator, List, Sequence, Tuple
+
+
+class AhoCorasick:
+    """
+    Multi-pattern matcher compiled to a deterministic automaton.
+
+    Patterns are sequences of any hashable symbols: characters of a string
+    or, as the skill extractor uses it, word tokens. The trie's failure
+    links are folded into the transition tables at build time, so matching
+    takes at most two dictionary lookups per input symbol regardless of the
+    number of patterns. Instances are plain data and pickle cleanly, which
+    lets callers cache a compiled automaton on disk.
+    """
+
+    def __init__(self, patterns: Sequence[Sequence[Hashable]]):
+        self.patterns = list(patterns)
+        goto: List[Dict[Hashable, int]] = [{}]
+        outputs: List[List[int]] = [[]]
+        for pattern_id, pattern in enumerate(self.patterns):
+            if not pattern:
+                raise ValueError("Patterns must be non-empty")
+            state = 0
+            for symbol in pattern:
+                next_state = goto[state].get(symbol)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][symbol] = next_state
+                    goto.append({})
+                    outputs.append([])
+                state = next_state
+            outputs[state].append(pattern_id)
+
+        # Failure links are folded into each state's table, except the
+        # root's transitions: copying those into every state would cost
+        # states x distinct first symbols. A miss falls back to the root.
+        # Breadth-first order guarantees a state's failure target is complete
+        # before the state itself is processed.
+        root = goto[0]
+        fail = [0] * len(goto)
+        delta: List[Dict[Hashable, int]] = [root] + [None] * (len(goto) - 1)
+        queue = deque(root.values())
+        while queue:
+            state = queue.popleft()
+            fallback = delta[fail[state]] if fail[state] else {}
+            outputs[state].extend(outputs[fail[state]])
+            for symbol, child in goto[state].items():
+                fail[child] = delta[fail[state]].get(symbol) or root.get(symbol, 0)
+                queue.append(child)
+            delta[state] = {**fallback, **goto[state]}
+
+        self._delta = delta
+        self._outputs: List[Tuple[int, ...]] = [tuple(out) for out in outputs]
+        self._lengths = [len(pattern) for pattern in self.patterns]
+
+    def __len__(self) -> int:
+        return len(self._delta)
+
+    def iter_matches(self, symbols: Sequence[Hashable]) -> Iterator[Tuple[int, int, int]]:
+        """
+        Yields every (start, end, pattern id) occurrence in ``symbols``.
+
+        Offsets are symbol indices. Overlapping occurrences are all
+        reported, ordered by end position.
+        """
+        delta = self._delta
+        root = delta[0]
+        outputs = self._outputs
+        lengths = self._lengths
+        state = 0
+        for end, symbol in enumerate(symbols, start=1):
+            # No transition targets the root, so a falsy result means a miss
+            state = delta[state].get(symbol) or root.get(symbol, 0)
+            if outputs[state]:
+                for pattern_id in outputs[state]:
+                    yield end - lengths[pattern_id], end, pattern_id
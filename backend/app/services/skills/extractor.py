@@ -0,0 +1,180 @@
+import hashlib
+import json
+import os
+import pickle
+import re
+import tempfile
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from ...core.config import settings
+from ...core.logger import get_logger
+from ...core.preload import register_preload_hook
+from .automaton import AhoCorasick
+
+logger = get_logger(__name__)
+
+DEFAULT_TAXONOMY_PATH = os.path.join(os.path.dirname(__file__), "taxonomy.json")
+
+# Words keep trailing "+"/"#" so "C" never matches inside "C++" or "C#";
+# other punctuation is a token of its own ("node", ".", "js")
+_TOKEN_RE = re.compile(r"\w+[+#]*|[^\w\s]")
+
+# (skill index, original tokens for case-sensitive aliases, else None)
+PatternTarget = Tuple[int, Optional[Tuple[str, ...]]]
+
+
+def tokenize(text: str) -> List[str]:
+    """Splits text into the word and punctuation tokens skills are matched on."""
+    return _TOKEN_RE.findall(text)
+
+
+class SkillExtractor:
+    """
+    Extracts canonical skills from free text using a versioned taxonomy.
+
+    Every skill name and alias is compiled into one Aho-Corasick automaton
+    over word tokens, so a document is tokenised by one regex pass and then
+    scanned once in linear time however large the taxonomy is. Matching on
+    tokens keeps matches on word boundaries and ignores spacing; overlapping
+    matches resolve to the leftmost, then longest ("machine learning" wins
+    over "learning"). Aliases listed under ``exact`` in the taxonomy ("Go", "R", "JS") only
+    match with their exact capitalisation.
+
+    The compiled automaton is pickled to SKILLS_CACHE_DIR, keyed by the
+    taxonomy version and content hash, so processes load it instead of
+    rebuilding it.
+    """
+
+    def __init__(self, taxonomy_path: Optional[str] = None, cache_dir: str = settings.SKILLS_CACHE_DIR):
+        taxonomy_path = taxonomy_path or settings.SKILLS_TAXONOMY_PATH or DEFAULT_TAXONOMY_PATH
+        with open(taxonomy_path, "rb") as f:
+            raw = f.read()
+        taxonomy = json.loads(raw)
+
+        self.version: str = taxonomy["version"]
+        self.skills: List[str] = [skill["name"] for skill in taxonomy["skills"]]
+        self.categories: Dict[str, str] = {
+            skill["name"]: skill.get("category", "other") for skill in taxonomy["skills"]
+        }
+
+        cache_path = os.path.join(
+            cache_dir, f"skills-{self.version}-{hashlib.sha256(raw).hexdigest()[:16]}.pkl"
+        )
+        compiled = self._load_compiled(cache_path)
+        if compiled is None:
+            compiled = self._compile(taxonomy["skills"])
+            self._save_compiled(cache_path, compiled)
+        self._automaton, self._targets = compiled
+
+    @staticmethod
+    def _compile(skills: Sequence[Dict[str, Any]]) -> Tuple[AhoCorasick, List[List[PatternTarget]]]:
+        """Builds the automaton and the pattern-to-skill table."""
+        targets: Dict[Tuple[str, ...], List[PatternTarget]] = {}
+        for index, skill in enumerate(skills):
+            exact = set(skill.get("exact", []))
+            spellings = [(alias, False) for alias in [skill["name"], *skill.get("aliases", [])] if alias not in exact]
+            spellings += [(alias, True) for alias in exact]
+            for spelling, case_sensitive in spellings:
+                tokens = tuple(tokenize(spelling))
+                entry = (index, tokens if case_sensitive else None)
+                bucket = targets.setdefault(tuple(token.lower() for token in tokens), [])
+                if entry not in bucket:
+                    bucket.append(entry)
+
+        patterns = list(targets)
+        return AhoCorasick(patterns), [targets[pattern] for pattern in patterns]
+
+    @staticmethod
+    def _load_compiled(path: str) -> Optional[Tuple[AhoCorasick, List[List[PatternTarget]]]]:
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable skills cache {path}: {e}")
+            return None
+
+    @staticmethod
+    def _save_compiled(path: str, compiled: Tuple[AhoCorasick, List[List[PatternTarget]]]) -> None:
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(compiled, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write skills cache {path}: {e}")
+
+    def _iter_skill_matches(self, tokens: List[str]):
+        """Yields (start, end, skill index) token spans for every match."""
+        lowered = [token.lower() for token in tokens]
+        for start, end, pattern_id in self._automaton.iter_matches(lowered):
+            for skill, original in self._targets[pattern_id]:
+                if original is None or tuple(tokens[start:end]) == original:
+                    yield start, end, skill
+
+    def extract_counts(self, text: str) -> Dict[str, int]:
+        """
+        Counts skill mentions in ``text``.
+
+        Args:
+            text: Job description, resume or other free text
+
+        Returns:
+            Mapping of canonical skill name to mention count, in order of
+            first mention
+        """
+        matches = sorted(self._iter_skill_matches(tokenize(text)), key=lambda m: (m[0], -m[1]))
+        counts: Counter = Counter()
+        covered_until = 0
+        for start, end, skill in matches:
+            if start < covered_until:
+                continue
+            counts[self.skills[skill]] += 1
+            covered_until = end
+        return dict(counts)
+
+    def extract(self, text: str) -> List[str]:
+        """Returns the canonical skills mentioned in ``text``, in order of first mention."""
+        return list(self.extract_counts(text))
+
+    def match(self, job_description: str, background: str) -> Dict[str, Any]:
+        """
+        Scores how well a background covers the skills a job asks for.
+
+        Args:
+            job_description: Job description text
+            background: Candidate resume or background text
+
+        Returns:
+            Dict with ``job_skills``, ``candidate_skills``, ``matched``,
+            ``missing`` and ``score`` (percentage of job skills covered,
+            None when the job mentions no known skills)
+        """
+        job_skills = self.extract(job_description)
+        candidate_skills = self.extract(background)
+        candidate = set(candidate_skills)
+        matched = [skill for skill in job_skills if skill in candidate]
+        return {
+            "taxonomy_version": self.version,
+            "job_skills": job_skills,
+            "candidate_skills": candidate_skills,
+            "matched": matched,
+            "missing": [skill for skill in job_skills if skill not in candidate],
+            "score": round(100 * len(matched) / len(job_skills), 1) if job_skills else None,
+        }
+
+
+@lru_cache(maxsize=1)
+def get_skill_extractor() -> SkillExtractor:
+    """Returns the process-wide extractor for the configured taxonomy."""
+    return SkillExtractor()
+
+
+@register_preload_hook
+def _preload_skill_extractor() -> None:
+    """Loads the compiled taxonomy before workers fork."""
+    get_skill_extractor()
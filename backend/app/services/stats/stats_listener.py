@@ -0,0 +1,73 @@
+import select
+import threading
+from typing import Optional
+
+from ...core.logger import get_logger
+from ...db.session import engine
+from .stats_service import StatsService
+
+logger = get_logger(__name__)
+
+CHANNEL = "user_stats_changed"
+
+
+class StatsInvalidationListener:
+    """
+    Invalidates cached dashboard statistics on database notifications.
+
+    The stats triggers publish the affected user id on ``user_stats_changed``
+    (or ``*`` after a bulk rebuild), so writes made by any client, not just
+    this API, evict the cached copy immediately.
+    """
+
+    def __init__(self, poll_interval: float = 5.0):
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Starts listening in a daemon thread (PostgreSQL only)."""
+        if engine.dialect.name != "postgresql":
+            logger.info("Stats invalidation listener disabled for non-PostgreSQL database")
+            return
+        self._thread = threading.Thread(target=self._run, name="stats-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops the listener thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval + 1)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self._listen()
+            except Exception as e:
+                logger.error(f"Stats invalidation listener error: {e}")
+                # Anything may have been missed while disconnected
+                StatsService.invalidate_all()
+                self._stop.wait(self.poll_interval)
+
+    def _listen(self) -> None:
+        connection = engine.raw_connection()
+        # Dedicated autocommit connection; never hand it back to the pool
+        connection.detach()
+        try:
+            dbapi_connection = connection.dbapi_connection
+            dbapi_connection.autocommit = True
+            with dbapi_connection.cursor() as cursor:
+                cursor.execute(f"LISTEN {CHANNEL}")
+
+            while not self._stop.is_set():
+                if not select.select([dbapi_connection], [], [], self.poll_interval)[0]:
+                    continue
+                dbapi_connection.poll()
+                while dbapi_connection.notifies:
+                    user_id = dbapi_connection.notifies.pop(0).payload
+                    if user_id == "*":
+                        StatsService.invalidate_all()
+                    else:
+                        StatsService.invalidate(user_id)
+        finally:
+            connection.close()
@@ -0,0 +1,88 @@
+from datetime import date, timedelta
+from typing import Any, Dict
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from ...core.cache import JSONCache
+from ...core.config import settings
+
+_SOURCES = {
+    "counters": ("user_stats", "user_activity_daily"),
+    "materialized_view": ("user_stats_mv", "user_activity_daily_mv"),
+}
+
+
+def _stats_cache() -> JSONCache:
+    return JSONCache("dashboard_stats", ttl=settings.DASHBOARD_STATS_TTL)
+
+
+class StatsService:
+    """Serves pre-aggregated dashboard statistics."""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.cache = _stats_cache()
+
+    def get_dashboard_stats(self, user_id: str) -> Dict[str, Any]:
+        """
+        Returns a user's dashboard statistics.
+
+        A warm request is a single cache lookup. On a miss the counters are
+        read by primary key from the aggregate tables maintained by the
+        database triggers, never aggregated from the history.
+
+        Args:
+            user_id: User to load statistics for
+
+        Returns:
+            Dict matching the DashboardStats schema
+        """
+        stats = self.cache.get(user_id)
+        if stats is None:
+            stats = self._load(user_id)
+            self.cache.set(user_id, stats)
+        return stats
+
+    def _load(self, user_id: str) -> Dict[str, Any]:
+        """Reads counters and recent daily activity from the aggregate tables."""
+        stats_table, activity_table = _SOURCES[settings.DASHBOARD_STATS_SOURCE]
+
+        row = self.db.execute(text(
+            "SELECT applications_total, applications_by_status, analyses_total, "
+            f"scored_analyses, score_sum, last_activity_at FROM {stats_table} "
+            "WHERE user_id = :user_id"
+        ), {"user_id": user_id}).mappings().first()
+
+        activity = self.db.execute(text(
+            f"SELECT day, applications, analyses FROM {activity_table} "
+            "WHERE user_id = :user_id AND day >= :since ORDER BY day"
+        ), {
+            "user_id": user_id,
+            "since": date.today() - timedelta(days=settings.DASHBOARD_ACTIVITY_DAYS),
+        }).mappings().all()
+
+        if row is None:
+            return {"activity": [dict(day) for day in activity]}
+
+        return {
+            "applications_total": row["applications_total"],
+            "applications_by_status": row["applications_by_status"] or {},
+            "analyses_total": row["analyses_total"],
+            "average_score": (
+                float(row["score_sum"]) / row["scored_analyses"]
+                if row["scored_analyses"] else None
+            ),
+            "last_activity_at": row["last_activity_at"],
+            "activity": [dict(day) for day in activity],
+        }
+
+    @staticmethod
+    def invalidate(user_id: str) -> None:
+        """Drops a user's cached statistics after a write."""
+        _stats_cache().delete(user_id)
+
+    @staticmethod
+    def invalidate_all() -> None:
+        """Drops every cached statistics entry, e.g. after a backfill."""
+        _stats_cache().clear()
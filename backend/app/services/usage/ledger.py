@@ -0,0 +1,469 @@
+import atexit
+import heapq
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import text
+
+from ...core.cache import get_redis
+from ...core.config import settings
+from ...core.logger import get_logger
+from ...core.profiling import route_template
+from ...core.shm_cache import get_shared_table
+from ...db.session import SessionLocal, engine
+
+logger = get_logger(__name__)
+
+# Ledger rows for calls made outside any user's request (batch jobs, tests)
+SYSTEM_USER_ID = "00000000-0000-0000-0000-000000000000"
+
+# (user_id, route, provider, model, minute)
+BucketKey = Tuple[str, str, str, str, int]
+
+# requests, errors, input_tokens, output_tokens, latency_ms_sum, latency_ms_max, cost_usd
+_REQUESTS, _ERRORS, _INPUT, _OUTPUT, _LATENCY_SUM, _LATENCY_MAX, _COST = range(7)
+
+_UPSERT_SQL = text("""
+    INSERT INTO usage_ledger (
+        minute, user_id, route, provider, model, requests, errors,
+        input_tokens, output_tokens, latency_ms_sum, latency_ms_max, cost_usd
+    )
+    SELECT to_timestamp(m), u, r, p, md, rq, er, it, ot, ls, lm, c
+    FROM unnest(
+        CAST(:minutes AS BIGINT[]), CAST(:user_ids AS UUID[]), CAST(:routes AS TEXT[]),
+        CAST(:providers AS TEXT[]), CAST(:models AS TEXT[]), CAST(:requests AS INTEGER[]),
+        CAST(:errors AS INTEGER[]), CAST(:input_tokens AS BIGINT[]), CAST(:output_tokens AS BIGINT[]),
+        CAST(:latency_ms_sums AS BIGINT[]), CAST(:latency_ms_maxes AS INTEGER[]),
+        CAST(:costs AS NUMERIC[])
+    ) AS t(m, u, r, p, md, rq, er, it, ot, ls, lm, c)
+    ON CONFLICT (user_id, minute, route, provider, model) DO UPDATE SET
+        requests = usage_ledger.requests + EXCLUDED.requests,
+        errors = usage_ledger.errors + EXCLUDED.errors,
+        input_tokens = usage_ledger.input_tokens + EXCLUDED.input_tokens,
+        output_tokens = usage_ledger.output_tokens + EXCLUDED.output_tokens,
+        latency_ms_sum = usage_ledger.latency_ms_sum + EXCLUDED.latency_ms_sum,
+        latency_ms_max = GREATEST(usage_ledger.latency_ms_max, EXCLUDED.latency_ms_max),
+        cost_usd = usage_ledger.cost_usd + EXCLUDED.cost_usd
+""")
+
+
+class UsageContext:
+    """Who and what provider calls in the current request are billed to."""
+
+    __slots__ = ("user_id", "feature", "scope")
+
+    def __init__(
+        self,
+        user_id: Optional[str] = None,
+        feature: Optional[str] = None,
+        scope: Optional[Dict[str, Any]] = None,
+    ):
+        self.user_id = user_id
+        self.feature = feature
+        self.scope = scope
+
+
+_usage_context: ContextVar[Optional[UsageContext]] = ContextVar("usage_context", default=None)
+
+
+def begin_request_usage(scope: Dict[str, Any]) -> None:
+    """
+    Starts usage attribution for an HTTP request.
+
+    The context object is shared with the tasks and threads the request
+    spawns, so the user set later by authentication is seen by all of them.
+    The route is resolved from the scope when usage is recorded, once
+    routing has matched it.
+    """
+    _usage_context.set(UsageContext(scope=scope))
+
+
+def set_usage_user(user_id: str) -> None:
+    """Attributes the current request's provider usage to ``user_id``."""
+    context = _usage_context.get()
+    if context is None:
+        _usage_context.set(UsageContext(user_id=user_id))
+    else:
+        context.user_id = user_id
+
+
+@contextmanager
+def usage_scope(user_id: Optional[str] = None, feature: Optional[str] = None) -> Iterator[None]:
+    """
+    Attributes provider usage inside the block to a user and feature.
+
+    Used by work that does not run in a request, e.g. batch pipelines;
+    ``feature`` takes the place of the route in the ledger.
+    """
+    token = _usage_context.set(UsageContext(user_id=user_id, feature=feature))
+    try:
+        yield
+    finally:
+        _usage_context.reset(token)
+
+
+def current_usage_labels() -> Tuple[Optional[str], str]:
+    """Returns the (user id, route or feature) usage is attributed to."""
+    context = _usage_context.get()
+    if context is None:
+        return None, "-"
+    if context.feature:
+        return context.user_id, context.feature
+    if context.scope is not None:
+        return context.user_id, f"{context.scope['method']} {route_template(context.scope)}"
+    return context.user_id, "-"
+
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int) -> float:
+    """Returns the USD cost of a call from USAGE_MODEL_PRICES, 0 for unknown models."""
+    prices = settings.USAGE_MODEL_PRICES.get(model)
+    if not prices:
+        return 0.0
+    return (input_tokens * prices[0] + output_tokens * prices[1]) / 1_000_000
+
+
+class UsageLimitExceeded(Exception):
+    """Raised when a user has used up a token allowance."""
+
+    def __init__(self, window: str, limit: int):
+        self.window = window
+        self.limit = limit
+        super().__init__(f"Token limit of {limit} per {window} reached")
+
+
+class UsageCounters:
+    """
+    Per-user token counters for the current minute and day.
+
+    Counting and checking only touch the host-wide shared memory table, so
+    the request path never waits on the network. When Redis is reachable,
+    ``sync`` (run by the ledger's flush thread) adds the tokens counted in
+    this process since the last sync to cluster-wide counters in Redis and
+    stores the totals it gets back in the shared table. Allowances are then
+    enforced across hosts, lagging other hosts' usage by at most one flush
+    interval. Counters are fixed windows keyed by the window start.
+    """
+
+    _windows = {"minute": (60, 120), "day": (86400, 2 * 86400)}  # (length, ttl)
+
+    def __init__(self):
+        self.shared = get_shared_table()
+        self._pending: Dict[str, int] = {}  # tokens not yet added to Redis, by counter key
+        self._watched: Set[str] = set()  # counters checked since the last sync
+        self._lock = threading.Lock()
+
+    @classmethod
+    def _key(cls, user_id: str, window: str, now: float) -> str:
+        length = cls._windows[window][0]
+        return f"usage:{user_id}:{window}:{int(now // length)}"
+
+    @classmethod
+    def _ttl(cls, key: str) -> int:
+        return cls._windows[key.rsplit(":", 2)[1]][1]
+
+    def add(self, user_id: str, tokens: int) -> None:
+        """Adds ``tokens`` to the user's minute and day counters."""
+        now = time.time()
+        try:
+            for window, (_, ttl) in self._windows.items():
+                key = self._key(user_id, window, now)
+                self.shared.incr(key, tokens, ttl=ttl)
+                with self._lock:
+                    self._pending[key] = self._pending.get(key, 0) + tokens
+        except Exception as e:
+            logger.error(f"Usage counter update error: {e}")
+
+    def tokens(self, user_id: str, window: str = "day") -> int:
+        """Returns the tokens a user has used in the current minute or day."""
+        key = self._key(user_id, window, time.time())
+        with self._lock:
+            self._watched.add(key)
+        try:
+            used = self.shared.get_counter(key)
+            cluster = self.shared.get(f"{key}:cluster")
+            if cluster is None:
+                return used
+            # Cluster total as of the last sync, plus this host's tokens since
+            return max(used, int(cluster) + used - self.shared.get_counter(f"{key}:synced"))
+        except Exception as e:
+            logger.error(f"Usage counter read error: {e}")
+            return 0
+
+    def sync(self) -> None:
+        """
+        Adds pending tokens to the Redis counters and refreshes the cluster totals.
+
+        Covers the counters this process added to or checked since the last
+        sync. Without Redis the shared table is the only counter and there
+        is nothing to do. If Redis fails, the pending tokens are kept for
+        the next sync.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            watched, self._watched = self._watched, set()
+        client = get_redis()
+        keys = list(pending.keys() | watched)
+        if client is None or not keys:
+            return
+
+        try:
+            pipe = client.pipeline(transaction=False)
+            for key in keys:
+                pipe.incrby(key, pending.get(key, 0))
+                pipe.expire(key, self._ttl(key))
+            totals = pipe.execute()[::2]
+        except Exception as e:
+            logger.error(f"Usage counter sync error: {e}")
+            with self._lock:
+                for key, tokens in pending.items():
+                    self._pending[key] = self._pending.get(key, 0) + tokens
+            return
+
+        for key, total in zip(keys, totals):
+            ttl = self._ttl(key)
+            if pending.get(key):
+                self.shared.incr(f"{key}:synced", pending[key], ttl=ttl)
+            self.shared.set(f"{key}:cluster", str(total).encode(), ttl=ttl)
+
+    def check(self, user_id: str, tokens: int = 0) -> None:
+        """
+        Enforces USAGE_USER_MINUTE_TOKEN_LIMIT and USAGE_USER_DAILY_TOKEN_LIMIT.
+
+        Args:
+            user_id: User about to make a provider call
+            tokens: Tokens the call is expected to use
+
+        Raises:
+            UsageLimitExceeded: If the call would exceed an allowance
+        """
+        for window, limit in (
+            ("minute", settings.USAGE_USER_MINUTE_TOKEN_LIMIT),
+            ("day", settings.USAGE_USER_DAILY_TOKEN_LIMIT),
+        ):
+            if limit and self.tokens(user_id, window) + tokens > limit:
+                raise UsageLimitExceeded(window, limit)
+
+
+class UsageLedger:
+    """
+    Aggregates provider usage in memory and writes it to ``usage_ledger``.
+
+    Recording a call updates one in-process bucket per (user, route,
+    provider, model, minute) and the user's shared budget counters; there is
+    no database or Redis call on the request path. A background thread
+    upserts all buckets every USAGE_FLUSH_INTERVAL seconds in a single
+    statement and syncs the budget counters. If the write fails, the buckets
+    are merged back and retried on the next flush, keeping at most
+    USAGE_MAX_PENDING_BUCKETS; the oldest minutes are dropped beyond that.
+
+    The ledger table needs PostgreSQL. On any other database (e.g. the
+    SQLite development default) nothing is aggregated and no thread is
+    started; token counters still work, but are not synced to Redis.
+    """
+
+    def __init__(
+        self,
+        flush_interval: float = settings.USAGE_FLUSH_INTERVAL,
+        enabled: Optional[bool] = None,
+    ):
+        self.flush_interval = flush_interval
+        self.enabled = engine.dialect.name == "postgresql" if enabled is None else enabled
+        self.dropped = 0
+        self._failing = False
+        self._buckets: Dict[BucketKey, List[Any]] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._counters: Optional[UsageCounters] = None
+        os.register_at_fork(after_in_child=self._after_fork)
+        atexit.register(self._flush_all)
+
+    def _after_fork(self) -> None:
+        # The flush thread and the parent's pending buckets and tokens stay with the parent
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._counters = None
+
+    @property
+    def counters(self) -> UsageCounters:
+        if self._counters is None:
+            self._counters = UsageCounters()
+        return self._counters
+
+    def record(
+        self,
+        provider: str,
+        model: str,
+        input_tokens: int,
+        output_tokens: int,
+        latency_ms: float,
+        error: bool = False,
+    ) -> None:
+        """
+        Records one provider call against the current usage context.
+
+        Args:
+            provider: Provider name (openai, anthropic)
+            model: Model the call was made with
+            input_tokens: Prompt tokens reported by the provider
+            output_tokens: Completion tokens reported by the provider
+            latency_ms: Wall time of the call
+            error: Whether the call failed
+        """
+        user_id, route = current_usage_labels()
+        if user_id and input_tokens + output_tokens:
+            self.counters.add(user_id, input_tokens + output_tokens)
+        if not self.enabled:
+            return
+        key = (user_id or SYSTEM_USER_ID, route, provider, model, int(time.time() // 60) * 60)
+        latency = int(latency_ms)
+        cost = estimate_cost(model, input_tokens, output_tokens)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [0, 0, 0, 0, 0, 0, 0.0]
+            bucket[_REQUESTS] += 1
+            bucket[_ERRORS] += error
+            bucket[_INPUT] += input_tokens
+            bucket[_OUTPUT] += output_tokens
+            bucket[_LATENCY_SUM] += latency
+            bucket[_LATENCY_MAX] = max(bucket[_LATENCY_MAX], latency)
+            bucket[_COST] += cost
+            self._start_thread()
+
+    def check(self, user_id: str, tokens: int = 0) -> None:
+        """Enforces the user's token allowances, see UsageCounters.check."""
+        if self.enabled:
+            with self._lock:
+                self._start_thread()
+        self.counters.check(user_id, tokens)
+
+    def _start_thread(self) -> None:
+        # Called with self._lock held
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="usage-ledger", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.flush_interval)
+            self._flush_all()
+
+    def _flush_all(self) -> None:
+        self.flush()
+        if self._counters is not None:
+            self._counters.sync()
+
+    def flush(self) -> int:
+        """
+        Writes all pending buckets to the ledger table.
+
+        Returns:
+            Number of ledger rows written
+        """
+        with self._lock:
+            buckets, self._buckets = self._buckets, {}
+        if not buckets:
+            return 0
+
+        columns: Dict[str, List[Any]] = {name: [] for name in (
+            "minutes", "user_ids", "routes", "providers", "models", "requests", "errors",
+            "input_tokens", "output_tokens", "latency_ms_sums", "latency_ms_maxes", "costs",
+        )}
+        for (user_id, route, provider, model, minute), bucket in buckets.items():
+            columns["minutes"].append(minute)
+            columns["user_ids"].append(user_id)
+            columns["routes"].append(route)
+            columns["providers"].append(provider)
+            columns["models"].append(model)
+            columns["requests"].append(bucket[_REQUESTS])
+            columns["errors"].append(bucket[_ERRORS])
+            columns["input_tokens"].append(bucket[_INPUT])
+            columns["output_tokens"].append(bucket[_OUTPUT])
+            columns["latency_ms_sums"].append(bucket[_LATENCY_SUM])
+            columns["latency_ms_maxes"].append(bucket[_LATENCY_MAX])
+            columns["costs"].append(round(bucket[_COST], 6))
+
+        db = SessionLocal()
+        try:
+            db.execute(_UPSERT_SQL, columns)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            # Logged once per outage rather than every flush interval
+            if not self._failing:
+                logger.error(f"Usage ledger flush failed, retrying {len(buckets)} rows later: {e}")
+            self._failing = True
+            self._merge_back(buckets)
+            return 0
+        finally:
+            db.close()
+        if self._failing:
+            self._failing = False
+            logger.info("usage_ledger_flush_recovered", rows=len(buckets))
+        return len(buckets)
+
+    def _merge_back(self, buckets: Dict[BucketKey, List[Any]]) -> None:
+        """Returns unwritten buckets to the pending set, dropping the oldest beyond the cap."""
+        with self._lock:
+            for key, bucket in buckets.items():
+                pending = self._buckets.get(key)
+                if pending is None:
+                    self._buckets[key] = bucket
+                    continue
+                for field in (_REQUESTS, _ERRORS, _INPUT, _OUTPUT, _LATENCY_SUM, _COST):
+                    pending[field] += bucket[field]
+                pending[_LATENCY_MAX] = max(pending[_LATENCY_MAX], bucket[_LATENCY_MAX])
+
+            excess = len(self._buckets) - settings.USAGE_MAX_PENDING_BUCKETS
+            if excess <= 0:
+                return
+            for key in heapq.nsmallest(excess, self._buckets, key=lambda key: key[4]):
+                del self._buckets[key]
+            self.dropped += excess
+        logger.warning("usage_ledger_buckets_dropped", dropped=excess, dropped_total=self.dropped)
+
+
+_ledger: Optional[UsageLedger] = None
+_ledger_lock = threading.Lock()
+
+
+def get_usage_ledger() -> UsageLedger:
+    """Returns the process-wide usage ledger."""
+    global _ledger
+    if _ledger is None:
+        with _ledger_lock:
+            if _ledger is None:
+                _ledger = UsageLedger()
+    return _ledger
+
+
+def record_usage(
+    provider: str,
+    model: str,
+    input_tokens: int,
+    output_tokens: int,
+    latency_ms: float,
+    error: bool = False,
+) -> None:
+    """Records one provider call in the process-wide ledger, see UsageLedger.record."""
+    get_usage_ledger().record(provider, model, input_tokens, output_tokens, latency_ms, error)
+
+
+def check_usage_limit(user_id: Optional[str] = None, tokens: int = 0) -> None:
+    """
+    Raises UsageLimitExceeded if a user is out of token allowance.
+
+    Args:
+        user_id: User to check, defaults to the current usage context's
+        tokens: Tokens the next call is expected to use
+    """
+    if not (settings.USAGE_USER_MINUTE_TOKEN_LIMIT or settings.USAGE_USER_DAILY_TOKEN_LIMIT):
+        return
+    user_id = user_id or current_usage_labels()[0]
+    if user_id:
+        get_usage_ledger().check(user_id, tokens)
@@ -0,0 +1,89 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+GRANULARITIES = ("minute", "hour", "day")
+
+_TOTALS = (
+    "SUM(requests)::INTEGER AS requests, SUM(errors)::INTEGER AS errors, "
+    "SUM(input_tokens)::BIGINT AS input_tokens, SUM(output_tokens)::BIGINT AS output_tokens, "
+    "SUM(cost_usd)::FLOAT AS cost_usd, "
+    "(SUM(latency_ms_sum)::FLOAT / NULLIF(SUM(requests), 0)) AS avg_latency_ms, "
+    "MAX(latency_ms_max) AS max_latency_ms"
+)
+
+
+class UsageService:
+    """
+    Reads provider usage from the ledger.
+
+    The ledger is written by each worker's UsageLedger every
+    USAGE_FLUSH_INTERVAL seconds, so the most recent calls may not be
+    visible yet.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def user_usage(
+        self,
+        user_id: str,
+        since: datetime,
+        until: Optional[datetime] = None,
+        granularity: str = "day",
+    ) -> List[Dict[str, Any]]:
+        """
+        Returns a user's usage over time, per provider and model.
+
+        Args:
+            user_id: User to report on
+            since: Start of the period (inclusive)
+            until: End of the period (exclusive), defaults to now
+            granularity: Bucket size, one of minute, hour or day
+
+        Returns:
+            One row per bucket, provider and model, oldest first
+
+        Raises:
+            ValueError: If the granularity is not supported
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"granularity must be one of {', '.join(GRANULARITIES)}")
+        rows = self.db.execute(text(
+            f"SELECT date_trunc(:granularity, minute) AS bucket, provider, model, {_TOTALS} "
+            "FROM usage_ledger "
+            "WHERE user_id = :user_id AND minute >= :since AND minute < COALESCE(:until, NOW()) "
+            "GROUP BY 1, 2, 3 ORDER BY 1, 2, 3"
+        ), {"granularity": granularity, "user_id": user_id, "since": since, "until": until})
+        return [dict(row) for row in rows.mappings()]
+
+    def feature_usage(
+        self,
+        since: datetime,
+        until: Optional[datetime] = None,
+        user_id: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Returns usage per route or feature, provider and model.
+
+        Args:
+            since: Start of the period (inclusive)
+            until: End of the period (exclusive), defaults to now
+            user_id: Optional filter to a single user
+
+        Returns:
+            One row per route, provider and model, costliest first
+        """
+        conditions = ["minute >= :since", "minute < COALESCE(:until, NOW())"]
+        params: Dict[str, Any] = {"since": since, "until": until}
+        if user_id:
+            conditions.append("user_id = :user_id")
+            params["user_id"] = user_id
+        rows = self.db.execute(text(
+            f"SELECT route, provider, model, {_TOTALS} FROM usage_ledger "
+            f"WHERE {' AND '.join(conditions)} "
+            "GROUP BY 1, 2, 3 ORDER BY cost_usd DESC, SUM(input_tokens + output_tokens) DESC"
+        ), params)
+        return [dict(row) for row in rows.mappings()]
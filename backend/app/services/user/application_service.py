@@ -0,0 +1,46 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from ...db.pagination import fetch_keyset_page
+
+
+class ApplicationService:
+    """Service for reading a user's job applications."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def list_applications(
+        self,
+        user_id: str,
+        status: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = 20,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Lists a user's applications, newest first.
+
+        Args:
+            user_id: Owner of the applications
+            status: Optional status filter (applied, interview, rejected, ...)
+            cursor: Cursor returned with the previous page
+            limit: Maximum applications per page
+
+        Returns:
+            The page of applications and the cursor for the next page
+        """
+        conditions = ["user_id = :user_id"]
+        params: Dict[str, Any] = {"user_id": user_id}
+        if status:
+            conditions.append("status = :status")
+            params["status"] = status
+        return fetch_keyset_page(
+            self.db,
+            "SELECT id, job_posting_id, status, application_date, notes, "
+            "resume_version, created_at, updated_at FROM user_applications",
+            conditions,
+            params,
+            cursor,
+            limit,
+        )
@@ -0,0 +1,79 @@
+import json
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from ..search.embeddings import HashingEmbedder
+from ..search.vector_index import get_vector_index
+from ..skills.extractor import get_skill_extractor
+
+
+class ResumeService:
+    """Service for storing user resumes."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def create(
+        self,
+        user_id: str,
+        title: str,
+        content: str,
+        file_url: Optional[str] = None,
+        is_default: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Stores a resume and indexes it for job matching.
+
+        Skills extracted from the resume fill the user's profile when the
+        resume is the default or the profile has no skills yet.
+
+        Args:
+            user_id: Owner of the resume
+            title: Display title
+            content: Normalised resume text
+            file_url: Location of the original document, if uploaded
+            is_default: Whether this becomes the user's default resume
+
+        Returns:
+            The stored resume row
+        """
+        if is_default:
+            self.db.execute(text(
+                "UPDATE user_resumes SET is_default = false "
+                "WHERE user_id = :user_id AND is_default"
+            ), {"user_id": user_id})
+
+        row = self.db.execute(text(
+            "INSERT INTO user_resumes (user_id, title, content, file_url, is_default) "
+            "VALUES (:user_id, :title, :content, :file_url, :is_default) "
+            "RETURNING id, title, content, file_url, is_default, created_at"
+        ), {
+            "user_id": user_id,
+            "title": title,
+            "content": content,
+            "file_url": file_url,
+            "is_default": is_default,
+        }).mappings().one()
+        self._update_profile_skills(user_id, get_skill_extractor().extract(content), overwrite=is_default)
+        self.db.commit()
+
+        get_vector_index("user_resumes").upsert(
+            [str(row["id"])], HashingEmbedder().embed(content)[None, :]
+        )
+        return dict(row)
+
+    def _update_profile_skills(self, user_id: str, skills: List[str], overwrite: bool) -> None:
+        """Writes extracted skills to ``user_profiles``, creating the profile if needed."""
+        params = {"user_id": user_id, "skills": json.dumps(skills), "overwrite": overwrite}
+        updated = self.db.execute(text(
+            "UPDATE user_profiles SET skills = CAST(:skills AS JSONB), updated_at = NOW() "
+            "WHERE user_id = :user_id AND (:overwrite OR skills IS NULL OR skills = '[]')"
+        ), params)
+        if updated.rowcount == 0:
+            self.db.execute(text(
+                "INSERT INTO user_profiles (user_id, skills) "
+                "SELECT :user_id, CAST(:skills AS JSONB) "
+                "WHERE NOT EXISTS (SELECT 1 FROM user_profiles WHERE user_id = :user_id)"
+            ), params)
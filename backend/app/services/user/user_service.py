@@ -0,0 +1,139 @@
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
+from starlette.concurrency import run_in_threadpool
+
+from ...core.cache import TTLCache
+from ...core.config import settings
+from ...core.security import hash_password, pwd_context, verify_password
+from ...db.session import SessionLocal
+from ...schemas.user import UserCreate, UserInDB, UserUpdate
+
+_USER_COLUMNS = "id, email, full_name, hashed_password, is_active, is_verified, created_at"
+
+# Hash verified for unknown emails so login timing doesn't reveal which exist
+_DUMMY_HASH = pwd_context.hash("career-compass-dummy-password")
+
+_user_cache = TTLCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL)
+
+
+def invalidate_user_cache(email: str) -> None:
+    """Drops a cached user after it has been modified."""
+    _user_cache.delete(email.lower())
+
+
+class UserService:
+    """Service for user accounts and authentication."""
+
+    def _fetch_one(self, sql: str, params: Dict[str, Any]) -> Optional[UserInDB]:
+        db = SessionLocal()
+        try:
+            row = db.execute(text(sql), params).mappings().first()
+            db.commit()
+            return UserInDB(**row) if row else None
+        finally:
+            db.close()
+
+    async def get_by_email(self, email: str) -> Optional[UserInDB]:
+        """
+        Loads a user by email from the database.
+
+        Args:
+            email: Email address (case-insensitive)
+
+        Returns:
+            The user, or None if no account exists
+        """
+        return await run_in_threadpool(
+            self._fetch_one,
+            f"SELECT {_USER_COLUMNS} FROM users WHERE email = :email",
+            {"email": email.lower()},
+        )
+
+    async def get_cached_by_email(self, email: str) -> Optional[UserInDB]:
+        """
+        Loads a user by email through the in-process TTL cache.
+
+        Used on every authenticated request; misses fall through to the
+        database and writes through ``update`` invalidate the entry.
+
+        Args:
+            email: Email address (case-insensitive)
+
+        Returns:
+            The user, or None if no account exists
+        """
+        key = email.lower()
+        user = _user_cache.get(key)
+        if user is None:
+            user = await self.get_by_email(key)
+            if user is not None:
+                _user_cache.set(key, user)
+        return user
+
+    async def create(self, obj_in: UserCreate) -> UserInDB:
+        """
+        Registers a new user.
+
+        Args:
+            obj_in: Registration payload
+
+        Returns:
+            The created user
+        """
+        hashed_password = await hash_password(obj_in.password)
+        return await run_in_threadpool(
+            self._fetch_one,
+            "INSERT INTO users (email, hashed_password, full_name) "
+            f"VALUES (:email, :hashed_password, :full_name) RETURNING {_USER_COLUMNS}",
+            {
+                "email": obj_in.email.lower(),
+                "hashed_password": hashed_password,
+                "full_name": obj_in.full_name,
+            },
+        )
+
+    async def update(self, user: UserInDB, obj_in: UserUpdate) -> UserInDB:
+        """
+        Updates a user's profile fields and invalidates the cached copy.
+
+        Args:
+            user: User being updated
+            obj_in: Fields to change
+
+        Returns:
+            The updated user
+        """
+        values = obj_in.model_dump(exclude_unset=True, exclude={"password"})
+        if obj_in.password:
+            values["hashed_password"] = await hash_password(obj_in.password)
+        if not values:
+            return user
+
+        assignments = ", ".join(f"{column} = :{column}" for column in values)
+        updated = await run_in_threadpool(
+            self._fetch_one,
+            f"UPDATE users SET {assignments} WHERE id = :id RETURNING {_USER_COLUMNS}",
+            {**values, "id": str(user.id)},
+        )
+        invalidate_user_cache(user.email)
+        return updated
+
+    async def authenticate(self, email: str, password: str) -> Optional[UserInDB]:
+        """
+        Checks credentials without blocking the event loop.
+
+        Args:
+            email: Email address used as the login name
+            password: Plain-text password
+
+        Returns:
+            The user if the credentials are valid and the account is active
+        """
+        user = await self.get_by_email(email)
+        if user is None:
+            await verify_password(password, _DUMMY_HASH)
+            return None
+        if not await verify_password(password, user.hashed_password):
+            return None
+        return user if user.is_active else None
@@ -0,0 +1,91 @@
+"""
+Copies the ai_analysis history into its partitioned replacement.
+
+Rows are copied in primary key order, one short transaction per batch, so
+the live table is never locked; new writes are mirrored by the trigger from
+migrations/005_ai_analysis_partitioned.sql. Copies of rows deleted mid-batch
+are then pruned, again in id ranges. Safe to stop and rerun: copied rows are
+skipped, and --after resumes from a logged position.
+
+Usage:
+    python -m app.tasks.backfill_ai_analysis
+    python -m app.tasks.backfill_ai_analysis --batch-size 2000 --pause 0.5
+"""
+import argparse
+import time
+from typing import Optional
+
+from sqlalchemy import text
+
+from ..core.logger import configure_logging, get_logger
+from ..db.session import SessionLocal
+
+logger = get_logger(__name__)
+
+
+def backfill(batch_size: int = 5000, pause: float = 0.1, after: Optional[str] = None) -> None:
+    """
+    Copies existing analyses into ai_analysis_v2 in batches.
+
+    Args:
+        batch_size: Rows copied per transaction
+        pause: Seconds to sleep between batches, to leave I/O for live traffic
+        after: Resume after this analysis id
+    """
+    started = time.perf_counter()
+    batches = 0
+    db = SessionLocal()
+    try:
+        last_id = after
+        while True:
+            last_id = db.execute(
+                text("SELECT ai_analysis_backfill_batch(CAST(:after AS UUID), :batch_size)"),
+                {"after": last_id, "batch_size": batch_size},
+            ).scalar()
+            db.commit()
+            if last_id is None:
+                break
+            last_id = str(last_id)
+            batches += 1
+            if batches % 20 == 0:
+                logger.info("ai_analysis_backfill_progress", batches=batches, last_id=last_id)
+            time.sleep(pause)
+
+        # A row deleted while its batch was being copied can be left behind;
+        # prune in id ranges too, so no statement scans the whole history
+        orphans = 0
+        last_id = None
+        while True:
+            last_id, removed = db.execute(
+                text("SELECT * FROM ai_analysis_backfill_prune_batch(CAST(:after AS UUID), :batch_size)"),
+                {"after": last_id, "batch_size": batch_size},
+            ).one()
+            db.commit()
+            if last_id is None:
+                break
+            last_id = str(last_id)
+            orphans += removed
+            time.sleep(pause)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    logger.info(
+        "ai_analysis_backfilled",
+        batches=batches,
+        orphans_removed=orphans,
+        duration=f"{time.perf_counter() - started:.1f}s",
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--pause", type=float, default=0.1, help="Seconds between batches")
+    parser.add_argument("--after", help="Resume after this analysis id")
+    args = parser.parse_args()
+
+    configure_logging()
+    backfill(batch_size=args.batch_size, pause=args.pause, after=args.after)
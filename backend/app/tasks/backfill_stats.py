@@ -0,0 +1,60 @@
+"""
+Rebuilds the dashboard statistics aggregates in bulk.
+
+Usage:
+    python -m app.tasks.backfill_stats
+    python -m app.tasks.backfill_stats --materialized-view
+"""
+import argparse
+import time
+
+from sqlalchemy import text
+
+from ..core.logger import configure_logging, get_logger
+from ..db.session import SessionLocal
+from ..services.stats.stats_service import StatsService
+
+logger = get_logger(__name__)
+
+
+def backfill(materialized_view: bool = False) -> None:
+    """
+    Recomputes the per-user aggregates from the source tables.
+
+    Args:
+        materialized_view: Refresh the materialized views instead of
+            rebuilding the trigger-maintained counters
+    """
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        if materialized_view:
+            db.execute(text("SELECT refresh_user_stats_mv()"))
+            target = "user_stats_mv"
+        else:
+            db.execute(text("SELECT backfill_user_stats()"))
+            target = "user_stats"
+        db.commit()
+        users = db.execute(text(f"SELECT COUNT(*) FROM {target}")).scalar_one()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    StatsService.invalidate_all()
+    logger.info(
+        "user_stats_backfilled",
+        source="materialized_view" if materialized_view else "counters",
+        users=users,
+        duration=f"{time.perf_counter() - started:.1f}s",
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--materialized-view", action="store_true")
+    args = parser.parse_args()
+
+    configure_logging()
+    backfill(materialized_view=args.materialized_view)
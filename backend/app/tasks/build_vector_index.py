@@ -0,0 +1,91 @@
+"""
+Rebuilds the local vector indexes from the database.
+
+Usage:
+    python -m app.tasks.build_vector_index --corpus job_postings --compact
+"""
+import argparse
+import time
+
+from sqlalchemy import text
+
+from ..core.logger import configure_logging, get_logger
+from ..db.session import SessionLocal
+from ..services.jobs.job_service import JobService
+from ..services.search.embeddings import HashingEmbedder
+from ..services.search.vector_index import get_vector_index
+
+logger = get_logger(__name__)
+
+
+def _iter_resume_documents(db, batch_size: int):
+    """Streams user resumes as (id, text) batches for vector indexing."""
+    stmt = text(
+        "SELECT id, content FROM user_resumes WHERE content IS NOT NULL"
+    ).execution_options(yield_per=batch_size)
+    for rows in db.execute(stmt).partitions():
+        yield [(str(row.id), row.content) for row in rows]
+
+
+def build_index(corpus: str, batch_size: int = 1000, compact: bool = False) -> int:
+    """
+    Embeds every document of a corpus and appends it to its index.
+
+    Args:
+        corpus: Either ``"job_postings"`` or ``"user_resumes"``
+        batch_size: Documents embedded and appended per batch
+        compact: Whether to compact (and rebuild IVF lists) afterwards
+
+    Returns:
+        Number of documents indexed
+    """
+    embedder = HashingEmbedder()
+    index = get_vector_index(corpus)
+    indexed = 0
+    started = time.perf_counter()
+
+    db = SessionLocal()
+    try:
+        if corpus == "job_postings":
+            batches = JobService(db).iter_index_documents(batch_size)
+        elif corpus == "user_resumes":
+            batches = _iter_resume_documents(db, batch_size)
+        else:
+            raise ValueError(f"Unknown corpus: {corpus}")
+
+        for batch in batches:
+            ids = [doc_id for doc_id, _ in batch]
+            index.upsert(ids, embedder.embed_many(doc for _, doc in batch))
+            indexed += len(batch)
+
+        if corpus == "job_postings":
+            # Postings deactivated outside deactivate_postings() still have rows
+            for ids in JobService(db).iter_inactive_ids(batch_size):
+                index.delete(index.present(ids))
+    finally:
+        db.close()
+
+    if compact:
+        index.compact()
+    else:
+        index.maybe_compact()
+
+    elapsed = time.perf_counter() - started
+    logger.info(
+        "vector_index_built",
+        corpus=corpus,
+        documents=indexed,
+        duration=f"{elapsed:.1f}s",
+    )
+    return indexed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", choices=["job_postings", "user_resumes"], default="job_postings")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--compact", action="store_true")
+    args = parser.parse_args()
+
+    configure_logging()
+    build_index(args.corpus, batch_size=args.batch_size, compact=args.compact)
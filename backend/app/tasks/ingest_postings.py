@@ -0,0 +1,37 @@
+"""
+Bulk-ingests job postings from a CSV or JSONL feed.
+
+Usage:
+    python -m app.tasks.ingest_postings feed.jsonl
+    zcat feed.csv.gz | python -m app.tasks.ingest_postings - --format csv
+"""
+import argparse
+import sys
+
+from ..core.config import settings
+from ..core.logger import configure_logging
+from ..services.jobs.ingestion import PostingIngestor, detect_format, read_records
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path", help="Feed file, or - for stdin")
+    parser.add_argument("--format", choices=["csv", "jsonl"])
+    parser.add_argument("--batch-size", type=int, default=settings.INGEST_BATCH_SIZE)
+    parser.add_argument("--no-vector-index", action="store_true")
+    args = parser.parse_args()
+
+    configure_logging()
+    fmt = args.format or detect_format(args.path)
+    ingestor = PostingIngestor(
+        batch_size=args.batch_size,
+        update_vector_index=not args.no_vector_index,
+    )
+
+    if args.path == "-":
+        report = ingestor.ingest(read_records(sys.stdin, fmt))
+    else:
+        with open(args.path, "r", encoding="utf-8", newline="") as stream:
+            report = ingestor.ingest(read_records(stream, fmt))
+
+    print(report.model_dump_json(indent=2))
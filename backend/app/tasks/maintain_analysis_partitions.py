@@ -0,0 +1,74 @@
+"""
+Creates upcoming ai_analysis partitions and drops expired ones.
+
+Run daily from cron (or pg_cron with
+``SELECT ai_analysis_maintain_partitions(3, 0)``). Inserts never fail if
+runs are missed: rows for months without a partition land in the default
+partition, and the next run moves them into their month's new partition.
+
+Usage:
+    python -m app.tasks.maintain_analysis_partitions
+    python -m app.tasks.maintain_analysis_partitions --retention-months 24
+"""
+import argparse
+
+from sqlalchemy import text
+
+from ..core.config import settings
+from ..core.logger import configure_logging, get_logger
+from ..db.session import SessionLocal
+
+logger = get_logger(__name__)
+
+
+def maintain(
+    months_ahead: int = settings.ANALYSIS_PARTITION_MONTHS_AHEAD,
+    retention_months: int = settings.ANALYSIS_RETENTION_MONTHS,
+) -> None:
+    """
+    Ensures partitions exist ahead of time and applies retention.
+
+    Args:
+        months_ahead: Months after the current one to create partitions for
+        retention_months: Full months of history to keep before the current
+            one; 0 keeps everything
+    """
+    db = SessionLocal()
+    try:
+        # Until migration 006 swaps the tables, the partitioned one is ai_analysis_v2
+        parent = db.execute(text(
+            "SELECT CASE WHEN (SELECT relkind FROM pg_class WHERE oid = 'ai_analysis'::REGCLASS) = 'p' "
+            "THEN 'ai_analysis' ELSE 'ai_analysis_v2' END"
+        )).scalar_one()
+        created = db.execute(
+            text("SELECT ai_analysis_ensure_partitions(NULL, :months_ahead, :parent)"),
+            {"months_ahead": months_ahead, "parent": parent},
+        ).scalar_one()
+        dropped = 0
+        if retention_months > 0:
+            dropped = db.execute(
+                text("SELECT ai_analysis_drop_partitions(:retention_months, :parent)"),
+                {"retention_months": retention_months, "parent": parent},
+            ).scalar_one()
+        db.commit()
+        # Rows left over are dated beyond the months created ahead
+        stranded = db.execute(text("SELECT COUNT(*) FROM ai_analysis_default")).scalar_one()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    logger.info("ai_analysis_partitions_maintained", parent=parent, created=created, dropped=dropped)
+    if stranded:
+        logger.warning("ai_analysis_default_partition_rows", parent=parent, rows=stranded)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--months-ahead", type=int, default=settings.ANALYSIS_PARTITION_MONTHS_AHEAD)
+    parser.add_argument("--retention-months", type=int, default=settings.ANALYSIS_RETENTION_MONTHS)
+    args = parser.parse_args()
+
+    configure_logging()
+    maintain(months_ahead=args.months_ahead, retention_months=args.retention_months)
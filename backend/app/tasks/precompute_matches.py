@@ -0,0 +1,26 @@
+"""
+Pre-evaluates new job postings against users' default resumes.
+
+Meant to be scheduled (e.g. hourly via cron); outside the off-peak window
+configured by PRECOMPUTE_WINDOW_START_HOUR/END_HOUR a run exits immediately.
+
+Usage:
+    python -m app.tasks.precompute_matches
+    python -m app.tasks.precompute_matches --ignore-window
+"""
+import argparse
+import asyncio
+import json
+
+from ..core.logger import configure_logging
+from ..services.ai.precompute_service import PrecomputePipeline
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--ignore-window", action="store_true")
+    args = parser.parse_args()
+
+    configure_logging()
+    report = asyncio.run(PrecomputePipeline(respect_window=not args.ignore_window).run())
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,134 @@
+"""
+Measures provider tokens and modelled latency over a resume edit session.
+
+Replays a realistic session (one initial evaluation followed by single-bullet
+edits) against a stub provider, once with full evaluations and once with
+section-level incremental evaluation, and compares prompt/completion tokens
+and modelled provider latency. No network or Redis is needed: the stub
+counts tokens and the caches fall back to memory.
+
+Usage:
+    python -m benchmarks.bench_incremental_eval --edits 10
+"""
+import argparse
+import asyncio
+import random
+import os
+import re
+import time
+
+from app.core.config import settings
+from app.core.shm_cache import get_shared_table
+from app.services.ai.ai_evaluator import JobEvaluationRequest, JobEvaluator
+
+# Rough provider model: fixed overhead plus per-token costs
+BASE_LATENCY_S = 0.4
+PROMPT_TOKEN_S = 0.0002
+COMPLETION_TOKEN_S = 0.02
+
+JOB = (
+    "Senior Backend Engineer. We are looking for an engineer with strong Python and "
+    "PostgreSQL experience to design REST APIs, run services on Kubernetes and mentor "
+    "other developers. Experience with FastAPI, Redis and AWS is a plus. "
+) * 3
+
+RESUME_SECTIONS = {
+    "SUMMARY": "Backend engineer with eight years of experience building web services.",
+    "EXPERIENCE": " ".join(
+        f"Built service {i} in Python handling {i * 10}k requests per minute with PostgreSQL and Redis."
+        for i in range(1, 25)
+    ),
+    "EDUCATION": "BSc Computer Science, State University. Graduated with honours.",
+    "SKILLS": "Python, FastAPI, Django, PostgreSQL, Redis, Docker, Kubernetes, AWS, Terraform.",
+    "PROJECTS": " ".join(
+        f"Open source project {i}: a library for async task queues used by {i * 100} developers."
+        for i in range(1, 8)
+    ),
+}
+
+
+class StubEvaluator(JobEvaluator):
+    """JobEvaluator whose provider returns canned results and counts tokens."""
+
+    def __init__(self):
+        super().__init__()
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.modelled_latency = 0.0
+
+    async def _call_provider(self, ai_provider, prompt):
+        finding = "Demonstrates production experience directly relevant to the role requirements"
+        section_ids = re.findall(r"\[(S\d+)\]", prompt)
+        result = {
+            "score": 72.0,
+            "summary": "Strong backend profile with relevant Python and PostgreSQL experience. " * 3,
+            "suggested_questions": ["Describe a scaling problem you solved and how you measured it."] * 5,
+            "career_advice": "Highlight production Kubernetes work and mentoring experience. " * 3,
+        }
+        if section_ids:
+            result["sections"] = {
+                section_id: {"score": 70.0, "strengths": [finding] * 2, "gaps": [finding]}
+                for section_id in section_ids
+            }
+        else:
+            result["strengths"] = [finding] * 8
+            result["gaps"] = [finding] * 5
+        prompt_tokens = len(prompt) // 4
+        completion_tokens = len(str(result)) // 4
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.modelled_latency += (
+            BASE_LATENCY_S + prompt_tokens * PROMPT_TOKEN_S + completion_tokens * COMPLETION_TOKEN_S
+        )
+        return result
+
+
+def edit_session(edits: int, seed: int = 0):
+    """Yields successive resume versions, each changing one sentence."""
+    rng = random.Random(seed)
+    sections = dict(RESUME_SECTIONS)
+    yield sections
+    for n in range(edits):
+        heading = rng.choice(["EXPERIENCE", "PROJECTS", "SKILLS", "SUMMARY"])
+        sentences = sections[heading].split(". ")
+        i = rng.randrange(len(sentences))
+        sentences[i] = sentences[i] + f" (revised {n})"
+        sections = {**sections, heading: ". ".join(sentences)}
+        yield sections
+
+
+async def run_session(incremental: bool, edits: int):
+    settings.INCREMENTAL_EVALUATION = incremental
+    # Both modes must start cold; the fallback caches are shared memory
+    get_shared_table().clear()
+    evaluator = StubEvaluator()
+    started = time.perf_counter()
+    for version in edit_session(edits):
+        background = " ".join(f"{heading}: {text}" for heading, text in version.items())
+        await evaluator.evaluate_job(JobEvaluationRequest(
+            job_description=JOB[:settings.MAX_JOB_DESC_LENGTH],
+            your_background=background,
+        ))
+    local_overhead = time.perf_counter() - started
+    return evaluator, local_overhead
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Incremental evaluation benchmark")
+    parser.add_argument("--edits", type=int, default=10)
+    args = parser.parse_args()
+    settings.SHM_CACHE_NAME = f"bench-{os.getpid()}"
+
+    print(f"{'mode':<12} {'prompt tok':>11} {'compl tok':>10} {'latency s':>10} {'local ms':>9}")
+    for incremental in (False, True):
+        evaluator, overhead = asyncio.run(run_session(incremental, args.edits))
+        print(
+            f"{'incremental' if incremental else 'full':<12} {evaluator.prompt_tokens:>11} "
+            f"{evaluator.completion_tokens:>10} {evaluator.modelled_latency:>10.1f} "
+            f"{overhead * 1000:>9.1f}"
+        )
+    os.unlink(get_shared_table().path)
+
+
+if __name__ == "__main__":
+    main()
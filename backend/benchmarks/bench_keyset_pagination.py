@@ -0,0 +1,89 @@
+"""
+Compares keyset and OFFSET pagination cost at increasing page depths.
+
+Seeds one user with N applications inside a transaction that is rolled back
+at the end, then times fetching page 1, 100, 1,000 and 10,000 both ways.
+Requires DATABASE_URL to point at a PostgreSQL database with
+database_schema.sql and migrations/001_listing_indexes.sql applied.
+
+Usage:
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_keyset_pagination --rows 500000
+"""
+import argparse
+import statistics
+import time
+
+from sqlalchemy import text
+
+from app.db.pagination import encode_cursor, fetch_keyset_page
+from app.db.session import SessionLocal
+
+PAGE_SIZE = 20
+PAGES = (1, 100, 1000, 10000)
+
+
+def _seed(db, rows: int) -> str:
+    """Creates a throwaway user with ``rows`` applications."""
+    user_id = db.execute(text(
+        "INSERT INTO users (email, hashed_password) "
+        "VALUES ('bench-' || gen_random_uuid() || '@example.com', 'x') RETURNING id"
+    )).scalar_one()
+    db.execute(text(
+        "INSERT INTO user_applications (user_id, status, created_at) "
+        "SELECT :user_id, (ARRAY['applied','interview','rejected','offered'])[1 + i % 4], "
+        "NOW() - make_interval(secs => i) FROM generate_series(1, :rows) AS i"
+    ), {"user_id": user_id, "rows": rows})
+    db.execute(text("ANALYZE user_applications"))
+    return str(user_id)
+
+
+def _time(fn, repeat: int) -> float:
+    """Returns the median wall time of ``fn`` in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Keyset vs OFFSET pagination benchmark")
+    parser.add_argument("--rows", type=int, default=PAGE_SIZE * max(PAGES) + PAGE_SIZE)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        user_id = _seed(db, args.rows)
+        print(f"{'page':>8} {'offset ms':>12} {'keyset ms':>12}")
+        for page in PAGES:
+            offset = (page - 1) * PAGE_SIZE
+            if offset + PAGE_SIZE > args.rows:
+                break
+
+            cursor = None
+            if offset:
+                # Cursor of the row just before the page, as a client would hold it
+                previous = db.execute(text(
+                    "SELECT id, created_at FROM user_applications WHERE user_id = :user_id "
+                    "ORDER BY created_at DESC, id DESC OFFSET :offset LIMIT 1"
+                ), {"user_id": user_id, "offset": offset - 1}).one()
+                cursor = encode_cursor(previous.created_at, previous.id)
+
+            offset_ms = _time(lambda: db.execute(text(
+                "SELECT * FROM user_applications WHERE user_id = :user_id "
+                "ORDER BY created_at DESC, id DESC OFFSET :offset LIMIT :limit"
+            ), {"user_id": user_id, "offset": offset, "limit": PAGE_SIZE}).all(), args.repeat)
+            keyset_ms = _time(lambda: fetch_keyset_page(
+                db, "SELECT * FROM user_applications", ["user_id = :user_id"],
+                {"user_id": user_id}, cursor, PAGE_SIZE,
+            ), args.repeat)
+            print(f"{page:>8} {offset_ms:>12.2f} {keyset_ms:>12.2f}")
+    finally:
+        db.rollback()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Measures the per-request cost of logging on the calling thread.
+
+"sync" reproduces the previous pipeline: duplicated processors, the stdlib
+JSON renderer and a PrintLogger writing to stdout on every call. "queued"
+is configure_logging(): records are appended to a bounded queue and a
+background thread serialises them with orjson and writes them in batches.
+
+Each simulated request binds its request id and logs two events, as the
+request middleware and a typical endpoint do. Output goes to a pipe read by
+a consumer thread; --drain-mbps throttles the consumer to imitate a slow
+log collector, which makes the synchronous pipeline block once the pipe
+buffer is full while the queued one drops and counts records instead.
+
+Usage:
+    python -m benchmarks.bench_logging --requests 50000
+    python -m benchmarks.bench_logging --requests 50000 --drain-mbps 2
+"""
+import argparse
+import os
+import statistics
+import threading
+import time
+import uuid
+
+import structlog
+
+from app.core import logger as app_logger
+from app.core.config import settings
+
+
+def start_consumer(read_fd: int, drain_mbps: float, counts: dict) -> threading.Thread:
+    """Reads the pipe, at most ``drain_mbps`` megabytes per second if set."""
+    def run() -> None:
+        chunk = 65536
+        while True:
+            data = os.read(read_fd, chunk)
+            if not data:
+                return
+            counts["bytes"] += len(data)
+            counts["lines"] += data.count(b"\n")
+            if drain_mbps:
+                time.sleep(len(data) / (drain_mbps * 1e6))
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def configure_sync(stream) -> None:
+    """The pipeline as it was before the queued writer."""
+    structlog.configure(
+        processors=[
+            structlog.contextvars.merge_contextvars,
+            structlog.processors.add_log_level,
+            structlog.processors.StackInfoRenderer(),
+            structlog.processors.TimeStamper(fmt="iso"),
+            structlog.processors.add_log_level,
+            structlog.processors.format_exc_info,
+            structlog.processors.JSONRenderer(),
+        ],
+        logger_factory=structlog.PrintLoggerFactory(stream),
+        wrapper_class=structlog.make_filtering_bound_logger(20),
+        cache_logger_on_first_use=True,
+    )
+
+
+def run(mode: str, args) -> None:
+    read_fd, write_fd = os.pipe()
+    counts = {"bytes": 0, "lines": 0}
+    consumer = start_consumer(read_fd, args.drain_mbps, counts)
+    if mode == "sync":
+        stream = os.fdopen(write_fd, "w", buffering=1)
+        configure_sync(stream)
+    else:
+        stream = os.fdopen(write_fd, "wb", buffering=0)
+        app_logger.configure_logging(stream)
+    logger = structlog.get_logger("bench")
+
+    latencies = []
+    started = time.perf_counter()
+    for i in range(args.requests):
+        path = "/health" if i % 5 == 0 else "/api/v1/jobs/search"
+        t0 = time.perf_counter_ns()
+        structlog.contextvars.clear_contextvars()
+        structlog.contextvars.bind_contextvars(request_id=str(uuid.uuid4()), environment="production")
+        logger.info("search_completed", user_id=i % 1000, results=20, cache_hit=i % 3 == 0)
+        logger.info(
+            "request_processed",
+            path=path,
+            method="GET",
+            status_code=200,
+            duration=f"{0.012:.3f}s",
+        )
+        latencies.append(time.perf_counter_ns() - t0)
+    elapsed = time.perf_counter() - started
+
+    dropped = 0
+    if mode == "queued":
+        app_logger.flush_logging()
+        dropped = app_logger.logging_stats()["dropped"]
+        app_logger._writer.close()
+    stream.close()
+    consumer.join()
+    os.close(read_fd)
+
+    latencies.sort()
+    print(
+        f"{mode:<7} {statistics.mean(latencies) / 1000:>8.1f} "
+        f"{latencies[len(latencies) // 2] / 1000:>8.1f} "
+        f"{latencies[int(len(latencies) * 0.99)] / 1000:>8.1f} "
+        f"{latencies[-1] / 1000:>9.1f} {args.requests / elapsed:>9.0f} "
+        f"{counts['lines']:>8} {dropped:>8}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Logging overhead benchmark")
+    parser.add_argument("--requests", type=int, default=50000)
+    parser.add_argument("--drain-mbps", type=float, default=0.0, help="Throttle the log reader; 0 reads as fast as possible")
+    args = parser.parse_args()
+
+    settings.ENVIRONMENT = "production"
+    print(f"{'mode':<7} {'mean us':>8} {'p50 us':>8} {'p99 us':>8} {'max us':>9} {'req/s':>9} {'lines':>8} {'dropped':>8}")
+    for mode in ("sync", "queued"):
+        run(mode, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Compares per-worker memory and cache hit rate for the two serving modes.
+
+"per-worker" reproduces the previous setup: each worker loads its own copy
+of the read-mostly data after fork and caches evaluations in a private
+dict. "shared" is the gunicorn.conf.py setup: data is loaded and frozen in
+the parent before fork, and evaluations go to the shared memory table.
+
+Every worker runs the same workload: Zipf-distributed cache-aside lookups
+of evaluation-sized JSON values. Per-worker memory is read from
+/proc/self/smaps_rollup (Linux). Pss counts shared pages fractionally, so
+it is the fair per-worker figure.
+
+Usage:
+    python -m benchmarks.bench_multiworker --workers 4 --requests 20000
+"""
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import random
+import time
+from typing import Dict
+
+import numpy as np
+
+from app.core.config import settings
+
+VALUE = json.dumps({
+    "score": 72.0,
+    "summary": "Strong backend profile with relevant Python and PostgreSQL experience. " * 4,
+    "strengths": ["Demonstrates production experience relevant to the role"] * 8,
+    "gaps": ["Limited exposure to the team's cloud provider"] * 5,
+    "suggested_questions": ["Describe a scaling problem you solved."] * 5,
+    "career_advice": "Highlight production Kubernetes work and mentoring. " * 3,
+})
+
+
+def load_read_mostly_data(rows: int, dim: int):
+    """Stands in for vector index id tables and skill dictionaries."""
+    rng = np.random.default_rng(0)
+    matrix = rng.standard_normal((rows, dim), dtype=np.float32)
+    ids = [f"posting-{i:08d}" for i in range(rows)]
+    id_to_row = {item_id: row for row, item_id in enumerate(ids)}
+    return matrix, ids, id_to_row
+
+
+def memory_kb() -> Dict[str, int]:
+    """Returns Rss, Pss and private memory of this process in KB."""
+    values = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ("Rss:", "Pss:", "Private_Clean:", "Private_Dirty:"):
+                values[parts[0][:-1]] = int(parts[1])
+    values["Private"] = values.pop("Private_Clean") + values.pop("Private_Dirty")
+    return values
+
+
+def worker(mode: str, seed: int, args, data, results) -> None:
+    if mode == "per-worker":
+        data = load_read_mostly_data(args.rows, args.dim)
+        local_cache: Dict[str, str] = {}
+    else:
+        gc.enable()
+        from app.core.shm_cache import get_shared_table
+        table = get_shared_table()
+
+    rng = random.Random(seed)
+    # Keys follow a Zipf-like popularity curve, as repeated evaluations do
+    weights = [1 / (rank + 1) ** args.zipf for rank in range(args.keys)]
+    keys = rng.choices(range(args.keys), weights=weights, k=args.requests)
+    matrix, ids, id_to_row = data
+
+    hits = 0
+    started = time.perf_counter()
+    for key in keys:
+        cache_key = f"job_eval:{key}"
+        if mode == "per-worker":
+            value = local_cache.get(cache_key)
+            if value is None:
+                local_cache[cache_key] = VALUE
+        else:
+            value = table.get(cache_key)
+            if value is None:
+                table.set(cache_key, VALUE.encode(), ttl=3600)
+        hits += value is not None
+        # Touch the read-mostly data like a request would
+        _ = matrix[id_to_row[ids[key % len(ids)]]].sum()
+    elapsed = time.perf_counter() - started
+    results.put({"hits": hits, "requests": len(keys), "seconds": elapsed, **memory_kb()})
+
+
+def run(mode: str, args) -> None:
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    data = None
+    if mode == "shared":
+        gc.disable()
+        data = load_read_mostly_data(args.rows, args.dim)
+        from app.core.shm_cache import get_shared_table
+        get_shared_table().clear()
+        gc.freeze()
+
+    processes = [
+        context.Process(target=worker, args=(mode, seed, args, data, results))
+        for seed in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    reports = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    if mode == "shared":
+        gc.unfreeze()
+        gc.enable()
+
+    hits = sum(r["hits"] for r in reports)
+    requests = sum(r["requests"] for r in reports)
+    throughput = requests / max(r["seconds"] for r in reports)
+    print(
+        f"{mode:<11} {hits / requests:>8.1%} {throughput:>10.0f} "
+        f"{np.mean([r['Rss'] for r in reports]) / 1024:>8.1f} "
+        f"{np.mean([r['Pss'] for r in reports]) / 1024:>8.1f} "
+        f"{np.mean([r['Private'] for r in reports]) / 1024:>11.1f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Multi-worker memory and cache benchmark")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=20000, help="Lookups per worker")
+    parser.add_argument("--keys", type=int, default=5000, help="Distinct evaluation keys")
+    parser.add_argument("--zipf", type=float, default=1.0)
+    parser.add_argument("--rows", type=int, default=100000, help="Rows of read-mostly data")
+    parser.add_argument("--dim", type=int, default=256)
+    args = parser.parse_args()
+
+    # Keep the benchmark's table apart from a running server's
+    settings.SHM_CACHE_NAME = f"bench-{os.getpid()}"
+
+    print(f"{'mode':<11} {'hit rate':>8} {'lookups/s':>10} {'RSS MB':>8} {'PSS MB':>8} {'private MB':>11}")
+    try:
+        for mode in ("per-worker", "shared"):
+            run(mode, args)
+    finally:
+        from app.core.shm_cache import get_shared_table
+        os.unlink(get_shared_table().path)
+
+
+if __name__ == "__main__":
+    main()
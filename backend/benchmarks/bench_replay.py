@@ -0,0 +1,249 @@
+"""
+Replays recorded provider traffic through JobEvaluator, without network.
+
+Evaluations are found by the evaluation label their provider calls were
+recorded with (PROVIDER_MODE=record). Each is rebuilt from its first
+call's prompt, which holds the job description and background, and
+started at its recorded arrival offset divided by --speed. Evaluations
+recorded with INCREMENTAL_EVALUATION on only send changed sections, so
+they cannot be rebuilt and are skipped. A ReplayBackend answers every
+provider call from the trace, sleeping the recorded latency divided by
+the same factor, so changes to caching, concurrency or response parsing
+can be compared on the same traffic. Reports throughput, evaluation latency, cache hit
+rates, trace hits and misses, and failed evaluations.
+
+Without --trace, a synthetic trace is recorded first, with full prompts:
+users editing their resumes against a few jobs, arriving as a Poisson
+process, answered by a stub provider with lognormal latencies. With
+INCREMENTAL_EVALUATION on, the replay needs --on-miss model, since section
+prompts differ from the recorded ones.
+
+Usage:
+    python -m benchmarks.bench_replay --speed 10
+    python -m benchmarks.bench_replay --trace data/traces/providers.trace --speed 10
+    python -m benchmarks.bench_replay --speed 10 --on-miss model --concurrency 8
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import tempfile
+import time
+
+from app.core.config import settings
+from app.core.shm_cache import cache_hit_stats, get_shared_table
+from app.services.ai.ai_evaluator import JobEvaluationRequest, JobEvaluator
+from app.services.ai.providers import (
+    Completion,
+    ProviderBackend,
+    RecordingBackend,
+    ReplayBackend,
+    iter_trace,
+)
+from benchmarks.bench_incremental_eval import JOB, edit_session
+
+FINDING = "Demonstrates production experience directly relevant to the role requirements"
+
+# Inputs as placed in JobEvaluator's full evaluation prompt; the request
+# validator has already collapsed their whitespace to single spaces
+_PROMPT_FIELDS = re.compile(r"Job Description:\n *([^\n]*)\n.*?Candidate Background:\n *([^\n]*)\n", re.S)
+
+
+class StubProvider(ProviderBackend):
+    """Answers like a provider would, with lognormal latencies divided by ``speed``."""
+
+    def __init__(self, seed: int, speed: float):
+        self.rng = random.Random(seed)
+        self.speed = speed
+
+    async def complete(self, request):
+        prompt = request.messages[-1]["content"]
+        result = {
+            "score": 72.0,
+            "summary": "Strong backend profile with relevant Python and PostgreSQL experience.",
+            "suggested_questions": ["Describe a scaling problem you solved and how you measured it."] * 3,
+            "career_advice": "Highlight production Kubernetes work and mentoring experience.",
+        }
+        section_ids = re.findall(r"\[(S\d+)\]", prompt)
+        if section_ids:
+            result["sections"] = {
+                section_id: {"score": 70.0, "strengths": [FINDING] * 2, "gaps": [FINDING]}
+                for section_id in section_ids
+            }
+        else:
+            result["strengths"] = [FINDING] * 6
+            result["gaps"] = [FINDING] * 3
+        text = json.dumps(result)
+        input_tokens, output_tokens = len(prompt) // 4, len(text) // 4
+        # Median about 1s plus 20ms per output token, with a long tail
+        latency_ms = (1000 + output_tokens * 20) * self.rng.lognormvariate(0, 0.5)
+        await asyncio.sleep(latency_ms / 1000 / self.speed)
+        return Completion(text, input_tokens, output_tokens, latency_ms)
+
+    async def stream(self, request, usage=None):
+        completion = await self.complete(request)
+        yield completion.text
+        if usage is not None:
+            usage.input_tokens, usage.output_tokens = completion.input_tokens, completion.output_tokens
+
+
+def workload(evaluations: int, users: int, jobs: int, rate: float, seed: int):
+    """Yields (arrival offset s, request): users re-evaluating edited resumes."""
+    rng = random.Random(seed)
+    sessions = [edit_session(evaluations, seed=user) for user in range(users)]
+    offset = 0.0
+    for _ in range(evaluations):
+        offset += rng.expovariate(rate)
+        user = rng.randrange(users)
+        version = next(sessions[user])
+        yield offset, JobEvaluationRequest(
+            job_description=f"{JOB} Team {user % jobs}."[:settings.MAX_JOB_DESC_LENGTH],
+            your_background=" ".join(f"{heading}: {text}" for heading, text in version.items()),
+        )
+
+
+async def record_synthetic(path: str, args) -> None:
+    """
+    Records a synthetic trace, running ``speed`` times faster than real time.
+
+    Evaluations overlap as they would at full scale, and the recorder's
+    clock is scaled to match, so a replay at the same speed sees the same
+    interleaving and therefore the same cache state behind each prompt.
+    """
+    speed = args.speed or 10.0
+    # Section prompts leave out unchanged sections; replay needs the whole background
+    incremental, settings.INCREMENTAL_EVALUATION = settings.INCREMENTAL_EVALUATION, False
+    recorder = RecordingBackend(StubProvider(args.seed, speed), path)
+    wall_start, started = time.time(), time.perf_counter()
+    recorder.clock = lambda: wall_start + (time.perf_counter() - started) * speed
+    evaluator = JobEvaluator()
+    evaluator.backend = recorder
+
+    async def run_one(offset, request):
+        await asyncio.sleep(max(0.0, offset / speed - (time.perf_counter() - started)))
+        await evaluator.evaluate_job(request)
+
+    await asyncio.gather(*(
+        run_one(offset, request)
+        for offset, request in workload(args.evaluations, args.users, args.jobs, args.rate, args.seed)
+    ))
+    recorder._writer.close()
+    settings.INCREMENTAL_EVALUATION = incremental
+
+
+def load_evaluations(path: str):
+    """
+    Rebuilds the recorded evaluations from the prompts of their first calls.
+
+    Returns:
+        (arrival offset s, request) per evaluation, by arrival, and the
+        number of evaluations that could not be rebuilt
+    """
+    first_calls = {}
+    for record in iter_trace(path):
+        evaluation = (record.get("g") or {}).get("evaluation")
+        if evaluation and (evaluation not in first_calls or record["t"] < first_calls[evaluation]["t"]):
+            first_calls[evaluation] = record
+    evaluations = []
+    skipped = 0
+    for record in first_calls.values():
+        match = _PROMPT_FIELDS.search(record["r"]["messages"][-1]["content"])
+        if match is None:
+            skipped += 1
+            continue
+        request = JobEvaluationRequest(
+            job_description=match.group(1),
+            your_background=match.group(2),
+            ai_provider=record["r"]["provider"],
+        )
+        evaluations.append((record["t"], request))
+    if not evaluations:
+        return [], skipped
+    first = min(t for t, _ in evaluations)
+    return sorted(((t - first, request) for t, request in evaluations), key=lambda e: e[0]), skipped
+
+
+async def replay(path: str, args):
+    evaluations, skipped = load_evaluations(path)
+    if skipped:
+        print(f"skipped {skipped} evaluations without a full evaluation prompt")
+    backend = ReplayBackend(path, speed=args.speed, on_miss=args.on_miss)
+    # Start cold; the fallback caches are shared memory
+    get_shared_table().clear()
+    evaluator = JobEvaluator()
+    evaluator.backend = backend
+    semaphore = asyncio.Semaphore(args.concurrency) if args.concurrency else None
+    latencies = []
+    failures = 0
+
+    async def run_one(offset, request):
+        nonlocal failures
+        delay = offset / args.speed if args.speed else 0.0
+        await asyncio.sleep(max(0.0, delay - (time.perf_counter() - started)))
+        t0 = time.perf_counter()
+        try:
+            if semaphore is None:
+                await evaluator.evaluate_job(request)
+            else:
+                async with semaphore:
+                    await evaluator.evaluate_job(request)
+        except Exception:
+            failures += 1
+            return
+        latencies.append(time.perf_counter() - t0)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(run_one(offset, request) for offset, request in evaluations))
+    elapsed = time.perf_counter() - started
+    return evaluations, backend, latencies, failures, elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Provider trace replay benchmark")
+    parser.add_argument("--trace", help="Trace recorded with PROVIDER_MODE=record; synthesised if omitted")
+    parser.add_argument("--speed", type=float, default=10.0, help="Time compression; 0 replays without delays")
+    parser.add_argument("--on-miss", choices=["error", "model"], default="error")
+    parser.add_argument("--concurrency", type=int, default=0, help="Evaluations in flight at most; 0 is unbounded")
+    parser.add_argument("--evaluations", type=int, default=300, help="Synthetic trace: evaluations")
+    parser.add_argument("--users", type=int, default=30, help="Synthetic trace: users")
+    parser.add_argument("--jobs", type=int, default=5, help="Synthetic trace: distinct jobs")
+    parser.add_argument("--rate", type=float, default=2.0, help="Synthetic trace: evaluations per second")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    settings.SHM_CACHE_NAME = f"bench-{os.getpid()}"
+
+    path = args.trace
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(prefix="bench-replay-"), "synthetic.trace")
+        asyncio.run(record_synthetic(path, args))
+        get_shared_table().clear()
+        print(f"recorded {args.evaluations} synthetic evaluations to {path} ({os.path.getsize(path)} bytes)")
+
+    evaluations, backend, latencies, failures, elapsed = asyncio.run(replay(path, args))
+    if args.trace is None:
+        os.unlink(path)
+        os.rmdir(os.path.dirname(path))
+
+    span = evaluations[-1][0] if evaluations else 0.0
+    latencies.sort()
+    stats = backend.stats()
+    cache = cache_hit_stats(["job_eval", "job_eval_section"])
+    print(f"trace span {span:.1f}s, replayed in {elapsed:.1f}s at {args.speed:g}x")
+    print(f"{'evals':>6} {'failed':>6} {'evals/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'hits':>6} {'misses':>6} {'section hit':>11}")
+    if latencies:
+        p50 = latencies[len(latencies) // 2] * 1000
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    else:
+        p50 = p99 = 0.0
+    print(
+        f"{len(evaluations):>6} {failures:>6} {len(latencies) / elapsed if elapsed else 0:>8.1f} "
+        f"{p50:>8.1f} {p99:>8.1f} {stats['hits']:>6} {stats['misses']:>6} "
+        f"{cache['job_eval_section']['hit_rate']:>11.0%}"
+    )
+    os.unlink(get_shared_table().path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Measures resume text extraction throughput and worker memory.
+
+Extracts a set of large documents through the same process pool the upload
+endpoint uses, once per worker count, and reports files per second, per-core
+throughput and the peak RSS of the extraction processes. Documents are
+generated (large DOCX and TXT, plus PDF when reportlab is available) unless
+``--files`` points at real resumes. Every extraction uses a fresh cache key
+so each file is actually parsed.
+
+Usage:
+    python -m benchmarks.bench_resume_extraction --copies 40 --workers 1 2 4
+    python -m benchmarks.bench_resume_extraction --files ~/resumes/*.pdf
+"""
+import argparse
+import asyncio
+import os
+import resource
+import tempfile
+import time
+from typing import List, Tuple
+
+from app.core.config import settings
+from app.services.resume.extraction import ResumeExtractor, detect_kind
+
+PARAGRAPH = (
+    "Led the migration of a monolithic billing platform to Python microservices on "
+    "Kubernetes, cutting p99 latency by 40% while processing 2M invoices per day. "
+)
+
+
+def generate_documents(directory: str, copies: int, paragraphs: int) -> List[Tuple[str, str]]:
+    """Writes large DOCX/TXT documents and returns (path, kind) pairs."""
+    import docx
+
+    body = [f"{i}. {PARAGRAPH * 3}" for i in range(paragraphs)]
+    docx_path = os.path.join(directory, "large.docx")
+    document = docx.Document()
+    document.add_heading("EXPERIENCE", level=1)
+    for paragraph in body:
+        document.add_paragraph(paragraph)
+    document.save(docx_path)
+
+    txt_path = os.path.join(directory, "large.txt")
+    with open(txt_path, "w") as f:
+        f.write("\n".join(body))
+
+    sources = [(docx_path, "docx"), (txt_path, "txt")]
+    try:
+        from reportlab.lib.pagesizes import A4
+        from reportlab.pdfgen import canvas
+
+        pdf_path = os.path.join(directory, "large.pdf")
+        pdf = canvas.Canvas(pdf_path, pagesize=A4)
+        for i, paragraph in enumerate(body):
+            if i and i % 40 == 0:
+                pdf.showPage()
+            pdf.drawString(40, 800 - (i % 40) * 19, paragraph[:110])
+        pdf.save()
+        sources.append((pdf_path, "pdf"))
+    except ImportError:
+        print("reportlab not installed; skipping generated PDF")
+
+    return [source for source in sources for _ in range(copies)]
+
+
+def _detect(path: str) -> str:
+    with open(path, "rb") as f:
+        return detect_kind(path, f.read(8))
+
+
+async def run(documents: List[Tuple[str, str]], workers: int) -> float:
+    settings.RESUME_EXTRACT_WORKERS = workers
+    extractor = ResumeExtractor()
+    # Warm the pool so process start-up is not counted
+    await extractor.extract(*documents[0], file_hash=f"warm-{time.time_ns()}")
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        extractor.extract(path, kind, file_hash=f"{i}-{time.time_ns()}")
+        for i, (path, kind) in enumerate(documents)
+    ))
+    elapsed = time.perf_counter() - started
+    ResumeExtractor.shutdown()
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Resume extraction benchmark")
+    parser.add_argument("--files", nargs="*", help="Real documents to extract")
+    parser.add_argument("--copies", type=int, default=20, help="Copies of each generated document")
+    parser.add_argument("--paragraphs", type=int, default=2000, help="Paragraphs per generated document")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    settings.RESUME_EXTRACT_TIMEOUT = 600
+
+    with tempfile.TemporaryDirectory() as directory:
+        if args.files:
+            documents = [(path, _detect(path)) for path in args.files]
+        else:
+            documents = generate_documents(directory, args.copies, args.paragraphs)
+        total_mb = sum(os.path.getsize(path) for path, _ in documents) / (1024 * 1024)
+        print(f"{len(documents)} files, {total_mb:.1f} MB")
+
+        print(f"{'workers':>7} {'seconds':>8} {'files/s':>8} {'files/s/core':>13} {'peak child RSS MB':>18}")
+        for workers in args.workers:
+            elapsed = asyncio.run(run(documents, workers))
+            # ru_maxrss is in KB on Linux; covers every reaped extraction process
+            peak_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+            rate = len(documents) / elapsed
+            print(f"{workers:>7} {elapsed:>8.2f} {rate:>8.1f} {rate / workers:>13.1f} {peak_rss:>18.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Measures skill extraction throughput and automaton load time.
+
+Generates job-description-sized documents that mix taxonomy aliases into
+filler prose, then reports documents and megabytes per second on one core.
+It also compares compiling the taxonomy from scratch with loading the
+pickled automaton from the disk cache.
+
+Usage:
+    python -m benchmarks.bench_skill_extraction --docs 2000 --chars 4000
+"""
+import argparse
+import json
+import random
+import tempfile
+import time
+
+from app.services.skills.extractor import DEFAULT_TAXONOMY_PATH, SkillExtractor
+
+FILLER = (
+    "We are looking for an engineer who enjoys ownership and works closely with "
+    "product and design to deliver reliable features for our customers. "
+).split()
+
+
+def generate_documents(count: int, chars: int, seed: int = 0):
+    """Builds documents of roughly ``chars`` characters with mixed-in skills."""
+    with open(DEFAULT_TAXONOMY_PATH) as f:
+        taxonomy = json.load(f)
+    spellings = [
+        spelling
+        for skill in taxonomy["skills"]
+        for spelling in [skill["name"], *skill.get("aliases", []), *skill.get("exact", [])]
+    ]
+    rng = random.Random(seed)
+    documents = []
+    for _ in range(count):
+        words, length = [], 0
+        while length < chars:
+            word = rng.choice(spellings) if rng.random() < 0.08 else rng.choice(FILLER)
+            words.append(word)
+            length += len(word) + 1
+        documents.append(" ".join(words))
+    return documents
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Skill extraction benchmark")
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--chars", type=int, default=4000, help="Characters per document")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        started = time.perf_counter()
+        SkillExtractor(cache_dir=cache_dir)
+        compile_ms = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        extractor = SkillExtractor(cache_dir=cache_dir)
+        load_ms = (time.perf_counter() - started) * 1000
+    print(f"taxonomy {extractor.version}: {len(extractor.skills)} skills, "
+          f"{len(extractor._automaton)} automaton states")
+    print(f"compile {compile_ms:.1f} ms, load from disk cache {load_ms:.1f} ms")
+
+    documents = generate_documents(args.docs, args.chars)
+    total_mb = sum(len(doc) for doc in documents) / 1e6
+    started = time.perf_counter()
+    mentions = sum(sum(extractor.extract_counts(doc).values()) for doc in documents)
+    elapsed = time.perf_counter() - started
+    print(
+        f"{len(documents)} docs x {args.chars} chars: {len(documents) / elapsed:.0f} docs/s, "
+        f"{total_mb / elapsed:.2f} MB/s, {mentions / len(documents):.1f} skill mentions/doc"
+    )
+
+
+if __name__ == "__main__":
+    main()
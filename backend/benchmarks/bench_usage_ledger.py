@@ -0,0 +1,68 @@
+"""
+Measures the request-path cost of recording provider usage.
+
+Records simulated provider calls spread over users, routes and models,
+with and without a user in context (a user also updates the shared budget
+counters). With --flush, the aggregated buckets are then written to the
+usage_ledger table of DATABASE_URL and the flush time is reported.
+
+Usage:
+    python -m benchmarks.bench_usage_ledger --calls 200000
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_usage_ledger --flush
+"""
+import argparse
+import os
+import random
+import time
+import uuid
+
+from app.core.config import settings
+from app.services.usage.ledger import UsageLedger, usage_scope
+
+ROUTES = ["POST /api/v1/evaluate", "POST /api/analysis/resume", "precompute"]
+MODELS = [("openai", "gpt-4-1106-preview"), ("anthropic", "claude-2.1")]
+
+
+def run(ledger: UsageLedger, calls: int, users: int, with_user: bool, seed: int = 0) -> float:
+    """Returns microseconds per recorded call."""
+    rng = random.Random(seed)
+    user_ids = [str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(users)]
+    plan = [
+        (rng.choice(user_ids) if with_user else None, rng.choice(ROUTES), *rng.choice(MODELS))
+        for _ in range(calls)
+    ]
+    started = time.perf_counter()
+    for user_id, route, provider, model in plan:
+        with usage_scope(user_id=user_id, feature=route):
+            ledger.record(provider, model, 1200, 400, 850.0)
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Usage ledger overhead benchmark")
+    parser.add_argument("--calls", type=int, default=200000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--flush", action="store_true", help="Write the buckets to the database")
+    args = parser.parse_args()
+
+    # Keep the benchmark's counters apart from a running server's
+    settings.SHM_CACHE_NAME = f"bench-{os.getpid()}"
+    # Only flush when asked to
+    ledger = UsageLedger(flush_interval=3600)
+
+    try:
+        for label, with_user in (("no user (ledger only)", False), ("user (ledger + budget counters)", True)):
+            print(f"{label:<32} {run(ledger, args.calls, args.users, with_user):6.2f} us/call")
+        print(f"{len(ledger._buckets)} pending ledger rows")
+        if args.flush:
+            started = time.perf_counter()
+            rows = ledger.flush()
+            print(f"flushed {rows} rows in {(time.perf_counter() - started) * 1000:.0f} ms")
+        ledger._buckets.clear()
+    finally:
+        if ledger._counters is not None and ledger._counters.shared is not None:
+            os.unlink(ledger._counters.shared.path)
+
+
+if __name__ == "__main__":
+    main()
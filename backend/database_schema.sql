@@ -47,6 +47,8 @@ CREATE TABLE IF NOT EXISTS job_postings (
     application_deadline DATE,
     job_url VARCHAR(500),
     is_active BOOLEAN DEFAULT true,
+    content_hash CHAR(64), -- SHA-256 of normalised fields, set by bulk ingestion
+    identity_hash CHAR(64), -- SHA-256 of source id, URL or company/title/location, set by bulk ingestion
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
@@ -65,17 +67,24 @@ CREATE TABLE IF NOT EXISTS user_applications (
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
--- AI analysis results table
+-- AI analysis results, one partition per month (see migrations/005_ai_analysis_partitioned.sql)
 CREATE TABLE IF NOT EXISTS ai_analysis (
-    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    id UUID NOT NULL DEFAULT gen_random_uuid(),
     user_id UUID REFERENCES users(id) ON DELETE CASCADE,
     job_posting_id UUID REFERENCES job_postings(id) ON DELETE CASCADE,
     analysis_type VARCHAR(50), -- resume_match, skill_gap, interview_prep
-    analysis_data JSONB,
     score DECIMAL(3,2), -- 0.00 to 1.00
-    recommendations TEXT,
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
-);
+    provider VARCHAR(20), -- openai, anthropic
+    model VARCHAR(100),
+    prompt_version VARCHAR(20),
+    cache_key_hash BYTEA, -- SHA-256 of the evaluation cache key
+    analysis_data JSONB COMPRESSION lz4,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+-- Catches rows outside every monthly partition, e.g. if maintenance lapses
+CREATE TABLE IF NOT EXISTS ai_analysis_default PARTITION OF ai_analysis DEFAULT;
 
 -- User resumes table
 CREATE TABLE IF NOT EXISTS user_resumes (
@@ -92,11 +101,20 @@ CREATE TABLE IF NOT EXISTS user_resumes (
 -- Create indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
 CREATE INDEX IF NOT EXISTS idx_user_profiles_user_id ON user_profiles(user_id);
-CREATE INDEX IF NOT EXISTS idx_user_applications_user_id ON user_applications(user_id);
 CREATE INDEX IF NOT EXISTS idx_user_applications_job_posting_id ON user_applications(job_posting_id);
-CREATE INDEX IF NOT EXISTS idx_ai_analysis_user_id ON ai_analysis(user_id);
 CREATE INDEX IF NOT EXISTS idx_user_resumes_user_id ON user_resumes(user_id);
 
+-- Listing indexes for keyset pagination (see migrations/001_listing_indexes.sql)
+CREATE INDEX IF NOT EXISTS idx_job_postings_active_created ON job_postings(created_at DESC, id DESC) WHERE is_active;
+CREATE INDEX IF NOT EXISTS idx_job_postings_active_company_created ON job_postings(company, created_at DESC, id DESC) WHERE is_active;
+CREATE INDEX IF NOT EXISTS idx_user_applications_user_created ON user_applications(user_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_user_applications_user_status_created ON user_applications(user_id, status, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_ai_analysis_user_created ON ai_analysis(user_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_ai_analysis_user_job_created ON ai_analysis(user_id, job_posting_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_ai_analysis_job_posting_id ON ai_analysis(job_posting_id);
+CREATE INDEX IF NOT EXISTS idx_ai_analysis_cache_key_hash ON ai_analysis(cache_key_hash) WHERE cache_key_hash IS NOT NULL;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_job_postings_identity_hash ON job_postings(identity_hash);
+
 -- Create updated_at trigger function
 CREATE OR REPLACE FUNCTION update_updated_at_column()
 RETURNS TRIGGER AS $$
@@ -121,3 +139,392 @@ CREATE TRIGGER update_user_applications_updated_at BEFORE UPDATE ON user_applica
 
 CREATE TRIGGER update_user_resumes_updated_at BEFORE UPDATE ON user_resumes 
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+-- Monthly ai_analysis partitions (see migrations/005_ai_analysis_partitioned.sql).
+-- Schedule python -m app.tasks.maintain_analysis_partitions daily.
+-- Creates the monthly partitions from p_from's month (default: this month,
+-- or the earliest month with rows in the default partition) through
+-- p_months_ahead months from now. Returns how many were created.
+--
+-- A month cannot be attached while the default partition holds rows for it,
+-- which happens when maintenance lapsed. Those rows are moved: the month is
+-- built as a standalone table, the rows are copied into it and deleted from
+-- the default partition, and the table is attached. The default partition is
+-- locked against writes meanwhile; inserts for months that have a partition
+-- are not affected.
+CREATE OR REPLACE FUNCTION ai_analysis_ensure_partitions(
+    p_from DATE DEFAULT NULL,
+    p_months_ahead INTEGER DEFAULT 3,
+    p_parent TEXT DEFAULT 'ai_analysis'
+) RETURNS INTEGER AS $$
+DECLARE
+    v_default REGCLASS := (
+        SELECT partdefid::REGCLASS FROM pg_partitioned_table
+        WHERE partrelid = p_parent::REGCLASS AND partdefid <> 0
+    );
+    v_month DATE;
+    v_last DATE := (date_trunc('month', NOW() AT TIME ZONE 'UTC')
+                    + make_interval(months => p_months_ahead))::DATE;
+    v_earliest TIMESTAMP WITH TIME ZONE;
+    v_name TEXT;
+    v_lower TIMESTAMP WITH TIME ZONE;
+    v_upper TIMESTAMP WITH TIME ZONE;
+    v_moved BIGINT;
+    v_created INTEGER := 0;
+BEGIN
+    IF v_default IS NOT NULL THEN
+        EXECUTE format('SELECT MIN(created_at) FROM %s', v_default) INTO v_earliest;
+    END IF;
+    v_month := date_trunc('month', LEAST(
+        COALESCE(p_from, (NOW() AT TIME ZONE 'UTC')::DATE),
+        (v_earliest AT TIME ZONE 'UTC')::DATE
+    ))::DATE;
+
+    WHILE v_month <= v_last LOOP
+        v_name := 'ai_analysis_y' || to_char(v_month, 'YYYY"m"MM');
+        v_lower := v_month::TIMESTAMP AT TIME ZONE 'UTC';
+        v_upper := (v_month + INTERVAL '1 month') AT TIME ZONE 'UTC';
+        IF to_regclass(v_name) IS NULL THEN
+            v_moved := 0;
+            IF v_default IS NOT NULL THEN
+                EXECUTE format(
+                    'SELECT COUNT(*) FROM %s WHERE created_at >= %L AND created_at < %L',
+                    v_default, v_lower, v_upper
+                ) INTO v_moved;
+            END IF;
+
+            IF v_moved = 0 THEN
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                    v_name, p_parent, v_lower, v_upper
+                );
+                EXECUTE format('ALTER TABLE %I ALTER COLUMN analysis_data SET COMPRESSION lz4', v_name);
+            ELSE
+                EXECUTE format('LOCK TABLE %s IN EXCLUSIVE MODE', v_default);
+                EXECUTE format(
+                    'CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING COMPRESSION)',
+                    v_name, p_parent
+                );
+                EXECUTE format('ALTER TABLE %I ALTER COLUMN analysis_data SET COMPRESSION lz4', v_name);
+                EXECUTE format(
+                    'WITH moved AS (DELETE FROM %s WHERE created_at >= %L AND created_at < %L RETURNING *) '
+                    'INSERT INTO %I SELECT * FROM moved',
+                    v_default, v_lower, v_upper, v_name
+                );
+                GET DIAGNOSTICS v_moved = ROW_COUNT;
+                EXECUTE format(
+                    'ALTER TABLE %I ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                    p_parent, v_name, v_lower, v_upper
+                );
+                RAISE NOTICE 'Moved % rows from % into %', v_moved, v_default, v_name;
+            END IF;
+            v_created := v_created + 1;
+        END IF;
+        v_month := (v_month + INTERVAL '1 month')::DATE;
+    END LOOP;
+    RETURN v_created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Detaches and drops monthly partitions older than p_retention_months
+-- before the current month. Returns how many were dropped.
+--
+-- Dropping a partition fires no row triggers, so user_stats keeps counting
+-- the dropped analyses; run backfill_user_stats() if the dashboard should
+-- only reflect retained history.
+CREATE OR REPLACE FUNCTION ai_analysis_drop_partitions(
+    p_retention_months INTEGER,
+    p_parent TEXT DEFAULT 'ai_analysis'
+) RETURNS INTEGER AS $$
+DECLARE
+    v_cutoff DATE := (date_trunc('month', NOW() AT TIME ZONE 'UTC')
+                      - make_interval(months => p_retention_months))::DATE;
+    v_partition RECORD;
+    v_dropped INTEGER := 0;
+BEGIN
+    FOR v_partition IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = p_parent::REGCLASS
+          AND c.relname ~ '^ai_analysis_y[0-9]{4}m[0-9]{2}$'
+          AND to_date(substr(c.relname, 14), 'YYYY"m"MM') < v_cutoff
+        ORDER BY c.relname
+    LOOP
+        EXECUTE format('ALTER TABLE %I DETACH PARTITION %I', p_parent, v_partition.relname);
+        EXECUTE format('DROP TABLE %I', v_partition.relname);
+        v_dropped := v_dropped + 1;
+    END LOOP;
+    RETURN v_dropped;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Scheduled maintenance: partitions ahead, retention behind (0 keeps all)
+CREATE OR REPLACE FUNCTION ai_analysis_maintain_partitions(
+    p_months_ahead INTEGER DEFAULT 3,
+    p_retention_months INTEGER DEFAULT 0,
+    p_parent TEXT DEFAULT 'ai_analysis'
+) RETURNS VOID AS $$
+BEGIN
+    PERFORM ai_analysis_ensure_partitions(NULL, p_months_ahead, p_parent);
+    IF p_retention_months > 0 THEN
+        PERFORM ai_analysis_drop_partitions(p_retention_months, p_parent);
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT ai_analysis_ensure_partitions();
+
+-- Per-user dashboard statistics (see migrations/002_user_stats.sql)
+CREATE TABLE IF NOT EXISTS user_stats (
+    user_id UUID PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    applications_total INTEGER NOT NULL DEFAULT 0,
+    applications_by_status JSONB NOT NULL DEFAULT '{}',
+    analyses_total INTEGER NOT NULL DEFAULT 0,
+    scored_analyses INTEGER NOT NULL DEFAULT 0,
+    score_sum NUMERIC NOT NULL DEFAULT 0,
+    last_activity_at TIMESTAMP WITH TIME ZONE,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS user_activity_daily (
+    user_id UUID REFERENCES users(id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    applications INTEGER NOT NULL DEFAULT 0,
+    analyses INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, day)
+);
+
+-- Applies a delta to a user's counters and daily activity
+CREATE OR REPLACE FUNCTION user_stats_apply(
+    p_user_id UUID,
+    p_at TIMESTAMP WITH TIME ZONE,
+    p_applications INTEGER,
+    p_status VARCHAR,
+    p_status_delta INTEGER,
+    p_analyses INTEGER,
+    p_scored INTEGER,
+    p_score NUMERIC
+) RETURNS VOID AS $$
+BEGIN
+    IF p_user_id IS NULL THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO user_stats (user_id) VALUES (p_user_id) ON CONFLICT (user_id) DO NOTHING;
+
+    UPDATE user_stats SET
+        applications_total = applications_total + p_applications,
+        applications_by_status = CASE
+            WHEN p_status IS NULL THEN applications_by_status
+            ELSE applications_by_status || jsonb_build_object(
+                p_status,
+                COALESCE((applications_by_status ->> p_status)::INTEGER, 0) + p_status_delta
+            )
+        END,
+        analyses_total = analyses_total + p_analyses,
+        scored_analyses = scored_analyses + p_scored,
+        score_sum = score_sum + p_score,
+        last_activity_at = GREATEST(last_activity_at, p_at),
+        updated_at = NOW()
+    WHERE user_id = p_user_id;
+
+    IF p_applications <> 0 OR p_analyses <> 0 THEN
+        INSERT INTO user_activity_daily (user_id, day, applications, analyses)
+        VALUES (p_user_id, p_at::DATE, p_applications, p_analyses)
+        ON CONFLICT (user_id, day) DO UPDATE SET
+            applications = user_activity_daily.applications + EXCLUDED.applications,
+            analyses = user_activity_daily.analyses + EXCLUDED.analyses;
+    END IF;
+
+    PERFORM pg_notify('user_stats_changed', p_user_id::TEXT);
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION user_applications_stats_trigger()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM user_stats_apply(NEW.user_id, NEW.created_at, 1, NEW.status, 1, 0, 0, 0);
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM user_stats_apply(OLD.user_id, OLD.created_at, -1, OLD.status, -1, 0, 0, 0);
+    ELSIF OLD.user_id IS DISTINCT FROM NEW.user_id THEN
+        PERFORM user_stats_apply(OLD.user_id, OLD.created_at, -1, OLD.status, -1, 0, 0, 0);
+        PERFORM user_stats_apply(NEW.user_id, NEW.created_at, 1, NEW.status, 1, 0, 0, 0);
+    ELSIF OLD.status IS DISTINCT FROM NEW.status THEN
+        -- A status change is activity, not a new application
+        PERFORM user_stats_apply(OLD.user_id, NOW(), 0, OLD.status, -1, 0, 0, 0);
+        PERFORM user_stats_apply(NEW.user_id, NOW(), 0, NEW.status, 1, 0, 0, 0);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION ai_analysis_stats_trigger()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM user_stats_apply(
+            NEW.user_id, NEW.created_at, 0, NULL, 0, 1,
+            CASE WHEN NEW.score IS NULL THEN 0 ELSE 1 END, COALESCE(NEW.score, 0)
+        );
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM user_stats_apply(
+            OLD.user_id, OLD.created_at, 0, NULL, 0, -1,
+            CASE WHEN OLD.score IS NULL THEN 0 ELSE -1 END, -COALESCE(OLD.score, 0)
+        );
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS user_applications_stats ON user_applications;
+CREATE TRIGGER user_applications_stats
+    AFTER INSERT OR UPDATE OF status, user_id OR DELETE ON user_applications
+    FOR EACH ROW EXECUTE FUNCTION user_applications_stats_trigger();
+
+DROP TRIGGER IF EXISTS ai_analysis_stats ON ai_analysis;
+CREATE TRIGGER ai_analysis_stats
+    AFTER INSERT OR DELETE ON ai_analysis
+    FOR EACH ROW EXECUTE FUNCTION ai_analysis_stats_trigger();
+
+-- Rebuilds counters and daily activity from the source tables in bulk
+CREATE OR REPLACE FUNCTION backfill_user_stats() RETURNS VOID AS $$
+BEGIN
+    -- Block writers for the duration so no trigger delta is lost or doubled
+    LOCK TABLE user_applications, ai_analysis IN SHARE MODE;
+
+    DELETE FROM user_activity_daily;
+    DELETE FROM user_stats;
+
+    INSERT INTO user_stats (
+        user_id, applications_total, applications_by_status,
+        analyses_total, scored_analyses, score_sum, last_activity_at
+    )
+    SELECT
+        u.id,
+        COALESCE(a.total, 0),
+        COALESCE(a.by_status, '{}'),
+        COALESCE(r.total, 0),
+        COALESCE(r.scored, 0),
+        COALESCE(r.score_sum, 0),
+        GREATEST(a.last_at, r.last_at)
+    FROM users u
+    LEFT JOIN (
+        -- Applications without a status count towards the total, as in the
+        -- triggers and user_stats_mv, but get no by_status entry
+        SELECT user_id, SUM(n)::INTEGER AS total,
+               jsonb_object_agg(status, n) FILTER (WHERE status IS NOT NULL) AS by_status,
+               MAX(last_at) AS last_at
+        FROM (
+            SELECT user_id, status, COUNT(*) AS n, MAX(created_at) AS last_at
+            FROM user_applications
+            GROUP BY user_id, status
+        ) s
+        GROUP BY user_id
+    ) a ON a.user_id = u.id
+    LEFT JOIN (
+        SELECT user_id, COUNT(*) AS total, COUNT(score) AS scored,
+               COALESCE(SUM(score), 0) AS score_sum, MAX(created_at) AS last_at
+        FROM ai_analysis
+        GROUP BY user_id
+    ) r ON r.user_id = u.id
+    WHERE a.user_id IS NOT NULL OR r.user_id IS NOT NULL;
+
+    INSERT INTO user_activity_daily (user_id, day, applications, analyses)
+    SELECT user_id, day, SUM(applications), SUM(analyses)
+    FROM (
+        SELECT user_id, created_at::DATE AS day, COUNT(*) AS applications, 0 AS analyses
+        FROM user_applications WHERE user_id IS NOT NULL GROUP BY 1, 2
+        UNION ALL
+        SELECT user_id, created_at::DATE, 0, COUNT(*)
+        FROM ai_analysis WHERE user_id IS NOT NULL GROUP BY 1, 2
+    ) d
+    GROUP BY user_id, day;
+
+    PERFORM pg_notify('user_stats_changed', '*');
+END;
+$$ LANGUAGE plpgsql;
+
+-- Trigger-free alternative: aggregate on a schedule instead of per write
+CREATE MATERIALIZED VIEW IF NOT EXISTS user_stats_mv AS
+SELECT
+    u.id AS user_id,
+    (SELECT COUNT(*) FROM user_applications ua WHERE ua.user_id = u.id)::INTEGER
+        AS applications_total,
+    COALESCE((
+        SELECT jsonb_object_agg(status, n) FROM (
+            SELECT status, COUNT(*) AS n FROM user_applications ua
+            WHERE ua.user_id = u.id AND status IS NOT NULL GROUP BY status
+        ) s
+    ), '{}') AS applications_by_status,
+    (SELECT COUNT(*) FROM ai_analysis aa WHERE aa.user_id = u.id)::INTEGER AS analyses_total,
+    (SELECT COUNT(score) FROM ai_analysis aa WHERE aa.user_id = u.id)::INTEGER AS scored_analyses,
+    (SELECT COALESCE(SUM(score), 0) FROM ai_analysis aa WHERE aa.user_id = u.id) AS score_sum,
+    GREATEST(
+        (SELECT MAX(created_at) FROM user_applications ua WHERE ua.user_id = u.id),
+        (SELECT MAX(created_at) FROM ai_analysis aa WHERE aa.user_id = u.id)
+    ) AS last_activity_at
+FROM users u;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_user_stats_mv_user_id ON user_stats_mv (user_id);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS user_activity_daily_mv AS
+SELECT user_id, day, SUM(applications)::INTEGER AS applications, SUM(analyses)::INTEGER AS analyses
+FROM (
+    SELECT user_id, created_at::DATE AS day, COUNT(*) AS applications, 0 AS analyses
+    FROM user_applications WHERE user_id IS NOT NULL GROUP BY 1, 2
+    UNION ALL
+    SELECT user_id, created_at::DATE, 0, COUNT(*)
+    FROM ai_analysis WHERE user_id IS NOT NULL GROUP BY 1, 2
+) d
+GROUP BY user_id, day;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_user_activity_daily_mv_user_day
+    ON user_activity_daily_mv (user_id, day);
+
+CREATE OR REPLACE FUNCTION refresh_user_stats_mv() RETURNS VOID AS $$
+BEGIN
+    REFRESH MATERIALIZED VIEW CONCURRENTLY user_stats_mv;
+    REFRESH MATERIALIZED VIEW CONCURRENTLY user_activity_daily_mv;
+    PERFORM pg_notify('user_stats_changed', '*');
+END;
+$$ LANGUAGE plpgsql;
+
+-- Batch pre-evaluation checkpoints (see migrations/004_precompute_checkpoints.sql)
+CREATE TABLE IF NOT EXISTS precompute_checkpoints (
+    name VARCHAR(100) PRIMARY KEY,
+    last_created_at TIMESTAMP WITH TIME ZONE,
+    last_id UUID,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Attempt counts for failing pre-evaluation pairs (see migrations/009_precompute_failures.sql)
+CREATE TABLE IF NOT EXISTS precompute_failures (
+    user_id UUID NOT NULL,
+    job_posting_id UUID NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (user_id, job_posting_id)
+);
+
+-- Provider usage ledger (see migrations/007_usage_ledger.sql)
+CREATE TABLE IF NOT EXISTS usage_ledger (
+    user_id UUID NOT NULL,
+    minute TIMESTAMP WITH TIME ZONE NOT NULL,
+    route VARCHAR(200) NOT NULL,
+    provider VARCHAR(20) NOT NULL,
+    model VARCHAR(100) NOT NULL,
+    requests INTEGER NOT NULL DEFAULT 0,
+    errors INTEGER NOT NULL DEFAULT 0,
+    input_tokens BIGINT NOT NULL DEFAULT 0,
+    output_tokens BIGINT NOT NULL DEFAULT 0,
+    latency_ms_sum BIGINT NOT NULL DEFAULT 0,
+    latency_ms_max INTEGER NOT NULL DEFAULT 0,
+    cost_usd NUMERIC(14,6) NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, minute, route, provider, model)
+);
+
+-- Per-feature and global reports scan a time range across users
+CREATE INDEX IF NOT EXISTS idx_usage_ledger_minute ON usage_ledger (minute);
@@ -0,0 +1,46 @@
+"""
+Gunicorn configuration for multi-worker serving.
+
+The app and all registered read-mostly data are loaded once in the master
+process and then forked, so workers share those pages copy-on-write. The
+evaluation cache, cache statistics and rate limit counters live in a shared
+memory table that every worker on the host uses.
+
+Usage:
+    gunicorn -c gunicorn.conf.py app.main:app
+"""
+import gc
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 5
+
+# Collections in the master would touch every object header and defeat
+# copy-on-write before workers fork; see when_ready and post_fork.
+gc.disable()
+
+
+def when_ready(server):
+    """Preloads shared state in the master, then freezes it for the workers."""
+    from app.core.preload import preload
+
+    preload()
+    # Keep preloaded objects out of the workers' collections so their
+    # pages stay shared
+    gc.freeze()
+    server.log.info("Preloaded shared state; %d objects frozen", gc.get_freeze_count())
+
+
+def post_fork(server, worker):
+    """Resets per-process resources inherited from the master."""
+    from app.db.session import engine
+
+    # Connections opened while preloading must not be shared between processes
+    engine.dispose(close=False)
+    gc.enable()
@@ -0,0 +1,41 @@
+-- Migration 001: composite and partial indexes for keyset-paginated listings
+--
+-- Every listing endpoint orders by (created_at DESC, id DESC) and pages with a
+-- (created_at, id) cursor, so each index ends with those two columns and a
+-- page at any depth is a single bounded index range scan.
+--
+-- CREATE/DROP INDEX CONCURRENTLY cannot run inside a transaction block: run
+-- this file statement by statement (psql autocommit or the Supabase SQL Editor).
+
+-- Active job postings, newest first
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_job_postings_active_created
+    ON job_postings (created_at DESC, id DESC)
+    WHERE is_active;
+
+-- Active job postings filtered by company
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_job_postings_active_company_created
+    ON job_postings (company, created_at DESC, id DESC)
+    WHERE is_active;
+
+-- "My applications, newest first"
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_applications_user_created
+    ON user_applications (user_id, created_at DESC, id DESC);
+
+-- "My applications by status, newest first"
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_applications_user_status_created
+    ON user_applications (user_id, status, created_at DESC, id DESC);
+
+-- "My past analyses", optionally for one job
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_ai_analysis_user_created
+    ON ai_analysis (user_id, created_at DESC, id DESC);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_ai_analysis_user_job_created
+    ON ai_analysis (user_id, job_posting_id, created_at DESC, id DESC);
+
+-- Foreign key lookups and ON DELETE CASCADE from job_postings
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_ai_analysis_job_posting_id
+    ON ai_analysis (job_posting_id);
+
+-- Single-column user_id indexes are now prefixes of the composite ones
+DROP INDEX CONCURRENTLY IF EXISTS idx_user_applications_user_id;
+DROP INDEX CONCURRENTLY IF EXISTS idx_ai_analysis_user_id;
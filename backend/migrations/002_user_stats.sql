@@ -0,0 +1,227 @@
+-- Migration 002: incrementally maintained per-user dashboard statistics
+--
+-- user_stats holds one row of counters per user and user_activity_daily one
+-- row per user and day. Both are kept current by row triggers on
+-- user_applications and ai_analysis, so the dashboard reads a single primary
+-- key instead of aggregating the history on every page load. Every change is
+-- also announced on the 'user_stats_changed' channel so API workers can drop
+-- their cached copy.
+--
+-- user_stats_mv and user_activity_daily_mv are an alternative, trigger-free
+-- source refreshed on a schedule with refresh_user_stats_mv();
+-- backfill_user_stats() rebuilds the counters in bulk.
+
+CREATE TABLE IF NOT EXISTS user_stats (
+    user_id UUID PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    applications_total INTEGER NOT NULL DEFAULT 0,
+    applications_by_status JSONB NOT NULL DEFAULT '{}',
+    analyses_total INTEGER NOT NULL DEFAULT 0,
+    scored_analyses INTEGER NOT NULL DEFAULT 0,
+    score_sum NUMERIC NOT NULL DEFAULT 0,
+    last_activity_at TIMESTAMP WITH TIME ZONE,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS user_activity_daily (
+    user_id UUID REFERENCES users(id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    applications INTEGER NOT NULL DEFAULT 0,
+    analyses INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, day)
+);
+
+-- Applies a delta to a user's counters and daily activity
+CREATE OR REPLACE FUNCTION user_stats_apply(
+    p_user_id UUID,
+    p_at TIMESTAMP WITH TIME ZONE,
+    p_applications INTEGER,
+    p_status VARCHAR,
+    p_status_delta INTEGER,
+    p_analyses INTEGER,
+    p_scored INTEGER,
+    p_score NUMERIC
+) RETURNS VOID AS $$
+BEGIN
+    IF p_user_id IS NULL THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO user_stats (user_id) VALUES (p_user_id) ON CONFLICT (user_id) DO NOTHING;
+
+    UPDATE user_stats SET
+        applications_total = applications_total + p_applications,
+        applications_by_status = CASE
+            WHEN p_status IS NULL THEN applications_by_status
+            ELSE applications_by_status || jsonb_build_object(
+                p_status,
+                COALESCE((applications_by_status ->> p_status)::INTEGER, 0) + p_status_delta
+            )
+        END,
+        analyses_total = analyses_total + p_analyses,
+        scored_analyses = scored_analyses + p_scored,
+        score_sum = score_sum + p_score,
+        last_activity_at = GREATEST(last_activity_at, p_at),
+        updated_at = NOW()
+    WHERE user_id = p_user_id;
+
+    IF p_applications <> 0 OR p_analyses <> 0 THEN
+        INSERT INTO user_activity_daily (user_id, day, applications, analyses)
+        VALUES (p_user_id, p_at::DATE, p_applications, p_analyses)
+        ON CONFLICT (user_id, day) DO UPDATE SET
+            applications = user_activity_daily.applications + EXCLUDED.applications,
+            analyses = user_activity_daily.analyses + EXCLUDED.analyses;
+    END IF;
+
+    PERFORM pg_notify('user_stats_changed', p_user_id::TEXT);
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION user_applications_stats_trigger()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM user_stats_apply(NEW.user_id, NEW.created_at, 1, NEW.status, 1, 0, 0, 0);
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM user_stats_apply(OLD.user_id, OLD.created_at, -1, OLD.status, -1, 0, 0, 0);
+    ELSIF OLD.user_id IS DISTINCT FROM NEW.user_id THEN
+        PERFORM user_stats_apply(OLD.user_id, OLD.created_at, -1, OLD.status, -1, 0, 0, 0);
+        PERFORM user_stats_apply(NEW.user_id, NEW.created_at, 1, NEW.status, 1, 0, 0, 0);
+    ELSIF OLD.status IS DISTINCT FROM NEW.status THEN
+        -- A status change is activity, not a new application
+        PERFORM user_stats_apply(OLD.user_id, NOW(), 0, OLD.status, -1, 0, 0, 0);
+        PERFORM user_stats_apply(NEW.user_id, NOW(), 0, NEW.status, 1, 0, 0, 0);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION ai_analysis_stats_trigger()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM user_stats_apply(
+            NEW.user_id, NEW.created_at, 0, NULL, 0, 1,
+            CASE WHEN NEW.score IS NULL THEN 0 ELSE 1 END, COALESCE(NEW.score, 0)
+        );
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM user_stats_apply(
+            OLD.user_id, OLD.created_at, 0, NULL, 0, -1,
+            CASE WHEN OLD.score IS NULL THEN 0 ELSE -1 END, -COALESCE(OLD.score, 0)
+        );
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS user_applications_stats ON user_applications;
+CREATE TRIGGER user_applications_stats
+    AFTER INSERT OR UPDATE OF status, user_id OR DELETE ON user_applications
+    FOR EACH ROW EXECUTE FUNCTION user_applications_stats_trigger();
+
+DROP TRIGGER IF EXISTS ai_analysis_stats ON ai_analysis;
+CREATE TRIGGER ai_analysis_stats
+    AFTER INSERT OR DELETE ON ai_analysis
+    FOR EACH ROW EXECUTE FUNCTION ai_analysis_stats_trigger();
+
+-- Rebuilds counters and daily activity from the source tables in bulk
+CREATE OR REPLACE FUNCTION backfill_user_stats() RETURNS VOID AS $$
+BEGIN
+    -- Block writers for the duration so no trigger delta is lost or doubled
+    LOCK TABLE user_applications, ai_analysis IN SHARE MODE;
+
+    DELETE FROM user_activity_daily;
+    DELETE FROM user_stats;
+
+    INSERT INTO user_stats (
+        user_id, applications_total, applications_by_status,
+        analyses_total, scored_analyses, score_sum, last_activity_at
+    )
+    SELECT
+        u.id,
+        COALESCE(a.total, 0),
+        COALESCE(a.by_status, '{}'),
+        COALESCE(r.total, 0),
+        COALESCE(r.scored, 0),
+        COALESCE(r.score_sum, 0),
+        GREATEST(a.last_at, r.last_at)
+    FROM users u
+    LEFT JOIN (
+        -- Applications without a status count towards the total, as in the
+        -- triggers and user_stats_mv, but get no by_status entry
+        SELECT user_id, SUM(n)::INTEGER AS total,
+               jsonb_object_agg(status, n) FILTER (WHERE status IS NOT NULL) AS by_status,
+               MAX(last_at) AS last_at
+        FROM (
+            SELECT user_id, status, COUNT(*) AS n, MAX(created_at) AS last_at
+            FROM user_applications
+            GROUP BY user_id, status
+        ) s
+        GROUP BY user_id
+    ) a ON a.user_id = u.id
+    LEFT JOIN (
+        SELECT user_id, COUNT(*) AS total, COUNT(score) AS scored,
+               COALESCE(SUM(score), 0) AS score_sum, MAX(created_at) AS last_at
+        FROM ai_analysis
+        GROUP BY user_id
+    ) r ON r.user_id = u.id
+    WHERE a.user_id IS NOT NULL OR r.user_id IS NOT NULL;
+
+    INSERT INTO user_activity_daily (user_id, day, applications, analyses)
+    SELECT user_id, day, SUM(applications), SUM(analyses)
+    FROM (
+        SELECT user_id, created_at::DATE AS day, COUNT(*) AS applications, 0 AS analyses
+        FROM user_applications WHERE user_id IS NOT NULL GROUP BY 1, 2
+        UNION ALL
+        SELECT user_id, created_at::DATE, 0, COUNT(*)
+        FROM ai_analysis WHERE user_id IS NOT NULL GROUP BY 1, 2
+    ) d
+    GROUP BY user_id, day;
+
+    PERFORM pg_notify('user_stats_changed', '*');
+END;
+$$ LANGUAGE plpgsql;
+
+-- Trigger-free alternative: aggregate on a schedule instead of per write
+CREATE MATERIALIZED VIEW IF NOT EXISTS user_stats_mv AS
+SELECT
+    u.id AS user_id,
+    (SELECT COUNT(*) FROM user_applications ua WHERE ua.user_id = u.id)::INTEGER
+        AS applications_total,
+    COALESCE((
+        SELECT jsonb_object_agg(status, n) FROM (
+            SELECT status, COUNT(*) AS n FROM user_applications ua
+            WHERE ua.user_id = u.id AND status IS NOT NULL GROUP BY status
+        ) s
+    ), '{}') AS applications_by_status,
+    (SELECT COUNT(*) FROM ai_analysis aa WHERE aa.user_id = u.id)::INTEGER AS analyses_total,
+    (SELECT COUNT(score) FROM ai_analysis aa WHERE aa.user_id = u.id)::INTEGER AS scored_analyses,
+    (SELECT COALESCE(SUM(score), 0) FROM ai_analysis aa WHERE aa.user_id = u.id) AS score_sum,
+    GREATEST(
+        (SELECT MAX(created_at) FROM user_applications ua WHERE ua.user_id = u.id),
+        (SELECT MAX(created_at) FROM ai_analysis aa WHERE aa.user_id = u.id)
+    ) AS last_activity_at
+FROM users u;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_user_stats_mv_user_id ON user_stats_mv (user_id);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS user_activity_daily_mv AS
+SELECT user_id, day, SUM(applications)::INTEGER AS applications, SUM(analyses)::INTEGER AS analyses
+FROM (
+    SELECT user_id, created_at::DATE AS day, COUNT(*) AS applications, 0 AS analyses
+    FROM user_applications WHERE user_id IS NOT NULL GROUP BY 1, 2
+    UNION ALL
+    SELECT user_id, created_at::DATE, 0, COUNT(*)
+    FROM ai_analysis WHERE user_id IS NOT NULL GROUP BY 1, 2
+) d
+GROUP BY user_id, day;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_user_activity_daily_mv_user_day
+    ON user_activity_daily_mv (user_id, day);
+
+CREATE OR REPLACE FUNCTION refresh_user_stats_mv() RETURNS VOID AS $$
+BEGIN
+    REFRESH MATERIALIZED VIEW CONCURRENTLY user_stats_mv;
+    REFRESH MATERIALIZED VIEW CONCURRENTLY user_activity_daily_mv;
+    PERFORM pg_notify('user_stats_changed', '*');
+END;
+$$ LANGUAGE plpgsql;
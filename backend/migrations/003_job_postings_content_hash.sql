@@ -0,0 +1,15 @@
+-- Migration 003: content-hash deduplication key for bulk posting ingestion
+--
+-- content_hash is the SHA-256 (hex) of a posting's normalised fields, computed
+-- by the ingestion pipeline (app/services/jobs/ingestion.py). The unique index
+-- lets each ingested batch be merged with a single set-based
+-- INSERT ... ON CONFLICT (content_hash) DO NOTHING, so unchanged and duplicate
+-- postings are skipped without a lookup per row. Rows created before this
+-- migration keep a NULL hash, which the unique index allows any number of.
+--
+-- CREATE INDEX CONCURRENTLY cannot run inside a transaction block.
+
+ALTER TABLE job_postings ADD COLUMN IF NOT EXISTS content_hash CHAR(64);
+
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS idx_job_postings_content_hash
+    ON job_postings (content_hash);
@@ -0,0 +1,13 @@
+-- Migration 004: checkpoints for the batch pre-evaluation pipeline
+--
+-- Each pipeline records the (created_at, id) keyset position of the last
+-- job posting whose shortlisted matches were fully processed, so a run that
+-- is interrupted (or stops at the end of the off-peak window) resumes where
+-- it left off instead of rescanning every posting.
+
+CREATE TABLE IF NOT EXISTS precompute_checkpoints (
+    name VARCHAR(100) PRIMARY KEY,
+    last_created_at TIMESTAMP WITH TIME ZONE,
+    last_id UUID,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
@@ -0,0 +1,292 @@
+-- Migration 005: month-partitioned, compact storage for ai_analysis
+--
+-- ai_analysis_v2 replaces ai_analysis. It is range-partitioned by created_at
+-- into one partition per month (ai_analysis_yYYYYmMM), so retention drops
+-- whole partitions instead of deleting rows, and vacuum works on small
+-- recent partitions instead of the whole history. The fields queries filter
+-- or report on (score, provider, model, prompt version, cache key hash) are
+-- typed columns. The JSON payload is compressed with lz4 once it is large
+-- enough to be TOASTed. The recommendations column is dropped: it was a copy
+-- of analysis_data ->> 'career_advice'.
+--
+-- Rollout, without locking the live table for longer than a rename:
+--   1. Apply this file. Inserts, updates and deletes on ai_analysis are
+--      mirrored into ai_analysis_v2 from now on.
+--   2. python -m app.tasks.backfill_ai_analysis copies existing rows in
+--      small batches.
+--   3. Apply 006_ai_analysis_swap.sql to swap the tables.
+-- The typed columns are also added to ai_analysis (a metadata-only change),
+-- so application code that writes them can be deployed at any point.
+--
+-- Requires PostgreSQL 14+ (column compression).
+
+ALTER TABLE ai_analysis
+    ADD COLUMN IF NOT EXISTS provider VARCHAR(20),
+    ADD COLUMN IF NOT EXISTS model VARCHAR(100),
+    ADD COLUMN IF NOT EXISTS prompt_version VARCHAR(20),
+    ADD COLUMN IF NOT EXISTS cache_key_hash BYTEA;
+
+CREATE TABLE IF NOT EXISTS ai_analysis_v2 (
+    id UUID NOT NULL DEFAULT gen_random_uuid(),
+    user_id UUID REFERENCES users(id) ON DELETE CASCADE,
+    job_posting_id UUID REFERENCES job_postings(id) ON DELETE CASCADE,
+    analysis_type VARCHAR(50), -- resume_match, skill_gap, interview_prep
+    score DECIMAL(3,2), -- 0.00 to 1.00
+    provider VARCHAR(20), -- openai, anthropic
+    model VARCHAR(100),
+    prompt_version VARCHAR(20),
+    cache_key_hash BYTEA, -- SHA-256 of the evaluation cache key
+    analysis_data JSONB COMPRESSION lz4,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+-- Catches rows outside every monthly partition, e.g. if maintenance lapses.
+-- ai_analysis_ensure_partitions moves such rows into their month's
+-- partition once it is created.
+CREATE TABLE IF NOT EXISTS ai_analysis_default PARTITION OF ai_analysis_v2 DEFAULT;
+
+-- Indexes on the parent are created on every partition. History listings
+-- read the newest partitions first and stop once a page is full.
+CREATE INDEX IF NOT EXISTS idx_ai_analysis_v2_user_created
+    ON ai_analysis_v2 (user_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_ai_analysis_v2_user_job_created
+    ON ai_analysis_v2 (user_id, job_posting_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_ai_analysis_v2_job_posting_id
+    ON ai_analysis_v2 (job_posting_id);
+CREATE INDEX IF NOT EXISTS idx_ai_analysis_v2_cache_key_hash
+    ON ai_analysis_v2 (cache_key_hash) WHERE cache_key_hash IS NOT NULL;
+
+-- Creates the monthly partitions from p_from's month (default: this month,
+-- or the earliest month with rows in the default partition) through
+-- p_months_ahead months from now. Returns how many were created.
+--
+-- A month cannot be attached while the default partition holds rows for it,
+-- which happens when maintenance lapsed. Those rows are moved: the month is
+-- built as a standalone table, the rows are copied into it and deleted from
+-- the default partition, and the table is attached. The default partition is
+-- locked against writes meanwhile; inserts for months that have a partition
+-- are not affected.
+CREATE OR REPLACE FUNCTION ai_analysis_ensure_partitions(
+    p_from DATE DEFAULT NULL,
+    p_months_ahead INTEGER DEFAULT 3,
+    p_parent TEXT DEFAULT 'ai_analysis'
+) RETURNS INTEGER AS $$
+DECLARE
+    v_default REGCLASS := (
+        SELECT partdefid::REGCLASS FROM pg_partitioned_table
+        WHERE partrelid = p_parent::REGCLASS AND partdefid <> 0
+    );
+    v_month DATE;
+    v_last DATE := (date_trunc('month', NOW() AT TIME ZONE 'UTC')
+                    + make_interval(months => p_months_ahead))::DATE;
+    v_earliest TIMESTAMP WITH TIME ZONE;
+    v_name TEXT;
+    v_lower TIMESTAMP WITH TIME ZONE;
+    v_upper TIMESTAMP WITH TIME ZONE;
+    v_moved BIGINT;
+    v_created INTEGER := 0;
+BEGIN
+    IF v_default IS NOT NULL THEN
+        EXECUTE format('SELECT MIN(created_at) FROM %s', v_default) INTO v_earliest;
+    END IF;
+    v_month := date_trunc('month', LEAST(
+        COALESCE(p_from, (NOW() AT TIME ZONE 'UTC')::DATE),
+        (v_earliest AT TIME ZONE 'UTC')::DATE
+    ))::DATE;
+
+    WHILE v_month <= v_last LOOP
+        v_name := 'ai_analysis_y' || to_char(v_month, 'YYYY"m"MM');
+        v_lower := v_month::TIMESTAMP AT TIME ZONE 'UTC';
+        v_upper := (v_month + INTERVAL '1 month') AT TIME ZONE 'UTC';
+        IF to_regclass(v_name) IS NULL THEN
+            v_moved := 0;
+            IF v_default IS NOT NULL THEN
+                EXECUTE format(
+                    'SELECT COUNT(*) FROM %s WHERE created_at >= %L AND created_at < %L',
+                    v_default, v_lower, v_upper
+                ) INTO v_moved;
+            END IF;
+
+            IF v_moved = 0 THEN
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                    v_name, p_parent, v_lower, v_upper
+                );
+                EXECUTE format('ALTER TABLE %I ALTER COLUMN analysis_data SET COMPRESSION lz4', v_name);
+            ELSE
+                EXECUTE format('LOCK TABLE %s IN EXCLUSIVE MODE', v_default);
+                EXECUTE format(
+                    'CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING COMPRESSION)',
+                    v_name, p_parent
+                );
+                EXECUTE format('ALTER TABLE %I ALTER COLUMN analysis_data SET COMPRESSION lz4', v_name);
+                EXECUTE format(
+                    'WITH moved AS (DELETE FROM %s WHERE created_at >= %L AND created_at < %L RETURNING *) '
+                    'INSERT INTO %I SELECT * FROM moved',
+                    v_default, v_lower, v_upper, v_name
+                );
+                GET DIAGNOSTICS v_moved = ROW_COUNT;
+                EXECUTE format(
+                    'ALTER TABLE %I ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                    p_parent, v_name, v_lower, v_upper
+                );
+                RAISE NOTICE 'Moved % rows from % into %', v_moved, v_default, v_name;
+            END IF;
+            v_created := v_created + 1;
+        END IF;
+        v_month := (v_month + INTERVAL '1 month')::DATE;
+    END LOOP;
+    RETURN v_created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Detaches and drops monthly partitions older than p_retention_months
+-- before the current month. Returns how many were dropped.
+--
+-- Dropping a partition fires no row triggers, so user_stats keeps counting
+-- the dropped analyses; run backfill_user_stats() if the dashboard should
+-- only reflect retained history.
+CREATE OR REPLACE FUNCTION ai_analysis_drop_partitions(
+    p_retention_months INTEGER,
+    p_parent TEXT DEFAULT 'ai_analysis'
+) RETURNS INTEGER AS $$
+DECLARE
+    v_cutoff DATE := (date_trunc('month', NOW() AT TIME ZONE 'UTC')
+                      - make_interval(months => p_retention_months))::DATE;
+    v_partition RECORD;
+    v_dropped INTEGER := 0;
+BEGIN
+    FOR v_partition IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = p_parent::REGCLASS
+          AND c.relname ~ '^ai_analysis_y[0-9]{4}m[0-9]{2}$'
+          AND to_date(substr(c.relname, 14), 'YYYY"m"MM') < v_cutoff
+        ORDER BY c.relname
+    LOOP
+        EXECUTE format('ALTER TABLE %I DETACH PARTITION %I', p_parent, v_partition.relname);
+        EXECUTE format('DROP TABLE %I', v_partition.relname);
+        v_dropped := v_dropped + 1;
+    END LOOP;
+    RETURN v_dropped;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Scheduled maintenance: partitions ahead, retention behind (0 keeps all)
+CREATE OR REPLACE FUNCTION ai_analysis_maintain_partitions(
+    p_months_ahead INTEGER DEFAULT 3,
+    p_retention_months INTEGER DEFAULT 0,
+    p_parent TEXT DEFAULT 'ai_analysis'
+) RETURNS VOID AS $$
+BEGIN
+    PERFORM ai_analysis_ensure_partitions(NULL, p_months_ahead, p_parent);
+    IF p_retention_months > 0 THEN
+        PERFORM ai_analysis_drop_partitions(p_retention_months, p_parent);
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Payload as stored in ai_analysis_v2: legacy rows whose payload lacks the
+-- career advice keep it, since the recommendations column goes away
+CREATE OR REPLACE FUNCTION ai_analysis_v2_payload(p_data JSONB, p_recommendations TEXT)
+RETURNS JSONB AS $$
+    SELECT CASE
+        WHEN p_recommendations IS NULL OR COALESCE(p_data ? 'career_advice', FALSE) THEN p_data
+        ELSE COALESCE(p_data, '{}'::JSONB) || jsonb_build_object('career_advice', p_recommendations)
+    END
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Mirrors writes to ai_analysis into ai_analysis_v2 until the swap. An
+-- update is mirrored as delete and insert, since a changed created_at moves
+-- the row to another partition. The upsert also overwrites a stale copy
+-- that a concurrent backfill batch wrote first.
+CREATE OR REPLACE FUNCTION ai_analysis_sync_v2_trigger()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        DELETE FROM ai_analysis_v2 WHERE id = OLD.id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO ai_analysis_v2 (
+            id, user_id, job_posting_id, analysis_type, score, provider, model,
+            prompt_version, cache_key_hash, analysis_data, created_at
+        ) VALUES (
+            NEW.id, NEW.user_id, NEW.job_posting_id, NEW.analysis_type, NEW.score,
+            NEW.provider, NEW.model, NEW.prompt_version, NEW.cache_key_hash,
+            ai_analysis_v2_payload(NEW.analysis_data, NEW.recommendations),
+            COALESCE(NEW.created_at, NOW())
+        ) ON CONFLICT (id, created_at) DO UPDATE SET
+            user_id = EXCLUDED.user_id,
+            job_posting_id = EXCLUDED.job_posting_id,
+            analysis_type = EXCLUDED.analysis_type,
+            score = EXCLUDED.score,
+            provider = EXCLUDED.provider,
+            model = EXCLUDED.model,
+            prompt_version = EXCLUDED.prompt_version,
+            cache_key_hash = EXCLUDED.cache_key_hash,
+            analysis_data = EXCLUDED.analysis_data;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS ai_analysis_sync_v2 ON ai_analysis;
+CREATE TRIGGER ai_analysis_sync_v2
+    AFTER INSERT OR UPDATE OR DELETE ON ai_analysis
+    FOR EACH ROW EXECUTE FUNCTION ai_analysis_sync_v2_trigger();
+
+-- Copies one batch of existing rows, in primary key order after p_after_id.
+-- Returns the last id copied, or NULL once there is nothing left.
+CREATE OR REPLACE FUNCTION ai_analysis_backfill_batch(p_after_id UUID, p_batch_size INTEGER)
+RETURNS UUID AS $$
+    WITH batch AS (
+        SELECT * FROM ai_analysis
+        WHERE p_after_id IS NULL OR id > p_after_id
+        ORDER BY id
+        LIMIT p_batch_size
+    ), copied AS (
+        INSERT INTO ai_analysis_v2 (
+            id, user_id, job_posting_id, analysis_type, score, provider, model,
+            prompt_version, cache_key_hash, analysis_data, created_at
+        )
+        SELECT
+            id, user_id, job_posting_id, analysis_type, score, provider, model,
+            prompt_version, cache_key_hash,
+            ai_analysis_v2_payload(analysis_data, recommendations),
+            COALESCE(created_at, NOW())
+        FROM batch
+        ON CONFLICT DO NOTHING
+    )
+    SELECT id FROM batch ORDER BY id DESC LIMIT 1
+$$ LANGUAGE sql;
+
+-- Removes copies of rows deleted from ai_analysis while their batch was
+-- being copied, checking one batch of ai_analysis_v2 ids after p_after_id.
+-- Returns the last id checked, or NULL once there is nothing left, and the
+-- number of rows removed.
+CREATE OR REPLACE FUNCTION ai_analysis_backfill_prune_batch(
+    p_after_id UUID,
+    p_batch_size INTEGER,
+    OUT last_id UUID,
+    OUT removed INTEGER
+) AS $$
+    WITH batch AS (
+        SELECT id FROM ai_analysis_v2
+        WHERE p_after_id IS NULL OR id > p_after_id
+        ORDER BY id
+        LIMIT p_batch_size
+    ), pruned AS (
+        DELETE FROM ai_analysis_v2 v
+        USING batch b
+        WHERE v.id = b.id AND NOT EXISTS (SELECT 1 FROM ai_analysis a WHERE a.id = v.id)
+        RETURNING 1
+    )
+    SELECT (SELECT id FROM batch ORDER BY id DESC LIMIT 1), (SELECT COUNT(*)::INTEGER FROM pruned)
+$$ LANGUAGE sql;
+
+-- Months the existing history spans, plus the usual months ahead
+SELECT ai_analysis_ensure_partitions(
+    (SELECT MIN(created_at) AT TIME ZONE 'UTC' FROM ai_analysis)::DATE, 3, 'ai_analysis_v2'
+);
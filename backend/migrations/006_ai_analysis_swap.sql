@@ -0,0 +1,84 @@
+-- Migration 006: swap ai_analysis for its partitioned replacement
+--
+-- Run once python -m app.tasks.backfill_ai_analysis has finished (see
+-- 005_ai_analysis_partitioned.sql). The swap is a handful of catalog
+-- updates; writers wait only for the duration of this transaction.
+-- The old table is kept as ai_analysis_legacy; drop it once satisfied:
+--
+--     DROP TABLE ai_analysis_legacy;
+
+BEGIN;
+
+LOCK TABLE ai_analysis IN ACCESS EXCLUSIVE MODE;
+
+DROP TRIGGER IF EXISTS ai_analysis_sync_v2 ON ai_analysis;
+DROP TRIGGER IF EXISTS ai_analysis_stats ON ai_analysis;
+
+ALTER TABLE ai_analysis RENAME TO ai_analysis_legacy;
+ALTER INDEX IF EXISTS idx_ai_analysis_user_created RENAME TO idx_ai_analysis_legacy_user_created;
+ALTER INDEX IF EXISTS idx_ai_analysis_user_job_created RENAME TO idx_ai_analysis_legacy_user_job_created;
+ALTER INDEX IF EXISTS idx_ai_analysis_job_posting_id RENAME TO idx_ai_analysis_legacy_job_posting_id;
+
+ALTER TABLE ai_analysis_v2 RENAME TO ai_analysis;
+ALTER INDEX idx_ai_analysis_v2_user_created RENAME TO idx_ai_analysis_user_created;
+ALTER INDEX idx_ai_analysis_v2_user_job_created RENAME TO idx_ai_analysis_user_job_created;
+ALTER INDEX idx_ai_analysis_v2_job_posting_id RENAME TO idx_ai_analysis_job_posting_id;
+ALTER INDEX idx_ai_analysis_v2_cache_key_hash RENAME TO idx_ai_analysis_cache_key_hash;
+
+-- Dashboard counters (migration 002) now follow the partitioned table
+CREATE TRIGGER ai_analysis_stats
+    AFTER INSERT OR DELETE ON ai_analysis
+    FOR EACH ROW EXECUTE FUNCTION ai_analysis_stats_trigger();
+
+DROP FUNCTION IF EXISTS ai_analysis_sync_v2_trigger();
+DROP FUNCTION IF EXISTS ai_analysis_backfill_batch(UUID, INTEGER);
+DROP FUNCTION IF EXISTS ai_analysis_backfill_prune_batch(UUID, INTEGER);
+DROP FUNCTION IF EXISTS ai_analysis_v2_payload(JSONB, TEXT);
+
+COMMIT;
+
+-- Materialized views bind to the table, not its name, so the ones from
+-- migration 002 still read ai_analysis_legacy. Rebuild them outside the
+-- swap transaction so computing them does not hold up writers.
+BEGIN;
+
+DROP MATERIALIZED VIEW IF EXISTS user_stats_mv;
+DROP MATERIALIZED VIEW IF EXISTS user_activity_daily_mv;
+
+CREATE MATERIALIZED VIEW user_stats_mv AS
+SELECT
+    u.id AS user_id,
+    (SELECT COUNT(*) FROM user_applications ua WHERE ua.user_id = u.id)::INTEGER
+        AS applications_total,
+    COALESCE((
+        SELECT jsonb_object_agg(status, n) FROM (
+            SELECT status, COUNT(*) AS n FROM user_applications ua
+            WHERE ua.user_id = u.id AND status IS NOT NULL GROUP BY status
+        ) s
+    ), '{}') AS applications_by_status,
+    (SELECT COUNT(*) FROM ai_analysis aa WHERE aa.user_id = u.id)::INTEGER AS analyses_total,
+    (SELECT COUNT(score) FROM ai_analysis aa WHERE aa.user_id = u.id)::INTEGER AS scored_analyses,
+    (SELECT COALESCE(SUM(score), 0) FROM ai_analysis aa WHERE aa.user_id = u.id) AS score_sum,
+    GREATEST(
+        (SELECT MAX(created_at) FROM user_applications ua WHERE ua.user_id = u.id),
+        (SELECT MAX(created_at) FROM ai_analysis aa WHERE aa.user_id = u.id)
+    ) AS last_activity_at
+FROM users u;
+
+CREATE UNIQUE INDEX idx_user_stats_mv_user_id ON user_stats_mv (user_id);
+
+CREATE MATERIALIZED VIEW user_activity_daily_mv AS
+SELECT user_id, day, SUM(applications)::INTEGER AS applications, SUM(analyses)::INTEGER AS analyses
+FROM (
+    SELECT user_id, created_at::DATE AS day, COUNT(*) AS applications, 0 AS analyses
+    FROM user_applications WHERE user_id IS NOT NULL GROUP BY 1, 2
+    UNION ALL
+    SELECT user_id, created_at::DATE, 0, COUNT(*)
+    FROM ai_analysis WHERE user_id IS NOT NULL GROUP BY 1, 2
+) d
+GROUP BY user_id, day;
+
+CREATE UNIQUE INDEX idx_user_activity_daily_mv_user_day
+    ON user_activity_daily_mv (user_id, day);
+
+COMMIT;
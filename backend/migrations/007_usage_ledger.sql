@@ -0,0 +1,28 @@
+-- Migration 007: provider usage ledger
+--
+-- One row per (user, minute, route, provider, model) with the calls, tokens,
+-- latency and estimated cost of AI provider requests. API workers aggregate
+-- usage in memory and add it here with a single batched upsert every
+-- USAGE_FLUSH_INTERVAL seconds (app/services/usage/ledger.py), so rows are
+-- only ever incremented. Calls made outside a user's request are recorded
+-- under the nil UUID. route is the HTTP route ("POST /api/v1/evaluate") or
+-- the background feature name ("precompute").
+
+CREATE TABLE IF NOT EXISTS usage_ledger (
+    user_id UUID NOT NULL,
+    minute TIMESTAMP WITH TIME ZONE NOT NULL,
+    route VARCHAR(200) NOT NULL,
+    provider VARCHAR(20) NOT NULL,
+    model VARCHAR(100) NOT NULL,
+    requests INTEGER NOT NULL DEFAULT 0,
+    errors INTEGER NOT NULL DEFAULT 0,
+    input_tokens BIGINT NOT NULL DEFAULT 0,
+    output_tokens BIGINT NOT NULL DEFAULT 0,
+    latency_ms_sum BIGINT NOT NULL DEFAULT 0,
+    latency_ms_max INTEGER NOT NULL DEFAULT 0,
+    cost_usd NUMERIC(14,6) NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, minute, route, provider, model)
+);
+
+-- Per-feature and global reports scan a time range across users
+CREATE INDEX IF NOT EXISTS idx_usage_ledger_minute ON usage_ledger (minute);
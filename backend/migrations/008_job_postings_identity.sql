@@ -0,0 +1,67 @@
+-- Migration 008: natural identity key for bulk posting ingestion
+--
+-- Migration 003 merged ingested batches on content_hash, so a posting whose
+-- text changed upstream was inserted again next to its stale copy.
+-- identity_hash is the SHA-256 (hex) of the posting's natural identity: the
+-- feed's source id, else job_url, else company, title and location
+-- (posting_identity in app/services/jobs/ingestion.py). Batches are now
+-- merged with INSERT ... ON CONFLICT (identity_hash) DO UPDATE ... WHERE
+-- content_hash IS DISTINCT FROM EXCLUDED.content_hash.
+--
+-- Apply before deploying the matching ingestion code. Existing rows are
+-- hashed in batches of 5000, committing each one, so run this file with psql
+-- outside a transaction block (PostgreSQL 11+). Where existing rows share an
+-- identity, the active, most recently updated one keeps it and the others
+-- are left with a NULL hash, which the unique index allows any number of.
+-- content_hash stays as the change detector but is no longer unique: the
+-- same text may be posted under two identities.
+
+ALTER TABLE job_postings ADD COLUMN IF NOT EXISTS identity_hash CHAR(64);
+
+DO $$
+DECLARE
+    batch_start UUID := '00000000-0000-0000-0000-000000000000';
+    batch_end UUID;
+BEGIN
+    LOOP
+        -- PostgreSQL has no max(uuid); take the batch's last id instead
+        SELECT id INTO batch_end FROM (
+            SELECT id FROM job_postings WHERE id > batch_start ORDER BY id LIMIT 5000
+        ) batch
+        ORDER BY id DESC LIMIT 1;
+        EXIT WHEN batch_end IS NULL;
+
+        UPDATE job_postings
+        SET identity_hash = encode(sha256(convert_to(
+            CASE
+                WHEN nullif(btrim(regexp_replace(job_url, '\s+', ' ', 'g')), '') IS NOT NULL
+                    THEN 'url' || E'\x1f' || btrim(regexp_replace(job_url, '\s+', ' ', 'g'))
+                ELSE 'posting'
+                    || E'\x1f' || lower(btrim(regexp_replace(company, '\s+', ' ', 'g')))
+                    || E'\x1f' || lower(btrim(regexp_replace(title, '\s+', ' ', 'g')))
+                    || E'\x1f' || lower(coalesce(btrim(regexp_replace(location, '\s+', ' ', 'g')), ''))
+            END, 'UTF8')), 'hex')
+        WHERE id > batch_start AND id <= batch_end AND identity_hash IS NULL;
+
+        batch_start := batch_end;
+        COMMIT;
+    END LOOP;
+END $$;
+
+UPDATE job_postings p
+SET identity_hash = NULL
+FROM (
+    SELECT id, ROW_NUMBER() OVER (
+        PARTITION BY identity_hash ORDER BY is_active DESC NULLS LAST, updated_at DESC NULLS LAST, id
+    ) AS rank
+    FROM job_postings
+    WHERE identity_hash IS NOT NULL
+) ranked
+WHERE p.id = ranked.id AND ranked.rank > 1;
+
+-- CREATE/DROP INDEX CONCURRENTLY cannot run inside a transaction block.
+
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS idx_job_postings_identity_hash
+    ON job_postings (identity_hash);
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_job_postings_content_hash;
@@ -0,0 +1,17 @@
+-- Migration 009: attempt counts for failing pre-evaluation pairs
+--
+-- A (user, posting) pair whose evaluation fails holds the pre-evaluation
+-- checkpoint so the next run retries it. A pair that can never succeed
+-- (the provider rejects the content, say) would hold it forever and make
+-- every run rescan all postings since. Failures are counted here; after
+-- PRECOMPUTE_MAX_ATTEMPTS the pair is given up and the checkpoint moves on.
+-- A later successful evaluation removes the pair's row.
+
+CREATE TABLE IF NOT EXISTS precompute_failures (
+    user_id UUID NOT NULL,
+    job_posting_id UUID NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (user_id, job_posting_id)
+);
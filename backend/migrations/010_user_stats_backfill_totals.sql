@@ -0,0 +1,65 @@
+-- Migration 010: count applications without a status in backfill_user_stats
+--
+-- backfill_user_stats() from migration 002 summed applications_total over
+-- the per-status counts, which left out applications whose status is NULL.
+-- The triggers and user_stats_mv count every application, so a backfill
+-- undercounted. This replaces the function; run
+-- python -m app.tasks.backfill_stats afterwards to correct stored totals.
+
+-- Rebuilds counters and daily activity from the source tables in bulk
+CREATE OR REPLACE FUNCTION backfill_user_stats() RETURNS VOID AS $$
+BEGIN
+    -- Block writers for the duration so no trigger delta is lost or doubled
+    LOCK TABLE user_applications, ai_analysis IN SHARE MODE;
+
+    DELETE FROM user_activity_daily;
+    DELETE FROM user_stats;
+
+    INSERT INTO user_stats (
+        user_id, applications_total, applications_by_status,
+        analyses_total, scored_analyses, score_sum, last_activity_at
+    )
+    SELECT
+        u.id,
+        COALESCE(a.total, 0),
+        COALESCE(a.by_status, '{}'),
+        COALESCE(r.total, 0),
+        COALESCE(r.scored, 0),
+        COALESCE(r.score_sum, 0),
+        GREATEST(a.last_at, r.last_at)
+    FROM users u
+    LEFT JOIN (
+        -- Applications without a status count towards the total, as in the
+        -- triggers and user_stats_mv, but get no by_status entry
+        SELECT user_id, SUM(n)::INTEGER AS total,
+               jsonb_object_agg(status, n) FILTER (WHERE status IS NOT NULL) AS by_status,
+               MAX(last_at) AS last_at
+        FROM (
+            SELECT user_id, status, COUNT(*) AS n, MAX(created_at) AS last_at
+            FROM user_applications
+            GROUP BY user_id, status
+        ) s
+        GROUP BY user_id
+    ) a ON a.user_id = u.id
+    LEFT JOIN (
+        SELECT user_id, COUNT(*) AS total, COUNT(score) AS scored,
+               COALESCE(SUM(score), 0) AS score_sum, MAX(created_at) AS last_at
+        FROM ai_analysis
+        GROUP BY user_id
+    ) r ON r.user_id = u.id
+    WHERE a.user_id IS NOT NULL OR r.user_id IS NOT NULL;
+
+    INSERT INTO user_activity_daily (user_id, day, applications, analyses)
+    SELECT user_id, day, SUM(applications), SUM(analyses)
+    FROM (
+        SELECT user_id, created_at::DATE AS day, COUNT(*) AS applications, 0 AS analyses
+        FROM user_applications WHERE user_id IS NOT NULL GROUP BY 1, 2
+        UNION ALL
+        SELECT user_id, created_at::DATE, 0, COUNT(*)
+        FROM ai_analysis WHERE user_id IS NOT NULL GROUP BY 1, 2
+    ) d
+    GROUP BY user_id, day;
+
+    PERFORM pg_notify('user_stats_changed', '*');
+END;
+$$ LANGUAGE plpgsql;
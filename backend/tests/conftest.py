@@ -0,0 +1,33 @@
+import os
+import shutil
+import tempfile
+
+# Settings that have no default; nothing under test talks to these services
+for _name in (
+    "POSTGRES_SERVER",
+    "POSTGRES_USER",
+    "POSTGRES_PASSWORD",
+    "POSTGRES_DB",
+    "SUPABASE_URL",
+    "SUPABASE_KEY",
+    "SUPABASE_JWT_SECRET",
+    "OPENAI_API_KEY",
+    "ANTHROPIC_API_KEY",
+):
+    os.environ.setdefault(_name, "test")
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ["SHM_CACHE_NAME"] = f"careercompass-test-{os.getpid()}"
+os.environ["VECTOR_INDEX_DIR"] = tempfile.mkdtemp(prefix="careercompass-test-")
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _remove_runtime_files():
+    """Removes the session's shared memory table and vector indexes once the tests are done."""
+    yield
+    from app.core import shm_cache
+
+    if shm_cache._table is not None:
+        os.unlink(shm_cache._table.path)
+    shutil.rmtree(os.environ["VECTOR_INDEX_DIR"], ignore_errors=True)
@@ -0,0 +1,172 @@
+import asyncio
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from jose import JWTError
+from passlib.context import CryptContext
+
+from app.api.deps import get_current_active_user, get_current_user
+from app.core import security
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.schemas.user import UserInDB, UserUpdate
+from app.services.user import user_service as user_service_module
+from app.services.user.user_service import UserService, invalidate_user_cache
+
+EMAIL = "ada@example.com"
+
+
+@pytest.fixture(autouse=True)
+def fresh_caches(monkeypatch):
+    monkeypatch.setattr(security, "_claims_cache", TTLCache(maxsize=100, ttl=settings.TOKEN_CACHE_TTL))
+    monkeypatch.setattr(user_service_module, "_user_cache", TTLCache(maxsize=100, ttl=settings.USER_CACHE_TTL))
+    # The semaphore binds to the first event loop that waits on it
+    monkeypatch.setattr(security, "_hash_slots", None)
+    monkeypatch.setattr(security, "pwd_context", CryptContext(schemes=["bcrypt"], bcrypt__rounds=4))
+
+
+@pytest.fixture
+def users(monkeypatch):
+    """Stands in for the users table, serving both lookups and updates."""
+    users = {}
+
+    def fetch_one(self, sql, params):
+        if "id" in params:
+            user = next(u for u in users.values() if str(u.id) == params["id"])
+            users[user.email] = user.model_copy(update={k: v for k, v in params.items() if k != "id"})
+            return users[user.email]
+        return users.get(params["email"])
+
+    monkeypatch.setattr(UserService, "_fetch_one", fetch_one)
+    users[EMAIL] = UserInDB(id=uuid.uuid4(), email=EMAIL, hashed_password=security.pwd_context.hash("old password"))
+    return users
+
+
+def _login_token(user, **kwargs):
+    return security.create_access_token(
+        {"sub": user.email, "pwd": security.password_fingerprint(user.hashed_password)}, **kwargs
+    )
+
+
+def _cached(token):
+    return security._claims_cache.get(security._token_key(token)) is not None
+
+
+def test_cached_token_is_rejected_after_expiry(monkeypatch):
+    token = security.create_access_token({"sub": EMAIL}, expires_delta=timedelta(minutes=1))
+    assert security.decode_access_token(token)["sub"] == EMAIL
+    assert _cached(token)
+
+    class _Later(datetime):
+        @classmethod
+        def utcnow(cls):
+            return datetime.utcnow() + timedelta(minutes=2)
+
+    monkeypatch.setattr(security, "datetime", _Later)
+    with pytest.raises(JWTError):
+        security.decode_access_token(token)
+    assert not _cached(token)
+
+
+def test_cached_claims_are_reverified_after_cache_ttl(monkeypatch):
+    calls = []
+    decode = security.jwt.decode
+    monkeypatch.setattr(security.jwt, "decode", lambda *args, **kwargs: calls.append(1) or decode(*args, **kwargs))
+    token = security.create_access_token({"sub": EMAIL})
+
+    security.decode_access_token(token)
+    security.decode_access_token(token)
+    assert len(calls) == 1
+
+    monkeypatch.setattr(settings, "TOKEN_CACHE_TTL", 0)
+    security.forget_access_token(token)
+    security.decode_access_token(token)
+    security.decode_access_token(token)
+    assert len(calls) == 3
+
+
+def test_tampered_token_is_not_served_from_cache():
+    token = security.create_access_token({"sub": EMAIL})
+    security.decode_access_token(token)
+
+    header, claims, signature = token.split(".")
+    with pytest.raises(JWTError):
+        security.decode_access_token(f"{header}.{claims}.{signature[::-1]}")
+
+
+async def test_deleted_user_is_not_served_from_cache(users):
+    token = _login_token(users[EMAIL])
+    assert (await get_current_user(token)).email == EMAIL
+
+    del users[EMAIL]
+    invalidate_user_cache(EMAIL)
+
+    with pytest.raises(HTTPException) as error:
+        await get_current_user(token)
+    assert error.value.status_code == 401
+    assert not _cached(token)
+
+
+async def test_deactivated_user_is_rejected(users):
+    token = _login_token(users[EMAIL])
+    await get_current_active_user(await get_current_user(token))
+
+    users[EMAIL] = users[EMAIL].model_copy(update={"is_active": False})
+    invalidate_user_cache(EMAIL)
+
+    with pytest.raises(HTTPException) as error:
+        await get_current_active_user(await get_current_user(token))
+    assert error.value.status_code == 400
+
+
+async def test_password_change_revokes_earlier_tokens(users):
+    old_token = _login_token(users[EMAIL])
+    user = await get_current_user(old_token)
+
+    await UserService().update(user, UserUpdate(password="new password"))
+
+    with pytest.raises(HTTPException) as error:
+        await get_current_user(old_token)
+    assert error.value.status_code == 401
+    assert not _cached(old_token)
+    assert await UserService().authenticate(EMAIL, "new password") is not None
+    assert (await get_current_user(_login_token(users[EMAIL]))).email == EMAIL
+
+
+async def test_token_without_password_fingerprint_is_rejected(users):
+    with pytest.raises(HTTPException):
+        await get_current_user(security.create_access_token({"sub": EMAIL}))
+
+
+async def test_password_hashing_runs_in_bounded_pool(monkeypatch):
+    monkeypatch.setattr(settings, "PASSWORD_HASH_MAX_CONCURRENCY", 2)
+    running, peak, threads = [0], [0], set()
+    lock = threading.Lock()
+    context = security.pwd_context
+
+    class _SlowContext:
+        def hash(self, password):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+                threads.add(threading.current_thread().name)
+            try:
+                return context.hash(password)
+            finally:
+                with lock:
+                    running[0] -= 1
+
+        def verify(self, password, hashed):
+            threads.add(threading.current_thread().name)
+            return context.verify(password, hashed)
+
+    monkeypatch.setattr(security, "pwd_context", _SlowContext())
+    hashes = await asyncio.gather(*(security.hash_password(f"password {n}") for n in range(6)))
+
+    assert peak[0] <= 2
+    assert await security.verify_password("password 3", hashes[3])
+    assert not await security.verify_password("password 3", hashes[4])
+    assert all(name.startswith("password-hash") for name in threads)
@@ -0,0 +1,41 @@
+from app.core import cache
+from app.core.cache import JSONCache, TTLCache
+from app.core.shm_cache import get_shared_table
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    lru = TTLCache(maxsize=2, ttl=60)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    lru.get("a")
+    lru.set("c", 3)
+
+    assert lru.get("a") == 1
+    assert lru.get("b") is None
+    assert lru.get("c") == 3
+
+
+def test_ttl_cache_purges_expired_entries_before_live_ones():
+    lru = TTLCache(maxsize=2, ttl=60)
+    lru.set("live", 1)
+    lru.set("stale", 2, ttl=-1)
+    lru.set("new", 3)
+
+    assert lru.get("live") == 1
+    assert lru.get("new") == 3
+    assert len(lru._data) == 2
+
+
+def test_oversize_values_are_bounded_and_namespaced(monkeypatch):
+    monkeypatch.setattr(cache, "_oversize_values", TTLCache(maxsize=3, ttl=60))
+    json_cache = JSONCache("test_oversize", ttl=60)
+    monkeypatch.setattr(json_cache, "redis", None)
+    monkeypatch.setattr(json_cache, "shared", get_shared_table())
+    big = "x" * (json_cache.shared.slot_bytes * 2)
+
+    for i in range(5):
+        json_cache.set(str(i), big)
+
+    assert [json_cache.get(str(i)) for i in range(5)] == [None, None, big, big, big]
+    json_cache.clear()
+    assert json_cache.get("4") is None
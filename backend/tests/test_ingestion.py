@@ -0,0 +1,176 @@
+import csv
+import io
+from datetime import date
+
+import pytest
+
+from app.schemas.job import IngestionReport
+from app.services.jobs.ingestion import PostingIngestor, normalize_posting, read_records
+
+RECORD = {
+    "title": "  Senior   Backend\tEngineer ",
+    "company": "Acme",
+    "job_type": "Full-Time",
+    "remote_option": "REMOTE",
+    "description": "Python\n and PostgreSQL",
+    "job_url": "https://jobs.example.com/1",
+    "posted_date": "2024-03-01T09:00:00Z",
+}
+
+
+def test_normalize_posting_cleans_fields():
+    posting = normalize_posting(RECORD)
+
+    assert posting["title"] == "Senior Backend Engineer"
+    assert posting["description"] == "Python and PostgreSQL"
+    assert posting["job_type"] == "full-time"
+    assert posting["remote_option"] == "remote"
+    assert posting["posted_date"] == date(2024, 3, 1)
+    assert posting["location"] is None
+    assert posting["application_deadline"] is None
+    assert normalize_posting({**RECORD, "title": "x" * 300})["title"] == "x" * 255
+
+
+@pytest.mark.parametrize("record, error", [
+    ("not an object", "not an object"),
+    ({"title": "Engineer"}, "Missing required field: company"),
+    ({"title": "   ", "company": "Acme"}, "Missing required field: title"),
+    ({**RECORD, "posted_date": "yesterday"}, "Invalid date for posted_date"),
+])
+def test_normalize_posting_rejects(record, error):
+    with pytest.raises(ValueError, match=error):
+        normalize_posting(record)
+
+
+def test_content_hash_ignores_cosmetic_differences():
+    cosmetic = {**RECORD, "title": "Senior Backend Engineer", "job_type": "full-time"}
+    changed = {**RECORD, "description": "Go and PostgreSQL"}
+
+    assert normalize_posting(cosmetic)["content_hash"] == normalize_posting(RECORD)["content_hash"]
+    assert normalize_posting(changed)["content_hash"] != normalize_posting(RECORD)["content_hash"]
+
+
+def test_identity_survives_content_changes():
+    original = normalize_posting(RECORD)
+    edited = normalize_posting({**RECORD, "description": "Go and PostgreSQL", "title": "Staff Engineer"})
+
+    assert edited["identity_hash"] == original["identity_hash"]
+    assert edited["content_hash"] != original["content_hash"]
+
+
+def test_identity_prefers_source_id_then_url():
+    by_source = normalize_posting({**RECORD, "source_id": "feed-1"})
+    moved = normalize_posting({**RECORD, "source_id": "feed-1", "job_url": "https://jobs.example.com/2"})
+    by_url = normalize_posting(RECORD)
+    no_url = {key: value for key, value in RECORD.items() if key != "job_url"}
+
+    assert moved["identity_hash"] == by_source["identity_hash"]
+    assert by_url["identity_hash"] != by_source["identity_hash"]
+    assert (
+        normalize_posting({**no_url, "company": "ACME", "title": "senior backend engineer"})["identity_hash"]
+        == normalize_posting(no_url)["identity_hash"]
+    )
+    assert (
+        normalize_posting({**no_url, "location": "Berlin"})["identity_hash"]
+        != normalize_posting(no_url)["identity_hash"]
+    )
+
+
+def test_read_records_reports_bad_json_lines():
+    stream = io.StringIO('{"title": "a"}\n\nnot json\n')
+
+    records = list(read_records(stream, "jsonl"))
+
+    assert records[0] == (1, {"title": "a"})
+    assert records[1][0] == 3
+    assert records[1][1].startswith("Invalid JSON")
+
+
+@pytest.fixture
+def small_csv_fields():
+    limit = csv.field_size_limit(100)
+    yield
+    csv.field_size_limit(limit)
+
+
+def test_read_records_rejects_bad_csv_rows_and_continues(small_csv_fields):
+    stream = io.StringIO(
+        "title,company\n"
+        "Engineer,Acme\n"
+        f"{'x' * 200},Huge\n"
+        '"Analyst"x,Quoted\n'
+        "Designer,Studio\n"
+    )
+
+    records = list(read_records(stream, "csv"))
+
+    assert records[0] == (2, {"title": "Engineer", "company": "Acme"})
+    assert records[1][0] == 3 and records[1][1].startswith("Invalid CSV: field larger")
+    assert records[2][0] == 4 and records[2][1].startswith("Invalid CSV")
+    assert records[3] == (5, {"title": "Designer", "company": "Studio"})
+
+
+def test_normalize_posting_strips_nul_characters():
+    posting = normalize_posting({
+        "title": "Back\x00end Engineer",
+        "company": "Acme\x00",
+        "description": "Python\x00 and SQL",
+        "source_id": "feed\x00-1",
+    })
+
+    assert posting["title"] == "Backend Engineer"
+    assert posting["company"] == "Acme"
+    assert posting["description"] == "Python and SQL"
+    assert posting["identity_hash"] == normalize_posting({
+        "title": "Backend Engineer", "company": "Acme", "source_id": "feed-1",
+    })["identity_hash"]
+
+
+class _Cursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def copy_expert(self, sql, buffer):
+        self.connection.copied = [line.split("\t") for line in buffer.read().splitlines()]
+
+    def execute(self, sql):
+        self.connection.sql = sql
+
+    def fetchall(self):
+        # Every copied row is new except the first, which existed unchanged
+        return [
+            (f"id-{n}", True, True, row[0], row[1], row[6], row[7])
+            for n, row in enumerate(self.connection.copied[1:])
+        ]
+
+
+class _Connection:
+    def cursor(self):
+        return _Cursor(self)
+
+    def commit(self):
+        pass
+
+
+def test_load_batch_keeps_last_version_of_repeated_posting():
+    connection = _Connection()
+    report = IngestionReport()
+    batch = [
+        normalize_posting({"title": "Engineer", "company": "Beta"}),
+        normalize_posting(RECORD),
+        normalize_posting({**RECORD, "description": "Updated"}),
+    ]
+
+    PostingIngestor(update_vector_index=False)._load_batch(connection, batch, report)
+
+    assert len(connection.copied) == 2
+    assert connection.copied[1][6] == "Updated"
+    assert "ON CONFLICT (identity_hash) DO UPDATE" in connection.sql
+    assert "content_hash IS DISTINCT FROM EXCLUDED.content_hash" in connection.sql
+    assert (report.inserted, report.updated, report.duplicates) == (1, 0, 2)
@@ -0,0 +1,99 @@
+import io
+import random
+import time
+
+import orjson
+import pytest
+import structlog
+
+from app.core.logger import QueuedLogWriter, RouteSampler
+
+
+def _lines(stream):
+    return [orjson.loads(line) for line in stream.getvalue().splitlines()]
+
+
+@pytest.fixture
+def stream():
+    return io.BytesIO()
+
+
+def _writer(stream, **kwargs):
+    # A long interval and large batches keep the writer thread idle until close()
+    kwargs.setdefault("batch_size", 1000)
+    return QueuedLogWriter(stream, flush_interval_ms=60_000, **kwargs)
+
+
+def test_close_writes_everything_queued(stream):
+    writer = _writer(stream, max_size=100)
+    for n in range(10):
+        writer.submit({"event": "job_done", "n": n})
+    writer.submit("plain text line")
+
+    writer.close()
+
+    lines = stream.getvalue().splitlines()
+    assert [orjson.loads(line)["n"] for line in lines[:10]] == list(range(10))
+    assert lines[10] == b"plain text line"
+    assert not writer._thread.is_alive()
+    assert writer.stats() == {"queued": 0, "written": 11, "dropped": 0}
+
+
+def test_full_batch_wakes_the_writer(stream):
+    writer = QueuedLogWriter(stream, max_size=100, batch_size=5, flush_interval_ms=60_000)
+    for n in range(5):
+        writer.submit({"event": "tick", "n": n})
+
+    deadline = time.monotonic() + 2
+    while writer.written < 5 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert writer.written == 5
+    writer.close()
+
+
+def test_full_queue_drops_and_reports_new_records(stream):
+    writer = _writer(stream, max_size=3)
+    for n in range(5):
+        writer.submit({"event": "burst", "n": n})
+    assert writer.stats() == {"queued": 3, "written": 0, "dropped": 2}
+
+    writer.flush()
+    writer.submit({"event": "burst", "n": 5})
+    writer.close()
+
+    records = _lines(stream)
+    assert [r.get("n") for r in records] == [0, 1, 2, None, 5]
+    assert records[3]["event"] == "log_records_dropped"
+    assert (records[3]["count"], records[3]["total"]) == (2, 2)
+    assert writer.dropped == 2
+
+
+def test_sampler_keeps_errors_slow_requests_and_app_events():
+    sampler = RouteSampler({"/health": 0.0}, slow_ms=500)
+
+    for event in (
+        {"event": "request_processed", "path": "/health", "status_code": 503},
+        {"event": "request_processed", "path": "/health", "status_code": 200, "duration_ms": 750},
+        {"event": "cache_miss", "path": "/health"},
+        {"event": "request_processed", "path": "/api/v1/jobs", "status_code": 200},
+    ):
+        assert sampler(None, "info", dict(event)) == event
+
+    with pytest.raises(structlog.DropEvent):
+        sampler(None, "info", {"event": "request_processed", "path": "/health", "status_code": 200})
+
+
+def test_sampler_thins_successful_requests(monkeypatch):
+    sampler = RouteSampler({"/api": 1.0, "/api/v1/jobs": 0.1}, slow_ms=500)
+    monkeypatch.setattr(random, "random", random.Random(7).random)
+
+    kept = []
+    for _ in range(2000):
+        try:
+            kept.append(sampler(None, "info", {"path": "/api/v1/jobs/1", "status_code": 200, "duration_ms": 20}))
+        except structlog.DropEvent:
+            pass
+
+    assert 150 < len(kept) < 250
+    assert all(event["sample_rate"] == 0.1 for event in kept)
+    assert "sample_rate" not in sampler(None, "info", {"path": "/api/v1/users", "status_code": 200})
@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from app.db.pagination import decode_cursor, encode_cursor, fetch_keyset_page
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2026, 3, 1, 12, 30, 15, 123456)
+    cursor = encode_cursor(created_at, "7f0c2a4e-0000-4000-8000-000000000001")
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, "7f0c2a4e-0000-4000-8000-000000000001")
+
+
+@pytest.mark.parametrize("cursor", ["", "not-base64!", encode_cursor("not a date", "x"), "WyJhIl0"])
+def test_decode_rejects_malformed_cursors(cursor):
+    with pytest.raises(ValueError, match="Invalid pagination cursor"):
+        decode_cursor(cursor)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    with Session(engine) as session:
+        session.execute(text("CREATE TABLE items (id TEXT PRIMARY KEY, created_at TIMESTAMP, kind TEXT)"))
+        base = datetime(2026, 1, 1)
+        # Several rows share a timestamp, so the id tie-breaker decides their order
+        for i in range(23):
+            session.execute(
+                text("INSERT INTO items VALUES (:id, :created_at, :kind)"),
+                {"id": f"id{i:02d}", "created_at": base + timedelta(minutes=i // 4), "kind": "ab"[i % 2]},
+            )
+        yield session
+
+
+def _all_pages(db, conditions, params, limit):
+    rows, cursor, pages = [], None, 0
+    while True:
+        page, cursor = fetch_keyset_page(db, "SELECT id, created_at FROM items", conditions, params, cursor, limit)
+        rows.extend(page)
+        pages += 1
+        if cursor is None:
+            return rows, pages
+
+
+def test_pages_follow_created_at_then_id_descending(db):
+    rows, pages = _all_pages(db, [], {}, limit=5)
+
+    ids = [row["id"] for row in rows]
+    expected = [row.id for row in db.execute(text("SELECT id FROM items ORDER BY created_at DESC, id DESC"))]
+    assert ids == expected
+    assert len(set(ids)) == 23
+    assert pages == 5
+
+
+def test_pages_apply_conditions(db):
+    rows, _ = _all_pages(db, ["kind = :kind"], {"kind": "a"}, limit=4)
+
+    assert [row["id"] for row in rows] == [f"id{i:02d}" for i in range(22, -1, -2)]
+
+
+def test_last_full_page_has_no_cursor(db):
+    page, cursor = fetch_keyset_page(db, "SELECT id, created_at FROM items", [], {}, None, 23)
+
+    assert len(page) == 23
+    assert cursor is None
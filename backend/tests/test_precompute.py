@@ -0,0 +1,213 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.services.ai import precompute_service
+from app.services.ai.precompute_service import PrecomputePipeline, TokenBudget, in_offpeak_window
+from app.services.search.embeddings import HashingEmbedder
+from app.services.search.vector_index import get_vector_index
+from app.services.usage.ledger import UsageLimitExceeded
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def test_token_budget_enforces_user_and_global_limits(monkeypatch):
+    monkeypatch.setattr(precompute_service, "check_usage_limit", lambda user_id, tokens: None)
+    budget = TokenBudget(per_user=100, global_limit=150)
+
+    assert budget.try_reserve("a", 60)
+    assert not budget.try_reserve("a", 60)  # over the user's share
+    assert not budget.try_reserve("b", 100)  # over the global limit
+    assert budget.try_reserve("b", 90)
+    assert budget.exhausted
+    assert budget.used == 150
+
+
+def test_token_budget_respects_usage_limits(monkeypatch):
+    def check_usage_limit(user_id, tokens):
+        raise UsageLimitExceeded("daily", 0)
+
+    monkeypatch.setattr(precompute_service, "check_usage_limit", check_usage_limit)
+    budget = TokenBudget(per_user=100, global_limit=100)
+
+    assert not budget.try_reserve("a", 10)
+    assert budget.used == 0
+
+
+@pytest.mark.parametrize("start, end, hour, expected", [
+    (1, 6, 3, True),
+    (1, 6, 6, False),
+    (22, 4, 23, True),
+    (22, 4, 2, True),
+    (22, 4, 12, False),
+])
+def test_offpeak_window(monkeypatch, start, end, hour, expected):
+    monkeypatch.setattr(settings, "PRECOMPUTE_WINDOW_START_HOUR", start)
+    monkeypatch.setattr(settings, "PRECOMPUTE_WINDOW_END_HOUR", end)
+
+    assert in_offpeak_window(START.replace(hour=hour)) is expected
+
+
+class _Pipeline(PrecomputePipeline):
+    """Runs the checkpoint logic over in-memory batches; ``outcomes`` maps posting id to the evaluation result."""
+
+    def __init__(self, batches, outcomes):
+        super().__init__(respect_window=False)
+        self.batches = batches
+        self.outcomes = outcomes
+        self.saved = []
+        self.evaluated = []
+
+    def _load_checkpoint(self):
+        return None
+
+    def _save_checkpoint(self, checkpoint):
+        self.saved.append(checkpoint[1])
+
+    def _fetch_postings(self, checkpoint):
+        for batch in self.batches:
+            if checkpoint is None or batch[0]["id"] > checkpoint[1]:
+                return batch
+        return []
+
+    def _load_resumes(self):
+        return [(["user"], ["resume"])]
+
+    def _shortlist(self, postings):
+        return [("user", "resume", posting["id"], 0.9) for posting in postings]
+
+    def _drop_evaluated(self, candidates):
+        return candidates
+
+    def _load_inputs(self, candidates):
+        return {}, {}
+
+    async def _evaluate_one(self, candidate, descriptions, resumes):
+        self.evaluated.append(candidate[2])
+        return self.outcomes.get(candidate[2], True)
+
+
+def _batches(*ids):
+    return [
+        [{"id": posting_id, "created_at": START + timedelta(minutes=n)} for posting_id in batch]
+        for n, batch in enumerate(ids)
+    ]
+
+
+async def test_checkpoint_advances_past_complete_batches():
+    pipeline = _Pipeline(_batches(["a1", "a2"], ["b1"]), outcomes={})
+
+    report = await pipeline.run()
+
+    assert pipeline.saved == ["a2", "b1"]
+    assert report["postings_scanned"] == 3
+    assert not report["checkpoint_held"]
+
+
+async def test_checkpoint_held_before_batch_with_deferred_pairs():
+    pipeline = _Pipeline(_batches(["a1"], ["b1", "b2"], ["c1"]), outcomes={"b2": False})
+
+    report = await pipeline.run()
+
+    assert pipeline.saved == ["a1"]
+    assert pipeline.evaluated == ["a1", "b1", "b2", "c1"]
+    assert report["checkpoint_held"]
+
+
+async def test_run_stops_when_global_budget_is_spent():
+    pipeline = _Pipeline(_batches(["a1"], ["b1"]), outcomes={})
+    pipeline.budget = TokenBudget(per_user=10, global_limit=0)
+
+    report = await pipeline.run()
+
+    assert pipeline.evaluated == []
+    assert pipeline.saved == []
+    assert report["postings_scanned"] == 0
+
+
+async def test_budget_skip_defers_pair(monkeypatch):
+    monkeypatch.setattr(precompute_service, "check_usage_limit", lambda user_id, tokens: None)
+    pipeline = PrecomputePipeline(respect_window=False)
+    pipeline.budget = TokenBudget(per_user=10, global_limit=1_000_000)
+    candidate = ("user", "resume", "job", 0.9)
+
+    done = await pipeline._evaluate_one(candidate, {"job": "Backend engineer " * 10}, {"resume": "Python developer " * 10})
+
+    assert done is False
+    assert pipeline.stats["skipped_budget"] == 1
+
+
+def test_shortlist_scores_indexed_resume_vectors(monkeypatch):
+    embedder = HashingEmbedder()
+    index = get_vector_index("user_resumes")
+    index.upsert(
+        ["r-python", "r-nurse"],
+        embedder.embed_many(["python postgresql backend services", "registered nurse intensive care"]),
+    )
+    monkeypatch.setattr(settings, "PRECOMPUTE_SHORTLIST_PER_USER", 1)
+    monkeypatch.setattr(settings, "PRECOMPUTE_MIN_SIMILARITY", 0.0)
+    pipeline = PrecomputePipeline(respect_window=False)
+    pipeline._resumes = [(["u-python", "u-nurse", "u-missing"], ["r-python", "r-nurse", "r-missing"])]
+    postings = [
+        {"id": "p-backend", "title": "Backend Engineer", "company": "Acme",
+         "description": "python postgresql backend services", "requirements": None},
+        {"id": "p-icu", "title": "ICU Nurse", "company": "Clinic",
+         "description": "registered nurse intensive care", "requirements": None},
+    ]
+
+    candidates = pipeline._shortlist(postings)
+
+    assert {(c[0], c[1], c[2]) for c in candidates} == {
+        ("u-python", "r-python", "p-backend"),
+        ("u-nurse", "r-nurse", "p-icu"),
+    }
+    assert all(np.isfinite(c[3]) for c in candidates)
+
+
+async def test_failing_pair_is_given_up_after_max_attempts(monkeypatch):
+    monkeypatch.setattr(precompute_service, "check_usage_limit", lambda user_id, tokens: None)
+    monkeypatch.setattr(settings, "PRECOMPUTE_MAX_ATTEMPTS", 2)
+    pipeline = PrecomputePipeline(respect_window=False)
+    pipeline.rate_limiter.interval = 0
+    attempts = {}
+
+    async def evaluate_job(request):
+        raise ValueError("provider rejected the content")
+
+    def record_failure(user_id, job_posting_id, error):
+        attempts[job_posting_id] = attempts.get(job_posting_id, 0) + 1
+        return attempts[job_posting_id]
+
+    monkeypatch.setattr(pipeline.evaluator, "evaluate_job", evaluate_job)
+    monkeypatch.setattr(pipeline, "_record_failure", record_failure)
+    candidate = ("user", "resume", "job", 0.9)
+    inputs = ({"job": "Backend engineer " * 10}, {"resume": "Python developer " * 10})
+
+    assert await pipeline._evaluate_one(candidate, *inputs) is False
+    assert await pipeline._evaluate_one(candidate, *inputs) is True
+    assert pipeline.stats["failures"] == 2
+    assert pipeline.stats["skipped_failed"] == 1
+
+
+async def test_unrecorded_failure_still_holds_the_checkpoint(monkeypatch):
+    monkeypatch.setattr(precompute_service, "check_usage_limit", lambda user_id, tokens: None)
+    pipeline = PrecomputePipeline(respect_window=False)
+    pipeline.rate_limiter.interval = 0
+
+    async def evaluate_job(request):
+        raise ValueError("provider down")
+
+    def record_failure(user_id, job_posting_id, error):
+        raise RuntimeError("database down")
+
+    monkeypatch.setattr(pipeline.evaluator, "evaluate_job", evaluate_job)
+    monkeypatch.setattr(pipeline, "_record_failure", record_failure)
+
+    done = await pipeline._evaluate_one(
+        ("user", "resume", "job", 0.9), {"job": "Backend engineer " * 10}, {"resume": "Python developer " * 10}
+    )
+
+    assert done is False
+    assert pipeline.stats["skipped_failed"] == 0
@@ -0,0 +1,123 @@
+import json
+import os
+import time
+
+import pytest
+
+from app.core import profiling
+from app.core.config import settings
+from app.core.shm_cache import SharedMemoryTable
+
+
+@pytest.fixture
+def profile_dir(tmp_path, monkeypatch):
+    directory = str(tmp_path / "profiles")
+    monkeypatch.setattr(settings, "PROFILE_DIR", directory)
+    monkeypatch.setattr(settings, "PROFILE_FORMAT", "collapsed")
+    return directory
+
+
+@pytest.fixture
+def shared(tmp_path, monkeypatch):
+    table = SharedMemoryTable(str(tmp_path / "toggle"), slots=16, slot_bytes=256, stripes=2)
+    monkeypatch.setattr(profiling, "get_shared_table", lambda: table)
+    monkeypatch.setattr(profiling, "_toggle_cache", (0.0, None))
+    return table
+
+
+def _profile(started):
+    profile = profiling.RequestProfile(None, 0, "header")
+    profile.started = started
+    profile.samples[("main", "handler")] = 3
+    return profile
+
+
+def test_valid_token_accepts_a_fresh_token():
+    assert profiling._valid_token(profiling.create_profile_token(5))
+
+
+def test_valid_token_rejects_expired_token(monkeypatch):
+    token = profiling.create_profile_token(1)
+    monkeypatch.setattr(profiling.time, "time", lambda: int(token.split(".")[0]) + 1)
+
+    assert not profiling._valid_token(token)
+
+
+def test_valid_token_rejects_bad_signature(monkeypatch):
+    token = profiling.create_profile_token(5)
+    expires, _, signature = token.partition(".")
+
+    assert not profiling._valid_token(f"{int(expires) + 60}.{signature}")
+    assert not profiling._valid_token(f"{expires}.{'0' * len(signature)}")
+    monkeypatch.setattr(settings, "PROFILE_SIGNING_KEY", "another key")
+    assert not profiling._valid_token(token)
+
+
+@pytest.mark.parametrize("value", ["", "garbage", ".", "-5.abc", f"{int(time.time()) + 600}", "1e12.abc"])
+def test_valid_token_rejects_malformed_values(value):
+    assert not profiling._valid_token(value)
+
+
+def test_save_profile_trims_to_max_files(profile_dir, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILE_MAX_FILES", 3)
+    names = [
+        profiling.save_profile(_profile(1_700_000_000 + n), f"req{n}", "GET", "/api/v1/jobs/{job_id}", 120)
+        for n in range(5)
+    ]
+
+    assert sorted(os.listdir(profile_dir)) == names[2:]
+    assert [p["name"] for p in profiling.list_profiles()] == names[:1:-1]
+
+
+def test_list_profiles_parses_names(profile_dir):
+    name = profiling.save_profile(_profile(1_700_000_000.5), "abc-123", "POST", "/api/v1/evaluate", 845)
+    # Unrelated files in the directory are ignored
+    open(os.path.join(profile_dir, "notes.txt"), "w").close()
+
+    (profile,) = profiling.list_profiles()
+
+    assert name == "1700000000500_abc-123_POST_api-v1-evaluate_845ms.collapsed"
+    assert profile["request_id"] == "abc-123"
+    assert profile["method"] == "POST"
+    assert profile["route"] == "api-v1-evaluate"
+    assert profile["duration_ms"] == 845
+    assert profile["format"] == "collapsed"
+    assert profile["created_at"] == 1_700_000_000.5
+    assert profile["size"] == len("main;handler 3\n")
+
+
+def test_list_profiles_without_directory(profile_dir):
+    assert profiling.list_profiles() == []
+
+
+def test_profile_path_rejects_unknown_and_traversal_names(profile_dir, tmp_path):
+    name = profiling.save_profile(_profile(1_700_000_000), "req", "GET", "/", 10)
+    outside = tmp_path / "1700000000000_req_GET_root_10ms.collapsed"
+    outside.write_text("secret")
+
+    assert profiling.profile_path(name) == os.path.join(profile_dir, name)
+    assert profiling.profile_path("1700000000001_req_GET_root_10ms.collapsed") is None
+    for bad in (
+        "../1700000000000_req_GET_root_10ms.collapsed",
+        "1700000000000_req_GET_../../etc_10ms.collapsed",
+        "1700000000000_req_GET_root/x_10ms.collapsed",
+        str(outside),
+        ".1700000000000_req_GET_root_10ms.collapsed.tmp",
+    ):
+        assert profiling.profile_path(bad) is None
+
+
+def test_toggle_matches_stops_after_max_profiles(shared):
+    profiling.set_profiling_toggle("/api/v1/evaluate", minutes=5, max_profiles=2)
+
+    assert not profiling._toggle_matches("/api/v1/jobs")
+    assert profiling._toggle_matches("/api/v1/evaluate")
+    assert profiling._toggle_matches("/api/v1/evaluate/stream")
+    assert not profiling._toggle_matches("/api/v1/evaluate")
+
+
+def test_toggle_matches_ignores_expired_toggle(shared):
+    toggle = {"path_prefix": "/api", "expires_at": time.time() - 1, "max_profiles": 10}
+    shared.set(profiling._TOGGLE_KEY, json.dumps(toggle).encode(), ttl=60)
+
+    assert not profiling._toggle_matches("/api/v1/evaluate")
@@ -0,0 +1,119 @@
+import os
+
+import pytest
+
+from app.services.ai.providers import (
+    Completion,
+    ProviderBackend,
+    ProviderRequest,
+    RecordingBackend,
+    ReplayBackend,
+    ReplayedProviderError,
+    StreamUsage,
+    TraceMissError,
+    TraceWriter,
+    iter_trace,
+    provider_trace_context,
+)
+
+
+def _request(prompt):
+    return ProviderRequest("openai", "gpt-4o-mini", [{"role": "user", "content": prompt}], temperature=0.7)
+
+
+class _Echo(ProviderBackend):
+    """Answers with the prompt upper-cased, or fails for prompts starting with "fail"."""
+
+    async def complete(self, request):
+        prompt = request.messages[-1]["content"]
+        if prompt.startswith("fail"):
+            raise RuntimeError("provider down")
+        return Completion(prompt.upper(), len(prompt), 3, 12.5)
+
+    async def stream(self, request, usage=None):
+        words = request.messages[-1]["content"].upper().split()
+        for word in words:
+            yield word + " "
+        if usage is not None:
+            # Reported by the provider, unlike the recorder's estimate
+            usage.input_tokens, usage.output_tokens = 7, len(words)
+
+
+def test_records_round_trip_across_interleaved_writers(tmp_path):
+    path = str(tmp_path / "providers.trace")
+    first, second = TraceWriter(path), TraceWriter(path)
+    for n in range(3):
+        first.append({"n": n, "writer": "first", "prompt": "same prompt text " * 20})
+        second.append({"n": n, "writer": "second"})
+    first.close()
+    second.close()
+
+    records = list(iter_trace(path))
+
+    assert [(r["writer"], r["n"]) for r in records] == [
+        ("first", 0), ("second", 0), ("first", 1), ("second", 1), ("first", 2), ("second", 2),
+    ]
+    assert records[4]["prompt"] == "same prompt text " * 20
+
+
+def test_truncated_tail_is_ignored(tmp_path):
+    path = str(tmp_path / "providers.trace")
+    writer = TraceWriter(path)
+    writer.append({"n": 0})
+    writer.append({"n": 1})
+    writer.close()
+
+    # A crash mid-write leaves part of the last frame
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 3)
+    assert [r["n"] for r in iter_trace(path)] == [0]
+
+    with open(path, "r+b") as f:
+        f.truncate(4)
+    assert list(iter_trace(path)) == []
+
+
+async def test_recorded_calls_replay_without_the_provider(tmp_path):
+    path = str(tmp_path / "providers.trace")
+    recorder = RecordingBackend(_Echo(), path)
+    with provider_trace_context(evaluation="e1"):
+        completion = await recorder.complete(_request("hello world"))
+        streamed = [chunk async for chunk in recorder.stream(_request("two words"))]
+        with pytest.raises(RuntimeError):
+            await recorder.complete(_request("fail now"))
+    recorder._writer.close()
+
+    records = list(iter_trace(path))
+    assert [r["g"] for r in records] == [{"evaluation": "e1"}] * 3
+    assert records[0]["r"]["messages"][0]["content"] == "hello world"
+    assert records[1]["u"] == [7, 2]
+
+    replay = ReplayBackend(path, speed=0)
+    replayed = await replay.complete(_request("hello world"))
+    assert (replayed.text, replayed.input_tokens, replayed.output_tokens) == (
+        completion.text, completion.input_tokens, completion.output_tokens,
+    )
+    usage = StreamUsage()
+    assert [chunk async for chunk in replay.stream(_request("two words"), usage)] == streamed
+    assert (usage.input_tokens, usage.output_tokens) == (7, 2)
+    with pytest.raises(ReplayedProviderError):
+        await replay.complete(_request("fail now"))
+    with pytest.raises(TraceMissError):
+        await replay.complete(_request("never recorded"))
+    assert replay.stats() == {"records": 3, "hits": 3, "misses": 1}
+
+
+async def test_stream_stopped_early_is_recorded_as_cancelled(tmp_path):
+    path = str(tmp_path / "providers.trace")
+    recorder = RecordingBackend(_Echo(), path)
+
+    stream = recorder.stream(_request("one two three"))
+    assert await stream.__anext__() == "ONE "
+    await stream.aclose()
+    recorder._writer.close()
+
+    (record,) = iter_trace(path)
+    assert record["a"] == 1
+    assert record["x"] == "ONE "
+    assert [text for _, text in record["c"]] == ["ONE "]
+    assert "e" not in record
@@ -0,0 +1,38 @@
+import uuid
+
+from limits import RateLimitItemPerMinute
+from limits.storage import storage_from_string
+from limits.strategies import FixedWindowRateLimiter
+
+from app.core.rate_limit import SharedMemoryStorage
+
+
+def test_shm_uri_selects_shared_memory_storage():
+    assert isinstance(storage_from_string("shm://"), SharedMemoryStorage)
+
+
+def test_fixed_window_limit_is_shared_between_storages():
+    limit = RateLimitItemPerMinute(2)
+    key = uuid.uuid4().hex
+    first = FixedWindowRateLimiter(storage_from_string("shm://"))
+    second = FixedWindowRateLimiter(storage_from_string("shm://"))
+
+    assert first.hit(limit, key)
+    assert second.hit(limit, key)
+    assert not first.hit(limit, key)
+    assert second.get_window_stats(limit, key).remaining == 0
+
+
+def test_clear_and_reset():
+    limit = RateLimitItemPerMinute(1)
+    storage = storage_from_string("shm://")
+    limiter = FixedWindowRateLimiter(storage)
+    key, other = uuid.uuid4().hex, uuid.uuid4().hex
+    limiter.hit(limit, key)
+    limiter.hit(limit, other)
+
+    limiter.clear(limit, key)
+    assert limiter.hit(limit, key)
+
+    assert storage.reset() >= 2
+    assert limiter.hit(limit, other)
@@ -0,0 +1,161 @@
+import io
+import os
+import time
+import uuid
+
+import docx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.deps import get_current_active_user
+from app.api.endpoints import resumes
+from app.core.config import settings
+from app.db.session import get_db
+from app.services.resume import extraction
+from app.services.resume.extraction import ResumeExtractor, _extract_and_normalize, detect_kind, save_stream
+
+
+def _pdf(text):
+    """Builds a one-page PDF showing ``text`` in Helvetica."""
+    stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+        b"/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream),
+    ]
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+def _docx(paragraph, cells):
+    document = docx.Document()
+    document.add_paragraph(paragraph)
+    table = document.add_table(rows=1, cols=len(cells))
+    for cell, text in zip(table.rows[0].cells, cells):
+        cell.text = text
+    out = io.BytesIO()
+    document.save(out)
+    return out.getvalue()
+
+
+def _hang(path, kind):
+    time.sleep(60)
+
+
+def _crash(path, kind):
+    os._exit(1)
+
+
+@pytest.fixture
+def extractor(monkeypatch):
+    monkeypatch.setattr(settings, "RESUME_EXTRACT_WORKERS", 1)
+    yield ResumeExtractor()
+    ResumeExtractor.shutdown()
+
+
+async def _extract(extractor, tmp_path, name, data):
+    with open(tmp_path / name, "wb") as f:
+        f.write(data)
+    with open(tmp_path / name, "rb") as f:
+        path, _, _ = save_stream(f, str(tmp_path / "uploads"), settings.RESUME_MAX_UPLOAD_BYTES)
+    # Unique cache key so every call reaches the pool
+    return await extractor.extract(path, detect_kind(name, data[:8]), uuid.uuid4().hex)
+
+
+async def test_extracts_pdf_docx_and_txt_in_the_pool(extractor, tmp_path):
+    assert await _extract(extractor, tmp_path, "cv.pdf", _pdf("Senior Python Engineer")) == "Senior Python Engineer"
+    assert await _extract(extractor, tmp_path, "cv.docx", _docx("Data  Scientist", ["SQL", "Pandas"])) == (
+        "Data Scientist SQL Pandas"
+    )
+    assert await _extract(extractor, tmp_path, "cv.txt", "Ｒｕｓｔ\x00 developer\n\n".encode()) == "Rust developer"
+
+
+async def test_extraction_is_cached_by_hash(extractor, tmp_path, monkeypatch):
+    path = str(tmp_path / "cv.txt")
+    with open(path, "w") as f:
+        f.write("Go developer")
+    file_hash = uuid.uuid4().hex
+    assert await extractor.extract(path, "txt", file_hash) == "Go developer"
+
+    monkeypatch.setattr(extraction, "_extract_and_normalize", _crash)
+    assert await ResumeExtractor().extract(path, "txt", file_hash) == "Go developer"
+
+
+async def test_parser_errors_surface_as_value_errors(extractor, tmp_path):
+    with pytest.raises(ValueError, match="Could not read text"):
+        await _extract(extractor, tmp_path, "cv.pdf", b"%PDF-1.4 not really a pdf")
+
+
+async def test_timeout_kills_the_pool_and_the_next_file_succeeds(extractor, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "RESUME_EXTRACT_TIMEOUT", 0.5)
+    monkeypatch.setattr(extraction, "_extract_and_normalize", _hang)
+    with pytest.raises(ValueError, match="timed out"):
+        await _extract(extractor, tmp_path, "cv.txt", b"stuck")
+    assert ResumeExtractor._executor is None
+
+    monkeypatch.setattr(extraction, "_extract_and_normalize", _extract_and_normalize)
+    assert await _extract(extractor, tmp_path, "cv.txt", b"Kotlin developer") == "Kotlin developer"
+
+
+async def test_crashed_worker_does_not_break_later_extractions(extractor, tmp_path, monkeypatch):
+    monkeypatch.setattr(extraction, "_extract_and_normalize", _crash)
+    with pytest.raises(ValueError, match="Could not read text"):
+        await _extract(extractor, tmp_path, "cv.txt", b"crash")
+
+    monkeypatch.setattr(extraction, "_extract_and_normalize", _extract_and_normalize)
+    assert await _extract(extractor, tmp_path, "cv.txt", b"Swift developer") == "Swift developer"
+
+
+def test_save_stream_enforces_the_size_cap(tmp_path):
+    with pytest.raises(extraction.UploadTooLargeError):
+        save_stream(io.BytesIO(b"x" * 2048), str(tmp_path), max_bytes=1024)
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(settings, "RESUME_MAX_UPLOAD_BYTES", 1024)
+    app = FastAPI()
+    app.include_router(resumes.router, prefix="/resumes")
+    app.dependency_overrides[get_current_active_user] = lambda: None
+    app.dependency_overrides[get_db] = lambda: None
+    return TestClient(app)
+
+
+def test_upload_limit_rejects_declared_length(client):
+    body = b"x" * (1024 + resumes._MULTIPART_OVERHEAD_BYTES + 1)
+    response = client.post("/resumes/upload", content=body, headers={"content-type": "multipart/form-data; boundary=b"})
+
+    assert response.status_code == 413
+
+
+def test_upload_limit_counts_chunked_bodies(client):
+    def chunks():
+        for _ in range(100):
+            yield b"x" * 1024
+
+    response = client.post("/resumes/upload", content=chunks(), headers={"content-type": "multipart/form-data; boundary=b"})
+
+    assert response.status_code == 413
+
+
+def test_upload_over_file_cap_within_body_limit(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "RESUME_UPLOAD_DIR", str(tmp_path))
+    response = client.post("/resumes/upload", files={"file": ("cv.txt", b"x" * 2048, "text/plain")})
+
+    assert response.status_code == 413
+    assert os.listdir(tmp_path) == []
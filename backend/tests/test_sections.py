@@ -0,0 +1,62 @@
+from app.core.config import settings
+from app.services.ai.sections import section_hash, split_sections
+
+JOB = "Senior backend engineer building Python services on PostgreSQL."
+
+
+def _sentences(n, topic):
+    return " ".join(f"I worked on {topic} project number {i} and shipped it to production." for i in range(n))
+
+
+def test_splits_on_headings():
+    background = (
+        "Jane Doe, backend engineer. EXPERIENCE Built payment APIs in Python. "
+        "Education: BSc Computer Science. SKILLS Python, PostgreSQL"
+    )
+
+    sections = split_sections(background)
+
+    assert [label for label, _ in sections] == ["Introduction", "Experience", "Education", "Skills"]
+    assert sections[1][1] == "Built payment APIs in Python."
+    assert sections[3][1] == "Python, PostgreSQL"
+
+
+def test_prose_mentioning_a_heading_does_not_split():
+    background = "I have experience with Python and skills in SQL. My education was online."
+
+    assert split_sections(background) == [("Background", background)]
+
+
+def test_long_sections_are_chunked_by_content():
+    background = f"EXPERIENCE {_sentences(80, 'payments')} SKILLS Python"
+
+    sections = split_sections(background)
+    chunks = [text for label, text in sections if label.startswith("Experience")]
+
+    assert len(chunks) > 1
+    assert all(len(text) <= settings.SECTION_MAX_CHARS + 100 for text in chunks)
+    assert " ".join(chunks) == _sentences(80, "payments")
+    assert sections[-1] == ("Skills", "Python")
+
+
+def test_editing_one_sentence_changes_few_chunks():
+    original = _sentences(80, "payments")
+    sentences = original.split(". ")
+    sentences[40] = "I rewrote the ledger service in Rust and cut latency by half"
+    edited = ". ".join(sentences)
+
+    before = {text for _, text in split_sections(original)}
+    after = {text for _, text in split_sections(edited)}
+
+    assert len(after - before) <= 2
+    assert len(before & after) >= len(before) - 2
+
+
+def test_section_hash_covers_every_input():
+    base = section_hash(JOB, "openai", "Python", "v1")
+
+    assert base == section_hash(JOB, "openai", "Python", "v1")
+    assert base != section_hash(JOB + " Remote.", "openai", "Python", "v1")
+    assert base != section_hash(JOB, "anthropic", "Python", "v1")
+    assert base != section_hash(JOB, "openai", "Python, Go", "v1")
+    assert base != section_hash(JOB, "openai", "Python", "v2")
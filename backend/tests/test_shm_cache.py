@@ -0,0 +1,137 @@
+import multiprocessing
+import os
+import time
+
+import pytest
+
+from app.core.shm_cache import SharedMemoryTable
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "table")
+
+
+def test_set_get_overwrite_delete(path):
+    table = SharedMemoryTable(path, slots=16, slot_bytes=128, stripes=4)
+
+    assert table.set("a", b"1")
+    assert table.set("a", b"22")
+    assert table.get("a") == b"22"
+    table.delete("a")
+    assert table.get("a") is None
+    assert table.get("missing") is None
+
+
+def test_rejects_values_larger_than_a_slot(path):
+    table = SharedMemoryTable(path, slots=16, slot_bytes=128, stripes=4)
+
+    assert not table.set("big", b"x" * table.payload_bytes)
+    assert table.get("big") is None
+
+
+def test_long_keys_are_hashed(path):
+    table = SharedMemoryTable(path, slots=16, slot_bytes=128, stripes=4)
+    key = "k" * 1000
+
+    assert table.set(key, b"v")
+    assert table.get(key) == b"v"
+    assert table.get("k" * 999) is None
+
+
+def test_expired_entries_are_not_returned(path, monkeypatch):
+    table = SharedMemoryTable(path, slots=16, slot_bytes=128, stripes=4)
+    table.set("short", b"v", ttl=10)
+    table.set("forever", b"v")
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 11)
+
+    assert table.get("short") is None
+    assert table.get("forever") == b"v"
+
+
+def test_full_probe_run_evicts_entry_closest_to_expiry(path):
+    table = SharedMemoryTable(path, slots=4, slot_bytes=128, stripes=1)
+    table.set("soon", b"v", ttl=100)
+    table.set("later", b"v", ttl=200)
+    table.set("latest", b"v", ttl=300)
+    table.set("never", b"v")
+
+    table.set("new", b"v", ttl=50)
+
+    assert table.get("soon") is None
+    assert [table.get(key) for key in ("later", "latest", "never", "new")] == [b"v"] * 4
+
+
+def test_deleted_slots_are_reused(path):
+    table = SharedMemoryTable(path, slots=4, slot_bytes=128, stripes=1)
+    for key in "abcd":
+        table.set(key, b"v")
+    table.delete("b")
+
+    table.set("e", b"v")
+
+    assert [table.get(key) for key in "acde"] == [b"v"] * 4
+
+
+def test_counters_and_fixed_window_expiry(path, monkeypatch):
+    table = SharedMemoryTable(path, slots=16, slot_bytes=128, stripes=4)
+
+    assert table.incr("hits", ttl=60) == 1
+    assert table.incr("hits", 4, ttl=60) == 5
+    assert table.get_counter("hits") == 5
+    expires = table.get_expiry("hits")
+    assert table.incr("hits", ttl=600) == 6
+    assert table.get_expiry("hits") == expires  # ttl only applies on creation
+
+    monkeypatch.setattr(time, "time", lambda: expires + 1)
+    assert table.get_counter("hits") == 0
+    assert table.incr("hits", ttl=60) == 1
+
+
+def test_clear_by_prefix(path):
+    table = SharedMemoryTable(path, slots=16, slot_bytes=128, stripes=4)
+    for key in ("a:1", "a:2", "b:1"):
+        table.set(key, b"v")
+
+    assert table.clear("a:") == 2
+    assert table.get("a:1") is None
+    assert table.get("b:1") == b"v"
+
+
+def _increment(path, times):
+    table = SharedMemoryTable(path, slots=16, slot_bytes=128, stripes=4)
+    for _ in range(times):
+        table.incr("shared")
+
+
+def test_counters_are_exact_across_processes(path):
+    table = SharedMemoryTable(path, slots=16, slot_bytes=128, stripes=4)
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_increment, args=(path, 500)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=60)
+
+    assert [worker.exitcode for worker in workers] == [0] * 4
+    assert table.get_counter("shared") == 2000
+
+
+def test_layout_change_replaces_file_without_touching_existing_mappings(path):
+    old = SharedMemoryTable(path, slots=256, slot_bytes=128, stripes=4)
+    old.set("a", b"old")
+    old_inode = os.stat(path).st_ino
+
+    new = SharedMemoryTable(path, slots=8, slot_bytes=64, stripes=2)
+
+    assert os.stat(path).st_ino != old_inode
+    assert os.path.getsize(path) < 256 * 128
+    assert new.get("a") is None
+    # The old mapping is intact, not truncated under its feet
+    assert old.get("a") == b"old"
+    assert old.set("b", b"still works")
+    new.set("a", b"new")
+    assert SharedMemoryTable(path, slots=8, slot_bytes=64, stripes=2).get("a") == b"new"
+    assert [name for name in os.listdir(os.path.dirname(path))] == ["table"]
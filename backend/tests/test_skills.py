@@ -0,0 +1,93 @@
+import json
+import os
+import pickle
+
+import pytest
+
+from app.services.skills.automaton import AhoCorasick
+from app.services.skills.extractor import SkillExtractor, tokenize
+
+
+def test_automaton_reports_overlapping_matches():
+    automaton = AhoCorasick(["he", "she", "his", "hers"])
+
+    matches = sorted(automaton.iter_matches("ushers"))
+
+    assert matches == [(1, 4, 1), (2, 4, 0), (2, 6, 3)]
+
+
+def test_automaton_follows_failure_links_across_partial_matches():
+    automaton = AhoCorasick([("a", "b", "c"), ("b", "c", "d"), ("c",)])
+
+    matches = list(automaton.iter_matches(["a", "b", "c", "d", "x", "c"]))
+
+    assert matches == [(0, 3, 0), (2, 3, 2), (1, 4, 1), (5, 6, 2)]
+
+
+def test_automaton_rejects_empty_patterns_and_pickles():
+    with pytest.raises(ValueError):
+        AhoCorasick(["a", ""])
+
+    automaton = pickle.loads(pickle.dumps(AhoCorasick(["ab", "b"])))
+
+    assert list(automaton.iter_matches("xab")) == [(1, 3, 0), (2, 3, 1)]
+
+
+def test_tokenize_keeps_plus_and_hash_suffixes():
+    assert tokenize("C, C++ and C# on Node.js") == ["C", ",", "C++", "and", "C#", "on", "Node", ".", "js"]
+
+
+@pytest.fixture(scope="module")
+def extractor(tmp_path_factory):
+    return SkillExtractor(cache_dir=str(tmp_path_factory.mktemp("skills")))
+
+
+def test_aliases_map_to_canonical_names(extractor):
+    text = "Built services in golang and nodejs backed by postgres, with Continuous Integration."
+
+    assert extractor.extract(text) == ["Go", "Node.js", "PostgreSQL", "CI/CD"]
+
+
+def test_exact_aliases_match_only_their_capitalisation(extractor):
+    assert extractor.extract("Wrote Go services and an R package") == ["Go", "R"]
+    assert extractor.extract("Ready to go, r u there") == []
+    assert extractor.extract("Built a JS frontend, not js") == ["JavaScript"]
+
+
+def test_c_family_languages_are_told_apart(extractor):
+    assert extractor.extract("C++ and C# developer who also knows C.") == ["C++", "C#", "C"]
+    assert extractor.extract("cpp, csharp") == ["C++", "C#"]
+    assert extractor.extract("c programming") == []
+
+
+def test_longest_match_wins_and_mentions_are_counted(extractor):
+    counts = extractor.extract_counts("Machine learning and ML: machine learning models in Apache Spark")
+
+    assert counts == {"Machine Learning": 3, "Apache Spark": 1}
+
+
+def test_match_scores_job_skill_coverage(extractor):
+    result = extractor.match("Python, PostgreSQL and Kubernetes required", "Python and postgres expert")
+
+    assert result["matched"] == ["Python", "PostgreSQL"]
+    assert result["missing"] == ["Kubernetes"]
+    assert result["score"] == pytest.approx(66.7)
+    assert extractor.match("Friendly team", "Python")["score"] is None
+
+
+def test_compiled_taxonomy_is_cached_by_version_and_content(tmp_path):
+    taxonomy = {"version": "t1", "skills": [{"name": "Python", "aliases": ["py"]}]}
+    path = tmp_path / "taxonomy.json"
+    path.write_text(json.dumps(taxonomy))
+    cache_dir = tmp_path / "cache"
+
+    SkillExtractor(str(path), cache_dir=str(cache_dir))
+    cached = os.listdir(cache_dir)
+    assert len(cached) == 1 and cached[0].startswith("skills-t1-")
+
+    taxonomy["skills"][0]["aliases"].append("cpython")
+    path.write_text(json.dumps(taxonomy))
+    reloaded = SkillExtractor(str(path), cache_dir=str(cache_dir))
+
+    assert len(os.listdir(cache_dir)) == 2
+    assert reloaded.extract("cpython internals") == ["Python"]
@@ -0,0 +1,214 @@
+import pytest
+
+from app.core.config import settings
+from app.core.shm_cache import SharedMemoryTable
+from app.services.usage import ledger as ledger_module
+from app.services.usage.ledger import UsageCounters, UsageLedger, UsageLimitExceeded, usage_scope
+
+USER = "11111111-1111-1111-1111-111111111111"
+
+
+class _Session:
+    """Stands in for SessionLocal, keeping the parameters of every upsert."""
+
+    def __init__(self, executed, fail):
+        self.executed = executed
+        self.fail = fail
+
+    def execute(self, statement, params):
+        if self.fail:
+            raise RuntimeError("database unavailable")
+        self.executed.append(params)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class _Redis:
+    """In-memory Redis with the pipeline commands the counters use."""
+
+    def __init__(self):
+        self.values = {}
+        self.fail = False
+
+    def pipeline(self, transaction=True):
+        return _Pipeline(self)
+
+
+class _Pipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def incrby(self, key, amount):
+        self.commands.append((key, amount))
+
+    def expire(self, key, ttl):
+        self.commands.append(None)
+
+    def execute(self):
+        if self.redis.fail:
+            raise ConnectionError("redis unavailable")
+        results = []
+        for command in self.commands:
+            if command is None:
+                results.append(True)
+            else:
+                key, amount = command
+                self.redis.values[key] = self.redis.values.get(key, 0) + amount
+                results.append(self.redis.values[key])
+        return results
+
+
+@pytest.fixture
+def counters(tmp_path, monkeypatch):
+    monkeypatch.setattr(ledger_module, "get_redis", lambda: None)
+    counters = UsageCounters()
+    counters.shared = SharedMemoryTable(str(tmp_path / "usage"), slots=64, slot_bytes=128, stripes=2)
+    return counters
+
+
+@pytest.fixture
+def ledger(counters, monkeypatch):
+    executed = []
+    sessions = {"fail": False}
+    monkeypatch.setattr(ledger_module, "SessionLocal", lambda: _Session(executed, sessions["fail"]))
+    ledger = UsageLedger(flush_interval=3600, enabled=True)
+    ledger._counters = counters
+    ledger.executed = executed
+    ledger.sessions = sessions
+    yield ledger
+    # Nothing left for the exit hook to write
+    ledger._buckets = {}
+    ledger._counters = None
+
+
+def test_flush_writes_one_row_per_bucket(ledger):
+    with usage_scope(USER, "evaluate"):
+        ledger.record("openai", "gpt-4o-mini", 100, 20, 150.0)
+        ledger.record("openai", "gpt-4o-mini", 50, 10, 250.0)
+        ledger.record("anthropic", "claude-3-haiku", 0, 0, 90.0, error=True)
+
+    assert ledger.flush() == 2
+    assert ledger.flush() == 0
+
+    params = ledger.executed[0]
+    row = params["providers"].index("openai")
+    assert params["user_ids"] == [USER, USER]
+    assert params["routes"] == ["evaluate", "evaluate"]
+    assert params["requests"][row] == 2
+    assert params["input_tokens"][row] == 150
+    assert params["output_tokens"][row] == 30
+    assert params["latency_ms_sums"][row] == 400
+    assert params["latency_ms_maxes"][row] == 250
+    assert params["errors"][1 - row] == 1
+
+
+def test_failed_flush_merges_buckets_back(ledger):
+    with usage_scope(USER, "evaluate"):
+        ledger.record("openai", "gpt-4o-mini", 100, 20, 150.0)
+        ledger.sessions["fail"] = True
+        assert ledger.flush() == 0
+
+        ledger.record("openai", "gpt-4o-mini", 40, 5, 300.0)
+        ledger.sessions["fail"] = False
+        assert ledger.flush() == 1
+
+    params = ledger.executed[0]
+    assert params["requests"] == [2]
+    assert params["input_tokens"] == [140]
+    assert params["output_tokens"] == [25]
+    assert params["latency_ms_maxes"] == [300]
+
+
+def test_record_counts_tokens_for_the_user(ledger):
+    with usage_scope(USER, "evaluate"):
+        ledger.record("openai", "gpt-4o-mini", 100, 20, 150.0)
+    with usage_scope(None, "precompute"):
+        ledger.record("openai", "gpt-4o-mini", 500, 50, 150.0)
+
+    assert ledger.counters.tokens(USER, "minute") == 120
+    assert ledger.counters.tokens(USER, "day") == 120
+
+
+def test_check_enforces_token_limits(counters, monkeypatch):
+    monkeypatch.setattr(settings, "USAGE_USER_MINUTE_TOKEN_LIMIT", 0)
+    monkeypatch.setattr(settings, "USAGE_USER_DAILY_TOKEN_LIMIT", 1000)
+    counters.add(USER, 900)
+
+    counters.check(USER, 100)
+    with pytest.raises(UsageLimitExceeded) as error:
+        counters.check(USER, 101)
+    assert error.value.window == "day"
+
+
+def test_sync_shares_usage_across_hosts(counters, monkeypatch):
+    redis = _Redis()
+    monkeypatch.setattr(ledger_module, "get_redis", lambda: redis)
+    counters.add(USER, 100)
+
+    counters.sync()
+    assert sorted(redis.values.values()) == [100, 100]
+
+    # Another host adds 400 tokens, then this host adds 50 more
+    for key in redis.values:
+        redis.values[key] += 400
+    counters.tokens(USER)  # watches the counter, so the next sync reads it back
+    counters.sync()
+    counters.add(USER, 50)
+
+    assert counters.tokens(USER, "day") == 550
+    counters.sync()
+    assert sorted(redis.values.values()) == [550, 550]
+    assert counters.tokens(USER, "day") == 550
+
+
+def test_failed_sync_keeps_pending_tokens(counters, monkeypatch):
+    redis = _Redis()
+    monkeypatch.setattr(ledger_module, "get_redis", lambda: redis)
+    counters.add(USER, 100)
+
+    redis.fail = True
+    counters.sync()
+    assert redis.values == {}
+    assert counters.tokens(USER) == 100
+
+    redis.fail = False
+    counters.add(USER, 20)
+    counters.sync()
+    assert sorted(redis.values.values()) == [120, 120]
+
+
+def test_merge_back_drops_the_oldest_buckets_beyond_the_cap(ledger, monkeypatch):
+    monkeypatch.setattr(settings, "USAGE_MAX_PENDING_BUCKETS", 2)
+    ledger.sessions["fail"] = True
+    for minute in (60, 120, 180):
+        ledger._buckets[(USER, "evaluate", "openai", "gpt-4o-mini", minute)] = [1, 0, 10, 5, 100, 100, 0.0]
+
+    assert ledger.flush() == 0
+
+    assert sorted(key[4] for key in ledger._buckets) == [120, 180]
+    assert ledger.dropped == 1
+
+
+def test_disabled_ledger_only_counts_tokens(counters):
+    ledger = UsageLedger(flush_interval=3600, enabled=False)
+    ledger._counters = counters
+    with usage_scope(USER, "evaluate"):
+        ledger.record("openai", "gpt-4o-mini", 100, 20, 150.0)
+        ledger.check(USER)
+
+    assert ledger._buckets == {}
+    assert ledger._thread is None
+    assert counters.tokens(USER) == 120
+    ledger._counters = None
+
+
+def test_ledger_is_disabled_without_postgresql():
+    assert not UsageLedger(flush_interval=3600).enabled
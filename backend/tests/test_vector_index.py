@@ -0,0 +1,133 @@
+import numpy as np
+import pytest
+
+from app.services.search.vector_index import VectorIndex
+
+DIM = 16
+
+
+def _unit(rows, seed=0):
+    vectors = np.random.default_rng(seed).standard_normal((rows, DIM)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "index")
+
+
+def _ids(results):
+    return [item_id for item_id, _ in results]
+
+
+def test_upsert_and_search(path):
+    index = VectorIndex(path, dim=DIM)
+    vectors = _unit(3)
+    index.upsert(["a", "b", "c"], vectors)
+
+    assert len(index) == 3
+    assert _ids(index.search(vectors[1], top_k=1)) == ["b"]
+    assert index.search(vectors[1], top_k=1)[0][1] == pytest.approx(1.0)
+    assert [_ids(r) for r in index.search_many(vectors[[2, 0]], top_k=1)] == [["c"], ["a"]]
+
+
+def test_upsert_supersedes_earlier_row(path):
+    index = VectorIndex(path, dim=DIM)
+    old, new = _unit(2)
+    index.upsert(["a"], old[np.newaxis])
+    index.upsert(["a"], new[np.newaxis])
+
+    assert len(index) == 1
+    assert index.search(old, top_k=5)[0][1] == pytest.approx(float(old @ new))
+    found, matrix = index.vectors(["a", "missing"])
+    assert found == ["a"]
+    np.testing.assert_allclose(matrix[0], new)
+    assert index.dead_fraction() == pytest.approx(0.5)
+
+
+def test_delete_hides_row_and_is_seen_by_other_readers(path):
+    index = VectorIndex(path, dim=DIM)
+    vectors = _unit(2)
+    index.upsert(["a", "b"], vectors)
+    reader = VectorIndex(path, dim=DIM)
+
+    index.delete(["a"])
+
+    assert index.present(["a", "b"]) == ["b"]
+    assert reader.present(["a", "b"]) == ["b"]
+    assert _ids(reader.search(vectors[0], top_k=5)) == ["b"]
+
+
+def test_reupsert_after_delete_survives_reopen_and_compaction(path):
+    index = VectorIndex(path, dim=DIM)
+    vectors = _unit(3)
+    index.upsert(["a", "b"], vectors[:2])
+    index.delete(["a"])
+    index.upsert(["a"], vectors[2:])
+
+    assert index.present(["a", "b"]) == ["a", "b"]
+    reopened = VectorIndex(path, dim=DIM)
+    assert reopened.present(["a", "b"]) == ["a", "b"]
+    assert _ids(reopened.search(vectors[2], top_k=1)) == ["a"]
+
+    reopened.compact(ivf_lists=0)
+    assert len(reopened) == 2
+    assert VectorIndex(path, dim=DIM).present(["a", "b"]) == ["a", "b"]
+    assert index.present(["a", "b"]) == ["a", "b"]
+
+
+def test_tombstone_ahead_of_a_lagging_reader_waits_for_its_rows(path):
+    index = VectorIndex(path, dim=DIM)
+    vectors = _unit(2)
+    index.upsert(["a"], vectors[:1])
+    reader = VectorIndex(path, dim=DIM)
+    index.upsert(["a"], vectors[1:])
+    index.delete(["a"])
+
+    # The reader sees the delete only together with the row it covers
+    assert reader.present(["a"]) == []
+    assert VectorIndex(path, dim=DIM).present(["a"]) == []
+
+
+def test_compact_drops_dead_rows(path):
+    index = VectorIndex(path, dim=DIM)
+    vectors = _unit(4)
+    index.upsert(["a", "b", "c"], vectors[:3])
+    index.upsert(["a"], vectors[3:])
+    index.delete(["b"])
+    reader = VectorIndex(path, dim=DIM)
+
+    index.compact(ivf_lists=0)
+
+    assert index.dead_fraction() == 0.0
+    assert sorted(reader.present(["a", "b", "c"])) == ["a", "c"]
+    assert _ids(reader.search(vectors[3], top_k=1)) == ["a"]
+
+
+def test_ivf_search_finds_exact_matches_and_new_rows(path):
+    index = VectorIndex(path, dim=DIM)
+    vectors = _unit(400, seed=1)
+    ids = [f"v{i}" for i in range(400)]
+    index.upsert(ids, vectors)
+    index.compact(ivf_lists=8)
+    assert index._ivf is not None
+
+    extra = _unit(1, seed=2)
+    index.upsert(["late"], extra)
+
+    for i in (0, 123, 399):
+        assert _ids(index.search(vectors[i], top_k=1, nprobe=8)) == [ids[i]]
+    # Rows appended after the IVF build are scanned exhaustively
+    assert _ids(index.search(extra[0], top_k=1, nprobe=1)) == ["late"]
+
+    index.delete(["v123"])
+    assert "v123" not in _ids(index.search(vectors[123], top_k=5, nprobe=8))
+
+
+def test_rejects_mismatched_dimension(path):
+    VectorIndex(path, dim=DIM)
+
+    with pytest.raises(ValueError):
+        VectorIndex(path, dim=DIM * 2)
+    with pytest.raises(ValueError):
+        VectorIndex(path, dim=DIM).upsert(["a"], _unit(2))